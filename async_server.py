@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+"""
+Asyncio compute server for the Energy Calculator
+
+An API-only HTTP/1.1 server built on asyncio.start_server. Idle keep-alive
+connections cost one coroutine each, so thousands can stay open cheaply.
+Besides the per-row endpoints of web_api, it accepts bulk requests that
+are computed in one vectorized EnergyCalculator call and streamed back
+with chunked transfer encoding:
+
+    POST /api/bulk/kinetic | /api/bulk/potential | /api/bulk/total
+
+Bulk request bodies are either JSON (a list of row objects, or an object
+of equal-length column lists; a "body" column of names such as "Moon"
+may replace gravity) or, with Content-Type
+application/octet-stream, raw little-endian float64 columns laid out one
+after another in the order named by the X-Columns header.
+
+A precision=float32 query parameter computes in single precision (see
+precision.py); the exact modes are only offered by the per-row endpoints.
+
+JSON responses are {"columns": [...], "rows": [[...], ...], "invalid":
+[[row, message], ...]}. Binary responses are row-major float64 values in
+the order given by the X-Columns response header; invalid rows are NaN
+and their count is sent in an X-Invalid-Rows header.
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import logging
+from typing import Dict, List, Tuple, Union
+from urllib.parse import urlsplit
+
+import bodies
+import precision as precision_modes
+import web_api
+from energy_calculator import EnergyCalculator, _numpy
+
+logger = logging.getLogger(__name__)
+
+PORT = 8001
+BULK_PREFIX = web_api.API_PREFIX + "bulk/"
+BINARY_CONTENT_TYPE = "application/octet-stream"
+MAX_BODY_BYTES = 256 * 1024 * 1024
+MAX_HEADERS = 100
+# Longest accepted request or header line, in bytes
+MAX_LINE_BYTES = 64 * 1024
+KEEP_ALIVE_TIMEOUT = 75.0
+# Time allowed for the headers and body once a request line has arrived
+REQUEST_TIMEOUT = 30.0
+# Rows serialized per chunk of a streamed response
+STREAM_ROWS = 8192
+
+BULK_OUTPUTS = {
+    "kinetic": ("kinetic_energy",),
+    "potential": ("potential_energy",),
+    "total": ("kinetic_energy", "potential_energy", "total_energy"),
+}
+
+REASONS = {100: "Continue", 200: "OK", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 408: "Request Timeout",
+           411: "Length Required", 413: "Payload Too Large",
+           414: "URI Too Long", 415: "Unsupported Media Type",
+           431: "Request Header Fields Too Large", 500: "Internal Server Error"}
+
+
+class HttpRequest:
+    """A parsed HTTP request."""
+
+    def __init__(self, method: str, target: str, version: str,
+                 headers: Dict[str, str], body: bytes):
+        self.method = method
+        self.version = version
+        self.headers = headers
+        self.body = body
+        url = urlsplit(target)
+        self.path = url.path
+        self.query = url.query
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+
+async def _read_line(reader: asyncio.StreamReader, status: int, message: str) -> bytes:
+    """Read one line, turning a line over MAX_LINE_BYTES into an ApiError."""
+    try:
+        return await reader.readline()
+    except ValueError:
+        # StreamReader's limit was hit; the rest of the stream is unusable
+        raise web_api.ApiError(status, message) from None
+
+
+async def read_request(reader: asyncio.StreamReader, timeout: float = KEEP_ALIVE_TIMEOUT,
+                       request_timeout: Union[float, None] = None, writer=None):
+    """
+    Read one request from the stream.
+
+    Args:
+        reader: Stream created with limit=MAX_LINE_BYTES
+        timeout: Seconds to wait for the request line on an idle connection
+        request_timeout: Seconds allowed for the headers and body after it
+            (default: REQUEST_TIMEOUT)
+        writer: The connection's StreamWriter, used to answer
+            "Expect: 100-continue" before the body is read
+
+    Returns:
+        HttpRequest, or None when the client closed the connection
+
+    Raises:
+        web_api.ApiError: For malformed, oversized or too slow requests
+        asyncio.TimeoutError: If the connection stays idle too long
+    """
+    line = await asyncio.wait_for(_read_line(reader, 414, "Request line too long"), timeout)
+    if not line:
+        return None
+    parts = line.decode("latin-1").split()
+    if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+        raise web_api.ApiError(400, "Malformed request line")
+    try:
+        headers, body = await asyncio.wait_for(
+            _read_headers_and_body(reader, writer),
+            REQUEST_TIMEOUT if request_timeout is None else request_timeout)
+    except asyncio.TimeoutError:
+        raise web_api.ApiError(408, "Timed out reading the request") from None
+    return HttpRequest(parts[0].upper(), parts[1], parts[2], headers, body)
+
+
+async def _read_headers_and_body(reader: asyncio.StreamReader, writer=None):
+    headers = {}
+    while True:
+        raw = await _read_line(reader, 431, "Request header too large")
+        if raw in (b"\r\n", b"\n", b""):
+            break
+        if len(headers) >= MAX_HEADERS:
+            raise web_api.ApiError(431, "Too many headers")
+        name, _, value = raw.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise web_api.ApiError(411, "Chunked request bodies are not supported")
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise web_api.ApiError(400, "Invalid Content-Length") from None
+    if length < 0:
+        raise web_api.ApiError(400, "Invalid Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise web_api.ApiError(413, "Request body too large")
+    if length and writer is not None and \
+            headers.get("expect", "").lower() == "100-continue":
+        # Clients such as curl otherwise wait about a second before sending
+        writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+        await writer.drain()
+    body = await reader.readexactly(length) if length else b""
+    return headers, body
+
+
+def _head(status: int, headers: List[Tuple[str, str]], keep_alive: bool) -> bytes:
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}"]
+    lines += [f"{name}: {value}" for name, value in headers]
+    lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+def write_response(writer, status: int, body: bytes, keep_alive: bool,
+                   content_type: str = web_api.JSON_CONTENT_TYPE) -> None:
+    """Queue a complete response with a Content-Length."""
+    writer.write(_head(status, [("Content-Type", content_type),
+                                ("Content-Length", str(len(body)))],
+                       keep_alive) + body)
+
+
+async def write_chunked(writer, status: int, chunks, keep_alive: bool,
+                        content_type: str, headers=()) -> None:
+    """
+    Stream an async iterable of byte strings with chunked transfer
+    encoding, writing each one as soon as it is produced.
+    """
+    writer.write(_head(status, [("Content-Type", content_type),
+                                ("Transfer-Encoding", "chunked"), *headers],
+                       keep_alive))
+    await writer.drain()
+    try:
+        async for data in chunks:
+            if data:
+                writer.write(b"%x\r\n%b\r\n" % (len(data), data))
+                await writer.drain()
+    except Exception:
+        # The status line is gone; the client can only see the failure as
+        # a connection closed before the terminating chunk
+        writer.close()
+        raise
+    writer.write(b"0\r\n\r\n")
+    await writer.drain()
+
+
+def parse_bulk_body(request: HttpRequest, endpoint: str) -> dict:
+    """
+    Decode a bulk request body into float64 column arrays.
+
+    Raises:
+        web_api.ApiError: 400 for malformed bodies or missing columns
+    """
+    np = _numpy()
+    required, optional = web_api.ENDPOINTS[endpoint]
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    columns = {}
+    if content_type == BINARY_CONTENT_TYPE:
+        names = [n.strip() for n in request.headers.get("x-columns", "").split(",") if n.strip()]
+        if not names:
+            raise web_api.ApiError(400, "Binary bulk requests need an X-Columns header")
+        width = 8 * len(names)
+        if len(request.body) % width:
+            raise web_api.ApiError(400, "Body length is not a whole number of rows")
+        rows = len(request.body) // width
+        data = np.frombuffer(request.body, dtype="<f8")
+        for i, name in enumerate(names):
+            columns[name] = data[i * rows:(i + 1) * rows]
+    elif content_type in ("", web_api.JSON_CONTENT_TYPE):
+        data = web_api.parse_json(request.body)
+        try:
+            if isinstance(data, list):
+                names = set(required) | set(optional) | {"body"}
+                columns = {name: [row[name] for row in data]
+                           for name in names if data and name in data[0]}
+            elif isinstance(data, dict):
+                columns = dict(data)
+            else:
+                raise TypeError
+            body_names = columns.pop("body", None)
+            columns = {name: np.asarray(values, dtype=np.float64)
+                       for name, values in columns.items()}
+            if body_names is not None and "gravity" in optional:
+                columns["gravity"] = _body_gravity(body_names)
+        except (AttributeError, KeyError, TypeError, ValueError):
+            raise web_api.ApiError(
+                400, "Bulk JSON must be a list of row objects or an object "
+                     "of numeric column lists") from None
+    else:
+        raise web_api.ApiError(415, f"Unsupported Content-Type: {content_type}")
+
+    for name in required:
+        if name not in columns:
+            raise web_api.ApiError(400, f"Missing column {name!r}")
+    query = web_api.parse_query(request.query)
+    for name, default in optional.items():
+        if name not in columns:
+            columns[name] = np.float64(
+                web_api.parse_number(name, query[name]) if name in query else default)
+    columns = {name: columns[name] for name in list(required) + list(optional)}
+    lengths = {len(a) for a in columns.values() if a.ndim}
+    if len(lengths) > 1 or any(a.ndim > 1 for a in columns.values()):
+        raise web_api.ApiError(400, "Bulk columns must be 1-D and equal length")
+    return columns
+
+
+def _body_gravity(names):
+    """Resolve a JSON column of body names, rejecting unknown names."""
+    if isinstance(names, str):
+        names = [names]
+    gravity, unknown = bodies.gravity_for_names(names)
+    if unknown.any():
+        row = int(unknown.argmax())
+        raise web_api.ApiError(400, f"Unknown body {names[row]!r} in row {row}")
+    return gravity
+
+
+def bulk_precision(request: HttpRequest) -> str:
+    """
+    The float precision mode requested for a bulk computation.
+
+    Raises:
+        web_api.ApiError: 400 for unknown or exact modes
+    """
+    mode = web_api.resolve_precision(web_api.parse_query(request.query))
+    if mode is None:
+        return precision_modes.FLOAT64
+    if precision_modes.is_exact(mode):
+        raise web_api.ApiError(400, "Bulk requests compute in float64 or float32; "
+                                    f"use the per-row endpoints for {mode}")
+    return mode
+
+
+def compute_bulk(endpoint: str, columns: dict, precision: str = "float64"):
+    """
+    Compute a bulk request in one vectorized call per output.
+
+    Returns:
+        (output names, list of result arrays, list of (row, message))
+    """
+    np = _numpy()
+    report = EnergyCalculator.validate_batch(precision, **columns)
+    if endpoint == "kinetic":
+        outputs = [EnergyCalculator.kinetic_energy_batch(
+            columns["mass"], columns["velocity"], on_invalid="ignore",
+            precision=precision)]
+    elif endpoint == "potential":
+        outputs = [EnergyCalculator.potential_energy_batch(
+            columns["mass"], columns["height"], columns["gravity"],
+            on_invalid="ignore", precision=precision)]
+    else:
+        ke = EnergyCalculator.kinetic_energy_batch(
+            columns["mass"], columns["velocity"], on_invalid="ignore",
+            precision=precision)
+        pe = EnergyCalculator.potential_energy_batch(
+            columns["mass"], columns["height"], columns["gravity"],
+            on_invalid="ignore", precision=precision)
+        outputs = [ke, pe, ke + pe]
+    outputs = [np.atleast_1d(out) for out in outputs]
+    errors = []
+    if not report.ok:
+        mask = np.atleast_1d(report.mask)
+        for out in outputs:
+            out[mask] = float("nan")
+        errors = report.errors()
+    return BULK_OUTPUTS[endpoint], outputs, errors
+
+
+def bulk_rows(columns: dict) -> int:
+    """Row count of parsed bulk columns; all-scalar requests are one row."""
+    return max((len(a) for a in columns.values() if a.ndim), default=1)
+
+
+def _render_slice(endpoint: str, columns: dict, start: int, stop: int, binary: bool,
+                  precision: str = "float64"):
+    """
+    Compute and serialize rows [start, stop) of a bulk request.
+
+    Returns:
+        (bytes for the response, list of [row, message] with absolute rows)
+    """
+    np = _numpy()
+    part = {name: a[start:stop] if a.ndim else a for name, a in columns.items()}
+    _, outputs, errors = compute_bulk(endpoint, part, precision)
+    table = np.column_stack(outputs)
+    errors = [[start + row, message] for row, message in errors]
+    if binary:
+        return table.astype("<f8", copy=False).tobytes(), errors
+    rows = table.tolist()
+    if errors:
+        rows = [[None if v != v else v for v in row] for row in rows]
+    text = json.dumps(rows, separators=(",", ":"))[1:-1]
+    return (b"," if start else b"") + text.encode(), errors
+
+
+async def _bulk_chunks(loop, endpoint: str, columns: dict, binary: bool,
+                       precision: str = "float64"):
+    """
+    Response chunks of a bulk request, STREAM_ROWS rows at a time.
+
+    Each slice is computed and serialized in the executor just before it
+    is sent, so clients receive the first rows while later ones are still
+    being computed.
+    """
+    names = BULK_OUTPUTS[endpoint]
+    if not binary:
+        yield b'{"columns":' + json.dumps(list(names)).encode() + b',"rows":['
+    errors = []
+    for start in range(0, bulk_rows(columns), STREAM_ROWS):
+        data, slice_errors = await loop.run_in_executor(
+            None, _render_slice, endpoint, columns, start, start + STREAM_ROWS, binary,
+            precision)
+        errors += slice_errors
+        yield data
+    if not binary:
+        yield b'],"invalid":' + json.dumps(errors, separators=(",", ":")).encode() + b"}"
+
+
+async def handle_bulk(request: HttpRequest, writer) -> None:
+    """Answer a bulk request with a chunked, streamed response."""
+    endpoint = request.path[len(BULK_PREFIX):].strip("/")
+    if endpoint not in BULK_OUTPUTS:
+        raise web_api.ApiError(404, f"Unknown endpoint: {request.path}")
+    if request.method != "POST":
+        raise web_api.ApiError(405, "Bulk endpoints only accept POST")
+    precision = bulk_precision(request)
+    # Decoding and computing are CPU-bound: keep them off the event loop so
+    # other connections are served meanwhile
+    loop = asyncio.get_running_loop()
+    columns = await loop.run_in_executor(None, parse_bulk_body, request, endpoint)
+    accept = request.headers.get("accept", "")
+    binary = BINARY_CONTENT_TYPE in accept or (
+        request.headers.get("content-type", "").startswith(BINARY_CONTENT_TYPE)
+        and web_api.JSON_CONTENT_TYPE not in accept)
+    chunks = _bulk_chunks(loop, endpoint, columns, binary, precision)
+    if binary:
+        # The invalid count goes in a header, ahead of the rows: validation
+        # is one cheap pass, the computation itself is streamed
+        report = await loop.run_in_executor(
+            None, functools.partial(EnergyCalculator.validate_batch, precision, **columns))
+        invalid = 0 if report.ok else len(report.invalid_rows())
+        await write_chunked(writer, 200, chunks, request.keep_alive, BINARY_CONTENT_TYPE,
+                            [("X-Columns", ",".join(BULK_OUTPUTS[endpoint])),
+                             ("X-Invalid-Rows", str(invalid))])
+    else:
+        await write_chunked(writer, 200, chunks, request.keep_alive,
+                            web_api.JSON_CONTENT_TYPE)
+
+
+async def dispatch(request: HttpRequest, writer, cache=None) -> None:
+    """Route a request to the bulk or per-row API."""
+    if request.path.startswith(BULK_PREFIX):
+        await handle_bulk(request, writer)
+        return
+    if not web_api.is_api_path(request.path):
+        raise web_api.ApiError(404, "Only /api/ endpoints are served")
+    if request.method == "GET":
+        params = web_api.parse_query(request.query)
+    elif request.method == "POST":
+        params = web_api.parse_json_body(request.body)
+        params.update(web_api.parse_query(request.query))
+    else:
+        raise web_api.ApiError(405, f"Method {request.method} not allowed")
+    status, body = web_api.handle_request(request.path, params, cache)
+    write_response(writer, status, body, request.keep_alive)
+    await writer.drain()
+
+
+async def handle_connection(reader, writer, cache=None) -> None:
+    """Serve requests on one connection until it closes or idles out."""
+    try:
+        while True:
+            try:
+                request = await read_request(reader, writer=writer)
+            except web_api.ApiError as e:
+                write_response(writer, e.status, web_api.encode({"error": e.message}), False)
+                await writer.drain()
+                return
+            if request is None:
+                return
+            try:
+                await dispatch(request, writer, cache)
+            except web_api.ApiError as e:
+                write_response(writer, e.status, web_api.encode({"error": e.message}),
+                               request.keep_alive)
+                await writer.drain()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                raise
+            except Exception:
+                logger.exception("Error serving %s %s", request.method, request.path)
+                if not writer.is_closing():
+                    write_response(writer, 500, web_api.encode(
+                        {"error": "Internal server error"}), False)
+                    await writer.drain()
+                return
+            if not request.keep_alive:
+                return
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start(host: str = "", port: int = PORT,
+                cache: web_api.ResponseCache = None) -> asyncio.AbstractServer:
+    """Start listening and return the asyncio server."""
+    return await asyncio.start_server(
+        functools.partial(handle_connection, cache=cache), host or None, port,
+        backlog=1024, limit=MAX_LINE_BYTES)
+
+
+async def serve(host: str = "", port: int = PORT,
+                cache: web_api.ResponseCache = None) -> None:
+    """Run the asyncio server forever."""
+    server = await start(host, port, cache)
+    port = server.sockets[0].getsockname()[1]
+    print(f"\n✅ Async API server running at: http://localhost:{port}/api/")
+    print("Press Ctrl+C to stop the server")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Energy Calculator asyncio API server")
+    parser.add_argument("--host", default="", help="Interface to bind (default: all)")
+    parser.add_argument("--port", type=int, default=PORT,
+                        help=f"Port to listen on (default: {PORT})")
+    parser.add_argument("--response-cache-size", type=int, default=web_api.DEFAULT_CACHE_SIZE,
+                        help="API responses kept in the LRU cache; 0 disables it")
+    parser.add_argument("--response-cache-ttl", type=float, default=web_api.DEFAULT_CACHE_TTL,
+                        help="Seconds an API response stays cached")
+    args = parser.parse_args(argv)
+    cache = None
+    if args.response_cache_size > 0:
+        cache = web_api.ResponseCache(args.response_cache_size, args.response_cache_ttl)
+    try:
+        asyncio.run(serve(args.host, args.port, cache))
+    except KeyboardInterrupt:
+        print("\n\n✓ Server stopped successfully")
+
+
+if __name__ == "__main__":
+    main()
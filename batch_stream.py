@@ -0,0 +1,530 @@
+#!/usr/bin/env python3
+"""
+Streaming batch mode for the Energy Calculator
+
+Reads CSV or JSON Lines records in fixed-size chunks, computes kinetic,
+potential and total mechanical energy for each chunk with the vectorized
+EnergyCalculator batch API, and writes results as it goes. Only one chunk
+is held in memory at a time, so arbitrarily large inputs can be piped
+through stdin/stdout.
+"""
+
+import csv
+import functools
+import io
+import json
+import zlib
+from itertools import islice
+from typing import Dict, Iterable, Iterator, Union
+
+import bodies
+import precision as precision_modes
+import units as unit_registry
+from energy_calculator import EnergyCalculator, NEGATIVE_VALUE_MESSAGES, _numpy
+
+# Input roles in the order accepted by --columns
+ROLES = ("mass", "velocity", "height", "gravity")
+# "body" names a column of celestial body names that supplies gravity
+NAMED_ROLES = ROLES + ("body",)
+REQUIRED_ROLES = ("mass", "velocity", "height")
+# A column name ending in this mark is used only when the input has it
+OPTIONAL_MARK = "?"
+RESULT_FIELDS = ("kinetic_energy", "potential_energy", "total_energy", "error")
+DEFAULT_CHUNK_SIZE = 65536
+FORMATS = ("csv", "jsonl")
+# Identifies the computation in result cache keys; change it whenever
+# compute_chunk or the output rendering would give different text
+FORMULA = ("kinetic_energy = 0.5 * mass * velocity**2; "
+           "potential_energy = mass * gravity * height; "
+           "total_energy = kinetic_energy + potential_energy; v1")
+
+
+def parse_column_spec(spec: str) -> Dict[str, str]:
+    """
+    Map calculator inputs to source column names.
+
+    Accepts either positional names in mass,velocity,height[,gravity] order
+    ("m,v,h") or explicit pairs ("mass=m,velocity=v,height=h,body=planet").
+    A gravity or body column name ending in OPTIONAL_MARK ("gravity?") is
+    mapped only if the input has that column.
+
+    Args:
+        spec: Comma-separated column specification
+
+    Returns:
+        Dict mapping input role to source column name
+
+    Raises:
+        ValueError: If the specification is malformed or incomplete
+    """
+    mapping = {}
+    parts = [p.strip() for p in spec.split(",") if p.strip()]
+    if any("=" in p for p in parts):
+        for part in parts:
+            role, sep, name = part.partition("=")
+            role = role.strip()
+            if not sep or role not in NAMED_ROLES:
+                raise ValueError(f"Invalid column mapping: {part!r}")
+            mapping[role] = name.strip()
+    else:
+        if len(parts) > len(ROLES):
+            raise ValueError(f"Too many columns: expected at most {len(ROLES)}")
+        mapping = dict(zip(ROLES, parts))
+    missing = [role for role in REQUIRED_ROLES if role not in mapping]
+    if missing:
+        raise ValueError(f"Missing column(s) for: {', '.join(missing)}")
+    optional = [role for role in REQUIRED_ROLES if split_optional(mapping[role])[1]]
+    if optional:
+        raise ValueError(f"Column(s) cannot be optional: {', '.join(optional)}")
+    if "gravity" in mapping and "body" in mapping:
+        raise ValueError("Map either a gravity or a body column, not both")
+    return mapping
+
+
+def split_optional(name: str):
+    """Split an optional column name: "gravity?" -> ("gravity", True)."""
+    if name.endswith(OPTIONAL_MARK):
+        return name[:-len(OPTIONAL_MARK)], True
+    return name, False
+
+
+def detect_format(path: str, default: str = "csv") -> str:
+    """Guess the record format from a file extension."""
+    if path and path != "-" and path.lower().endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    return default
+
+
+def _resolve_columns(available, mapping: Dict[str, str],
+                     declared: Union[dict, None]) -> Dict[str, str]:
+    """
+    Match mapped names to available columns, which may declare a unit.
+
+    A mapped name "mass" matches a column "mass" or "mass[lb]"; units
+    found this way are stored in declared (role -> unit name). Unmatched
+    roles are left out of the result.
+    """
+    by_base = {}
+    for column in available:
+        by_base.setdefault(unit_registry.split_name(column)[0], column)
+    resolved = {}
+    for role, name in mapping.items():
+        name = split_optional(name)[0]
+        column = name if name in available else by_base.get(name)
+        if column is None:
+            continue
+        resolved[role] = column
+        unit = unit_registry.split_name(column)[1]
+        if unit is not None and declared is not None:
+            declared[role] = unit
+    return resolved
+
+
+def iter_csv_chunks(stream, mapping: Dict[str, str],
+                    chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    declared_units: Union[dict, None] = None) -> Iterator[dict]:
+    """
+    Yield chunks of raw column values from a CSV stream with a header row.
+
+    Args:
+        stream: Text stream positioned at the header
+        mapping: Input role to column name mapping
+        chunk_size: Maximum rows per chunk
+        declared_units: Optional dict that receives the units declared in
+            the header (role -> unit name, from columns like "mass[lb]")
+            before the first chunk is yielded
+
+    Yields:
+        Dict mapping each role to a list of raw string values
+
+    Raises:
+        ValueError: If a mapped column is missing from the header
+    """
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = _resolve_columns(header, mapping, declared_units)
+    indices = {}
+    for role, name in mapping.items():
+        if role not in columns:
+            if split_optional(name)[1]:
+                continue
+            raise ValueError(f"Column {name!r} not found in input header")
+        indices[role] = header.index(columns[role])
+    while True:
+        rows = list(islice(reader, chunk_size))
+        if not rows:
+            return
+        yield {role: [row[i] if i < len(row) else "" for row in rows]
+               for role, i in indices.items()}
+
+
+def iter_jsonl_chunks(stream, mapping: Dict[str, str],
+                      chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      declared_units: Union[dict, None] = None) -> Iterator[dict]:
+    """
+    Yield chunks of raw column values from a JSON Lines stream.
+
+    Blank lines are skipped; missing keys produce empty values, which are
+    reported as errors for their row. Keys with a unit ("mass[lb]") and
+    optional columns are matched against the first record, as for CSV
+    headers.
+
+    Raises:
+        ValueError: If a line is not valid JSON or not a JSON object
+    """
+    lines = ((number, line) for number, line in enumerate(stream, 1) if line.strip())
+    columns = None
+    while True:
+        records = []
+        for number, line in islice(lines, chunk_size):
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"line {number}: {e}") from None
+            if not isinstance(record, dict):
+                raise ValueError(f"line {number}: expected a JSON object")
+            records.append(record)
+        if not records:
+            return
+        if columns is None:
+            columns = {role: name for role, name in mapping.items()
+                       if not split_optional(name)[1]}
+            columns.update(_resolve_columns(records[0], mapping, declared_units))
+        yield {role: [record.get(name, "") for record in records]
+               for role, name in columns.items()}
+
+
+def _to_float_array(np, values: list, precision: str = "float64"):
+    """
+    Convert raw values to the precision mode, returning (array, unparsable mask).
+
+    The whole column is converted in one call; only when that fails is it
+    re-parsed value by value to locate the bad entries. In the exact modes
+    the raw text is parsed as written.
+    """
+    if precision_modes.is_exact(precision):
+        out = np.empty(len(values), dtype=object)
+        bad = None
+        for i, value in enumerate(values):
+            try:
+                out[i] = precision_modes.convert(value, precision)
+            except ValueError:
+                # A placeholder that passes validation; the row is reported
+                out[i] = precision_modes.convert(0, precision)
+                if bad is None:
+                    bad = np.zeros(len(values), dtype=bool)
+                bad[i] = True
+        return out, bad
+    dtype = precision_modes.dtype(np, precision)
+    try:
+        return np.asarray(values, dtype=dtype), None
+    except (TypeError, ValueError):
+        out = np.empty(len(values), dtype=dtype)
+        bad = np.zeros(len(values), dtype=bool)
+        for i, value in enumerate(values):
+            try:
+                out[i] = float(value)
+            except (TypeError, ValueError):
+                out[i] = float("nan")
+                bad[i] = True
+        return out, bad
+
+
+def compute_chunk(raw: dict, gravity: float = EnergyCalculator.GRAVITY,
+                  precision: str = "float64",
+                  units: Union[Dict[str, "unit_registry.Unit"], None] = None) -> dict:
+    """
+    Compute energies for one chunk of raw column values.
+
+    Args:
+        raw: Dict mapping input roles to lists of raw values
+        gravity: Gravitational acceleration used when no gravity column
+            is mapped
+        precision: Precision mode of the inputs and results (see
+            precision.py)
+        units: Optional role -> Unit for non-SI input columns and
+            results; inputs are converted to SI in place, so the returned
+            input arrays hold SI values
+
+    Returns:
+        Dict with the parsed input arrays, the three energy arrays and an
+        "error" list holding a message (or "") per row
+    """
+    np = _numpy()
+    columns = {}
+    unparsable = {}
+    unknown_body = None
+    for role, values in raw.items():
+        if role == "body":
+            gravities, unknown_body = bodies.gravity_for_names(values)
+            # A placeholder the exact modes can convert; the row is reported
+            gravities[unknown_body] = EnergyCalculator.GRAVITY
+            columns["gravity"] = precision_modes.convert_array(np, gravities, precision)
+            continue
+        columns[role], bad = _to_float_array(np, values, precision)
+        if bad is not None:
+            unparsable[role] = bad
+    units = units or {}
+    for role, unit in units.items():
+        # Body gravities are already SI
+        if role in raw and role in columns:
+            columns[role] = unit_registry.to_si(np, columns[role], unit,
+                                                out=columns[role], mode=precision)
+    if "gravity" not in columns:
+        columns["gravity"] = precision_modes.convert_array(np, gravity, precision)
+
+    report = EnergyCalculator.validate_batch(precision, **columns)
+    ke = EnergyCalculator.kinetic_energy_batch(
+        columns["mass"], columns["velocity"], on_invalid="ignore",
+        precision=precision)
+    pe = EnergyCalculator.potential_energy_batch(
+        columns["mass"], columns["height"], columns["gravity"],
+        on_invalid="ignore", precision=precision)
+    with precision_modes.context(precision):
+        total = ke + pe
+    results = {"kinetic_energy": ke, "potential_energy": pe, "total_energy": total}
+    for role in unit_registry.ENERGY_ROLES:
+        if role in units:
+            unit_registry.from_si(np, results[role], units[role],
+                                  out=results[role], mode=precision)
+
+    rows = len(ke)
+    errors = [""] * rows
+    bad = report.mask if not report.ok else np.zeros(rows, dtype=bool)
+    for role, mask in unparsable.items():
+        bad = bad | mask
+    if unknown_body is not None:
+        bad = bad | unknown_body
+    if bad.any():
+        for row in np.flatnonzero(bad).tolist():
+            messages = [f"{role.capitalize()} is not a number"
+                        for role, mask in unparsable.items() if mask[row]]
+            if unknown_body is not None and unknown_body[row]:
+                messages.append(f"Unknown body {raw['body'][row]!r}")
+            messages += [NEGATIVE_VALUE_MESSAGES[role]
+                         for role, mask in report.failures.items() if mask[row]]
+            errors[row] = "; ".join(messages)
+        ke[bad] = pe[bad] = total[bad] = float("nan")
+        for role, mask in unparsable.items():
+            # The exact modes parsed a placeholder; report the input as NaN
+            columns[role][mask] = float("nan")
+        if unknown_body is not None:
+            columns["gravity"][unknown_body] = float("nan")
+
+    columns["gravity"] = np.broadcast_to(columns["gravity"], (rows,))
+    return {**columns, "kinetic_energy": ke, "potential_energy": pe,
+            "total_energy": total, "error": errors}
+
+
+def _column_values(values) -> list:
+    if values.dtype.itemsize == 4 and values.dtype.kind == "f":
+        # Shortest float32 spelling (0.1, not 0.10000000149011612)
+        return [float(text) for text in values.astype(str).tolist()]
+    return values.tolist()
+
+
+def _output_rows(result: dict, fields):
+    values = [_column_values(result[f]) if f != "error" else result[f]
+              for f in fields]
+    return zip(*values)
+
+
+def csv_header(labels) -> str:
+    """The CSV header line for the given column labels."""
+    out = io.StringIO()
+    csv.writer(out, lineterminator="\n").writerow(labels)
+    return out.getvalue()
+
+
+def render_csv(result: dict, fields=ROLES + RESULT_FIELDS) -> str:
+    """The CSV rows (no header) of one computed chunk."""
+    out = io.StringIO()
+    csv.writer(out, lineterminator="\n").writerows(_output_rows(result, fields))
+    return out.getvalue()
+
+
+def write_csv(stream, results: Iterable[dict], fields=ROLES + RESULT_FIELDS,
+              labels=None) -> None:
+    """Write computed chunks as CSV with a single header row (labels, default fields)."""
+    writer = csv.writer(stream, lineterminator="\n")
+    writer.writerow(labels or fields)
+    for result in results:
+        writer.writerows(_output_rows(result, fields))
+        stream.flush()
+
+
+def _json_value(value):
+    # NaN is not valid JSON; invalid rows are written as null instead, and
+    # exact results as strings
+    return precision_modes.to_json(value)
+
+
+def render_jsonl(result: dict, fields=ROLES + RESULT_FIELDS, labels=None) -> str:
+    """The JSON Lines of one computed chunk, keyed by labels (default fields)."""
+    keys = labels or fields
+    return "".join(json.dumps({f: _json_value(v) for f, v in zip(keys, row)}) + "\n"
+                   for row in _output_rows(result, fields))
+
+
+def write_jsonl(stream, results: Iterable[dict], fields=ROLES + RESULT_FIELDS,
+                labels=None) -> None:
+    """Write computed chunks as JSON Lines, one object per input row."""
+    keys = labels or fields
+    for result in results:
+        stream.writelines(
+            json.dumps({f: _json_value(v) for f, v in zip(keys, row)}) + "\n"
+            for row in _output_rows(result, fields)
+        )
+        stream.flush()
+
+
+def content_defined_chunks(chunks: Iterable[dict], chunk_size: int) -> Iterator[dict]:
+    """
+    Re-cut chunks of raw column values at boundaries chosen by row content.
+
+    A row ends a chunk when the low bits of the CRC-32 of its values are
+    all set, once the chunk holds at least chunk_size // 4 rows; no chunk
+    grows past chunk_size. Inserting or deleting a row therefore only
+    changes the chunk around it, where fixed-size chunks would shift every
+    chunk after it, so result cache keys of the rest of the input still
+    match. Chunks average about half of chunk_size.
+    """
+    low = max(chunk_size // 4, 1)
+    mask = (1 << max((chunk_size // 2).bit_length() - 1, 0)) - 1
+    pending, checked = None, 0
+    for raw in chunks:
+        if pending is not None:
+            raw = {role: pending[role] + values for role, values in raw.items()}
+        roles = sorted(raw)
+        start = 0
+        # Rows carried over were already found not to end a chunk
+        rows = islice(zip(*(raw[role] for role in roles)), checked, None)
+        for end, row in enumerate(rows, checked + 1):
+            size = end - start
+            if size >= chunk_size or (size >= low and zlib.crc32(
+                    "\x1f".join(map(str, row)).encode()) & mask == mask):
+                yield {role: values[start:end] for role, values in raw.items()}
+                start = end
+        pending = {role: values[start:] for role, values in raw.items()}
+        checked = len(next(iter(pending.values()), ()))
+    if checked:
+        yield pending
+
+
+def _cached_chunks(reader, in_stream, mapping, chunk_size, explicit, context_for,
+                   render, cache, gravity, precision, stats) -> Iterator[str]:
+    """Rendered output chunks, taken from the cache or computed and stored."""
+    from result_cache import chunk_key
+    
+    declared = {}
+    resolved = None
+    chunks = reader(in_stream, mapping, chunk_size, declared)
+    for raw in content_defined_chunks(chunks, chunk_size):
+        if resolved is None:
+            resolved = unit_registry.merge(
+                {role: unit_registry.for_role(role, unit)
+                 for role, unit in declared.items()}, explicit)
+            context = context_for(resolved)
+        key = chunk_key(context, raw)
+        entry = cache.get(key)
+        if entry is None:
+            result = compute_chunk(raw, gravity, precision, resolved)
+            data = render(result).encode("utf-8")
+            rows, invalid = len(result["error"]), sum(1 for e in result["error"] if e)
+            cache.put(key, data, rows, invalid)
+        else:
+            data, rows, invalid = entry.data, entry.rows, entry.invalid
+            stats["cached_rows"] += rows
+        stats["rows"] += rows
+        stats["invalid"] += invalid
+        yield data.decode("utf-8")
+
+
+def run_batch(in_stream, out_stream, mapping: Dict[str, str],
+              in_format: str = "csv", out_format: str = "csv",
+              chunk_size: int = DEFAULT_CHUNK_SIZE,
+              gravity: float = EnergyCalculator.GRAVITY,
+              precision: str = "float64",
+              units: Union[Dict[str, Union[str, "unit_registry.Unit"]], None] = None,
+              cache=None) -> dict:
+    """
+    Stream records from in_stream to out_stream through the batch API.
+
+    Args:
+        in_stream: Text stream with CSV (header required) or JSONL records
+        out_stream: Text stream receiving the results
+        mapping: Input role to source column name mapping
+        in_format: "csv" or "jsonl"
+        out_format: "csv" or "jsonl"
+        chunk_size: Rows per chunk; peak memory is proportional to this
+        gravity: Default gravitational acceleration in m/s²
+        precision: Precision mode for the calculation (see precision.py)
+        units: Optional role -> unit for input columns and results (e.g.
+            {"mass": "lb", "total_energy": "kJ"}); input columns may also
+            declare their unit in their name ("mass[lb]"). Inputs are
+            echoed in SI units; converted results are labelled with their
+            unit ("total_energy[kJ]")
+        cache: Optional result_cache.ResultCache. Each chunk's output is
+            looked up by the content of its input columns together with
+            FORMULA, the precision, units, gravity and output format, and
+            computed and stored only when missing. Cached runs cut chunks
+            at content-defined boundaries (see content_defined_chunks), so
+            inserted or deleted rows leave the other chunks' keys intact
+
+    Returns:
+        Dict with "rows" and "invalid" counts, plus "cached_rows" (rows
+        whose output came from the cache) when a cache is given
+    """
+    if in_format not in FORMATS or out_format not in FORMATS:
+        raise ValueError(f"Format must be one of: {', '.join(FORMATS)}")
+    if chunk_size <= 0:
+        raise ValueError("Chunk size must be positive")
+    precision_modes.check(precision)
+
+    explicit = {role: unit_registry.for_role(role, unit)
+                for role, unit in (units or {}).items()}
+    reader = iter_csv_chunks if in_format == "csv" else iter_jsonl_chunks
+    writer = write_csv if out_format == "csv" else write_jsonl
+    labels = list(ROLES) + [f"{field}[{explicit[field].name}]"
+                            if field in explicit and not explicit[field].is_si else field
+                            for field in RESULT_FIELDS]
+    stats = {"rows": 0, "invalid": 0}
+    if cache is not None:
+        from result_cache import context_key
+        
+        stats["cached_rows"] = 0
+        if out_format == "csv":
+            render = render_csv
+            out_stream.write(csv_header(labels))
+        else:
+            render = functools.partial(render_jsonl, labels=labels)
+
+        def context_for(resolved):
+            return context_key(
+                formula=FORMULA, precision=precision, gravity=repr(gravity),
+                units={role: unit.name for role, unit in resolved.items()},
+                out_format=out_format, fields=labels)
+
+        for text in _cached_chunks(reader, in_stream, mapping, chunk_size, explicit,
+                                   context_for, render, cache, gravity, precision, stats):
+            out_stream.write(text)
+            out_stream.flush()
+        return stats
+
+    def computed():
+        declared = {}
+        resolved = None
+        for raw in reader(in_stream, mapping, chunk_size, declared):
+            if resolved is None:
+                resolved = unit_registry.merge(
+                    {role: unit_registry.for_role(role, unit)
+                     for role, unit in declared.items()}, explicit)
+            result = compute_chunk(raw, gravity, precision, resolved)
+            stats["rows"] += len(result["error"])
+            stats["invalid"] += sum(1 for e in result["error"] if e)
+            yield result
+
+    writer(out_stream, computed(), labels=labels)
+    return stats
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Column-oriented result tables for browsing batch files
+
+A BatchTable holds one array per field instead of one object per row, so a
+table of millions of rows costs a few flat arrays (memory-mapped for binary
+column files). Viewers ask for a window of rows and only that window is
+formatted into strings. Errors are kept sparsely: sorted row numbers with
+their messages for CSV input, or the uint8 flag column for binary columns.
+"""
+
+import csv
+import io
+import os
+import tempfile
+from typing import Callable, Dict, List, Union
+
+import batch_stream
+import bodies
+import columnar
+import units as unit_registry
+from energy_calculator import EnergyCalculator, NEGATIVE_VALUE_MESSAGES, _numpy
+
+FIELDS = ("mass", "velocity", "height", "gravity",
+          "kinetic_energy", "potential_energy", "total_energy")
+FLAG_MESSAGES = {**NEGATIVE_VALUE_MESSAGES, "body": "Unknown body"}
+
+
+def auto_mapping(names) -> Dict[str, str]:
+    """
+    Map input roles to identically named columns.
+
+    A column may declare its unit in its name: "mass[lb]" maps to mass.
+
+    Raises:
+        ValueError: If a required role has no column of that name
+    """
+    by_base = {}
+    for name in names:
+        by_base.setdefault(unit_registry.split_name(name)[0], name)
+    mapping = {role: by_base[role] for role in batch_stream.NAMED_ROLES if role in by_base}
+    missing = [role for role in batch_stream.REQUIRED_ROLES if role not in mapping]
+    if missing:
+        raise ValueError(f"No column named: {', '.join(missing)}")
+    if "gravity" in mapping and "body" in mapping:
+        del mapping["body"]
+    return mapping
+
+
+class BatchTable:
+    """Computed batch results stored as columns, with sparse row errors."""
+
+    def __init__(self, columns: dict, error_rows=None, error_messages=(),
+                 flags=None, source: str = "", tempdir=None):
+        np = _numpy()
+        self.columns = columns
+        self.rows = len(columns["mass"])
+        self.error_rows = (np.asarray(error_rows, dtype=np.int64)
+                           if error_rows is not None else np.empty(0, dtype=np.int64))
+        self.error_messages = list(error_messages)
+        self.flags = flags
+        self.source = source
+        self._tempdir = tempdir
+
+    @property
+    def invalid(self) -> int:
+        """Number of rows that failed validation."""
+        if self.flags is not None:
+            return int(_numpy().count_nonzero(self.flags))
+        return len(self.error_rows)
+
+    def errors_between(self, start: int, stop: int) -> Dict[int, str]:
+        """Error messages of the invalid rows in [start, stop)."""
+        np = _numpy()
+        if self.flags is not None:
+            flags = self.flags[start:stop]
+            return {start + i: "; ".join(message for role, message in FLAG_MESSAGES.items()
+                                         if flags[i] & columnar.INVALID_FLAGS[role])
+                    for i in np.flatnonzero(flags).tolist()}
+        lo, hi = np.searchsorted(self.error_rows, (start, stop))
+        return dict(zip(self.error_rows[lo:hi].tolist(), self.error_messages[lo:hi]))
+
+    def window(self, start: int, stop: int) -> List[tuple]:
+        """
+        Format rows [start, stop) for display.
+
+        Returns:
+            One tuple per row: row number, the FIELDS values and the error
+        """
+        start, stop = max(start, 0), min(stop, self.rows)
+        if start >= stop:
+            return []
+        values = [self.columns[field][start:stop].tolist() for field in FIELDS]
+        errors = self.errors_between(start, stop)
+        return [(row + 1, *(_format(v) for v in row_values), errors.get(row, ""))
+                for row, row_values in zip(range(start, stop), zip(*values))]
+
+    def close(self) -> None:
+        """Release memory maps and delete temporary result files."""
+        np = _numpy()
+        self.columns = {field: np.empty(0) for field in self.columns}
+        self.flags = None
+        if self._tempdir is not None:
+            self._tempdir.cleanup()
+            self._tempdir = None
+
+
+def _format(value: float) -> str:
+    return "" if value != value else f"{value:.6g}"
+
+
+def load_csv(path: str, mapping: Union[Dict[str, str], None] = None,
+             gravity: float = EnergyCalculator.GRAVITY,
+             chunk_size: int = batch_stream.DEFAULT_CHUNK_SIZE,
+             progress: Union[Callable[[int, int], None], None] = None) -> BatchTable:
+    """
+    Compute every row of a CSV file into a BatchTable.
+
+    Units declared in the header ("mass[lb]") are converted, so the table
+    holds SI inputs and results in Joules.
+
+    Args:
+        path: CSV file with a header row
+        mapping: Role to column mapping (default: columns named after roles)
+        gravity: Gravity when no gravity or body column is mapped
+        chunk_size: Rows per chunk
+        progress: Optional callable(bytes_read, file_size) called per chunk;
+            an exception raised from it aborts the load
+    """
+    np = _numpy()
+    size = os.path.getsize(path)
+    if mapping is None:
+        with open(path, newline="", encoding="utf-8") as f:
+            mapping = auto_mapping(next(csv.reader(f), []))
+    with open(path, "rb") as raw:
+        # Progress is read from the binary file position under the text layer
+        stream = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        parts = {field: [] for field in FIELDS}
+        error_rows, error_messages = [], []
+        row = 0
+        declared, resolved = {}, None
+        for chunk in batch_stream.iter_csv_chunks(stream, mapping, chunk_size, declared):
+            if resolved is None:
+                resolved = unit_registry.merge(
+                    {role: unit_registry.for_role(role, unit)
+                     for role, unit in declared.items()}, {})
+            result = batch_stream.compute_chunk(chunk, gravity, units=resolved)
+            for field in FIELDS:
+                parts[field].append(np.ascontiguousarray(result[field]))
+            for i, message in enumerate(result["error"]):
+                if message:
+                    error_rows.append(row + i)
+                    error_messages.append(message)
+            row += len(result["error"])
+            if progress is not None:
+                progress(raw.tell(), size)
+    columns = {field: np.concatenate(chunks) if chunks else np.empty(0)
+               for field, chunks in parts.items()}
+    return BatchTable(columns, error_rows, error_messages, source=path)
+
+
+def load_columns(path: str, mapping: Union[Dict[str, str], None] = None,
+                 gravity: float = EnergyCalculator.GRAVITY,
+                 chunk_size: int = 1 << 20,
+                 progress: Union[Callable[[int, int], None], None] = None) -> BatchTable:
+    """
+    Compute a binary column set into a BatchTable backed by memory maps.
+
+    Results are written to a temporary column set that lives as long as
+    the table; inputs are mapped straight from the source files, except
+    those with a unit declared in the manifest, which are converted to SI
+    into the temporary column set as well.
+    """
+    np = _numpy()
+    source = columnar.ColumnSet.open(path)
+    if mapping is None:
+        mapping = auto_mapping(source.columns)
+    tempdir = tempfile.TemporaryDirectory(prefix="energy-table-")
+    try:
+        out_path = os.path.join(tempdir.name, "results.manifest.json")
+        columnar.run_columnar(path, out_path, mapping, chunk_size=chunk_size,
+                              gravity=gravity, progress=progress)
+        results = columnar.ColumnSet.open(out_path)
+        converted = _si_inputs(source, mapping, os.path.join(tempdir.name, "inputs"),
+                               chunk_size)
+    except BaseException:
+        tempdir.cleanup()
+        raise
+    columns = {role: source[mapping[role]] for role in ("mass", "velocity", "height")}
+    if "gravity" in mapping:
+        columns["gravity"] = source[mapping["gravity"]]
+    elif "body" in mapping:
+        codes = columnar.body_codes(source, mapping["body"], source[mapping["body"]])
+        columns["gravity"] = bodies.gravity_for_codes(codes)
+    else:
+        columns["gravity"] = np.broadcast_to(np.float64(gravity), (source.rows,))
+    columns.update(converted)
+    for field in columnar.RESULT_COLUMNS:
+        columns[field] = results[field]
+    return BatchTable(columns, flags=results["invalid"], source=path, tempdir=tempdir)
+
+
+def _si_inputs(source: columnar.ColumnSet, mapping: Dict[str, str], stem: str,
+               chunk_size: int) -> dict:
+    """Convert the input columns declared in a non-SI unit into a new column set."""
+    np = _numpy()
+    units = unit_registry.merge(
+        {role: unit_registry.for_role(role, source.units[name])
+         for role, name in mapping.items()
+         if role in FIELDS and name in source.units}, {})
+    if not units:
+        return {}
+    target = columnar.ColumnSet.create(stem + ".manifest.json", source.rows, units)
+    for start in range(0, source.rows, chunk_size):
+        stop = min(start + chunk_size, source.rows)
+        for role, unit in units.items():
+            unit_registry.to_si(np, source[mapping[role]][start:stop], unit,
+                                out=target[role][start:stop])
+    target.flush()
+    return {role: target[role] for role in units}
+
+
+def export(table: BatchTable, path: str, chunk_size: int = 1 << 16,
+           progress: Union[Callable[[int, int], None], None] = None) -> None:
+    """
+    Write a table to CSV, JSON Lines or a .manifest.json column set.
+
+    Args:
+        table: Table to export
+        path: Output path; the format follows the extension
+        chunk_size: Rows written per chunk
+        progress: Optional callable(done_rows, total_rows) called per chunk
+    """
+    np = _numpy()
+    if columnar.is_manifest(path):
+        target = columnar.ColumnSet.create(path, table.rows, FIELDS)
+        for start in range(0, table.rows, chunk_size):
+            stop = min(start + chunk_size, table.rows)
+            for field in FIELDS:
+                target[field][start:stop] = table.columns[field][start:stop]
+            if progress is not None:
+                progress(stop, table.rows)
+        target.flush()
+        return
+
+    def chunks():
+        for start in range(0, table.rows, chunk_size):
+            stop = min(start + chunk_size, table.rows)
+            result = {field: np.asarray(table.columns[field][start:stop])
+                      for field in FIELDS}
+            errors = [""] * (stop - start)
+            for row, message in table.errors_between(start, stop).items():
+                errors[row - start] = message
+            result["error"] = errors
+            yield result
+            if progress is not None:
+                progress(stop, table.rows)
+
+    writer = (batch_stream.write_jsonl if batch_stream.detect_format(path) == "jsonl"
+              else batch_stream.write_csv)
+    with open(path, "w", newline="", encoding="utf-8") as out:
+        writer(out, chunks(), FIELDS + ("error",))
@@ -0,0 +1,12 @@
+"""
+Performance benchmarks for the Energy Calculator
+
+Run from the repository root:
+
+    python -m benchmarks run --out results.json
+    python -m benchmarks compare baseline.json results.json --threshold 0.10
+
+harness.py holds the timing, result files and comparison logic, cases.py
+the benchmarks themselves (scalar calls, batch paths, the CLI streaming
+mode and the web servers).
+"""
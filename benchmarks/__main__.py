@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Command-line entry point: python -m benchmarks {run,compare,list}
+
+    run      Run the suite, print a table and optionally save JSON results
+    compare  Compare two result files; exits 1 if anything regressed
+    list     Print the benchmark names that run would execute
+"""
+
+import argparse
+import fnmatch
+import sys
+
+from benchmarks import cases, harness
+
+QUICK = {"repeat": 3, "min_time": 0.05, "max_rows": 10 ** 5,
+         "cli_rows": 10_000, "web_requests": 20}
+
+
+def _rows(value: str) -> int:
+    """Parse a row count such as 100000 or 1e8."""
+    try:
+        rows = int(float(value))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid row count: {value!r}") from None
+    if rows < 1:
+        raise argparse.ArgumentTypeError("row count must be positive")
+    return rows
+
+
+def _selected(args):
+    if args.quick:
+        for name, value in QUICK.items():
+            if getattr(args, name, 0) is None:
+                setattr(args, name, value)
+    groups = args.only.split(",") if args.only else cases.GROUPS
+    selected = cases.build(groups,
+                           max_rows=args.max_rows or cases.DEFAULT_MAX_ROWS,
+                           cli_rows=args.cli_rows or cases.CLI_ROWS,
+                           web_requests=args.web_requests or cases.WEB_REQUESTS)
+    if args.filter:
+        selected = [b for b in selected if fnmatch.fnmatchcase(b.name, args.filter)]
+    return selected
+
+
+def run_command(args) -> int:
+    """Run the suite and report or save the results."""
+    try:
+        selected = _selected(args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    if not selected:
+        print("Error: no benchmarks selected", file=sys.stderr)
+        return 2
+
+    def progress(result):
+        print(f"{result['name']}: {harness.format_time(result['median_ns'])}",
+              file=sys.stderr)
+
+    document = harness.run_suite(selected,
+                                 repeat=args.repeat or harness.DEFAULT_REPEAT,
+                                 min_time=args.min_time or harness.DEFAULT_MIN_TIME,
+                                 progress=progress)
+    print(harness.format_results(document))
+    if args.out:
+        harness.write_results(document, args.out)
+    if args.pyperf:
+        harness.write_pyperf(document, args.pyperf)
+    return 0
+
+
+def compare_command(args) -> int:
+    """Compare two result files and exit non-zero on regressions."""
+    try:
+        baseline = harness.load_results(args.baseline)
+        current = harness.load_results(args.current)
+        comparisons = harness.compare(baseline, current, args.threshold, args.statistic)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    for key, (old, new) in harness.environment_differences(baseline, current).items():
+        print(f"Warning: {key} differs: {old} -> {new}", file=sys.stderr)
+    print(harness.format_comparison(comparisons))
+    regressions = [c for c in comparisons if c.status == "regression"]
+    missing = [c for c in comparisons if c.status == "missing"]
+    print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%} "
+          f"({args.statistic}), {len(missing)} missing")
+    return 1 if regressions or (missing and args.fail_on_missing) else 0
+
+
+def list_command(args) -> int:
+    """Print the selected benchmark names."""
+    try:
+        selected = _selected(args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    for benchmark in selected:
+        print(benchmark.name)
+    return 0
+
+
+def _add_selection(parser) -> None:
+    parser.add_argument("--only", metavar="GROUPS",
+                        help=f"Comma-separated groups to run ({','.join(cases.GROUPS)})")
+    parser.add_argument("--filter", metavar="PATTERN",
+                        help="Only benchmarks whose name matches this glob pattern")
+    parser.add_argument("--quick", action="store_true",
+                        help="Small sizes and short timings, for smoke runs")
+    parser.add_argument("--max-rows", type=_rows,
+                        help=f"Largest batch size (default: {cases.DEFAULT_MAX_ROWS:.0e}; "
+                             "1e8 needs about 3 GB of memory)")
+    parser.add_argument("--cli-rows", type=_rows,
+                        help=f"Rows in the CLI input files (default: {cases.CLI_ROWS})")
+    parser.add_argument("--web-requests", type=_rows,
+                        help=f"Requests per timed call (default: {cases.WEB_REQUESTS})")
+
+
+def build_parser():
+    """Build the command-line argument parser."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Energy Calculator benchmark suite")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run = subparsers.add_parser("run", help="Run the benchmarks")
+    _add_selection(run)
+    run.add_argument("--repeat", type=int,
+                     help=f"Timed repeats per benchmark (default: {harness.DEFAULT_REPEAT})")
+    run.add_argument("--min-time", type=float,
+                     help="Minimum seconds per repeat "
+                          f"(default: {harness.DEFAULT_MIN_TIME})")
+    run.add_argument("--out", help="Write JSON results with environment metadata here")
+    run.add_argument("--pyperf", metavar="FILE",
+                     help="Also write the results in pyperf's JSON format")
+    run.set_defaults(handler=run_command)
+
+    compare = subparsers.add_parser(
+        "compare", help="Compare results against a baseline; exit 1 on regressions")
+    compare.add_argument("baseline", help="Saved baseline result file")
+    compare.add_argument("current", help="New result file")
+    compare.add_argument("--threshold", type=float, default=harness.DEFAULT_THRESHOLD,
+                         help="Relative slowdown counted as a regression "
+                              f"(default: {harness.DEFAULT_THRESHOLD})")
+    compare.add_argument("--statistic", choices=harness.STATISTICS, default="median",
+                         help="Per-call time statistic to compare (default: median)")
+    compare.add_argument("--fail-on-missing", action="store_true",
+                         help="Also fail when a baseline benchmark was not run")
+    compare.set_defaults(handler=compare_command)
+
+    listing = subparsers.add_parser("list", help="List the benchmarks run would execute")
+    _add_selection(listing)
+    listing.set_defaults(handler=list_command)
+    return parser
+
+
+def main(argv=None) -> int:
+    """Main entry point."""
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+The benchmarks of the suite
+
+Groups:
+    scalar  One EnergyCalculator call per iteration
+    batch   kinetic/potential/total batch calls at 1e3, 1e4, ... rows up to
+            a configurable maximum (1e8 rows of float64 inputs take about
+            3 GB of memory)
+    cli     ``energy_calculator.py batch`` streaming a CSV or JSON Lines
+            file to a file, in process
+    web     GET /api/total over one keep-alive connection against the
+            threaded server (launch_web) and the asyncio server
+            (async_server), with repeated (cache hit) and distinct URLs
+    precision
+            total_mechanical_energy_batch in each precision mode; the
+            float modes at PRECISION_ROWS rows, the exact modes at
+            EXACT_ROWS. Each result records in its params the largest
+            relative error against exact rational arithmetic, so a run
+            documents both sides of the speed/accuracy trade-off
+    inverse the batch inverse solvers (velocity from KE, height from PE,
+            drop height, velocity and mass for a target total) at the
+            largest batch size, to compare with the forward batch cases
+    table   EnergyTable at TABLE_ROWS rows: reading the total after
+            every input changed, after a new gravity (KE reused), and
+            after editing a contiguous 1% of the velocities (one chunk
+            of KE recomputed)
+    daemon  the compute daemon over one open Unix socket connection:
+            DAEMON_CALLS scalar round trips, and a DAEMON_ROWS-row batch
+            request (sent, computed and returned)
+
+Batch, CLI, precision, inverse and table cases, and the daemon batch case,
+need NumPy and are left out without it.
+"""
+
+import asyncio
+import contextlib
+import http.client
+import io
+import itertools
+import os
+import tempfile
+import threading
+from typing import List
+
+from benchmarks.harness import Benchmark
+from energy_calculator import EnergyCalculator
+
+GROUPS = ("scalar", "batch", "cli", "web", "precision", "inverse", "table", "daemon")
+DEFAULT_MAX_ROWS = 10 ** 7
+CLI_ROWS = 100_000
+WEB_REQUESTS = 100
+PRECISION_ROWS = 100_000
+EXACT_ROWS = 1_000
+# Rows compared against the exact reference for the error figure
+ACCURACY_SAMPLE = 1_000
+TABLE_ROWS = 1_000_000
+DAEMON_CALLS = 1_000
+DAEMON_ROWS = 100_000
+
+
+def _have_numpy() -> bool:
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def rows_label(rows: int) -> str:
+    """Short label for a row count: 1e3, 1e6, or the plain number."""
+    exponent = len(str(rows)) - 1
+    return f"1e{exponent}" if rows == 10 ** exponent else str(rows)
+
+
+def _scalar(func, *args):
+    @contextlib.contextmanager
+    def setup():
+        yield lambda: func(*args)
+    return setup
+
+
+def _batch(function: str, rows: int):
+    @contextlib.contextmanager
+    def setup():
+        import numpy as np
+        rng = np.random.default_rng(rows)
+        mass = rng.uniform(0.1, 100.0, rows)
+        velocity = rng.uniform(0.0, 50.0, rows)
+        height = rng.uniform(0.0, 1000.0, rows)
+        calls = {
+            "kinetic_energy": lambda: EnergyCalculator.kinetic_energy_batch(mass, velocity),
+            "potential_energy": lambda: EnergyCalculator.potential_energy_batch(mass, height),
+            "total_mechanical_energy": lambda: EnergyCalculator.total_mechanical_energy_batch(
+                mass, velocity, height),
+        }
+        yield calls[function]
+    return setup
+
+
+def max_relative_error(results, mass, velocity, height) -> float:
+    """Largest relative error of results against exact Fraction arithmetic."""
+    from fractions import Fraction
+    exact = EnergyCalculator.total_mechanical_energy_batch(
+        mass, velocity, height, precision="fraction")
+    worst = Fraction(0)
+    for value, reference in zip(results.tolist(), exact.tolist()):
+        if reference:
+            worst = max(worst, abs(Fraction(value) - reference) / reference)
+    return float(worst)
+
+
+def _precision(mode: str, rows: int, params: dict):
+    @contextlib.contextmanager
+    def setup():
+        import numpy as np
+        rng = np.random.default_rng(rows)
+        mass = rng.uniform(0.1, 100.0, rows)
+        velocity = rng.uniform(0.0, 50.0, rows)
+        height = rng.uniform(0.0, 1000.0, rows)
+        if mode == "float32":
+            # Single precision pays off for data stored as float32; casting
+            # float64 inputs on every call would cost more than it saves
+            mass, velocity, height = (a.astype(np.float32) for a in (mass, velocity, height))
+
+        def run():
+            return EnergyCalculator.total_mechanical_energy_batch(
+                mass, velocity, height, precision=mode)
+
+        n = min(rows, ACCURACY_SAMPLE)
+        params["max_rel_error"] = max_relative_error(
+            run()[:n], mass[:n], velocity[:n], height[:n])
+        yield run
+    return setup
+
+
+def _inverse(function: str, rows: int):
+    @contextlib.contextmanager
+    def setup():
+        import numpy as np
+        rng = np.random.default_rng(rows)
+        mass = rng.uniform(0.1, 100.0, rows)
+        velocity = rng.uniform(0.0, 50.0, rows)
+        height = rng.uniform(0.0, 1000.0, rows)
+        energy = EnergyCalculator.total_mechanical_energy_batch(mass, velocity, height)
+        calls = {
+            "velocity_from_kinetic_energy": lambda: (
+                EnergyCalculator.velocity_from_kinetic_energy_batch(energy, mass)),
+            "height_from_potential_energy": lambda: (
+                EnergyCalculator.height_from_potential_energy_batch(energy, mass)),
+            "drop_height_for_impact_velocity": lambda: (
+                EnergyCalculator.drop_height_for_impact_velocity_batch(velocity)),
+            "velocity_for_total_energy": lambda: (
+                EnergyCalculator.velocity_for_total_energy_batch(energy, mass, height)),
+            "mass_for_total_energy": lambda: (
+                EnergyCalculator.mass_for_total_energy_batch(energy, velocity, height)),
+        }
+        yield calls[function]
+    return setup
+
+
+def _table(change: str, rows: int):
+    @contextlib.contextmanager
+    def setup():
+        import numpy as np
+        from energy_table import EnergyTable
+        rng = np.random.default_rng(rows)
+        table = EnergyTable(rng.uniform(0.1, 100.0, rows), rng.uniform(0.0, 50.0, rows),
+                            rng.uniform(0.0, 1000.0, rows))
+        block = slice(rows // 2, rows // 2 + rows // 100)
+        velocities = rng.uniform(0.0, 50.0, rows // 100)
+        gravities = itertools.cycle((9.81, 1.62))
+
+        def run():
+            if change == "all":
+                table["mass"] = table["mass"]
+            elif change == "gravity":
+                table["gravity"] = next(gravities)
+            else:
+                table["velocity", block] = velocities
+            return table["total_energy"]
+
+        yield run
+    return setup
+
+
+def _write_input(path: str, rows: int, fmt: str) -> None:
+    import numpy as np
+    import batch_stream
+    rng = np.random.default_rng(0)
+    chunk = {"mass": rng.uniform(0.1, 100.0, rows),
+             "velocity": rng.uniform(0.0, 50.0, rows),
+             "height": rng.uniform(0.0, 1000.0, rows)}
+    writer = batch_stream.write_csv if fmt == "csv" else batch_stream.write_jsonl
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer(f, [chunk], ("mass", "velocity", "height"))
+
+
+def _cli(fmt: str, rows: int):
+    @contextlib.contextmanager
+    def setup():
+        import energy_calculator
+        with tempfile.TemporaryDirectory(prefix="energy-bench-") as tmp:
+            source = os.path.join(tmp, f"input.{fmt}")
+            target = os.path.join(tmp, f"output.{fmt}")
+            _write_input(source, rows, fmt)
+            argv = ["batch", "--in", source, "--out", target,
+                    "--columns", "mass,velocity,height"]
+
+            def run():
+                # The subcommand reports its row count on stderr
+                with contextlib.redirect_stderr(io.StringIO()):
+                    if energy_calculator.main(argv) != 0:
+                        raise RuntimeError("batch command failed")
+
+            yield run
+    return setup
+
+
+def _client(port: int, requests: int, distinct: bool):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    counter = itertools.count(1)
+
+    def run():
+        for _ in range(requests):
+            mass = next(counter) if distinct else 2
+            connection.request("GET", f"/api/total?mass={mass}&velocity=3&height=1")
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                raise RuntimeError(f"HTTP {response.status}")
+
+    return connection, run
+
+
+def _threaded_server(requests: int, distinct: bool):
+    @contextlib.contextmanager
+    def setup():
+        import launch_web
+        with tempfile.TemporaryDirectory(prefix="energy-bench-") as tmp:
+            httpd = launch_web.create_server("127.0.0.1", 0, quiet=True, directory=tmp)
+            thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+            thread.start()
+            connection, run = _client(httpd.server_address[1], requests, distinct)
+            try:
+                yield run
+            finally:
+                connection.close()
+                httpd.shutdown()
+                httpd.server_close()
+                thread.join()
+    return setup
+
+
+def _async_server(requests: int, distinct: bool):
+    @contextlib.contextmanager
+    def setup():
+        import async_server
+        import web_api
+        loop = asyncio.new_event_loop()
+        server = loop.run_until_complete(async_server.start(
+            "127.0.0.1", 0, web_api.ResponseCache(web_api.DEFAULT_CACHE_SIZE,
+                                                  web_api.DEFAULT_CACHE_TTL)))
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        connection, run = _client(server.sockets[0].getsockname()[1], requests, distinct)
+        try:
+            yield run
+        finally:
+            connection.close()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            server.close()
+            loop.run_until_complete(server.wait_closed())
+            loop.close()
+    return setup
+
+
+def _daemon(kind: str, count: int):
+    @contextlib.contextmanager
+    def setup():
+        import compute_daemon
+        from daemon_client import DaemonClient
+        with tempfile.TemporaryDirectory(prefix="energy-bench-") as tmp:
+            server = compute_daemon.create_server(os.path.join(tmp, "energy.sock"))
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            client = DaemonClient(server.server_address)
+            if kind == "scalar":
+                def run():
+                    for _ in range(count):
+                        client.calculate("total", (10.0, 5.0, 3.0))
+            else:
+                import numpy as np
+                rng = np.random.default_rng(count)
+                columns = [rng.uniform(0.0, 100.0, count) for _ in range(3)]
+
+                def run():
+                    return client.calculate_batch("total", columns)
+            try:
+                yield run
+            finally:
+                client.close()
+                server.shutdown()
+                server.server_close()
+                thread.join()
+    return setup
+
+
+def build(groups=GROUPS, max_rows: int = DEFAULT_MAX_ROWS,
+          cli_rows: int = CLI_ROWS, web_requests: int = WEB_REQUESTS) -> List[Benchmark]:
+    """
+    Build the benchmark list.
+
+    Args:
+        groups: Groups to include (see GROUPS)
+        max_rows: Largest batch size; batch cases run at every power of
+            ten from 1e3 up to it
+        cli_rows: Rows in the CLI input files
+        web_requests: Requests per timed call in the web cases
+
+    Returns:
+        Benchmarks in run order
+    """
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        raise ValueError(f"Unknown benchmark group(s): {', '.join(sorted(unknown))}")
+    numpy = _have_numpy()
+    cases = []
+    if "scalar" in groups:
+        cases += [
+            Benchmark("scalar.kinetic_energy", "scalar",
+                      _scalar(EnergyCalculator.kinetic_energy, 10.0, 5.0)),
+            Benchmark("scalar.potential_energy", "scalar",
+                      _scalar(EnergyCalculator.potential_energy, 10.0, 5.0)),
+            Benchmark("scalar.total_mechanical_energy", "scalar",
+                      _scalar(EnergyCalculator.total_mechanical_energy, 10.0, 5.0, 3.0)),
+        ]
+    if "batch" in groups and numpy:
+        rows = 1000
+        while rows <= max_rows:
+            for function in ("kinetic_energy", "potential_energy", "total_mechanical_energy"):
+                cases.append(Benchmark(f"batch.{function}[{rows_label(rows)}]", "batch",
+                                       _batch(function, rows), rows, {"rows": rows}))
+            rows *= 10
+    if "cli" in groups and numpy:
+        for fmt in ("csv", "jsonl"):
+            cases.append(Benchmark(f"cli.batch_{fmt}[{rows_label(cli_rows)}]", "cli",
+                                   _cli(fmt, cli_rows), cli_rows, {"rows": cli_rows}))
+    if "web" in groups:
+        for server, factory in (("threaded", _threaded_server), ("async", _async_server)):
+            for label, distinct in (("cached", False), ("distinct", True)):
+                cases.append(Benchmark(f"web.{server}.api_total.{label}", "web",
+                                       factory(web_requests, distinct), web_requests,
+                                       {"requests": web_requests}))
+    if "precision" in groups and numpy:
+        for mode in ("float64", "float32", "fraction", "decimal"):
+            rows = EXACT_ROWS if mode in ("fraction", "decimal") else PRECISION_ROWS
+            params = {"rows": rows, "precision": mode}
+            cases.append(Benchmark(f"precision.{mode}[{rows_label(rows)}]", "precision",
+                                   _precision(mode, rows, params), rows, params))
+    if "inverse" in groups and numpy:
+        for function in ("velocity_from_kinetic_energy", "height_from_potential_energy",
+                         "drop_height_for_impact_velocity", "velocity_for_total_energy",
+                         "mass_for_total_energy"):
+            cases.append(Benchmark(f"inverse.{function}[{rows_label(max_rows)}]", "inverse",
+                                   _inverse(function, max_rows), max_rows,
+                                   {"rows": max_rows}))
+    if "table" in groups and numpy:
+        for change in ("all", "gravity", "velocity_1pct"):
+            cases.append(Benchmark(f"table.{change}[{rows_label(TABLE_ROWS)}]", "table",
+                                   _table(change, TABLE_ROWS), TABLE_ROWS,
+                                   {"rows": TABLE_ROWS}))
+    if "daemon" in groups:
+        cases.append(Benchmark("daemon.scalar_total", "daemon",
+                               _daemon("scalar", DAEMON_CALLS), DAEMON_CALLS,
+                               {"calls": DAEMON_CALLS}))
+        if numpy:
+            cases.append(Benchmark(f"daemon.batch_total[{rows_label(DAEMON_ROWS)}]", "daemon",
+                                   _daemon("batch", DAEMON_ROWS), DAEMON_ROWS,
+                                   {"rows": DAEMON_ROWS}))
+    return cases
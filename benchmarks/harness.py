@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Timing, result files and regression checks for the benchmark suite
+
+A Benchmark pairs a name with a setup context manager that yields the
+callable to time, so servers, temporary files and large arrays are built
+once and torn down after the measurement. Each benchmark is calibrated
+like timeit's autorange (the loop count grows until one repeat takes at
+least ``min_time``) and then timed ``repeat`` times with
+time.perf_counter_ns. Values are stored as nanoseconds per call.
+
+Result files are JSON with the environment metadata next to the
+per-benchmark statistics; write_pyperf() converts them to the format read
+by ``python -m pyperf`` tools. compare() matches two result files by
+benchmark name and flags every benchmark whose chosen statistic got
+slower by more than a threshold.
+"""
+
+import contextlib
+import datetime
+import itertools
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, ContextManager, Dict, List, NamedTuple, Union
+
+FORMAT_VERSION = 1
+STATISTICS = ("min", "median", "mean")
+DEFAULT_REPEAT = 5
+DEFAULT_MIN_TIME = 0.2
+DEFAULT_THRESHOLD = 0.10
+
+
+class Benchmark(NamedTuple):
+    """One named measurement."""
+    name: str
+    group: str
+    setup: Callable[[], ContextManager[Callable[[], object]]]
+    items: int = 1          # items processed per call (rows, requests, ...)
+    params: Union[dict, None] = None
+
+
+class Comparison(NamedTuple):
+    """One benchmark in a baseline/current comparison."""
+    name: str
+    baseline_ns: Union[float, None]
+    current_ns: Union[float, None]
+    status: str             # "ok", "regression", "improvement", "new" or "missing"
+
+    @property
+    def ratio(self) -> Union[float, None]:
+        """current / baseline, above 1.0 when the benchmark got slower."""
+        if self.baseline_ns and self.current_ns is not None:
+            return self.current_ns / self.baseline_ns
+        return None
+
+
+def _time_loops(func: Callable[[], object], loops: int) -> int:
+    iterator = itertools.repeat(None, loops)
+    began = time.perf_counter_ns()
+    for _ in iterator:
+        func()
+    return time.perf_counter_ns() - began
+
+
+def calibrate(func: Callable[[], object], min_time: float = DEFAULT_MIN_TIME) -> int:
+    """
+    Find a loop count whose total run time is at least min_time seconds.
+
+    Loop counts go 1, 2, 5, 10, 20, 50, ... as in timeit.Timer.autorange.
+    """
+    target = min_time * 1e9
+    for scale in itertools.count():
+        for base in (1, 2, 5):
+            loops = base * 10 ** scale
+            if _time_loops(func, loops) >= target:
+                return loops
+
+
+def measure(func: Callable[[], object], repeat: int = DEFAULT_REPEAT,
+            min_time: float = DEFAULT_MIN_TIME, warmup: int = 1) -> dict:
+    """
+    Time a callable.
+
+    Args:
+        func: Callable taking no arguments
+        repeat: Number of timed repeats
+        min_time: Minimum seconds per repeat, used to pick the loop count
+        warmup: Untimed repeats run after calibration
+
+    Returns:
+        Dict with loops, repeat, the per-call values in nanoseconds and
+        their min, median, mean and stdev
+    """
+    if repeat <= 0:
+        raise ValueError("repeat must be positive")
+    loops = calibrate(func, min_time)
+    for _ in range(warmup):
+        _time_loops(func, loops)
+    values = [_time_loops(func, loops) / loops for _ in range(repeat)]
+    return {
+        "loops": loops,
+        "repeat": repeat,
+        "values_ns": values,
+        "min_ns": min(values),
+        "median_ns": statistics.median(values),
+        "mean_ns": statistics.fmean(values),
+        "stdev_ns": statistics.stdev(values) if len(values) > 1 else 0.0,
+    }
+
+
+def run_benchmark(benchmark: Benchmark, repeat: int = DEFAULT_REPEAT,
+                  min_time: float = DEFAULT_MIN_TIME) -> dict:
+    """Set up, measure and tear down one benchmark; return its result dict."""
+    with benchmark.setup() as func:
+        result = measure(func, repeat, min_time)
+    seconds = result["median_ns"] / 1e9
+    return {
+        "name": benchmark.name,
+        "group": benchmark.group,
+        "params": dict(benchmark.params or {}),
+        "items": benchmark.items,
+        **result,
+        "items_per_second": benchmark.items / seconds if seconds else None,
+    }
+
+
+def _cpu_model() -> str:
+    with contextlib.suppress(OSError):
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.partition(":")[2].strip()
+    return platform.processor()
+
+
+def _git_commit() -> Union[str, None]:
+    here = os.path.dirname(os.path.abspath(__file__))
+    try:
+        output = subprocess.run(["git", "rev-parse", "HEAD"], cwd=here, timeout=10,
+                                capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.strip() or None
+
+
+def environment() -> dict:
+    """Metadata describing the machine and software the suite ran on."""
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "hostname": socket.gethostname(),
+        "python_version": platform.python_version(),
+        "python_implementation": platform.python_implementation(),
+        "python_executable": sys.executable,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_model": _cpu_model(),
+        "cpu_count": os.cpu_count(),
+        "numpy_version": numpy_version,
+        "git_commit": _git_commit(),
+    }
+
+
+def run_suite(benchmarks: List[Benchmark], repeat: int = DEFAULT_REPEAT,
+              min_time: float = DEFAULT_MIN_TIME,
+              progress: Union[Callable[[dict], None], None] = None) -> dict:
+    """
+    Run benchmarks one after another.
+
+    Args:
+        benchmarks: Benchmarks to run
+        repeat: Timed repeats per benchmark
+        min_time: Minimum seconds per repeat
+        progress: Optional callable receiving each result as it finishes
+
+    Returns:
+        Result document: {"version", "metadata", "benchmarks": [...]}
+    """
+    document = {"version": FORMAT_VERSION, "metadata": environment(), "benchmarks": []}
+    document["metadata"].update(repeat=repeat, min_time=min_time)
+    for benchmark in benchmarks:
+        result = run_benchmark(benchmark, repeat, min_time)
+        document["benchmarks"].append(result)
+        if progress is not None:
+            progress(result)
+    return document
+
+
+def write_results(document: dict, path: str) -> None:
+    """Write a result document as JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+        f.write("\n")
+
+
+def load_results(path: str) -> dict:
+    """
+    Read a result document.
+
+    Raises:
+        ValueError: If the file is not a result document of this version
+    """
+    with open(path, encoding="utf-8") as f:
+        document = json.load(f)
+    if not isinstance(document, dict) or document.get("version") != FORMAT_VERSION:
+        raise ValueError(f"{path}: not a version {FORMAT_VERSION} benchmark result file")
+    return document
+
+
+def to_pyperf(document: dict) -> dict:
+    """Convert a result document to pyperf's JSON suite format."""
+    metadata = document["metadata"]
+    common = {key: metadata[key] for key in ("hostname", "platform", "cpu_count",
+                                             "cpu_model", "python_version")
+              if metadata.get(key) is not None}
+    return {
+        "version": "1.0",
+        "metadata": common,
+        "benchmarks": [{
+            "metadata": {"name": result["name"], "unit": "second",
+                         "loops": result["loops"]},
+            "runs": [{"metadata": {"date": metadata["timestamp"]},
+                      "values": [value / 1e9 for value in result["values_ns"]]}],
+        } for result in document["benchmarks"]],
+    }
+
+
+def write_pyperf(document: dict, path: str) -> None:
+    """Write a result document in pyperf's JSON format."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(to_pyperf(document), f)
+
+
+def compare(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD,
+            statistic: str = "median") -> List[Comparison]:
+    """
+    Compare two result documents benchmark by benchmark.
+
+    Args:
+        baseline: Saved result document
+        current: New result document
+        threshold: Relative slowdown (0.10 = 10%) that counts as a
+            regression; a speedup of the same size counts as an improvement
+        statistic: "min", "median" or "mean" of the per-call times
+
+    Returns:
+        One Comparison per benchmark name in either document, baseline
+        order first
+    """
+    if statistic not in STATISTICS:
+        raise ValueError(f"Statistic must be one of: {', '.join(STATISTICS)}")
+    if threshold < 0:
+        raise ValueError("Threshold cannot be negative")
+    key = f"{statistic}_ns"
+    old = {result["name"]: result[key] for result in baseline["benchmarks"]}
+    new = {result["name"]: result[key] for result in current["benchmarks"]}
+    comparisons = []
+    for name in list(old) + [name for name in new if name not in old]:
+        before, after = old.get(name), new.get(name)
+        if before is None:
+            status = "new"
+        elif after is None:
+            status = "missing"
+        elif after > before * (1 + threshold):
+            status = "regression"
+        elif after < before * (1 - threshold):
+            status = "improvement"
+        else:
+            status = "ok"
+        comparisons.append(Comparison(name, before, after, status))
+    return comparisons
+
+
+def environment_differences(baseline: dict, current: dict) -> Dict[str, tuple]:
+    """Metadata fields that make two result documents hard to compare."""
+    keys = ("python_version", "python_implementation", "machine", "cpu_model",
+            "cpu_count", "numpy_version")
+    old, new = baseline.get("metadata", {}), current.get("metadata", {})
+    return {key: (old.get(key), new.get(key)) for key in keys
+            if old.get(key) != new.get(key)}
+
+
+def format_time(ns: Union[float, None]) -> str:
+    """Format a duration in nanoseconds with a readable unit."""
+    if ns is None:
+        return "-"
+    for unit, scale in (("s", 1e9), ("ms", 1e6), ("us", 1e3)):
+        if ns >= scale:
+            return f"{ns / scale:.3g} {unit}"
+    return f"{ns:.3g} ns"
+
+
+def format_results(document: dict) -> str:
+    """Format a result document as a plain-text table."""
+    rows = document["benchmarks"]
+    width = max([len(result["name"]) for result in rows] + [9])
+    # Precision cases also report their accuracy
+    errors = any("max_rel_error" in result.get("params", {}) for result in rows)
+    lines = [f"{'benchmark':<{width}} {'median':>10} {'min':>10} {'stdev':>10} {'items/s':>12}"
+             + (f" {'rel.error':>10}" if errors else "")]
+    for result in rows:
+        rate = result["items_per_second"]
+        line = (f"{result['name']:<{width}} {format_time(result['median_ns']):>10} "
+                f"{format_time(result['min_ns']):>10} "
+                f"{format_time(result['stdev_ns']):>10} "
+                f"{rate if rate is None else format(rate, '.4g'):>12}")
+        error = result.get("params", {}).get("max_rel_error")
+        if error is not None:
+            line += f" {error:>10.2e}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def format_comparison(comparisons: List[Comparison]) -> str:
+    """Format comparisons as a plain-text table."""
+    width = max([len(c.name) for c in comparisons] + [9])
+    lines = [f"{'benchmark':<{width}} {'baseline':>10} {'current':>10} {'change':>8}  status"]
+    for c in comparisons:
+        change = "-" if c.ratio is None else f"{(c.ratio - 1) * 100:+.1f}%"
+        lines.append(f"{c.name:<{width}} {format_time(c.baseline_ns):>10} "
+                     f"{format_time(c.current_ns):>10} {change:>8}  {c.status}")
+    return "\n".join(lines)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Celestial body presets shared by the calculator, CLI, GUI and web page
+
+Each body carries its surface gravity plus radius and standard
+gravitational parameter (GM). Batch inputs can name bodies per row; names
+are turned into small integer codes once per distinct spelling, and
+gravity is then looked up for whole columns with a single take().
+"""
+
+from typing import Dict, List, NamedTuple
+
+
+class CelestialBody(NamedTuple):
+    """A named body with its surface gravity, radius and GM in SI units."""
+    name: str
+    gravity: float      # m/s²
+    radius: float       # m
+    gm: float           # m³/s²
+    icon: str = ""
+    quick: bool = False  # offered as a quick-pick button in the UIs
+
+
+# Registry order defines the integer body codes
+BODIES: Dict[str, CelestialBody] = {
+    body.name.lower(): body for body in (
+        CelestialBody("Earth", 9.81, 6.371e6, 3.986004418e14, "🌍", True),
+        CelestialBody("Moon", 1.62, 1.7374e6, 4.9048695e12, "🌙", True),
+        CelestialBody("Mars", 3.71, 3.3895e6, 4.282837e13, "🔴", True),
+        CelestialBody("Jupiter", 24.79, 6.9911e7, 1.26686534e17, "🪐", True),
+        CelestialBody("Mercury", 3.70, 2.4397e6, 2.2032e13, "☿"),
+        CelestialBody("Venus", 8.87, 6.0518e6, 3.24859e14, "♀"),
+        CelestialBody("Saturn", 10.44, 5.8232e7, 3.7931187e16, "🪐"),
+        CelestialBody("Uranus", 8.69, 2.5362e7, 5.793939e15, "⛢"),
+        CelestialBody("Neptune", 11.15, 2.4622e7, 6.836529e15, "🔵"),
+    )
+}
+UNKNOWN_CODE = -1
+_CODES = {key: code for code, key in enumerate(BODIES)}
+_gravity_table = None
+
+
+def get_body(name: str) -> CelestialBody:
+    """
+    Look up a body by name (case-insensitive).
+
+    Raises:
+        ValueError: If the body is not in the registry
+    """
+    try:
+        return BODIES[name.strip().lower()]
+    except (AttributeError, KeyError):
+        raise ValueError(f"Unknown celestial body: {name!r}") from None
+
+
+def is_body(name) -> bool:
+    """True if name is a registered body name."""
+    return isinstance(name, str) and name.strip().lower() in BODIES
+
+
+def gravity_of(value) -> float:
+    """
+    Resolve a gravity given either as a number or as a body name.
+
+    Raises:
+        ValueError: If value is neither a number nor a known body
+    """
+    if is_body(value):
+        return get_body(value).gravity
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Unknown celestial body: {value!r}") from None
+
+
+def quick_bodies() -> List[CelestialBody]:
+    """Bodies offered as quick-pick gravity buttons."""
+    return [body for body in BODIES.values() if body.quick]
+
+
+def as_dicts() -> List[dict]:
+    """The registry as JSON-ready dicts, in code order."""
+    return [body._asdict() for body in BODIES.values()]
+
+
+class _CodeLookup(dict):
+    """Name -> code map that resolves and remembers unseen spellings."""
+
+    def __missing__(self, name):
+        code = _CODES.get(str(name).strip().lower(), UNKNOWN_CODE)
+        self[name] = code
+        return code
+
+
+def encode(names):
+    """
+    Convert a sequence of body names to int16 codes (-1 for unknown).
+
+    The lookup runs at C speed through map(); each distinct spelling is
+    normalized only once.
+    """
+    from energy_calculator import _numpy
+
+    np = _numpy()
+    lookup = _CodeLookup()
+    if isinstance(names, np.ndarray):
+        names = names.tolist()
+    return np.fromiter(map(lookup.__getitem__, names), dtype=np.int16,
+                       count=len(names))
+
+
+def gravity_table():
+    """
+    Surface gravity by body code as a float64 array.
+
+    The table has one extra trailing NaN entry, so code -1 (unknown)
+    indexes to NaN.
+    """
+    global _gravity_table
+    if _gravity_table is None:
+        from energy_calculator import _numpy
+
+        np = _numpy()
+        _gravity_table = np.array(
+            [body.gravity for body in BODIES.values()] + [float("nan")])
+        _gravity_table.flags.writeable = False
+    return _gravity_table
+
+
+def gravity_for_codes(codes):
+    """Vectorized gravity lookup for an array of body codes."""
+    return gravity_table().take(codes)
+
+
+def gravity_for_names(names):
+    """
+    Resolve a column of body names to gravity.
+
+    Returns:
+        (float64 gravity array with NaN for unknown names,
+         boolean mask of unknown names)
+    """
+    codes = encode(names)
+    return gravity_for_codes(codes), codes == UNKNOWN_CODE
+
+
+def categories_to_codes(categories):
+    """
+    Map a categorical column's labels to registry codes.
+
+    Returns:
+        int16 array r where r[label_index] is the registry code
+    """
+    return encode(list(categories))
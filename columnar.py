@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped binary column files for bulk energy runs
+
+A column set is a JSON manifest plus one binary file per column. Column
+files are either raw little-endian float64/float32 arrays or .npy files.
+Both are opened through mmap, so reading inputs and writing results never
+copies whole columns into Python objects.
+
+Manifest format (e.g. ``data.manifest.json``)::
+
+    {
+      "format": "energy-columns",
+      "version": 1,
+      "rows": 1000000,
+      "columns": {
+        "mass":     {"file": "data.mass.f64", "dtype": "<f8"},
+        "velocity": {"file": "data.velocity.npy"}
+      }
+    }
+
+File paths are relative to the manifest. The dtype is required for raw
+files and read from the header for .npy files. An optional "offset" skips
+a fixed number of leading bytes in raw files.
+
+A categorical column stores uint8 codes and lists its labels, e.g. a
+column of celestial bodies used as the "body" input role::
+
+    "planet": {"file": "data.planet.u1", "dtype": "<u1",
+               "categories": ["Earth", "Moon", "Mars"]}
+
+A column may declare its unit (see units.py), e.g. ``"unit": "lb"``;
+inputs are converted to SI chunk by chunk and output columns record the
+unit their results were converted to.
+"""
+
+import json
+import os
+from typing import Dict, Iterable, Union
+
+import bodies
+import precision as precision_modes
+import units as unit_registry
+from energy_calculator import EnergyCalculator, _numpy
+
+MANIFEST_FORMAT = "energy-columns"
+MANIFEST_VERSION = 1
+MANIFEST_SUFFIX = ".manifest.json"
+# Little-endian dtypes accepted in manifests
+DTYPES = {"<f8": "float64", "<f4": "float32", "<u1": "uint8"}
+DTYPE_ALIASES = {"<f8": "<f8", "float64": "<f8", "f8": "<f8",
+                 "<f4": "<f4", "float32": "<f4", "f4": "<f4",
+                 "<u1": "<u1", "|u1": "<u1", "uint8": "<u1", "u1": "<u1"}
+RESULT_COLUMNS = ("kinetic_energy", "potential_energy", "total_energy")
+# Bit flags stored in the "invalid" output column
+INVALID_FLAGS = {"mass": 1, "velocity": 2, "height": 4, "gravity": 8, "body": 16}
+
+
+def is_manifest(path: str) -> bool:
+    """True if the path names a column set manifest."""
+    return bool(path) and path.lower().endswith(MANIFEST_SUFFIX)
+
+
+def normalize_dtype(dtype) -> str:
+    """
+    Return the manifest spelling ("<f8", "<f4", "<u1") of a dtype.
+
+    Raises:
+        ValueError: If the dtype is not a supported little-endian type
+    """
+    name = DTYPE_ALIASES.get(str(dtype))
+    if name is None:
+        try:
+            name = DTYPE_ALIASES.get(_numpy().dtype(dtype).str, "")
+        except TypeError:
+            name = ""
+    if name not in DTYPES:
+        raise ValueError(f"Unsupported column dtype: {dtype!r}")
+    return name
+
+
+class ColumnSet:
+    """
+    A group of equal-length, memory-mapped columns described by a manifest.
+
+    Attributes:
+        path: Manifest path
+        rows: Number of rows in every column
+        columns: Dict mapping column name to a NumPy memmap
+        categories: Dict mapping categorical column names to their labels
+        units: Dict mapping column names to their declared unit names
+    """
+
+    def __init__(self, path: str, rows: int, columns: dict,
+                 categories: Union[Dict[str, list], None] = None,
+                 units: Union[Dict[str, str], None] = None):
+        self.path = path
+        self.rows = rows
+        self.columns = columns
+        self.categories = categories or {}
+        self.units = units or {}
+
+    def __getitem__(self, name: str):
+        return self.columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def flush(self) -> None:
+        """Flush pending writes of writable columns to disk."""
+        for column in self.columns.values():
+            if hasattr(column, "flush"):
+                column.flush()
+
+    @classmethod
+    def open(cls, path: str, mode: str = "r") -> "ColumnSet":
+        """
+        Open an existing column set without reading column data.
+
+        Args:
+            path: Manifest path
+            mode: "r" for read-only or "r+" for in-place updates
+
+        Returns:
+            ColumnSet whose columns are memory-mapped views of the files
+
+        Raises:
+            ValueError: If the manifest is malformed or a file is too short
+        """
+        np = _numpy()
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != MANIFEST_FORMAT:
+            raise ValueError(f"{path} is not an {MANIFEST_FORMAT} manifest")
+        if manifest.get("version", MANIFEST_VERSION) > MANIFEST_VERSION:
+            raise ValueError(f"Unsupported manifest version in {path}")
+        rows = int(manifest["rows"])
+        base = os.path.dirname(os.path.abspath(path))
+        columns = {}
+        categories = {}
+        units = {}
+        for name, spec in manifest["columns"].items():
+            file_path = os.path.join(base, spec["file"])
+            if file_path.endswith(".npy"):
+                column = np.load(file_path, mmap_mode=mode)
+                if column.ndim != 1:
+                    raise ValueError(f"Column {name!r} must be a 1-D array")
+                normalize_dtype(column.dtype)
+            else:
+                if "dtype" not in spec:
+                    raise ValueError(f"Column {name!r} needs a dtype")
+                dtype = normalize_dtype(spec["dtype"])
+                offset = int(spec.get("offset", 0))
+                needed = offset + rows * np.dtype(dtype).itemsize
+                if os.path.getsize(file_path) < needed:
+                    raise ValueError(f"Column file {spec['file']!r} is shorter "
+                                     f"than {rows} rows")
+                if rows:
+                    column = np.memmap(file_path, dtype=dtype, mode=mode,
+                                       offset=offset, shape=(rows,))
+                else:
+                    column = np.empty(0, dtype=dtype)
+            if len(column) != rows:
+                raise ValueError(f"Column {name!r} has {len(column)} rows, "
+                                 f"manifest says {rows}")
+            columns[name] = column
+            if "categories" in spec:
+                categories[name] = list(spec["categories"])
+            if "unit" in spec:
+                units[name] = spec["unit"]
+        return cls(path, rows, columns, categories, units)
+
+    @classmethod
+    def create(cls, path: str, rows: int, names: Iterable[str],
+               dtype="<f8", npy: bool = False,
+               dtypes: Union[Dict[str, str], None] = None,
+               units: Union[Dict[str, str], None] = None) -> "ColumnSet":
+        """
+        Preallocate memory-mapped output columns and write their manifest.
+
+        Column files are placed next to the manifest and named
+        ``<stem>.<column>.f64`` (or ``.f32``/``.u1``/``.npy``).
+
+        Args:
+            path: Manifest path to create (should end in .manifest.json)
+            rows: Number of rows to allocate
+            names: Column names
+            dtype: Default column dtype
+            npy: Write .npy files instead of raw little-endian files
+            dtypes: Optional per-column dtype overrides
+            units: Optional per-column unit names recorded in the manifest
+
+        Returns:
+            Writable ColumnSet
+        """
+        np = _numpy()
+        base = os.path.dirname(os.path.abspath(path))
+        stem = os.path.basename(path)
+        if stem.lower().endswith(MANIFEST_SUFFIX):
+            stem = stem[:-len(MANIFEST_SUFFIX)]
+        dtypes = dtypes or {}
+        units = units or {}
+        columns = {}
+        specs = {}
+        for name in names:
+            column_dtype = normalize_dtype(dtypes.get(name, dtype))
+            if npy:
+                file_name = f"{stem}.{name}.npy"
+                column = np.lib.format.open_memmap(
+                    os.path.join(base, file_name), mode="w+",
+                    dtype=column_dtype, shape=(rows,))
+                specs[name] = {"file": file_name}
+            else:
+                extension = {"<f8": "f64", "<f4": "f32", "<u1": "u1"}[column_dtype]
+                file_name = f"{stem}.{name}.{extension}"
+                file_path = os.path.join(base, file_name)
+                if rows:
+                    column = np.memmap(file_path, dtype=column_dtype,
+                                       mode="w+", shape=(rows,))
+                else:
+                    # mmap cannot map an empty file
+                    open(file_path, "wb").close()
+                    column = np.empty(0, dtype=column_dtype)
+                specs[name] = {"file": file_name, "dtype": column_dtype}
+            if name in units:
+                specs[name]["unit"] = units[name]
+            columns[name] = column
+        write_manifest(path, rows, specs)
+        return cls(path, rows, columns, units=units)
+
+
+def write_manifest(path: str, rows: int, columns: Dict[str, dict]) -> None:
+    """
+    Write a column set manifest.
+
+    Args:
+        path: Manifest path
+        rows: Row count shared by all columns
+        columns: Dict mapping column name to {"file", "dtype"[, "offset",
+            "categories", "unit"]}
+    """
+    manifest = {"format": MANIFEST_FORMAT, "version": MANIFEST_VERSION,
+                "rows": int(rows), "columns": columns}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+
+
+def _process_chunk(source: ColumnSet, target: ColumnSet,
+                   mapping: Dict[str, str], start: int, stop: int,
+                   gravity: float, units: Union[dict, None] = None,
+                   precision: str = "float64") -> int:
+    """Compute one row range of a columnar run; returns its invalid count."""
+    np = _numpy()
+    dtype = precision_modes.dtype(np, precision)
+    units = units or {}
+    inputs = {role: source[name][start:stop] for role, name in mapping.items()}
+    for role, unit in units.items():
+        if role in inputs and role != "body":
+            # The memmap slice is read-only; the multiply makes the SI copy
+            inputs[role] = unit_registry.to_si(np, inputs[role], unit)
+    unknown_body = None
+    if "body" in inputs:
+        codes = body_codes(source, mapping["body"], inputs.pop("body"))
+        inputs["gravity"] = bodies.gravity_for_codes(codes)
+        unknown_body = codes == bodies.UNKNOWN_CODE
+    inputs.setdefault("gravity", gravity)
+    results = {role: target[role][start:stop] for role in RESULT_COLUMNS}
+    # Results are computed in the precision's dtype and written to output
+    # columns of another dtype once, so every step is rounded as the mode says
+    buffers = {role: column if column.dtype == dtype else np.empty(len(column), dtype)
+               for role, column in results.items()}
+    ke, pe, total = (buffers[role] for role in RESULT_COLUMNS)
+    flags = target["invalid"][start:stop]
+
+    report = EnergyCalculator.validate_batch(precision, **inputs)
+    EnergyCalculator.kinetic_energy_batch(
+        inputs["mass"], inputs["velocity"], on_invalid="ignore", out=ke,
+        precision=precision)
+    EnergyCalculator.potential_energy_batch(
+        inputs["mass"], inputs["height"], inputs["gravity"],
+        on_invalid="ignore", out=pe, precision=precision)
+    np.add(ke, pe, out=total)
+    for role, column in buffers.items():
+        if role in units:
+            unit_registry.from_si(np, column, units[role], out=column)
+        if column is not results[role]:
+            results[role][:] = column
+    ke, pe, total = (results[role] for role in RESULT_COLUMNS)
+
+    flags[:] = 0
+    has_unknown = unknown_body is not None and unknown_body.any()
+    if report.ok and not has_unknown:
+        return 0
+    for role, bad in report.failures.items():
+        flags[bad] |= INVALID_FLAGS[role]
+    mask = report.mask
+    if has_unknown:
+        flags[unknown_body] |= INVALID_FLAGS["body"]
+        mask |= unknown_body
+    ke[mask] = pe[mask] = total[mask] = float("nan")
+    return int(mask.sum())
+
+
+def body_codes(source: ColumnSet, name: str, labels):
+    """
+    Translate a categorical body column slice into registry body codes.
+
+    Label codes are remapped through a small per-category lookup table;
+    codes outside the category list become unknown (-1).
+    """
+    np = _numpy()
+    if name not in source.categories:
+        raise ValueError(f"Body column {name!r} needs a categories list")
+    remap = np.append(bodies.categories_to_codes(source.categories[name]),
+                      np.int16(bodies.UNKNOWN_CODE))
+    return remap.take(labels, mode="clip")
+
+
+def _process_chunk_task(start: int, stop: int, input_path: str,
+                        output_path: str, mapping: Dict[str, str],
+                        gravity: float, units: Union[dict, None] = None,
+                        precision: str = "float64") -> int:
+    """Worker entry point: map both column sets and process one chunk."""
+    source = ColumnSet.open(input_path)
+    target = ColumnSet.open(output_path, mode="r+")
+    invalid = _process_chunk(source, target, mapping, start, stop, gravity, units,
+                             precision)
+    target.flush()
+    return invalid
+
+
+def run_columnar(input_path: str, output_path: str, mapping: Dict[str, str],
+                 chunk_size: int = 1 << 20,
+                 gravity: float = EnergyCalculator.GRAVITY,
+                 dtype="<f8", npy: bool = False, workers: int = 1,
+                 progress=None, units: Union[dict, None] = None,
+                 precision: str = "float64") -> dict:
+    """
+    Compute energies for a column set into a new memory-mapped column set.
+
+    Inputs are sliced straight out of the input memmaps and results are
+    written straight into the preallocated output memmaps, one chunk at a
+    time, so the run is bounded by disk bandwidth rather than memory.
+    With workers > 1, chunks are processed by a ParallelBatchEngine pool;
+    each worker maps the same files, so no column data is pickled.
+
+    The output holds kinetic_energy, potential_energy and total_energy
+    (NaN for invalid rows) and a uint8 "invalid" column of bit flags
+    (1 mass, 2 velocity, 4 height, 8 gravity, 16 unknown body).
+
+    Args:
+        input_path: Input manifest path
+        output_path: Output manifest path to create
+        mapping: Input role to column name mapping
+        chunk_size: Rows per chunk
+        gravity: Gravitational acceleration when no gravity column is mapped
+        dtype: Output dtype for the energy columns
+        npy: Write .npy output files instead of raw files
+        workers: Number of worker processes (1 runs in-process)
+        progress: Optional callable(done_rows, total_rows) called after
+            each chunk; an exception raised from it aborts the run
+        units: Optional role -> unit for inputs and results, combined
+            with the units declared in the input manifest
+        precision: "float64" or "float32" arithmetic (see precision.py);
+            independent of dtype, the dtype results are stored in. The
+            exact modes need object arrays and are not available here
+
+    Returns:
+        Dict with "rows" and "invalid" counts, plus "timings" (a list of
+        ChunkTiming) when a worker pool was used
+
+    Raises:
+        ValueError: If a mapped column is missing from the input, or for
+            an exact precision mode
+    """
+    from batch_stream import split_optional
+
+    if chunk_size <= 0:
+        raise ValueError("Chunk size must be positive")
+    if precision_modes.is_exact(precision_modes.check(precision)):
+        raise ValueError("Binary column sets compute in float64 or float32; "
+                         f"use CSV or JSON Lines for {precision} results")
+    source = ColumnSet.open(input_path)
+    resolved = {}
+    for role, name in mapping.items():
+        name, optional = split_optional(name)
+        # Optional columns ("gravity?") the input lacks are left unmapped
+        if not optional or name in source:
+            resolved[role] = name
+    mapping = resolved
+    for role, name in mapping.items():
+        if name not in source:
+            raise ValueError(f"Column {name!r} not found in {input_path}")
+    if "body" in mapping and mapping["body"] not in source.categories:
+        raise ValueError(f"Body column {mapping['body']!r} needs a categories list")
+    declared = {role: unit_registry.for_role(role, source.units[name])
+                for role, name in mapping.items() if name in source.units}
+    units = unit_registry.merge(declared, {role: unit_registry.for_role(role, unit)
+                                           for role, unit in (units or {}).items()})
+    rows = source.rows
+    target = ColumnSet.create(output_path, rows, RESULT_COLUMNS + ("invalid",),
+                              dtype=dtype, npy=npy, dtypes={"invalid": "<u1"},
+                              units={role: units[role].name for role in RESULT_COLUMNS
+                                     if role in units})
+
+    if workers > 1 and rows > chunk_size:
+        from parallel import ParallelBatchEngine
+
+        target.flush()
+        with ParallelBatchEngine(workers, chunk_size=chunk_size) as engine:
+            counts = engine.run_chunks(_process_chunk_task, rows, input_path,
+                                       output_path, mapping, gravity, units, precision)
+        if progress is not None:
+            progress(rows, rows)
+        return {"rows": rows, "invalid": sum(counts), "timings": engine.timings}
+
+    invalid = 0
+    for start in range(0, rows, chunk_size):
+        stop = min(start + chunk_size, rows)
+        invalid += _process_chunk(source, target, mapping, start, stop, gravity, units,
+                                  precision)
+        if progress is not None:
+            progress(stop, rows)
+    target.flush()
+    return {"rows": rows, "invalid": invalid}
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Long-lived compute daemon on a Unix domain socket
+
+Shell pipelines that call the calculator many times pay for a Python
+process, and batch calls for a NumPy import, on every call. The daemon
+pays once: it loads and warms the batch kernels at start-up and then
+answers requests from any number of concurrent clients, one thread per
+connection, in the framed binary protocol described in daemon_client::
+
+    python3 energy_calculator.py serve --socket /tmp/energy.sock
+    python3 -m energy_calculator client --socket /tmp/energy.sock total 10 5 3
+    python3 -m energy_calculator client --socket /tmp/energy.sock total < rows.txt
+
+Scalar requests use the scalar API, so they give the same results and
+error messages as the scalar subcommands. Batch requests use the
+vectorized batch functions, with NaN for invalid rows, or a per-row loop
+when NumPy is not installed.
+"""
+
+import os
+import signal
+import socket
+import socketserver
+import struct
+import sys
+
+from daemon_client import (BATCH, COMMANDS, ERROR, HEADER, MAX_FRAME, OK, SCALAR,
+                           ProtocolError, encode_frame, field_count)
+from energy_calculator import SCALAR_COMMANDS, EnergyCalculator, _numpy, scalar_energy
+
+
+def read_frame(stream):
+    """
+    Read one frame payload from a binary stream.
+
+    Returns:
+        The payload, or None at a clean end of stream
+
+    Raises:
+        ProtocolError: For an oversized or truncated frame
+    """
+    header = stream.read(HEADER.size)
+    if not header:
+        return None
+    if len(header) < HEADER.size:
+        raise ProtocolError("Truncated frame header")
+    size, = HEADER.unpack(header)
+    if size > MAX_FRAME:
+        raise ProtocolError(f"Frame of {size} bytes exceeds {MAX_FRAME}")
+    payload = stream.read(size)
+    if len(payload) < size:
+        raise ProtocolError("Truncated frame")
+    return payload
+
+
+def _batch(command: str, columns: list):
+    """Energies and invalid-row count for whole columns."""
+    try:
+        np = _numpy()
+    except ImportError:
+        np = None
+    if np is None:
+        columns = [struct.unpack(f"<{len(values) // 8}d", values) for values in columns]
+        inputs = len(SCALAR_COMMANDS[command])
+        gravity = columns[inputs] if command != "kinetic" else None
+        results = []
+        for row, values in enumerate(zip(*columns[:inputs])):
+            try:
+                results.append(scalar_energy(command, values,
+                                             EnergyCalculator.GRAVITY if gravity is None
+                                             else gravity[row]))
+            except ValueError:
+                results.append(float("nan"))
+        invalid = sum(value != value for value in results)
+        return struct.pack(f"<{len(results)}d", *results), invalid
+    arrays = [np.frombuffer(values, dtype="<f8") for values in columns]
+    if command == "kinetic":
+        result = EnergyCalculator.kinetic_energy_batch(*arrays, on_invalid="nan")
+    elif command == "potential":
+        result = EnergyCalculator.potential_energy_batch(*arrays, on_invalid="nan")
+    else:
+        result = EnergyCalculator.total_mechanical_energy_batch(*arrays, on_invalid="nan")
+    result = np.atleast_1d(result)
+    return result.astype("<f8", copy=False).tobytes(), int(np.isnan(result).sum())
+
+
+def handle_request(payload: bytes) -> bytes:
+    """
+    Compute one request payload.
+
+    Returns:
+        The response body that follows the OK status byte
+
+    Raises:
+        ProtocolError: For a malformed request
+        ValueError: If a scalar input is negative
+    """
+    if len(payload) < 2:
+        raise ProtocolError("Request is too short")
+    kind, code = payload[0], payload[1]
+    if code >= len(COMMANDS):
+        raise ProtocolError(f"Unknown command code {code}")
+    command = COMMANDS[code]
+    fields = field_count(command)
+    body = memoryview(payload)[2:]
+    if kind == SCALAR:
+        if len(body) != 8 * fields:
+            raise ProtocolError(f"{command} takes {fields} values")
+        values = struct.unpack(f"<{fields}d", body)
+        inputs = len(SCALAR_COMMANDS[command])
+        gravity = values[inputs] if command != "kinetic" else EnergyCalculator.GRAVITY
+        return struct.pack("<d", scalar_energy(command, values[:inputs], gravity))
+    if kind == BATCH:
+        if len(body) % (8 * fields):
+            raise ProtocolError(f"{command} batches take {fields} equal float64 columns")
+        rows = len(body) // (8 * fields)
+        columns = [body[8 * rows * i:8 * rows * (i + 1)] for i in range(fields)]
+        results, invalid = _batch(command, columns)
+        return HEADER.pack(invalid) + results
+    raise ProtocolError(f"Unknown request kind {kind}")
+
+
+class DaemonHandler(socketserver.StreamRequestHandler):
+    """Answers the requests of one connection in order until it closes."""
+
+    def handle(self):
+        while True:
+            try:
+                payload = read_frame(self.rfile)
+            except ProtocolError as e:
+                # The stream cannot be resynchronized: report and hang up
+                self._reply(ERROR, str(e).encode())
+                return
+            if payload is None:
+                return
+            try:
+                body = handle_request(payload)
+            except ValueError as e:
+                self._reply(ERROR, str(e).encode())
+            else:
+                self._reply(OK, body)
+
+    def _reply(self, status: int, body: bytes) -> None:
+        try:
+            self.wfile.write(encode_frame(bytes((status,)) + body))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """A threaded Unix socket server that removes its socket file on close."""
+
+    daemon_threads = True
+    block_on_close = False
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except FileNotFoundError:
+            pass
+
+
+def warm_up() -> None:
+    """Import and exercise the batch kernels once, before the first client."""
+    for command in COMMANDS:
+        columns = [struct.pack("<d", 1.0)] * field_count(command)
+        _batch(command, columns)
+
+
+def create_server(path: str) -> DaemonServer:
+    """
+    Bind a daemon to a Unix socket path, ready for serve_forever().
+
+    A stale socket file left by a daemon that died is replaced.
+
+    Raises:
+        OSError: If a daemon is already listening on path, or the path
+            cannot be bound
+    """
+    if os.path.exists(path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(path)
+        else:
+            raise OSError(f"A daemon is already listening on {path}")
+        finally:
+            probe.close()
+    warm_up()
+    return DaemonServer(path, DaemonHandler)
+
+
+def serve(path: str) -> int:
+    """Run the daemon until interrupted or terminated; returns the exit code."""
+    try:
+        server = create_server(path)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    # SIGTERM (e.g. from a service manager) unwinds like Ctrl+C so the
+    # socket file is removed
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    print(f"✅ Compute daemon listening on {path}")
+    print("Press Ctrl+C to stop the daemon", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n✓ Daemon stopped")
+    finally:
+        server.server_close()
+    return 0
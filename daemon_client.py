@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Thin client for the compute daemon, and the protocol both sides speak
+
+The daemon (compute_daemon.py, started with ``energy_calculator.py serve
+--socket PATH``) listens on a Unix domain socket. Every message in either
+direction is one frame: a little-endian uint32 payload length followed by
+the payload. Requests are answered in order, and a connection may carry
+any number of them.
+
+Request payload::
+
+    uint8 kind        'S' (one scalar calculation) or 'B' (a batch)
+    uint8 command     0 kinetic, 1 potential, 2 total (SCALAR_COMMANDS order)
+    float64[...]      little-endian values
+
+A scalar request carries the command's inputs, then gravity for potential
+and total. A batch request carries the same fields as whole columns, one
+after another, each ``rows`` values long; the row count is implied by the
+payload size.
+
+Response payload::
+
+    uint8 status      0 ok, 1 error
+    ok, scalar:       float64 energy in Joules
+    ok, batch:        uint32 invalid row count, then float64[rows] energies
+                      (NaN for invalid rows)
+    error:            UTF-8 message
+
+This module only needs the C-level ``_socket`` and ``struct`` modules:
+importing ``socket`` alone costs more than a whole scalar calculation, and
+the client runs once per shell call. NumPy is never imported here.
+"""
+
+import struct
+import sys
+from array import array
+
+import _socket
+
+from energy_calculator import SCALAR_COMMANDS, EnergyCalculator, _pop_option
+
+COMMANDS = tuple(SCALAR_COMMANDS)
+SCALAR = ord("S")
+BATCH = ord("B")
+OK = 0
+ERROR = 1
+HEADER = struct.Struct("<I")
+MAX_FRAME = 256 * 1024 * 1024
+# Rows sent per batch request when streaming stdin
+CLIENT_CHUNK_ROWS = 8192
+
+
+class ProtocolError(ValueError):
+    """A malformed frame or request."""
+
+
+def field_count(command: str) -> int:
+    """Values per scalar request (columns per batch request) of a command."""
+    return len(SCALAR_COMMANDS[command]) + (command != "kinetic")
+
+
+def encode_frame(payload: bytes) -> bytes:
+    """Prefix a payload with its length."""
+    if len(payload) > MAX_FRAME:
+        raise ProtocolError(f"Frame of {len(payload)} bytes exceeds {MAX_FRAME}")
+    return HEADER.pack(len(payload)) + payload
+
+
+def _le_bytes(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array("d", values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _le_array(data) -> array:
+    values = array("d", bytes(data))
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _column(values, rows: int) -> bytes:
+    """One float64 column as little-endian bytes, broadcasting a scalar."""
+    if isinstance(values, (int, float)):
+        values = array("d", [values]) * rows
+    elif not hasattr(values, "astype") and not (isinstance(values, array)
+                                                and values.typecode == "d"):
+        values = array("d", values)
+    if len(values) != rows:
+        raise ValueError("Batch columns must have equal lengths")
+    if hasattr(values, "astype"):
+        # An ndarray: convert in C rather than element by element
+        return values.astype("<f8").tobytes()
+    return _le_bytes(values)
+
+
+class DaemonClient:
+    """
+    A connection to a running compute daemon.
+
+    Requests reuse the connection, so each call costs one socket round
+    trip rather than a process start. Errors the daemon reports (negative
+    inputs, malformed requests) are raised as ValueError, like the
+    EnergyCalculator methods.
+
+    Args:
+        path: Path of the daemon's Unix socket
+        timeout: Optional socket timeout in seconds
+
+    Raises:
+        OSError: If no daemon is listening at path
+    """
+
+    def __init__(self, path: str, timeout: float = None):
+        self._sock = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+        try:
+            self._sock.settimeout(timeout)
+            self._sock.connect(path)
+        except OSError:
+            self._sock.close()
+            raise
+
+    def close(self) -> None:
+        """Close the connection."""
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _receive(self, size: int) -> memoryview:
+        data = bytearray(size)
+        view = memoryview(data)
+        received = 0
+        while received < size:
+            count = self._sock.recv_into(view[received:])
+            if not count:
+                raise ConnectionError("The daemon closed the connection")
+            received += count
+        return view
+
+    def request(self, payload: bytes) -> memoryview:
+        """
+        Send one request payload and return the body of the response.
+
+        Raises:
+            ValueError: If the daemon answers with an error
+        """
+        self._sock.sendall(encode_frame(payload))
+        size, = HEADER.unpack(self._receive(HEADER.size))
+        response = self._receive(size)
+        if not response or response[0] != OK:
+            raise ValueError(bytes(response[1:]).decode("utf-8", "replace"))
+        return response[1:]
+
+    def calculate(self, command: str, values, gravity: float = EnergyCalculator.GRAVITY) -> float:
+        """
+        Compute one energy on the daemon.
+
+        Args:
+            command: "kinetic", "potential" or "total"
+            values: The command's inputs in SCALAR_COMMANDS order
+            gravity: Gravitational acceleration in m/s² (ignored by kinetic)
+
+        Returns:
+            Energy in Joules (J)
+
+        Raises:
+            ValueError: If an input is negative
+        """
+        fields = list(values)
+        if command != "kinetic":
+            fields.append(gravity)
+        body = self.request(bytes((SCALAR, COMMANDS.index(command)))
+                            + struct.pack(f"<{len(fields)}d", *fields))
+        return struct.unpack("<d", body)[0]
+
+    def calculate_batch(self, command: str, columns, gravity=EnergyCalculator.GRAVITY):
+        """
+        Compute one energy per row on the daemon.
+
+        Args:
+            command: "kinetic", "potential" or "total"
+            columns: The command's input columns in SCALAR_COMMANDS order
+                (sequences, array('d') or ndarrays of equal length)
+            gravity: Gravity in m/s², one value or a column (ignored by
+                kinetic)
+
+        Returns:
+            (array('d') of energies in Joules, NaN where a row is invalid;
+            number of invalid rows)
+
+        Raises:
+            ValueError: For columns of different lengths
+        """
+        columns = list(columns)
+        if command != "kinetic":
+            columns.append(gravity)
+        rows = max((len(values) for values in columns if not isinstance(values, (int, float))),
+                   default=1)
+        body = self.request(bytes((BATCH, COMMANDS.index(command)))
+                            + b"".join(_column(values, rows) for values in columns))
+        invalid, = HEADER.unpack(body[:HEADER.size])
+        return _le_array(body[HEADER.size:]), invalid
+
+
+def parse_client_argv(argv: list):
+    """
+    Parse ``--socket PATH COMMAND [VALUES...] [--gravity G]`` without
+    argparse, for the same reason as the scalar fast path.
+
+    Returns:
+        (socket path, command, values or None to read stdin, gravity), or
+        None when argparse should handle the arguments
+    """
+    rest = list(argv)
+    path = _pop_option(rest, "--socket")
+    if not path or not rest or rest[0] not in SCALAR_COMMANDS:
+        return None
+    command = rest.pop(0)
+    gravity = EnergyCalculator.GRAVITY
+    if command != "kinetic":
+        gravity = _pop_option(rest, "--gravity", gravity)
+    if rest and len(rest) != len(SCALAR_COMMANDS[command]):
+        return None
+    try:
+        return path, command, [float(value) for value in rest] or None, float(gravity)
+    except ValueError:
+        return None
+
+
+def _stream_rows(client: DaemonClient, command: str, gravity: float,
+                 in_stream, out_stream) -> int:
+    """Send stdin rows in chunks and write one energy per line; returns the exit code."""
+    inputs = len(SCALAR_COMMANDS[command])
+    widths = (inputs,) if command == "kinetic" else (inputs, inputs + 1)
+    rows = invalid = 0
+
+    def flush(chunk):
+        nonlocal rows, invalid
+        columns = [array("d", [row[i] for row in chunk]) for i in range(inputs)]
+        gravities = array("d", [row[inputs] if len(row) > inputs else gravity
+                                for row in chunk])
+        results, bad = client.calculate_batch(command, columns, gravities)
+        out_stream.write("".join(f"{value}\n" for value in results))
+        rows += len(chunk)
+        invalid += bad
+
+    chunk = []
+    for number, line in enumerate(in_stream, 1):
+        fields = line.replace(",", " ").split()
+        if not fields or fields[0].startswith("#"):
+            continue
+        try:
+            if len(fields) not in widths:
+                raise ValueError(f"expected {' or '.join(map(str, widths))} values")
+            chunk.append([float(value) for value in fields])
+        except ValueError as e:
+            print(f"Error: line {number}: {e}", file=sys.stderr)
+            return 2
+        if len(chunk) == CLIENT_CHUNK_ROWS:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+    print(f"Processed {rows} rows ({invalid} invalid)", file=sys.stderr)
+    return 0
+
+
+def run_client(path: str, command: str, values=None,
+               gravity: float = EnergyCalculator.GRAVITY,
+               in_stream=None, out_stream=None) -> int:
+    """
+    Run one client call and print the result(s).
+
+    With values, prints one energy (or ``Error: ...``) like the scalar
+    subcommands. Without, reads rows of whitespace- or comma-separated
+    inputs from in_stream (stdin), optionally ending in a gravity value,
+    and prints one energy per row; invalid rows print ``nan``.
+
+    Returns:
+        The exit code
+    """
+    in_stream = sys.stdin if in_stream is None else in_stream
+    out_stream = sys.stdout if out_stream is None else out_stream
+    try:
+        client = DaemonClient(path)
+    except OSError as e:
+        print(f"Error: cannot reach the daemon at {path}: {e.strerror or e}", file=sys.stderr)
+        return 1
+    with client:
+        if values is None:
+            return _stream_rows(client, command, gravity, in_stream, out_stream)
+        try:
+            result = client.calculate(command, values, gravity)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+    print(result, file=out_stream)
+    return 0
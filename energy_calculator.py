@@ -1,10 +1,138 @@
 #!/usr/bin/env python3
 """
 Energy Calculator - Kinetic and Potential Energy Calculator in SI Units
+
+Importing this module loads only sys and math, so one-off scalar runs
+such as ``energy_calculator.py total 10 5 3`` start quickly. Everything
+heavier (NumPy, the precision modes, the body registry, the batch, sweep
+and simulation engines, and argparse) is imported by the function that
+needs it. test_startup.py enforces this.
 """
 
+from __future__ import annotations
+
+import math
 import sys
-from typing import Union
+
+# Annotations are not evaluated (PEP 563), so typing, which costs more to
+# import than a scalar calculation, is only needed by type checkers
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Union
+
+
+# Messages shared by the scalar checks and the per-row batch reports
+NEGATIVE_VALUE_MESSAGES = {
+    "mass": "Mass cannot be negative",
+    "velocity": "Velocity cannot be negative",
+    "height": "Height cannot be negative",
+    "gravity": "Gravitational acceleration cannot be negative",
+}
+# Domain messages of the inverse solvers: energies and the solved-for
+# velocity/height must not be negative, divisors must be positive
+INVERSE_MESSAGES = {
+    "kinetic_energy": "Kinetic energy cannot be negative",
+    "potential_energy": "Potential energy cannot be negative",
+    "total_energy": "Total energy cannot be negative",
+    "velocity": NEGATIVE_VALUE_MESSAGES["velocity"],
+    "height": NEGATIVE_VALUE_MESSAGES["height"],
+    "mass": "Mass must be positive",
+    "gravity": "Gravitational acceleration must be positive",
+    "unreachable": "Total energy is less than the potential energy",
+    "no_energy": "Velocity or height must be positive",
+}
+# Inputs that must be strictly positive in the inverse solvers
+_POSITIVE = ("mass", "gravity")
+
+
+def _numpy():
+    """Import NumPy on demand so the scalar API stays dependency-free."""
+    try:
+        import numpy
+    except ImportError as exc:
+        raise ImportError(
+            "Batch calculations require NumPy (pip install numpy)"
+        ) from exc
+    return numpy
+
+
+def _precision():
+    """Import the precision modes on demand (they pull in fractions and decimal)."""
+    import precision
+    return precision
+
+
+class ValidationReport:
+    """
+    Per-row validation outcome of a batch calculation.
+    
+    Each failing column is stored as a boolean mask over the broadcast
+    result shape, so building the report costs one vectorized comparison
+    per column regardless of how many rows are bad.
+    """
+    
+    def __init__(self, shape, failures, messages=None):
+        self.shape = shape
+        self.failures = failures
+        # Column name -> error message (default: the negative-value checks)
+        self.messages = NEGATIVE_VALUE_MESSAGES if messages is None else messages
+    
+    @property
+    def ok(self) -> bool:
+        """True when every row passed validation."""
+        return not self.failures
+    
+    @property
+    def mask(self):
+        """Boolean array marking rows that failed any check."""
+        np = _numpy()
+        mask = np.zeros(self.shape, dtype=bool)
+        for bad in self.failures.values():
+            mask |= bad
+        return mask
+    
+    def invalid_rows(self):
+        """Flat indices of the rows that failed validation."""
+        return _numpy().flatnonzero(self.mask)
+    
+    def counts(self) -> dict:
+        """Number of failing rows per column."""
+        return {name: int(bad.sum()) for name, bad in self.failures.items()}
+    
+    def errors(self, limit: Union[int, None] = None) -> list:
+        """
+        List (row, message) pairs for the failing rows.
+        
+        Args:
+            limit: Maximum number of rows to report (default: all)
+            
+        Returns:
+            List of (flat row index, error message) tuples in row order
+        """
+        np = _numpy()
+        rows = self.invalid_rows()
+        if limit is not None:
+            rows = rows[:limit]
+        flat = {name: np.ravel(bad) for name, bad in self.failures.items()}
+        report = []
+        for row in rows.tolist():
+            messages = [self.messages[name]
+                        for name, bad in flat.items() if bad[row]]
+            report.append((row, "; ".join(messages)))
+        return report
+
+
+class BatchValidationError(ValueError):
+    """Raised when one or more rows of a batch input are invalid."""
+    
+    def __init__(self, report: ValidationReport, limit: int = 5):
+        self.report = report
+        invalid = report.invalid_rows()
+        details = ", ".join(f"row {row}: {message}"
+                            for row, message in report.errors(limit))
+        if len(invalid) > limit:
+            details += ", ..."
+        super().__init__(f"{len(invalid)} invalid row(s): {details}")
 
 
 class EnergyCalculator:
@@ -14,7 +142,8 @@ class EnergyCalculator:
     GRAVITY = 9.81
     
     @staticmethod
-    def kinetic_energy(mass: float, velocity: float) -> float:
+    def kinetic_energy(mass: float, velocity: float,
+                       precision: Union[str, None] = None) -> float:
         """
         Calculate kinetic energy in Joules.
         
@@ -23,22 +152,32 @@ class EnergyCalculator:
         Args:
             mass: Mass in kilograms (kg)
             velocity: Velocity in meters per second (m/s)
+            precision: Optional precision mode ("float64", "float32",
+                "fraction" or "decimal", see precision.py); by default the
+                inputs are used as given
             
         Returns:
-            Kinetic energy in Joules (J)
+            Kinetic energy in Joules (J), as a Fraction or Decimal in the
+            exact modes
             
         Raises:
-            ValueError: If mass or velocity is negative
+            ValueError: If mass or velocity is negative, or the precision
+                mode is unknown
         """
+        if precision is not None:
+            mass, velocity = EnergyCalculator._convert(precision, mass, velocity)
         if mass < 0:
             raise ValueError("Mass cannot be negative")
         if velocity < 0:
             raise ValueError("Velocity cannot be negative")
         
+        if precision is not None:
+            return _precision().kinetic_energy(mass, velocity, precision)
         return 0.5 * mass * velocity ** 2
     
     @staticmethod
-    def potential_energy(mass: float, height: float, gravity: float = GRAVITY) -> float:
+    def potential_energy(mass: float, height: float, gravity: float = GRAVITY,
+                         precision: Union[str, None] = None) -> float:
         """
         Calculate gravitational potential energy in Joules.
         
@@ -48,13 +187,18 @@ class EnergyCalculator:
             mass: Mass in kilograms (kg)
             height: Height in meters (m)
             gravity: Gravitational acceleration in m/s² (default: 9.81 m/s²)
+            precision: Optional precision mode (see kinetic_energy)
             
         Returns:
             Potential energy in Joules (J)
             
         Raises:
-            ValueError: If mass, height, or gravity is negative
+            ValueError: If mass, height, or gravity is negative, or the
+                precision mode is unknown
         """
+        if precision is not None:
+            mass, height, gravity = EnergyCalculator._convert(
+                precision, mass, height, gravity)
         if mass < 0:
             raise ValueError("Mass cannot be negative")
         if height < 0:
@@ -62,11 +206,14 @@ class EnergyCalculator:
         if gravity < 0:
             raise ValueError("Gravitational acceleration cannot be negative")
         
+        if precision is not None:
+            return _precision().potential_energy(mass, height, gravity, precision)
         return mass * gravity * height
     
     @staticmethod
     def total_mechanical_energy(
-        mass: float, velocity: float, height: float, gravity: float = GRAVITY
+        mass: float, velocity: float, height: float, gravity: float = GRAVITY,
+        precision: Union[str, None] = None
     ) -> float:
         """
         Calculate total mechanical energy (kinetic + potential).
@@ -78,13 +225,533 @@ class EnergyCalculator:
             velocity: Velocity in meters per second (m/s)
             height: Height in meters (m)
             gravity: Gravitational acceleration in m/s² (default: 9.81 m/s²)
+            precision: Optional precision mode (see kinetic_energy)
             
         Returns:
             Total mechanical energy in Joules (J)
         """
-        ke = EnergyCalculator.kinetic_energy(mass, velocity)
-        pe = EnergyCalculator.potential_energy(mass, height, gravity)
+        ke = EnergyCalculator.kinetic_energy(mass, velocity, precision)
+        pe = EnergyCalculator.potential_energy(mass, height, gravity, precision)
+        if precision is not None:
+            return _precision().add(ke, pe, precision)
         return ke + pe
+    
+    @staticmethod
+    def _convert(precision: str, *values) -> list:
+        """Convert scalar inputs to the number type of a precision mode."""
+        modes = _precision()
+        modes.check(precision)
+        return [modes.convert(value, precision) for value in values]
+    
+    @staticmethod
+    def gravity_for(body: str) -> float:
+        """
+        Surface gravity of a named celestial body.
+        
+        Args:
+            body: Body name from the bodies registry, e.g. "Moon"
+            
+        Returns:
+            Gravitational acceleration in m/s²
+            
+        Raises:
+            ValueError: If the body is unknown
+        """
+        import bodies
+        return bodies.get_body(body).gravity
+    
+    @staticmethod
+    def validate_batch(precision: str = "float64", **columns) -> ValidationReport:
+        """
+        Validate batch input columns without computing anything.
+        
+        Args:
+            precision: Precision mode the columns are converted to before
+                checking (see kinetic_energy_batch)
+            **columns: Any of mass, velocity, height and gravity as arrays,
+                sequences or scalars; they are broadcast against each other
+                
+        Returns:
+            ValidationReport with a boolean mask per failing column
+        """
+        np = _numpy()
+        arrays = EnergyCalculator._batch_arrays(np, precision, columns)
+        shape = np.broadcast_shapes(*(a.shape for a in arrays.values()))
+        return EnergyCalculator._batch_report(np, shape, arrays)
+    
+    @staticmethod
+    def _batch_report(np, shape, arrays) -> ValidationReport:
+        failures = {}
+        for name, values in arrays.items():
+            # A single fmin reduction (which skips NaN) screens the common
+            # all-valid case without allocating a boolean mask
+            if values.size and np.fmin.reduce(values, axis=None) < 0:
+                failures[name] = np.broadcast_to(values < 0, shape)
+        return ValidationReport(shape, failures)
+    
+    @staticmethod
+    def _batch_arrays(np, precision, columns) -> dict:
+        if precision == "float64":
+            # asarray does not copy float64 ndarrays or buffer-protocol inputs
+            return {name: np.asarray(values, dtype=np.float64)
+                    for name, values in columns.items()}
+        modes = _precision()
+        modes.check(precision)
+        return {name: modes.convert_array(np, values, precision)
+                for name, values in columns.items()}
+    
+    @staticmethod
+    def _batch_prepare(on_invalid, precision, **columns):
+        """Convert inputs to arrays of the precision mode and run the vectorized checks."""
+        if on_invalid not in ("raise", "nan", "ignore"):
+            raise ValueError(f"Unknown on_invalid mode: {on_invalid!r}")
+        np = _numpy()
+        arrays = EnergyCalculator._batch_arrays(np, precision, columns)
+        shape = np.broadcast_shapes(*(a.shape for a in arrays.values()))
+        report = None
+        if on_invalid != "ignore":
+            report = EnergyCalculator._batch_report(np, shape, arrays)
+            if not report.ok and on_invalid == "raise":
+                raise BatchValidationError(report)
+        return np, arrays, report
+    
+    @staticmethod
+    def _multiply_into(np, buffer, factor):
+        """Multiply in place when the product fits the existing buffer."""
+        if np.broadcast_shapes(buffer.shape, factor.shape) == buffer.shape:
+            buffer *= factor
+            return buffer
+        return buffer * factor
+    
+    @staticmethod
+    def _batch_arithmetic(precision):
+        """(1/2 in the mode's type, context manager) for the batch arithmetic."""
+        if precision in ("float64", "float32"):
+            import contextlib
+            return 0.5, contextlib.nullcontext()
+        modes = _precision()
+        return modes.half(precision), modes.context(precision)
+    
+    @staticmethod
+    def _batch_finish(result, report):
+        if report is not None and not report.ok:
+            np = _numpy()
+            if not isinstance(result, np.ndarray):
+                # Scalar inputs give a NumPy scalar, which cannot be assigned into
+                result = np.array(result)
+            result[report.mask] = float("nan")
+        return result
+    
+    @staticmethod
+    def kinetic_energy_batch(mass, velocity, on_invalid: str = "raise", out=None,
+                             precision: str = "float64"):
+        """
+        Calculate kinetic energy for whole arrays of inputs.
+        
+        Inputs may be NumPy arrays, buffer-protocol objects (array('d'),
+        memoryview) or sequences, and are broadcast against each other.
+        
+        Args:
+            mass: Masses in kilograms (kg)
+            velocity: Velocities in meters per second (m/s)
+            on_invalid: "raise" to raise BatchValidationError listing every
+                bad row, "nan" to return NaN for bad rows, or "ignore" to
+                skip validation entirely
+            out: Optional preallocated array (e.g. a memory-mapped output
+                column) with the broadcast shape to write results into
+            precision: "float64" (default), "float32" to compute in single
+                precision, or "fraction"/"decimal" for exact results in
+                object arrays (see precision.py)
+                
+        Returns:
+            NumPy array of kinetic energies in Joules (J), with the dtype
+            of the precision mode
+            
+        Raises:
+            BatchValidationError: If any row is negative and on_invalid
+                is "raise"
+        """
+        np, a, report = EnergyCalculator._batch_prepare(
+            on_invalid, precision, mass=mass, velocity=velocity)
+        half, arithmetic = EnergyCalculator._batch_arithmetic(precision)
+        with arithmetic:
+            result = np.multiply(a["mass"], a["velocity"], out=out)
+            result *= a["velocity"]
+            result *= half
+        return EnergyCalculator._batch_finish(result, report)
+    
+    @staticmethod
+    def potential_energy_batch(mass, height, gravity=GRAVITY,
+                               on_invalid: str = "raise", out=None,
+                               precision: str = "float64"):
+        """
+        Calculate gravitational potential energy for whole arrays of inputs.
+        
+        Args:
+            mass: Masses in kilograms (kg)
+            height: Heights in meters (m)
+            gravity: Gravitational acceleration(s) in m/s² (default: 9.81 m/s²)
+            on_invalid: "raise", "nan" or "ignore" (see kinetic_energy_batch)
+            out: Optional preallocated result array (see kinetic_energy_batch)
+            precision: Precision mode (see kinetic_energy_batch)
+            
+        Returns:
+            NumPy array of potential energies in Joules (J)
+            
+        Raises:
+            BatchValidationError: If any row is negative and on_invalid
+                is "raise"
+        """
+        np, a, report = EnergyCalculator._batch_prepare(
+            on_invalid, precision, mass=mass, height=height, gravity=gravity)
+        with EnergyCalculator._batch_arithmetic(precision)[1]:
+            result = EnergyCalculator._multiply_into(
+                np, np.multiply(a["mass"], a["height"], out=out), a["gravity"])
+        return EnergyCalculator._batch_finish(result, report)
+    
+    @staticmethod
+    def total_mechanical_energy_batch(mass, velocity, height, gravity=GRAVITY,
+                                      on_invalid: str = "raise", out=None,
+                                      precision: str = "float64"):
+        """
+        Calculate total mechanical energy for whole arrays of inputs.
+        
+        Args:
+            mass: Masses in kilograms (kg)
+            velocity: Velocities in meters per second (m/s)
+            height: Heights in meters (m)
+            gravity: Gravitational acceleration(s) in m/s² (default: 9.81 m/s²)
+            on_invalid: "raise", "nan" or "ignore" (see kinetic_energy_batch)
+            out: Optional preallocated result array (see kinetic_energy_batch)
+            precision: Precision mode (see kinetic_energy_batch)
+            
+        Returns:
+            NumPy array of total mechanical energies in Joules (J)
+            
+        Raises:
+            BatchValidationError: If any row is negative and on_invalid
+                is "raise"
+        """
+        np, a, report = EnergyCalculator._batch_prepare(
+            on_invalid, precision, mass=mass, velocity=velocity, height=height,
+            gravity=gravity)
+        shape = report.shape if report is not None else np.broadcast_shapes(
+            *(v.shape for v in a.values()))
+        half, arithmetic = EnergyCalculator._batch_arithmetic(precision)
+        if out is None:
+            dtype = np.float64 if precision == "float64" else _precision().dtype(np, precision)
+            out = np.empty(shape, dtype=dtype)
+        # KE and PE accumulate into one preallocated buffer
+        result = out
+        with arithmetic:
+            np.multiply(a["velocity"], a["velocity"], out=result)
+            result *= a["mass"]
+            result *= half
+            result += EnergyCalculator._multiply_into(
+                np, a["mass"] * a["height"], a["gravity"])
+        return EnergyCalculator._batch_finish(result, report)
+    
+    @staticmethod
+    def _check_inverse(**values) -> None:
+        """Raise the inverse solvers' ValueError for the first value out of its domain."""
+        for name, value in values.items():
+            if value < 0 or (value == 0 and name in _POSITIVE):
+                raise ValueError(INVERSE_MESSAGES[name])
+    
+    @staticmethod
+    def velocity_from_kinetic_energy(kinetic_energy: float, mass: float) -> float:
+        """
+        Velocity at which a mass has a given kinetic energy.
+        
+        v = √(2 KE / m)
+        
+        Args:
+            kinetic_energy: Kinetic energy in Joules (J)
+            mass: Mass in kilograms (kg)
+            
+        Returns:
+            Velocity in meters per second (m/s)
+            
+        Raises:
+            ValueError: If the energy is negative or the mass is not positive
+        """
+        EnergyCalculator._check_inverse(kinetic_energy=kinetic_energy, mass=mass)
+        return math.sqrt(2 * kinetic_energy / mass)
+    
+    @staticmethod
+    def height_from_potential_energy(potential_energy: float, mass: float,
+                                     gravity: float = GRAVITY) -> float:
+        """
+        Height at which a mass has a given potential energy.
+        
+        h = PE / (m g)
+        
+        Args:
+            potential_energy: Potential energy in Joules (J)
+            mass: Mass in kilograms (kg)
+            gravity: Gravitational acceleration in m/s² (default: 9.81 m/s²)
+            
+        Returns:
+            Height in meters (m)
+            
+        Raises:
+            ValueError: If the energy is negative or the mass or gravity is
+                not positive
+        """
+        EnergyCalculator._check_inverse(potential_energy=potential_energy, mass=mass,
+                                        gravity=gravity)
+        return potential_energy / (mass * gravity)
+    
+    @staticmethod
+    def drop_height_for_impact_velocity(velocity: float, gravity: float = GRAVITY) -> float:
+        """
+        Height of a drop from rest that ends at a given impact speed.
+        
+        h = v² / (2 g), the inverse of v = √(2 g h)
+        
+        Args:
+            velocity: Impact velocity in meters per second (m/s)
+            gravity: Gravitational acceleration in m/s² (default: 9.81 m/s²)
+            
+        Returns:
+            Height in meters (m)
+            
+        Raises:
+            ValueError: If the velocity is negative or gravity is not positive
+        """
+        EnergyCalculator._check_inverse(velocity=velocity, gravity=gravity)
+        return velocity * velocity / (2 * gravity)
+    
+    @staticmethod
+    def velocity_for_total_energy(total_energy: float, mass: float, height: float,
+                                  gravity: float = GRAVITY) -> float:
+        """
+        Velocity a mass at a height needs for a given total mechanical energy.
+        
+        v = √(2 (E − m g h) / m)
+        
+        Args:
+            total_energy: Target total energy in Joules (J)
+            mass: Mass in kilograms (kg)
+            height: Height in meters (m)
+            gravity: Gravitational acceleration in m/s² (default: 9.81 m/s²)
+            
+        Returns:
+            Velocity in meters per second (m/s)
+            
+        Raises:
+            ValueError: If an input is out of its domain, or the potential
+                energy alone exceeds the target
+        """
+        EnergyCalculator._check_inverse(total_energy=total_energy, mass=mass,
+                                        height=height, gravity=gravity)
+        kinetic_energy = total_energy - mass * gravity * height
+        if kinetic_energy < 0:
+            raise ValueError(INVERSE_MESSAGES["unreachable"])
+        return math.sqrt(2 * kinetic_energy / mass)
+    
+    @staticmethod
+    def mass_for_total_energy(total_energy: float, velocity: float, height: float,
+                              gravity: float = GRAVITY) -> float:
+        """
+        Mass that has a given total mechanical energy at a velocity and height.
+        
+        m = E / (v²/2 + g h)
+        
+        Args:
+            total_energy: Target total energy in Joules (J)
+            velocity: Velocity in meters per second (m/s)
+            height: Height in meters (m)
+            gravity: Gravitational acceleration in m/s² (default: 9.81 m/s²)
+            
+        Returns:
+            Mass in kilograms (kg)
+            
+        Raises:
+            ValueError: If an input is out of its domain, or velocity and
+                height are both zero
+        """
+        EnergyCalculator._check_inverse(total_energy=total_energy, velocity=velocity,
+                                        height=height, gravity=gravity)
+        specific_energy = 0.5 * velocity ** 2 + gravity * height
+        if specific_energy == 0:
+            raise ValueError(INVERSE_MESSAGES["no_energy"])
+        return total_energy / specific_energy
+    
+    @staticmethod
+    def _inverse_prepare(on_invalid, out, **columns):
+        """
+        Float64 arrays, an output buffer of the broadcast shape and the
+        domain failures (name -> mask) for a batch inverse solver.
+        """
+        if on_invalid not in ("raise", "nan", "ignore"):
+            raise ValueError(f"Unknown on_invalid mode: {on_invalid!r}")
+        np = _numpy()
+        arrays = {name: np.asarray(values, dtype=np.float64)
+                  for name, values in columns.items()}
+        shape = np.broadcast_shapes(*(a.shape for a in arrays.values()))
+        if out is None:
+            out = np.empty(shape)
+        failures = {}
+        if on_invalid != "ignore":
+            for name, values in arrays.items():
+                positive = name in _POSITIVE
+                # One fmin reduction screens the common all-valid case
+                if values.size:
+                    low = np.fmin.reduce(values, axis=None)
+                    if low < 0 or (positive and low == 0):
+                        bad = values <= 0 if positive else values < 0
+                        failures[name] = np.broadcast_to(bad, shape)
+            if failures and on_invalid == "raise":
+                raise BatchValidationError(ValidationReport(shape, failures, INVERSE_MESSAGES))
+        return np, arrays, out, failures
+    
+    @staticmethod
+    def _inverse_finish(np, result, failures, on_invalid, name=None, bad=None):
+        """Add a failed-solution mask, then raise or mark bad rows as NaN."""
+        if on_invalid == "ignore":
+            return result
+        if bad is not None and np.any(bad):
+            failures = dict(failures)
+            failures[name] = bad
+        if failures:
+            report = ValidationReport(result.shape, failures, INVERSE_MESSAGES)
+            if on_invalid == "raise":
+                raise BatchValidationError(report)
+            result[report.mask] = float("nan")
+        return result
+    
+    @staticmethod
+    def velocity_from_kinetic_energy_batch(kinetic_energy, mass,
+                                           on_invalid: str = "raise", out=None):
+        """
+        Vectorized velocity_from_kinetic_energy over broadcast arrays.
+        
+        Args:
+            kinetic_energy: Kinetic energies in Joules (J)
+            mass: Masses in kilograms (kg)
+            on_invalid: "raise", "nan" or "ignore" (see kinetic_energy_batch)
+            out: Optional preallocated result array of the broadcast shape
+            
+        Returns:
+            NumPy array of velocities in m/s
+            
+        Raises:
+            BatchValidationError: If any row is out of its domain and
+                on_invalid is "raise"
+        """
+        np, a, out, failures = EnergyCalculator._inverse_prepare(
+            on_invalid, out, kinetic_energy=kinetic_energy, mass=mass)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            np.divide(a["kinetic_energy"], a["mass"], out=out)
+            out *= 2
+            np.sqrt(out, out=out)
+        return EnergyCalculator._inverse_finish(np, out, failures, on_invalid)
+    
+    @staticmethod
+    def height_from_potential_energy_batch(potential_energy, mass, gravity=GRAVITY,
+                                           on_invalid: str = "raise", out=None):
+        """
+        Vectorized height_from_potential_energy over broadcast arrays.
+        
+        Returns:
+            NumPy array of heights in m (see velocity_from_kinetic_energy_batch
+            for the other arguments and errors)
+        """
+        np, a, out, failures = EnergyCalculator._inverse_prepare(
+            on_invalid, out, potential_energy=potential_energy, mass=mass, gravity=gravity)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            np.multiply(a["mass"], a["gravity"], out=out)
+            np.divide(a["potential_energy"], out, out=out)
+        return EnergyCalculator._inverse_finish(np, out, failures, on_invalid)
+    
+    @staticmethod
+    def drop_height_for_impact_velocity_batch(velocity, gravity=GRAVITY,
+                                              on_invalid: str = "raise", out=None):
+        """
+        Vectorized drop_height_for_impact_velocity over broadcast arrays.
+        
+        Returns:
+            NumPy array of heights in m (see velocity_from_kinetic_energy_batch
+            for the other arguments and errors)
+        """
+        np, a, out, failures = EnergyCalculator._inverse_prepare(
+            on_invalid, out, velocity=velocity, gravity=gravity)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            np.multiply(a["velocity"], a["velocity"], out=out)
+            # 2g has the (usually scalar) shape of gravity, not of the result
+            np.divide(out, a["gravity"] * 2, out=out)
+        return EnergyCalculator._inverse_finish(np, out, failures, on_invalid)
+    
+    @staticmethod
+    def velocity_for_total_energy_batch(total_energy, mass, height, gravity=GRAVITY,
+                                        on_invalid: str = "raise", out=None):
+        """
+        Vectorized velocity_for_total_energy over broadcast arrays.
+        
+        Rows whose potential energy exceeds the target are reported (or set
+        to NaN) after the solve, so out may be partly written when a
+        BatchValidationError is raised for them.
+        
+        Returns:
+            NumPy array of velocities in m/s (see
+            velocity_from_kinetic_energy_batch for the other arguments and
+            errors)
+        """
+        np, a, out, failures = EnergyCalculator._inverse_prepare(
+            on_invalid, out, total_energy=total_energy, mass=mass, height=height,
+            gravity=gravity)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            np.multiply(a["mass"], a["gravity"], out=out)
+            out *= a["height"]
+            np.subtract(a["total_energy"], out, out=out)
+            unreachable = None
+            if on_invalid != "ignore" and out.size and np.fmin.reduce(out, axis=None) < 0:
+                unreachable = out < 0
+            out /= a["mass"]
+            out *= 2
+            np.sqrt(out, out=out)
+        return EnergyCalculator._inverse_finish(np, out, failures, on_invalid,
+                                                "unreachable", unreachable)
+    
+    @staticmethod
+    def mass_for_total_energy_batch(total_energy, velocity, height, gravity=GRAVITY,
+                                    on_invalid: str = "raise", out=None):
+        """
+        Vectorized mass_for_total_energy over broadcast arrays.
+        
+        Rows with zero velocity and height are reported after the solve
+        (see velocity_for_total_energy_batch).
+        
+        Returns:
+            NumPy array of masses in kg (see velocity_from_kinetic_energy_batch
+            for the other arguments and errors)
+        """
+        np, a, out, failures = EnergyCalculator._inverse_prepare(
+            on_invalid, out, total_energy=total_energy, velocity=velocity, height=height,
+            gravity=gravity)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Energy per kilogram: v²/2 + g h
+            np.multiply(a["velocity"], a["velocity"], out=out)
+            out *= 0.5
+            out += a["gravity"] * a["height"]
+            no_energy = None
+            if on_invalid != "ignore" and out.size and np.fmin.reduce(out, axis=None) <= 0:
+                no_energy = out == 0
+            np.divide(a["total_energy"], out, out=out)
+        return EnergyCalculator._inverse_finish(np, out, failures, on_invalid,
+                                                "no_energy", no_energy)
+
+
+def read_gravity() -> float:
+    """Prompt for gravity as a number or a body name such as "Moon"."""
+    import bodies
+    
+    names = ", ".join(body.name for body in bodies.quick_bodies())
+    gravity_input = input(
+        f"Enter gravitational acceleration (m/s²) or body ({names}) [default: 9.81]: "
+    ).strip()
+    return bodies.gravity_of(gravity_input) if gravity_input else EnergyCalculator.GRAVITY
 
 
 def interactive_mode():
@@ -115,8 +782,7 @@ def interactive_mode():
             try:
                 mass = float(input("Enter mass (kg): "))
                 height = float(input("Enter height (m): "))
-                gravity_input = input("Enter gravitational acceleration (m/s²) [default: 9.81]: ").strip()
-                gravity = float(gravity_input) if gravity_input else EnergyCalculator.GRAVITY
+                gravity = read_gravity()
                 pe = EnergyCalculator.potential_energy(mass, height, gravity)
                 print(f"\nPotential Energy = {pe:.2f} J")
             except ValueError as e:
@@ -127,8 +793,7 @@ def interactive_mode():
                 mass = float(input("Enter mass (kg): "))
                 velocity = float(input("Enter velocity (m/s): "))
                 height = float(input("Enter height (m): "))
-                gravity_input = input("Enter gravitational acceleration (m/s²) [default: 9.81]: ").strip()
-                gravity = float(gravity_input) if gravity_input else EnergyCalculator.GRAVITY
+                gravity = read_gravity()
                 
                 ke = EnergyCalculator.kinetic_energy(mass, velocity)
                 pe = EnergyCalculator.potential_energy(mass, height, gravity)
@@ -148,15 +813,516 @@ def interactive_mode():
             print("Invalid choice. Please try again.")
 
 
-def main():
+def _open_stream(path: str, mode: str, default):
+    """Open a file path, treating '-' as stdin/stdout."""
+    if path == "-":
+        return default
+    return open(path, mode, newline="", encoding="utf-8")
+
+
+# Scalar subcommand -> its positional inputs; all but kinetic take --gravity
+SCALAR_COMMANDS = {
+    "kinetic": ("mass", "velocity"),
+    "potential": ("mass", "height"),
+    "total": ("mass", "velocity", "height"),
+}
+
+
+def scalar_energy(command: str, values: list, gravity: float = EnergyCalculator.GRAVITY) -> float:
+    """
+    Compute the energy of one scalar subcommand.
+    
+    Args:
+        command: "kinetic", "potential" or "total"
+        values: The command's inputs in SCALAR_COMMANDS order
+        gravity: Gravitational acceleration in m/s² (ignored by kinetic)
+    
+    Returns:
+        Energy in Joules (J)
+    
+    Raises:
+        ValueError: If an input is negative
+    """
+    if command == "kinetic":
+        return EnergyCalculator.kinetic_energy(*values)
+    if command == "potential":
+        return EnergyCalculator.potential_energy(*values, gravity)
+    return EnergyCalculator.total_mechanical_energy(*values, gravity)
+
+
+def print_scalar(command: str, values: list, gravity: float = EnergyCalculator.GRAVITY) -> int:
+    """Print the energy of one scalar subcommand in Joules; returns the exit code."""
+    try:
+        result = scalar_energy(command, values, gravity)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(result)
+    return 0
+
+
+def run_scalar_command(args) -> int:
+    """Run the kinetic, potential or total subcommand."""
+    values = [getattr(args, name) for name in SCALAR_COMMANDS[args.command]]
+    return print_scalar(args.command, values, getattr(args, "gravity", EnergyCalculator.GRAVITY))
+
+
+def _pop_option(tokens: list, name: str, default=None):
+    """Remove the first ``NAME VALUE`` or ``NAME=VALUE`` from tokens and return VALUE."""
+    for i, token in enumerate(tokens):
+        if token == name and i + 1 < len(tokens):
+            value = tokens[i + 1]
+            del tokens[i:i + 2]
+            return value
+        if token.startswith(name + "="):
+            del tokens[i]
+            return token.partition("=")[2]
+    return default
+
+
+def _parse_scalar_argv(argv: list):
+    """
+    Parse the plain numeric forms of the scalar subcommands without
+    argparse, e.g. ``total 10 5 3 --gravity 1.62``.
+
+    Importing argparse costs several times more than the calculation, so
+    shell loops take this path. Anything else (help, body names, malformed
+    input) returns None and is left to argparse and its error messages.
+
+    Returns:
+        (command, values, gravity), or None
+    """
+    if not argv or argv[0] not in SCALAR_COMMANDS:
+        return None
+    command, rest = argv[0], list(argv[1:])
+    gravity = EnergyCalculator.GRAVITY
+    if command != "kinetic":
+        gravity = _pop_option(rest, "--gravity", gravity)
+    if len(rest) != len(SCALAR_COMMANDS[command]):
+        return None
+    try:
+        return command, [float(value) for value in rest], float(gravity)
+    except ValueError:
+        return None
+
+
+def run_batch_command(args) -> int:
+    """Run the streaming batch subcommand."""
+    import batch_stream
+    
+    import units as unit_registry
+    
+    try:
+        mapping = batch_stream.parse_column_spec(args.columns)
+        units = unit_registry.parse_spec(args.units) if args.units else None
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    
+    import columnar
+    
+    if columnar.is_manifest(args.input) or columnar.is_manifest(args.output):
+        if not (columnar.is_manifest(args.input) and columnar.is_manifest(args.output)):
+            print("Error: binary column mode needs .manifest.json paths for "
+                  "both --in and --out", file=sys.stderr)
+            return 2
+        if args.precision not in ("float64", "float32"):
+            print(f"Error: binary column mode computes in float64 or float32; use "
+                  f"CSV or JSON Lines for {args.precision} results", file=sys.stderr)
+            return 2
+        if args.cache:
+            print("Error: --cache applies to CSV and JSON Lines batches; hashing "
+                  "binary columns costs as much as computing them", file=sys.stderr)
+            return 2
+        try:
+            stats = columnar.run_columnar(
+                args.input, args.output, mapping,
+                chunk_size=args.chunk_size, gravity=args.gravity,
+                dtype=args.out_dtype, npy=args.npy, workers=args.workers,
+                units=units, precision=args.precision,
+            )
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        print(f"Processed {stats['rows']} rows ({stats['invalid']} invalid)",
+              file=sys.stderr)
+        if args.timings and "timings" in stats:
+            from parallel import format_timings
+            print(format_timings(stats["timings"]), file=sys.stderr)
+        return 0
+    in_format = args.in_format or batch_stream.detect_format(args.input)
+    out_format = args.out_format or batch_stream.detect_format(args.output, in_format)
+    
+    cache = None
+    if args.cache:
+        cache = _open_cache(args)
+        if cache is None:
+            return 2
+    in_stream = _open_stream(args.input, "r", sys.stdin)
+    out_stream = _open_stream(args.output, "w", sys.stdout)
+    try:
+        stats = batch_stream.run_batch(
+            in_stream, out_stream, mapping,
+            in_format=in_format, out_format=out_format,
+            chunk_size=args.chunk_size, gravity=args.gravity,
+            precision=args.precision, units=units, cache=cache,
+        )
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if in_stream is not sys.stdin:
+            in_stream.close()
+        if out_stream is not sys.stdout:
+            out_stream.close()
+        if cache is not None:
+            cache.close()
+    cached = f", {stats['cached_rows']} from the cache" if cache is not None else ""
+    print(f"Processed {stats['rows']} rows ({stats['invalid']} invalid{cached})",
+          file=sys.stderr)
+    return 0
+
+
+def _open_cache(args):
+    """Open the result cache named by --cache-dir/--max-size, or print why not."""
+    import result_cache
+    
+    try:
+        max_bytes = result_cache.parse_size(args.max_size) if args.max_size else None
+        return result_cache.ResultCache(args.cache_dir, max_bytes)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return None
+
+
+def run_cache_command(args) -> int:
+    """Run the cache stats and cache prune subcommands."""
+    import json
+    
+    import result_cache
+    
+    cache = _open_cache(args)
+    if cache is None:
+        return 2
+    with cache:
+        if args.action == "stats":
+            print(json.dumps(cache.stats(), indent=2))
+            return 0
+        if args.all:
+            removed = cache.clear()
+        else:
+            removed = cache.prune(older_than=args.older_than * 86400
+                                  if args.older_than is not None else None)
+        print(f"Removed {removed['entries']} entries "
+              f"({result_cache.format_size(removed['bytes'])}); "
+              f"{result_cache.format_size(cache.stats()['bytes'])} remain")
+    return 0
+
+
+def run_simulate_command(args) -> int:
+    """Run the free-fall simulation subcommand and print the drift report."""
+    import simulation
+    
+    np = _numpy()
+    heights = np.linspace(0.0, args.height, args.particles)
+    names = list(simulation.INTEGRATORS) if args.integrator == "all" else [args.integrator]
+    try:
+        reports = simulation.compare_integrators(
+            args.mass, heights, args.velocity, args.gravity, dt=args.dt,
+            steps=args.steps, sample_every=args.sample_every,
+            integrators=names, block_size=args.block_size)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    print(f"{args.particles} particles, {args.steps} steps of {args.dt} s")
+    print(simulation.format_drift_report(reports.values()))
+    return 0
+
+
+def run_sweep_command(args) -> int:
+    """Run the parameter sweep subcommand."""
+    import json
+    
+    import sweep
+    
+    try:
+        axes = [sweep.parse_axis(name, getattr(args, name)) for name in sweep.AXES]
+        grid = sweep.Sweep(*axes, chunk_size=args.chunk_size)
+        fields = args.fields.split(",") if args.fields else None
+        unknown = set(fields or ()) - set(sweep.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}")
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    
+    stats = sweep.SweepStats(args.stats_field)
+    try:
+        if args.output is None:
+            grid.run(stats)
+        elif args.output.lower().endswith(".manifest.json"):
+            sweep.write_columns(grid, args.output, fields, dtype=args.out_dtype,
+                                npy=args.npy, reducers=(stats,))
+        else:
+            import batch_stream
+            
+            out_format = args.out_format or batch_stream.detect_format(args.output)
+            out_stream = _open_stream(args.output, "w", sys.stdout)
+            try:
+                sweep.write_text(grid, out_stream, out_format, fields, reducers=(stats,))
+            finally:
+                if out_stream is not sys.stdout:
+                    out_stream.close()
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    shape = " × ".join(str(n) for n in grid.shape)
+    print(f"Swept {grid.size} points ({shape})", file=sys.stderr)
+    print(json.dumps(stats.result(), indent=2),
+          file=sys.stdout if args.output is None else sys.stderr)
+    return 0
+
+
+def run_serve_command(args) -> int:
+    """Run the compute daemon until it is stopped."""
+    import compute_daemon
+    
+    return compute_daemon.serve(args.socket)
+
+
+def run_client_command(args) -> int:
+    """Send one calculation, or the rows on stdin, to a running daemon."""
+    import daemon_client
+    
+    inputs = SCALAR_COMMANDS[args.operation]
+    if args.values and len(args.values) != len(inputs):
+        print(f"Error: {args.operation} takes {len(inputs)} values "
+              f"({', '.join(inputs)}) or none to read rows from stdin", file=sys.stderr)
+        return 2
+    return daemon_client.run_client(args.socket, args.operation, args.values or None,
+                                    args.gravity)
+
+
+def _gravity_arg(value: str) -> float:
+    import argparse
+    import bodies
+    
+    try:
+        return bodies.gravity_of(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def add_cache_options(parser) -> None:
+    """Add the result cache location and size options to a subparser."""
+    parser.add_argument("--cache-dir",
+                        help="Result cache directory (default: $ENERGY_CALCULATOR_CACHE, "
+                             "else ~/.cache/energy-calculator)")
+    parser.add_argument("--max-size",
+                        help="Size limit of the result cache, e.g. 500M or 2G; it is "
+                             "saved with the cache (default: the saved limit, else 1G)")
+
+
+def build_parser():
+    """Build the command-line argument parser."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        prog="energy_calculator.py",
+        description="Kinetic and potential energy calculator in SI units. "
+                    "Run without arguments for interactive mode.",
+    )
+    parser.add_argument("--stats", action="store_true",
+                        help="Instrument the calculator and print a summary of "
+                             "calls, rows, validation failures and latencies "
+                             "to stderr on exit")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    subparsers.add_parser("interactive", help="Interactive calculator (default)")
+    
+    units = {"mass": "kg", "velocity": "m/s", "height": "m"}
+    for command, fields in SCALAR_COMMANDS.items():
+        scalar = subparsers.add_parser(
+            command, help=f"Print the {'total mechanical' if command == 'total' else command} "
+                          "energy in Joules for one set of inputs")
+        for field in fields:
+            scalar.add_argument(field, type=float, help=f"{field.capitalize()} in {units[field]}")
+        if command != "kinetic":
+            scalar.add_argument("--gravity", type=_gravity_arg,
+                                default=EnergyCalculator.GRAVITY,
+                                help="Gravity in m/s² or a body name (default: 9.81)")
+        scalar.set_defaults(handler=run_scalar_command)
+    
+    serve = subparsers.add_parser(
+        "serve", help="Run a compute daemon on a Unix socket for repeated calls")
+    serve.add_argument("--socket", required=True, help="Path of the Unix socket to listen on")
+    serve.set_defaults(handler=run_serve_command)
+    
+    client = subparsers.add_parser(
+        "client", help="Compute through a running daemon: one set of inputs, "
+                       "or rows of inputs read from stdin")
+    client.add_argument("--socket", required=True, help="Path of the daemon's Unix socket")
+    client.add_argument("operation", choices=tuple(SCALAR_COMMANDS),
+                        help="Energy to compute")
+    client.add_argument("values", type=float, nargs="*",
+                        help="The inputs as for the scalar subcommands; omit them to "
+                             "read one row per line from stdin")
+    client.add_argument("--gravity", type=_gravity_arg, default=EnergyCalculator.GRAVITY,
+                        help="Gravity in m/s² or a body name for rows without a "
+                             "gravity value (default: 9.81)")
+    client.set_defaults(handler=run_client_command)
+    
+    batch = subparsers.add_parser(
+        "batch", help="Stream CSV/JSONL records or memory-mapped binary "
+                      "columns through the batch calculator")
+    batch.add_argument("--in", dest="input", default="-",
+                       help="Input file, '-' for stdin (default), or a "
+                            ".manifest.json column set")
+    batch.add_argument("--out", dest="output", default="-",
+                       help="Output file, '-' for stdout (default), or a "
+                            ".manifest.json column set")
+    batch.add_argument("--columns", default="mass,velocity,height,gravity?",
+                       help="Input columns as mass,velocity,height[,gravity] "
+                            "or role=name pairs; map body=NAME to take gravity "
+                            "from a column of body names. A trailing ? marks a "
+                            "gravity or body column used only when present "
+                            "(default: mass,velocity,height,gravity?)")
+    batch.add_argument("--in-format", choices=("csv", "jsonl"),
+                       help="Input format (default: from extension, else csv)")
+    batch.add_argument("--out-format", choices=("csv", "jsonl"),
+                       help="Output format (default: from extension, else input format)")
+    batch.add_argument("--chunk-size", type=int, default=65536,
+                       help="Rows per chunk (default: 65536)")
+    batch.add_argument("--gravity", type=_gravity_arg, default=EnergyCalculator.GRAVITY,
+                       help="Gravity in m/s² or a body name, used when no gravity "
+                            "or body column is given (default: 9.81)")
+    batch.add_argument("--precision", default="float64",
+                       choices=("float64", "float32", "fraction", "decimal"),
+                       help="Arithmetic: float32 for fast screening, fraction or "
+                            "decimal for exact results (CSV/JSONL only; binary "
+                            "column sets take float64 or float32) (default: float64)")
+    batch.add_argument("--units",
+                       help="Units as role=unit pairs, e.g. mass=lb,velocity=mph,"
+                            "energy=kJ; 'energy' sets all three results. Columns "
+                            "may also declare units in their header, e.g. mass[lb] "
+                            "(default: SI)")
+    batch.add_argument("--cache", action="store_true",
+                       help="Reuse the output of input chunks computed before, from "
+                            "the on-disk result cache, and store new ones")
+    add_cache_options(batch)
+    batch.add_argument("--out-dtype", choices=("float64", "float32"), default="float64",
+                       help="Result dtype for binary column output (default: float64)")
+    batch.add_argument("--npy", action="store_true",
+                       help="Write binary column output as .npy files")
+    batch.add_argument("--workers", type=int, default=1,
+                       help="Worker processes for binary column input (default: 1)")
+    batch.add_argument("--timings", action="store_true",
+                       help="Print a per-chunk timing breakdown for parallel runs")
+    batch.set_defaults(handler=run_batch_command)
+    
+    cache = subparsers.add_parser("cache", help="Inspect or prune the batch result cache")
+    cache_actions = cache.add_subparsers(dest="action", required=True)
+    cache_stats = cache_actions.add_parser(
+        "stats", help="Print the size, entry count and hit rate of the cache as JSON")
+    add_cache_options(cache_stats)
+    cache_prune = cache_actions.add_parser(
+        "prune", help="Evict least recently used entries down to the size limit")
+    add_cache_options(cache_prune)
+    cache_prune.add_argument("--older-than", type=float, metavar="DAYS",
+                             help="Also evict entries unused for this many days")
+    cache_prune.add_argument("--all", action="store_true", help="Empty the cache")
+    cache.set_defaults(handler=run_cache_command)
+    
+    simulate = subparsers.add_parser(
+        "simulate", help="Simulate many falling particles and report the "
+                         "energy drift of each integrator")
+    simulate.add_argument("--particles", type=int, default=1_000_000,
+                          help="Number of particles (default: 1000000)")
+    simulate.add_argument("--steps", type=int, default=1000,
+                          help="Time steps to take (default: 1000)")
+    simulate.add_argument("--dt", type=float, default=1e-3,
+                          help="Time step in seconds (default: 0.001)")
+    simulate.add_argument("--mass", type=float, default=1.0,
+                          help="Mass of every particle in kg (default: 1)")
+    simulate.add_argument("--height", type=float, default=100.0,
+                          help="Particles start evenly spread from 0 to this "
+                               "height in m (default: 100)")
+    simulate.add_argument("--velocity", type=float, default=0.0,
+                          help="Initial vertical velocity in m/s, positive "
+                               "upward (default: 0)")
+    simulate.add_argument("--gravity", type=_gravity_arg, default=EnergyCalculator.GRAVITY,
+                          help="Gravity in m/s² or a body name (default: 9.81)")
+    simulate.add_argument("--integrator", default="all",
+                          choices=("all", "euler", "semi-implicit-euler", "velocity-verlet"),
+                          help="Integrator to run (default: all)")
+    simulate.add_argument("--sample-every", type=int, default=10,
+                          help="Record energies every N steps (default: 10)")
+    simulate.add_argument("--block-size", type=int, default=1 << 14,
+                          help="Particles advanced together per block (default: 16384)")
+    simulate.set_defaults(handler=run_simulate_command)
+    
+    sweep = subparsers.add_parser(
+        "sweep", help="Evaluate a mass × velocity × height × gravity grid in "
+                      "bounded chunks")
+    axis_help = ("linspace:START:STOP:NUM, logspace:START:STOP:NUM (powers of 10) "
+                 "or a comma-separated list")
+    sweep.add_argument("--mass", required=True, help=f"Mass axis in kg: {axis_help}")
+    sweep.add_argument("--velocity", required=True, help=f"Velocity axis in m/s: {axis_help}")
+    sweep.add_argument("--height", required=True, help=f"Height axis in m: {axis_help}")
+    sweep.add_argument("--gravity", default=str(EnergyCalculator.GRAVITY),
+                       help=f"Gravity axis in m/s²: {axis_help}; body names "
+                            "or 'bodies' for all bodies (default: 9.81)")
+    sweep.add_argument("--out", dest="output",
+                       help="Write every point to a CSV/JSONL file, '-' for stdout, "
+                            "or a .manifest.json column set (default: statistics only)")
+    sweep.add_argument("--out-format", choices=("csv", "jsonl"),
+                       help="Text output format (default: from extension, else csv)")
+    sweep.add_argument("--fields",
+                       help="Comma-separated output columns (default: all parameters "
+                            "and results)")
+    sweep.add_argument("--stats-field", default="total_energy",
+                       choices=("kinetic_energy", "potential_energy", "total_energy"),
+                       help="Result summarized in the statistics (default: total_energy)")
+    sweep.add_argument("--chunk-size", type=int, default=1 << 20,
+                       help="Maximum points per chunk (default: 1048576)")
+    sweep.add_argument("--out-dtype", choices=("float64", "float32"), default="float64",
+                       help="Dtype for binary column output (default: float64)")
+    sweep.add_argument("--npy", action="store_true",
+                       help="Write binary column output as .npy files")
+    sweep.set_defaults(handler=run_sweep_command)
+    return parser
+
+
+def main(argv=None):
     """Main entry point."""
-    if len(sys.argv) == 1:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
         interactive_mode()
-    else:
-        print("Command-line mode:")
-        print("Usage: python energy_calculator.py")
-        print("  Run without arguments to use interactive mode.")
+        return 0
+    scalar = _parse_scalar_argv(argv)
+    if scalar is not None:
+        return print_scalar(*scalar)
+    if argv[0] == "client":
+        import daemon_client
+        
+        call = daemon_client.parse_client_argv(argv[1:])
+        if call is not None:
+            return daemon_client.run_client(*call)
+    
+    args = build_parser().parse_args(argv)
+    if args.stats:
+        import metrics
+        metrics.enable(EnergyCalculator)
+    try:
+        if args.command in (None, "interactive"):
+            interactive_mode()
+            return 0
+        return args.handler(args)
+    finally:
+        if args.stats:
+            print(metrics.summary(), file=sys.stderr)
+            metrics.disable()
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
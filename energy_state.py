@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Compact records of per-object energy state
+
+EnergyState is a single mutable record with ``__slots__``: no per-instance
+dict, so it costs 80 bytes plus its float objects instead of the few
+hundred bytes of an equivalent dict or plain object.
+
+EnergyStateArray stores many states in one ``array('d')``, six doubles
+(48 bytes) per state laid out record by record::
+
+    mass, velocity, height, gravity, kinetic_energy, potential_energy
+
+Indexing returns a small view onto the buffer rather than a stored
+record (a slice returns a new array holding copies of its records), and
+with NumPy installed columns() exposes each field as a strided,
+zero-copy ndarray that the EnergyCalculator batch functions
+accept directly, as inputs or as ``out=`` targets::
+
+    states = EnergyStateArray.from_columns(mass, velocity, height)
+    EnergyCalculator.total_mechanical_energy_batch(**states.columns())
+    states.compute()             # fills kinetic_energy/potential_energy in place
+    states[3].total_energy
+
+An array cannot grow while NumPy views of it are alive (array('d')
+refuses to resize an exported buffer), so drop the views before append().
+"""
+
+import math
+import operator
+from array import array
+from typing import Dict, Iterable, Iterator, Tuple, Union
+
+from energy_calculator import BatchValidationError, EnergyCalculator, _numpy
+
+INPUTS = ("mass", "velocity", "height", "gravity")
+RESULTS = ("kinetic_energy", "potential_energy")
+FIELDS = INPUTS + RESULTS
+STATE_SIZE = len(FIELDS) * array("d").itemsize
+_NAN = float("nan")
+
+
+class EnergyState:
+    """
+    The energy state of one object, in SI units.
+
+    The energies are NaN until compute() is called; total_energy is derived
+    from them on access.
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self, mass: float, velocity: float, height: float,
+                 gravity: float = EnergyCalculator.GRAVITY,
+                 kinetic_energy: float = _NAN, potential_energy: float = _NAN):
+        self.mass = mass
+        self.velocity = velocity
+        self.height = height
+        self.gravity = gravity
+        self.kinetic_energy = kinetic_energy
+        self.potential_energy = potential_energy
+
+    @property
+    def total_energy(self) -> float:
+        """Kinetic plus potential energy in Joules (J)."""
+        return self.kinetic_energy + self.potential_energy
+
+    def compute(self) -> "EnergyState":
+        """
+        Compute the energies from the inputs with the scalar API.
+
+        Returns:
+            The state itself, for chaining
+
+        Raises:
+            ValueError: If an input is negative
+        """
+        self.kinetic_energy = EnergyCalculator.kinetic_energy(self.mass, self.velocity)
+        self.potential_energy = EnergyCalculator.potential_energy(
+            self.mass, self.height, self.gravity)
+        return self
+
+    def as_tuple(self) -> Tuple[float, ...]:
+        """Field values in FIELDS order."""
+        return tuple(getattr(self, name) for name in FIELDS)
+
+    def __eq__(self, other):
+        if not isinstance(other, (EnergyState, StateView)):
+            return NotImplemented
+        # Energies are NaN until computed; NaN fields count as equal
+        return all(a == b or (a != a and b != b)
+                   for a, b in zip(self.as_tuple(), other.as_tuple()))
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in FIELDS)
+        return f"{type(self).__name__}({fields})"
+
+
+def _record(state) -> Tuple[float, ...]:
+    """All six fields of a state, view or tuple; missing energies are NaN."""
+    values = state.as_tuple() if hasattr(state, "as_tuple") else tuple(state)
+    if len(values) == len(INPUTS):
+        values += (_NAN, _NAN)
+    if len(values) != len(FIELDS):
+        raise ValueError(f"A state has {len(INPUTS)} or {len(FIELDS)} fields")
+    return values
+
+
+def _field(index: int, doc: str) -> property:
+    def get(view):
+        return view._buffer[view._offset + index]
+
+    def set(view, value):
+        view._buffer[view._offset + index] = value
+
+    return property(get, set, doc=doc)
+
+
+class StateView:
+    """
+    A live view of one row of an EnergyStateArray.
+
+    Reads and writes go straight to the array's buffer; use copy() for a
+    detached EnergyState.
+    """
+
+    __slots__ = ("_buffer", "_offset")
+
+    def __init__(self, buffer: array, row: int):
+        self._buffer = buffer
+        self._offset = row * len(FIELDS)
+
+    mass = _field(0, "Mass in kilograms (kg)")
+    velocity = _field(1, "Velocity in meters per second (m/s)")
+    height = _field(2, "Height in meters (m)")
+    gravity = _field(3, "Gravitational acceleration in m/s²")
+    kinetic_energy = _field(4, "Kinetic energy in Joules (J)")
+    potential_energy = _field(5, "Potential energy in Joules (J)")
+
+    total_energy = EnergyState.total_energy
+    as_tuple = EnergyState.as_tuple
+    __eq__ = EnergyState.__eq__
+    __hash__ = None
+    __repr__ = EnergyState.__repr__
+
+    def copy(self) -> EnergyState:
+        """A detached EnergyState with this row's values."""
+        return EnergyState(*self.as_tuple())
+
+
+class EnergyStateArray:
+    """
+    A growable collection of energy states in one array('d') buffer.
+
+    Args:
+        buffer: Optional array('d') (or iterable of floats) holding whole
+            records in FIELDS order; it is used without copying when it is
+            already an array('d')
+
+    Raises:
+        ValueError: If the buffer length is not a whole number of records
+    """
+
+    def __init__(self, buffer: Iterable[float] = ()):
+        if not isinstance(buffer, array) or buffer.typecode != "d":
+            buffer = array("d", buffer)
+        if len(buffer) % len(FIELDS):
+            raise ValueError(f"Buffer length must be a multiple of {len(FIELDS)}")
+        self._buffer = buffer
+
+    @classmethod
+    def from_states(cls, states: Iterable) -> "EnergyStateArray":
+        """Pack EnergyState records (or views, or field tuples) into an array."""
+        result = cls()
+        for state in states:
+            result.append(state)
+        return result
+
+    @classmethod
+    def from_columns(cls, mass, velocity, height,
+                     gravity=EnergyCalculator.GRAVITY) -> "EnergyStateArray":
+        """
+        Build an array from input columns, broadcast against each other.
+
+        Energies start as NaN. Uses NumPy to interleave the columns.
+        """
+        np = _numpy()
+        columns = np.broadcast_arrays(*(np.asarray(values, dtype=np.float64)
+                                        for values in (mass, velocity, height, gravity)))
+        if columns[0].ndim != 1:
+            raise ValueError("State columns must be one-dimensional")
+        records = np.full((columns[0].size, len(FIELDS)), _NAN)
+        for i, values in enumerate(columns):
+            records[:, i] = values
+        return cls(array("d", records.tobytes()))
+
+    @property
+    def buffer(self) -> array:
+        """The underlying array('d'), records back to back."""
+        return self._buffer
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the stored records (STATE_SIZE per state)."""
+        return len(self._buffer) * self._buffer.itemsize
+
+    def __len__(self) -> int:
+        return len(self._buffer) // len(FIELDS)
+
+    def _row(self, row) -> int:
+        try:
+            row = operator.index(row)
+        except TypeError:
+            raise TypeError(f"state indices must be integers, not {type(row).__name__}") from None
+        rows = len(self)
+        if not -rows <= row < rows:
+            raise IndexError("state index out of range")
+        return row % rows
+
+    def __getitem__(self, row: Union[int, slice]) -> Union[StateView, "EnergyStateArray"]:
+        if isinstance(row, slice):
+            # A slice copies its records into a new array, as list slices do
+            width = len(FIELDS)
+            start, stop, step = row.indices(len(self))
+            if step == 1:
+                return EnergyStateArray(self._buffer[start * width:max(stop, start) * width])
+            result = EnergyStateArray()
+            for index in range(start, stop, step):
+                result._buffer.extend(self._buffer[index * width:(index + 1) * width])
+            return result
+        return StateView(self._buffer, self._row(row))
+
+    def __setitem__(self, row: int, state) -> None:
+        offset = self._row(row) * len(FIELDS)
+        self._buffer[offset:offset + len(FIELDS)] = array("d", _record(state))
+
+    def __iter__(self) -> Iterator[StateView]:
+        for row in range(len(self)):
+            yield StateView(self._buffer, row)
+
+    def append(self, state) -> None:
+        """
+        Append an EnergyState, a view, or a tuple of four inputs or all six
+        fields (missing energies are NaN).
+        """
+        self._buffer.extend(_record(state))
+
+    def columns(self, *names: str) -> Dict[str, object]:
+        """
+        Zero-copy NumPy views of fields, strided over the records.
+
+        Args:
+            *names: Field names (default: the four inputs, ready to pass as
+                keyword arguments to the batch functions)
+
+        Returns:
+            Dict mapping each name to a writable float64 ndarray view
+
+        Raises:
+            KeyError: For unknown field names
+        """
+        np = _numpy()
+        records = np.frombuffer(self._buffer, dtype=np.float64).reshape(-1, len(FIELDS))
+        return {name: records[:, FIELDS.index(name)] for name in names or INPUTS}
+
+    def compute(self, on_invalid: str = "raise") -> "EnergyStateArray":
+        """
+        Compute every state's energies into its record.
+
+        Uses the batch functions with the energy fields as ``out=`` when
+        NumPy is available, and the scalar API otherwise.
+
+        Args:
+            on_invalid: "raise" or "nan" (see kinetic_energy_batch)
+
+        Returns:
+            The array itself, for chaining
+
+        Raises:
+            BatchValidationError: If a state is invalid and on_invalid is
+                "raise" (ValueError for the first one without NumPy)
+        """
+        try:
+            np = _numpy()
+        except ImportError:
+            np = None
+        if np is None:
+            for view in self:
+                try:
+                    view.kinetic_energy = EnergyCalculator.kinetic_energy(
+                        view.mass, view.velocity)
+                    view.potential_energy = EnergyCalculator.potential_energy(
+                        view.mass, view.height, view.gravity)
+                except ValueError:
+                    if on_invalid == "raise":
+                        raise
+                    view.kinetic_energy = view.potential_energy = math.nan
+            return self
+        columns = self.columns(*FIELDS)
+        if on_invalid == "raise":
+            # Validate everything before writing anything
+            report = EnergyCalculator.validate_batch(
+                **{name: columns[name] for name in INPUTS})
+            if not report.ok:
+                raise BatchValidationError(report)
+            on_invalid = "ignore"
+        EnergyCalculator.kinetic_energy_batch(
+            columns["mass"], columns["velocity"], on_invalid=on_invalid,
+            out=columns["kinetic_energy"])
+        EnergyCalculator.potential_energy_batch(
+            columns["mass"], columns["height"], columns["gravity"],
+            on_invalid=on_invalid, out=columns["potential_energy"])
+        return self
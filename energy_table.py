@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Columnar datasets with cached, incrementally recomputed energy columns
+
+An EnergyTable holds mass, velocity, height and gravity as float64
+columns of equal length. Kinetic, potential and total energy are derived
+columns: computed on first access, cached, and recomputed only where
+their inputs changed. Rows are grouped into chunks of ``chunk_size``; each
+derived column keeps one dirty flag per chunk, and writing to an input
+marks the chunks it touched dirty in every column that depends on it:
+
+    kinetic_energy    mass, velocity
+    potential_energy  mass, height, gravity
+    total_energy      kinetic_energy, potential_energy
+
+So setting gravity recomputes PE and the total but reuses KE, and editing
+1% of the velocities recomputes KE (and the total) only in the chunks
+holding those rows. Consecutive dirty chunks are recomputed with one batch
+call, so a full recompute costs the same as total_mechanical_energy_batch.
+
+Columns read back from a table are read-only views; change them through
+the table so that the dirty flags stay correct::
+
+    table = EnergyTable(mass, velocity, height)
+    table["total_energy"]                     # computes KE, PE and total
+    table["gravity"] = 1.62                   # PE and total are now stale
+    table["velocity", rows] = new_velocities  # only the touched chunks
+"""
+
+from typing import Dict, List, Tuple
+
+from energy_calculator import BatchValidationError, EnergyCalculator, _numpy
+
+INPUTS = ("mass", "velocity", "height", "gravity")
+# Derived column -> the columns it is computed from, in evaluation order
+DEPENDENCIES = {
+    "kinetic_energy": ("mass", "velocity"),
+    "potential_energy": ("mass", "height", "gravity"),
+    "total_energy": ("kinetic_energy", "potential_energy"),
+}
+DERIVED = tuple(DEPENDENCIES)
+COLUMNS = INPUTS + DERIVED
+DEFAULT_CHUNK_SIZE = 65536
+
+
+def _dependents(name: str) -> Tuple[str, ...]:
+    """Derived columns that depend on a column, directly or transitively."""
+    found = []
+    for derived, inputs in DEPENDENCIES.items():
+        if name in inputs or any(dep in inputs for dep in found):
+            found.append(derived)
+    return tuple(found)
+
+
+# Input column -> derived columns to invalidate when it changes
+INVALIDATES = {name: _dependents(name) for name in INPUTS}
+
+
+class EnergyTable:
+    """
+    Array-backed input columns with lazily computed energy columns.
+
+    Args:
+        mass: Masses in kilograms (kg)
+        velocity: Velocities in meters per second (m/s)
+        height: Heights in meters (m)
+        gravity: Gravitational acceleration(s) in m/s² (default: 9.81)
+        chunk_size: Rows per chunk, the unit of invalidation
+        on_invalid: "raise" to reject negative values when they are set
+            (with BatchValidationError), or "nan" to accept them and give
+            their rows NaN energies
+
+    Inputs are broadcast to one length and copied, so the table owns its
+    data.
+
+    Raises:
+        BatchValidationError: If on_invalid is "raise" and an input is
+            negative
+        ValueError: For a bad chunk size or on_invalid mode, or inputs that
+            do not broadcast to one dimension
+    """
+
+    def __init__(self, mass, velocity, height, gravity=EnergyCalculator.GRAVITY,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, on_invalid: str = "raise"):
+        if chunk_size <= 0:
+            raise ValueError("Chunk size must be positive")
+        if on_invalid not in ("raise", "nan"):
+            raise ValueError(f"Unknown on_invalid mode: {on_invalid!r}")
+        np = _numpy()
+        self.chunk_size = chunk_size
+        self.on_invalid = on_invalid
+        inputs = {name: np.asarray(values, dtype=np.float64) for name, values in
+                  zip(INPUTS, (mass, velocity, height, gravity))}
+        shape = np.broadcast_shapes(*(values.shape for values in inputs.values()))
+        if len(shape) != 1:
+            raise ValueError("Table columns must be one-dimensional")
+        self._check(inputs)
+        self._columns = {name: np.array(np.broadcast_to(values, shape))
+                         for name, values in inputs.items()}
+        self.rows = shape[0]
+        self.chunks = -(-self.rows // chunk_size)
+        # Derived columns are allocated on first access, all chunks dirty
+        self._dirty = {name: np.ones(self.chunks, dtype=bool) for name in DERIVED}
+        self.recomputed = {name: 0 for name in DERIVED}
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, name: str):
+        """A read-only view of a column, computing stale chunks first."""
+        if name in DEPENDENCIES:
+            self._refresh(name)
+        elif name not in INPUTS:
+            raise KeyError(f"Unknown column: {name!r}")
+        view = self._columns[name].view()
+        view.flags.writeable = False
+        return view
+
+    def __setitem__(self, key, values) -> None:
+        """Set a whole input column (``table[name]``) or some of its rows
+        (``table[name, rows]``); rows may be a slice, indices or a mask."""
+        name, rows = key if isinstance(key, tuple) else (key, slice(None))
+        self.set_column(name, values, rows)
+
+    def set_column(self, name: str, values, rows=slice(None)) -> None:
+        """
+        Write values into rows of an input column and invalidate the chunks
+        of the derived columns that depend on it.
+
+        Args:
+            name: Input column name
+            values: New values, broadcast against the selected rows
+            rows: Slice, integer indices or boolean mask (default: all rows)
+
+        Raises:
+            KeyError: For derived or unknown column names
+            BatchValidationError: If on_invalid is "raise" and a value is
+                negative; the column is left unchanged (row numbers in the
+                report count the values given)
+            IndexError: If rows are out of range
+        """
+        if name not in INPUTS:
+            raise KeyError(f"Only input columns can be set, not {name!r}")
+        np = _numpy()
+        values = np.asarray(values, dtype=np.float64)
+        self._check({name: values})
+        column = self._columns[name]
+        column[rows] = values
+        chunks = self._touched_chunks(np, rows)
+        for derived in INVALIDATES[name]:
+            self._dirty[derived][chunks] = True
+
+    def dirty_chunks(self, name: str) -> List[int]:
+        """Indices of the chunks of a derived column awaiting recomputation."""
+        return _numpy().flatnonzero(self._dirty[name]).tolist()
+
+    def as_dict(self) -> Dict[str, object]:
+        """Every column, inputs and refreshed energies, as read-only arrays."""
+        return {name: self[name] for name in COLUMNS}
+
+    def _check(self, inputs: dict) -> None:
+        if self.on_invalid == "raise":
+            report = EnergyCalculator.validate_batch(**inputs)
+            if not report.ok:
+                raise BatchValidationError(report)
+
+    def _touched_chunks(self, np, rows):
+        """Chunk indices covering the selected rows (a slice when contiguous)."""
+        if not self.rows:
+            return slice(0, 0)
+        if isinstance(rows, slice):
+            start, stop, step = rows.indices(self.rows)
+            if step == 1:
+                if start >= stop:
+                    return slice(0, 0)
+                return slice(start // self.chunk_size, (stop - 1) // self.chunk_size + 1)
+            rows = np.arange(start, stop, step)
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        # The column assignment already rejected out-of-range indices
+        return np.unique(np.atleast_1d(rows) % self.rows // self.chunk_size)
+
+    def _refresh(self, name: str) -> None:
+        """Recompute the dirty chunks of a derived column, dependencies first."""
+        np = _numpy()
+        if name not in self._columns:
+            self._columns[name] = np.empty(self.rows)
+        dirty = self._dirty[name]
+        if not dirty.any():
+            return
+        for dependency in DEPENDENCIES[name]:
+            if dependency in DEPENDENCIES:
+                self._refresh(dependency)
+        out = self._columns[name]
+        arguments = [self._columns[dependency] for dependency in DEPENDENCIES[name]]
+        # Runs of consecutive dirty chunks: edges where the flag changes
+        edges = np.flatnonzero(np.diff(dirty, prepend=False, append=False))
+        for first, last in zip(edges[::2].tolist(), edges[1::2].tolist()):
+            rows = slice(first * self.chunk_size, min(last * self.chunk_size, self.rows))
+            self._compute(np, name, [values[rows] for values in arguments], out[rows])
+            self.recomputed[name] += last - first
+        dirty[:] = False
+
+    def _compute(self, np, name: str, arguments: list, out) -> None:
+        if name == "total_energy":
+            np.add(*arguments, out=out)
+            return
+        # Inputs were validated when set; "nan" mode marks the bad rows
+        on_invalid = "ignore" if self.on_invalid == "raise" else "nan"
+        if name == "kinetic_energy":
+            EnergyCalculator.kinetic_energy_batch(*arguments, on_invalid=on_invalid, out=out)
+        else:
+            EnergyCalculator.potential_energy_batch(*arguments, on_invalid=on_invalid,
+                                                    out=out)
@@ -3,6 +3,8 @@
 Example usage of the Energy Calculator
 """
 
+import bodies
+import units
 from energy_calculator import EnergyCalculator
 
 print("=" * 60)
@@ -37,7 +39,7 @@ print("\n3. POTENTIAL ENERGY EXAMPLE (Moon)")
 print("-" * 60)
 mass = 10  # kg
 height = 50  # m
-gravity_moon = 1.62  # m/s²
+gravity_moon = bodies.get_body("Moon").gravity  # m/s²
 pe_moon = EnergyCalculator.potential_energy(mass, height, gravity_moon)
 print(f"   Mass: {mass} kg")
 print(f"   Height: {height} m")
@@ -80,8 +82,8 @@ print(f"      Kinetic Energy = {initial_ke:.2f} J")
 print(f"      Total Energy = {initial_total:.2f} J")
 
 # At ground level, all PE converts to KE
-# v = √(2gh)
-final_velocity = (2 * 9.81 * initial_height) ** 0.5
+# v = √(2 KE / m)
+final_velocity = EnergyCalculator.velocity_from_kinetic_energy(initial_total, mass)
 final_ke = EnergyCalculator.kinetic_energy(mass, final_velocity)
 final_pe = EnergyCalculator.potential_energy(mass, 0)
 final_total = final_ke + final_pe
@@ -109,12 +111,25 @@ pe = EnergyCalculator.potential_energy(mass, height)
 total = EnergyCalculator.total_mechanical_energy(mass, velocity, height)
 
 print(f"   Vehicle: Car (mass = {mass} kg)")
-print(f"   Velocity: {velocity} m/s ({velocity * 3.6:.0f} km/h)")
+print(f"   Velocity: {velocity} m/s ({units.convert(velocity, 'm/s', 'km/h'):.0f} km/h)")
 print(f"   Height: {height} m")
 print(f"   ")
-print(f"   Kinetic Energy = {ke:,.0f} J ({ke/1000:.1f} kJ)")
-print(f"   Potential Energy = {pe:,.0f} J ({pe/1000:.1f} kJ)")
-print(f"   Total Mechanical Energy = {total:,.0f} J ({total/1000:.1f} kJ)")
+print(f"   Kinetic Energy = {ke:,.0f} J ({units.convert(ke, 'J', 'kJ'):.1f} kJ)")
+print(f"   Potential Energy = {pe:,.0f} J ({units.convert(pe, 'J', 'kJ'):.1f} kJ)")
+print(f"   Total Mechanical Energy = {total:,.0f} J ({units.convert(total, 'J', 'kJ'):.1f} kJ)")
+
+# Example 7: Inverse Problems
+print("\n7. INVERSE PROBLEMS")
+print("-" * 60)
+target = units.convert(1, "MJ", "J")
+speed = EnergyCalculator.velocity_from_kinetic_energy(target, mass)
+drop = EnergyCalculator.drop_height_for_impact_velocity(speed)
+budget = EnergyCalculator.mass_for_total_energy(target, velocity, height)
+
+print(f"   Speed for the car to carry 1 MJ: {speed:.2f} m/s "
+      f"({units.convert(speed, 'm/s', 'km/h'):.0f} km/h)")
+print(f"   Drop height giving the same impact speed: {drop:.1f} m")
+print(f"   Mass with 1 MJ at {velocity} m/s and {height} m: {budget:.1f} kg")
 
 print("\n" + "=" * 60)
 print("All calculations use SI units (kg, m/s, m, J)")
@@ -0,0 +1,641 @@
+#!/usr/bin/env python3
+"""
+User-defined energy formulas compiled into reusable kernels
+
+A formula is an arithmetic expression over named variables, for example
+``0.5 * moment_of_inertia * angular_velocity**2``, plus the unit and
+allowed domain of every variable and the unit of the result. It is parsed
+with the ast module once, checked against a small whitelist of syntax
+(numbers, variables, the constants below, + - * / **, and the functions
+in FUNCTIONS), and dimensionally checked: every variable's unit is
+reduced to exponents of kg, m and s, and the expression must reduce to
+the declared result unit.
+
+The checked expression is compiled once into a code object for a lambda
+over the variables. Evaluating that code object with NumPy ufuncs as the
+globals gives the vectorized kernel; with the math module it gives the
+scalar fallback, used for single values and when NumPy is not installed.
+Kernels are cached by (name, expression, variables, unit), so registering
+or compiling the same definition again returns the same Kernel and
+nothing is re-parsed per row, batch or request.
+
+Variable specifications are strings of the form ``UNIT [DOMAIN] [= DEFAULT]``:
+
+    "kg"                    kilograms, domain [0, inf) (the default)
+    "m [any]"               meters, any sign
+    "m/s [0, c)"            below the speed of light
+    "m/s^2 [0, inf) = 9.81" with a default value
+
+Formulas can also be loaded from INI-style configuration text (see
+load_config).
+"""
+
+import ast
+import configparser
+import functools
+import math
+import re
+import threading
+from fractions import Fraction
+from typing import Dict, Iterable, List, NamedTuple, Tuple, Union
+
+from energy_calculator import (
+    BatchValidationError,
+    EnergyCalculator,
+    ValidationReport,
+    _numpy,
+)
+
+# Exponents of (kg, m, s)
+UNITS = {
+    "1": (0, 0, 0),
+    "kg": (1, 0, 0),
+    "m": (0, 1, 0),
+    "s": (0, 0, 1),
+    "rad": (0, 0, 0),
+    "Hz": (0, 0, -1),
+    "N": (1, 1, -2),
+    "J": (1, 2, -2),
+    "W": (1, 2, -3),
+}
+# Name -> (value, unit)
+CONSTANTS = {
+    "pi": (math.pi, "1"),
+    "c": (299792458.0, "m/s"),
+    "G": (6.67430e-11, "m^3/(kg*s^2)"),
+}
+# Function name -> (NumPy ufunc name, scalar function); sqrt halves the
+# dimensions of its argument, abs keeps them, the rest need a
+# dimensionless argument
+FUNCTIONS = {
+    "sqrt": ("sqrt", math.sqrt),
+    "abs": ("abs", abs),
+    "exp": ("exp", math.exp),
+    "log": ("log", math.log),
+    "sin": ("sin", math.sin),
+    "cos": ("cos", math.cos),
+    "tan": ("tan", math.tan),
+}
+DEFAULT_DOMAIN = "[0, inf)"
+
+_SPEC = re.compile(r"^\s*(?P<unit>.+?)"
+                   r"(?:\s+(?P<domain>[\[(][^\[\]()]*,[^\[\]()]*[\])]|\[any\]|any))?"
+                   r"(?:\s*=\s*(?P<default>\S+))?\s*$")
+
+
+class FormulaError(ValueError):
+    """Raised for a formula definition that cannot be parsed or checked."""
+
+
+Dims = Tuple[Fraction, Fraction, Fraction]
+DIMENSIONLESS: Dims = (Fraction(0), Fraction(0), Fraction(0))
+
+
+def _dims(exponents) -> Dims:
+    return tuple(Fraction(e) for e in exponents)
+
+
+def _unit_dims(node, text: str) -> Dims:
+    if isinstance(node, ast.Name) and node.id in UNITS:
+        return _dims(UNITS[node.id])
+    if isinstance(node, ast.Constant) and node.value == 1:
+        return DIMENSIONLESS
+    if isinstance(node, ast.BinOp):
+        if isinstance(node.op, ast.Pow):
+            exponent = _literal(node.right)
+            if exponent is None:
+                raise FormulaError(f"Invalid unit {text!r}: exponents must be numbers")
+            return tuple(d * Fraction(exponent) for d in _unit_dims(node.left, text))
+        left, right = _unit_dims(node.left, text), _unit_dims(node.right, text)
+        if isinstance(node.op, ast.Mult):
+            return tuple(a + b for a, b in zip(left, right))
+        if isinstance(node.op, ast.Div):
+            return tuple(a - b for a, b in zip(left, right))
+    raise FormulaError(f"Invalid unit: {text!r}")
+
+
+@functools.lru_cache(maxsize=None)
+def parse_unit(text: str) -> Dims:
+    """
+    Reduce a unit such as "kg*m^2/s^2" or "N/m" to (kg, m, s) exponents.
+
+    Raises:
+        FormulaError: For unknown unit symbols or malformed units
+    """
+    source = text.strip().replace("^", "**") or "1"
+    try:
+        tree = ast.parse(source, mode="eval")
+    except SyntaxError:
+        raise FormulaError(f"Invalid unit: {text!r}") from None
+    return _unit_dims(tree.body, text)
+
+
+def format_unit(dims: Dims) -> str:
+    """Format (kg, m, s) exponents as a unit string, e.g. "kg*m^2/s^2"."""
+    def term(symbol, exponent):
+        return symbol if exponent == 1 else f"{symbol}^{exponent}"
+    numerator = [term(s, e) for s, e in zip(("kg", "m", "s"), dims) if e > 0]
+    denominator = [term(s, -e) for s, e in zip(("kg", "m", "s"), dims) if e < 0]
+    text = "*".join(numerator) or "1"
+    if denominator:
+        text += "/" + (denominator[0] if len(denominator) == 1
+                       else "(" + "*".join(denominator) + ")")
+    return text
+
+
+def _literal(node) -> Union[float, None]:
+    """The value of a numeric literal (optionally signed), else None."""
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        value = _literal(node.operand)
+        return None if value is None else (-value if isinstance(node.op, ast.USub) else value)
+    if (isinstance(node, ast.Constant) and isinstance(node.value, (int, float))
+            and not isinstance(node.value, bool)):
+        return float(node.value)
+    return None
+
+
+def _bound(text: str) -> float:
+    text = text.strip()
+    sign = -1.0 if text.startswith("-") else 1.0
+    if text.lstrip("+-") in CONSTANTS:
+        return sign * CONSTANTS[text.lstrip("+-")][0]
+    try:
+        return float(text)
+    except ValueError:
+        raise FormulaError(f"Invalid bound: {text!r}") from None
+
+
+class Domain(NamedTuple):
+    """Allowed values of a variable: an interval with open or closed ends."""
+    low: float
+    high: float
+    low_closed: bool
+    high_closed: bool
+    text: str
+
+    def message(self, label: str) -> str:
+        """Error message for a value outside the domain."""
+        if self.high == math.inf and self.low == 0:
+            return f"{label} cannot be negative" if self.low_closed else f"{label} must be positive"
+        return f"{label} must be in {self.text}"
+
+    def contains(self, value: float) -> bool:
+        """Scalar membership test (NaN passes, as in the batch checks)."""
+        if value != value:
+            return True
+        above = value >= self.low if self.low_closed else value > self.low
+        below = value <= self.high if self.high_closed else value < self.high
+        return above and below
+
+    def violations(self, np, values):
+        """Boolean mask of the values outside the domain, or None if all fit."""
+        if not values.size:
+            return None
+        bad = None
+        if self.low > -math.inf:
+            low = np.fmin.reduce(values, axis=None)
+            if low < self.low or (low == self.low and not self.low_closed):
+                bad = values < self.low if self.low_closed else values <= self.low
+        if self.high < math.inf:
+            high = np.fmax.reduce(values, axis=None)
+            if high > self.high or (high == self.high and not self.high_closed):
+                above = values > self.high if self.high_closed else values >= self.high
+                bad = above if bad is None else bad | above
+        return bad
+
+
+@functools.lru_cache(maxsize=None)
+def parse_domain(text: str) -> Domain:
+    """
+    Parse "[low, high)", "(0, inf)", ... or "any" (also written "[any]").
+
+    Bounds are numbers, inf/-inf or constant names such as c.
+
+    Raises:
+        FormulaError: If the domain is malformed or empty
+    """
+    text = text.strip()
+    if text in ("any", "[any]"):
+        return Domain(-math.inf, math.inf, False, False, "any")
+    if len(text) < 5 or text[0] not in "[(" or text[-1] not in "])" or "," not in text:
+        raise FormulaError(f"Invalid domain: {text!r}")
+    low_text, high_text = text[1:-1].split(",", 1)
+    low, high = _bound(low_text), _bound(high_text)
+    if not low < high:
+        raise FormulaError(f"Empty domain: {text!r}")
+    return Domain(low, high, text[0] == "[" and low > -math.inf,
+                  text[-1] == "]" and high < math.inf, text)
+
+
+class Variable(NamedTuple):
+    """A formula input: its unit, allowed domain and optional default."""
+    name: str
+    unit: str
+    dims: Dims
+    domain: Domain
+    default: Union[float, None]
+
+    @property
+    def label(self) -> str:
+        """Human-readable name for messages, e.g. "Moment of inertia"."""
+        return self.name.replace("_", " ").capitalize()
+
+
+def parse_variable(name: str, spec: str) -> Variable:
+    """
+    Parse a "UNIT [DOMAIN] [= DEFAULT]" variable specification.
+
+    Raises:
+        FormulaError: If the name or specification is invalid
+    """
+    if not name.isidentifier() or name in CONSTANTS or name in FUNCTIONS:
+        raise FormulaError(f"Invalid variable name: {name!r}")
+    match = _SPEC.match(spec)
+    if match is None:
+        raise FormulaError(f"Invalid specification for {name!r}: {spec!r}")
+    unit = match["unit"].strip()
+    domain = parse_domain(match["domain"] or DEFAULT_DOMAIN)
+    default = _bound(match["default"]) if match["default"] else None
+    if default is not None and not domain.contains(default):
+        raise FormulaError(f"Default of {name!r} is outside its domain {domain.text}")
+    return Variable(name, unit, parse_unit(unit), domain, default)
+
+
+class _Checker:
+    """Walks a parsed expression, enforcing the whitelist and the units."""
+
+    def __init__(self, variables: Dict[str, Variable]):
+        self.variables = variables
+        self.used = set()
+
+    def dims(self, node) -> Dims:
+        if isinstance(node, ast.Constant):
+            if _literal(node) is None:
+                raise FormulaError(f"Unsupported constant: {node.value!r}")
+            return DIMENSIONLESS
+        if isinstance(node, ast.Name):
+            if node.id in self.variables:
+                self.used.add(node.id)
+                return self.variables[node.id].dims
+            if node.id in CONSTANTS:
+                return parse_unit(CONSTANTS[node.id][1])
+            raise FormulaError(f"Unknown name: {node.id!r}")
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            return self.dims(node.operand)
+        if isinstance(node, ast.BinOp):
+            return self.binop(node)
+        if isinstance(node, ast.Call):
+            return self.call(node)
+        raise FormulaError(f"Unsupported syntax: {ast.unparse(node)!r}")
+
+    def binop(self, node) -> Dims:
+        left = self.dims(node.left)
+        if isinstance(node.op, ast.Pow):
+            exponent = _literal(node.right)
+            if exponent is None:
+                if left != DIMENSIONLESS or self.dims(node.right) != DIMENSIONLESS:
+                    raise FormulaError("Only dimensionless quantities can be raised "
+                                       f"to a variable power: {ast.unparse(node)!r}")
+                return DIMENSIONLESS
+            return tuple(d * Fraction(exponent).limit_denominator(1000) for d in left)
+        right = self.dims(node.right)
+        if isinstance(node.op, (ast.Add, ast.Sub)):
+            if left != right:
+                raise FormulaError(f"Cannot add or subtract {format_unit(left)} and "
+                                   f"{format_unit(right)} in {ast.unparse(node)!r}")
+            return left
+        if isinstance(node.op, ast.Mult):
+            return tuple(a + b for a, b in zip(left, right))
+        if isinstance(node.op, ast.Div):
+            return tuple(a - b for a, b in zip(left, right))
+        raise FormulaError(f"Unsupported operator in {ast.unparse(node)!r}")
+
+    def call(self, node) -> Dims:
+        if (not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS
+                or len(node.args) != 1 or node.keywords):
+            raise FormulaError(f"Unsupported call: {ast.unparse(node)!r}")
+        argument = self.dims(node.args[0])
+        name = node.func.id
+        if name == "sqrt":
+            return tuple(d / 2 for d in argument)
+        if name == "abs":
+            return argument
+        if argument != DIMENSIONLESS:
+            raise FormulaError(f"{name}() needs a dimensionless argument, got "
+                               f"{format_unit(argument)}")
+        return DIMENSIONLESS
+
+
+class _InlineConstants(ast.NodeTransformer):
+    def visit_Name(self, node):
+        if node.id in CONSTANTS:
+            return ast.copy_location(ast.Constant(CONSTANTS[node.id][0]), node)
+        return node
+
+
+class Kernel:
+    """
+    A compiled formula.
+
+    Call kernel.batch(...) with arrays (NumPy), kernel.scalar(...) with
+    numbers (pure Python), or the kernel itself to pick by argument type.
+    Missing arguments take the variable's default.
+    """
+
+    def __init__(self, name: str, expression: str, variables: Tuple[Variable, ...],
+                 unit: str, description: str, code):
+        self.name = name
+        self.expression = expression
+        self.variables = variables
+        self.unit = unit
+        self.description = description
+        self._code = code
+        self._scalar = eval(code, {"__builtins__": {},
+                                   **{name: scalar for name, (_, scalar) in FUNCTIONS.items()}})
+        self._vector = None
+        self.messages = {v.name: v.domain.message(v.label) for v in variables}
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        """Variable names in declaration order."""
+        return tuple(v.name for v in self.variables)
+
+    def _vector_function(self):
+        if self._vector is None:
+            np = _numpy()
+            self._vector = eval(self._code, {"__builtins__": {}, **{
+                name: getattr(np, ufunc) for name, (ufunc, _) in FUNCTIONS.items()}})
+        return self._vector
+
+    def _arguments(self, values: dict) -> list:
+        unknown = set(values) - set(self.names)
+        if unknown:
+            raise ValueError(f"{self.name}: unknown variable(s): {', '.join(sorted(unknown))}")
+        arguments = []
+        for variable in self.variables:
+            value = values.get(variable.name, variable.default)
+            if value is None:
+                raise ValueError(f"{self.name}: missing variable {variable.name!r}")
+            arguments.append(value)
+        return arguments
+
+    def scalar(self, **values) -> float:
+        """
+        Evaluate for single values without NumPy.
+
+        Raises:
+            ValueError: If a value is outside its domain or the expression
+                is undefined for the inputs
+        """
+        arguments = [float(value) for value in self._arguments(values)]
+        for variable, value in zip(self.variables, arguments):
+            if not variable.domain.contains(value):
+                raise ValueError(self.messages[variable.name])
+        try:
+            return float(self._scalar(*arguments))
+        except (ArithmeticError, ValueError) as e:
+            raise ValueError(f"{self.name}: {e}") from None
+
+    def validate(self, **columns) -> ValidationReport:
+        """Check every column against its domain without computing."""
+        np = _numpy()
+        arrays = [np.asarray(value, dtype=np.float64) for value in self._arguments(columns)]
+        return self._report(np, arrays)
+
+    def _report(self, np, arrays) -> ValidationReport:
+        shape = np.broadcast_shapes(*(a.shape for a in arrays))
+        failures = {}
+        for variable, values in zip(self.variables, arrays):
+            bad = variable.domain.violations(np, values)
+            if bad is not None:
+                failures[variable.name] = np.broadcast_to(bad, shape)
+        return ValidationReport(shape, failures, self.messages)
+
+    def batch(self, on_invalid: str = "raise", out=None, **columns):
+        """
+        Evaluate over arrays.
+
+        Args:
+            on_invalid: "raise", "nan" or "ignore", as for the
+                EnergyCalculator batch functions
+            out: Optional preallocated result array of the broadcast shape
+            **columns: One array, sequence or scalar per variable
+
+        Returns:
+            NumPy float64 array of results in the formula's unit
+
+        Raises:
+            BatchValidationError: If a row is outside a domain and
+                on_invalid is "raise"
+        """
+        if on_invalid not in ("raise", "nan", "ignore"):
+            raise ValueError(f"Unknown on_invalid mode: {on_invalid!r}")
+        np = _numpy()
+        arrays = [np.asarray(value, dtype=np.float64) for value in self._arguments(columns)]
+        report = None
+        if on_invalid != "ignore":
+            report = self._report(np, arrays)
+            if not report.ok and on_invalid == "raise":
+                raise BatchValidationError(report)
+            shape = report.shape
+        else:
+            shape = np.broadcast_shapes(*(a.shape for a in arrays))
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            result = self._vector_function()(*arrays)
+        if out is not None:
+            out[...] = result
+            result = out
+        elif (not isinstance(result, np.ndarray) or result.shape != shape
+              or any(result is a for a in arrays)):
+            result = np.array(np.broadcast_to(result, shape), dtype=np.float64)
+        if report is not None and not report.ok:
+            result[report.mask] = float("nan")
+        return result
+
+    def __call__(self, on_invalid: str = "raise", **values):
+        """Evaluate scalars with scalar() and anything else with batch()."""
+        if all(isinstance(v, (int, float)) for v in values.values()):
+            return self.scalar(**values)
+        return self.batch(on_invalid=on_invalid, **values)
+
+    def as_dict(self) -> dict:
+        """JSON-ready description of the formula."""
+        return {"name": self.name, "expression": self.expression, "unit": self.unit,
+                "description": self.description,
+                "variables": {v.name: {"unit": v.unit, "domain": v.domain.text,
+                                       "default": v.default} for v in self.variables}}
+
+    def __repr__(self):
+        return f"Kernel({self.name!r}, {self.expression!r})"
+
+
+@functools.lru_cache(maxsize=256)
+def _compile(name: str, expression: str, variables: Tuple[Tuple[str, str], ...],
+             unit: str, description: str) -> Kernel:
+    parsed = {var: parse_variable(var, spec) for var, spec in variables}
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise FormulaError(f"{name}: invalid expression: {e.msg}") from None
+    checker = _Checker(parsed)
+    dims = checker.dims(tree.body)
+    expected = parse_unit(unit)
+    if dims != expected:
+        raise FormulaError(f"{name}: expression has units of {format_unit(dims)}, "
+                           f"not {unit} ({format_unit(expected)})")
+    unused = [var for var in parsed if var not in checker.used]
+    if unused:
+        raise FormulaError(f"{name}: unused variable(s): {', '.join(unused)}")
+
+    body = _InlineConstants().visit(tree).body
+    arguments = ast.arguments(posonlyargs=[], args=[ast.arg(arg=var) for var in parsed],
+                              vararg=None, kwonlyargs=[], kw_defaults=[], kwarg=None,
+                              defaults=[])
+    lambda_tree = ast.fix_missing_locations(ast.Expression(ast.Lambda(arguments, body)))
+    code = compile(lambda_tree, f"<formula {name}>", "eval")
+    return Kernel(name, ast.unparse(tree), tuple(parsed.values()), unit, description, code)
+
+
+def compile_formula(name: str, expression: str, variables: Dict[str, str],
+                    unit: str = "J", description: str = "") -> Kernel:
+    """
+    Parse, check and compile a formula (cached).
+
+    Args:
+        name: Formula name
+        expression: Python-syntax arithmetic over the variables
+        variables: Variable name -> "UNIT [DOMAIN] [= DEFAULT]"
+        unit: Unit of the result
+        description: Free text shown in listings
+
+    Returns:
+        The compiled Kernel; the same object for a repeated definition
+
+    Raises:
+        FormulaError: If the expression or a specification is invalid or
+            the units do not work out
+    """
+    # Normalize the expression so formatting differences share a kernel
+    try:
+        normalized = ast.unparse(ast.parse(expression.strip(), mode="eval"))
+    except SyntaxError as e:
+        raise FormulaError(f"{name}: invalid expression: {e.msg}") from None
+    return _compile(name, normalized, tuple(variables.items()), unit, description)
+
+
+_registry: Dict[str, Kernel] = {}
+_registry_lock = threading.Lock()
+
+
+def register(name: str, expression: str, variables: Dict[str, str],
+             unit: str = "J", description: str = "", replace: bool = False) -> Kernel:
+    """
+    Compile a formula and make it available by name.
+
+    Raises:
+        FormulaError: If the definition is invalid, or the name is taken
+            and replace is not set
+    """
+    kernel = compile_formula(name, expression, variables, unit, description)
+    with _registry_lock:
+        if name in _registry and not replace and _registry[name] is not kernel:
+            raise FormulaError(f"Formula {name!r} is already registered")
+        _registry[name] = kernel
+    return kernel
+
+
+def get(name: str) -> Kernel:
+    """
+    Look up a registered formula.
+
+    Raises:
+        ValueError: If no formula has that name
+    """
+    try:
+        return _registry[name]
+    except KeyError:
+        raise ValueError(f"Unknown formula: {name!r}") from None
+
+
+def names() -> List[str]:
+    """Registered formula names in registration order."""
+    return list(_registry)
+
+
+def as_dicts() -> List[dict]:
+    """JSON-ready descriptions of every registered formula."""
+    return [kernel.as_dict() for kernel in _registry.values()]
+
+
+def load_config(text: str, replace: bool = False) -> List[Kernel]:
+    """
+    Register formulas from INI-style text.
+
+    Each section is one formula; "expression" is required, "unit"
+    (default J) and "description" are optional, and every other key is a
+    variable specification::
+
+        [spring]
+        expression = 0.5 * k * x**2
+        description = Elastic potential energy of a spring
+        k = N/m
+        x = m [any]
+
+    Returns:
+        The registered kernels
+
+    Raises:
+        FormulaError: If the text or any formula in it is invalid
+    """
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.optionxform = str    # variable names are case-sensitive
+    try:
+        parser.read_string(text)
+    except configparser.Error as e:
+        raise FormulaError(f"Invalid formula configuration: {e}") from None
+    kernels = []
+    for section in parser.sections():
+        options = dict(parser[section])
+        if "expression" not in options:
+            raise FormulaError(f"{section}: missing 'expression'")
+        expression = options.pop("expression")
+        unit = options.pop("unit", "J")
+        description = options.pop("description", "")
+        kernels.append(register(section, expression, options, unit, description, replace))
+    return kernels
+
+
+def load_config_file(path: str, replace: bool = False) -> List[Kernel]:
+    """Register formulas from an INI file (see load_config)."""
+    with open(path, encoding="utf-8") as f:
+        return load_config(f.read(), replace)
+
+
+def _register_builtins(definitions: Iterable[tuple]) -> None:
+    for name, expression, variables, description in definitions:
+        register(name, expression, variables, "J", description)
+
+
+_register_builtins([
+    ("kinetic", "0.5 * mass * velocity**2",
+     {"mass": "kg", "velocity": "m/s"},
+     "Kinetic energy, 1/2 m v^2"),
+    ("potential", "mass * gravity * height",
+     {"mass": "kg", "height": "m", "gravity": f"m/s^2 [0, inf) = {EnergyCalculator.GRAVITY}"},
+     "Gravitational potential energy near a surface, m g h"),
+    ("rotational_kinetic", "0.5 * moment_of_inertia * angular_velocity**2",
+     {"moment_of_inertia": "kg*m^2", "angular_velocity": "rad/s [any]"},
+     "Rotational kinetic energy, 1/2 I omega^2"),
+    ("elastic_potential", "0.5 * spring_constant * displacement**2",
+     {"spring_constant": "N/m", "displacement": "m [any]"},
+     "Elastic potential energy of a spring, 1/2 k x^2"),
+    # (gamma - 1) m c^2 rewritten as m v^2 / (s (1 + s)) with
+    # s = sqrt(1 - v^2/c^2), which does not cancel catastrophically at low speed
+    ("relativistic_kinetic",
+     "mass * velocity**2 / (sqrt(1 - velocity**2 / c**2) * (1 + sqrt(1 - velocity**2 / c**2)))",
+     {"mass": "kg", "velocity": "m/s [0, c)"},
+     "Relativistic kinetic energy, (gamma - 1) m c^2"),
+    ("gravitational_potential", "-G * central_mass * mass / distance",
+     {"central_mass": "kg", "mass": "kg", "distance": "m (0, inf)"},
+     "Inverse-square gravitational potential energy, -G M m / r"),
+])
@@ -4,9 +4,170 @@ Graphical User Interface for the Energy Calculator
 Built with tkinter for cross-platform compatibility
 """
 
+import queue
+import threading
 import tkinter as tk
-from tkinter import ttk, messagebox
-from energy_calculator import EnergyCalculator
+from tkinter import ttk, messagebox, filedialog
+import bodies
+import units
+from energy_calculator import EnergyCalculator, _numpy
+
+# How often the Tk main loop drains worker events (about 60 times a second)
+POLL_INTERVAL_MS = 16
+# Points per chunk for GUI jobs; small chunks keep cancellation responsive
+JOB_CHUNK_SIZE = 1 << 18
+# Treeview rows in the batch tab; only these items ever exist
+TABLE_VISIBLE_ROWS = 16
+TABLE_COLUMNS = (("#", 70), ("mass", 60), ("velocity", 60), ("height", 60),
+                 ("gravity", 50), ("KE", 70), ("PE", 70), ("total", 70), ("error", 160))
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when its job has been cancelled."""
+
+
+class BackgroundJob:
+    """
+    Run a long computation on a worker thread.
+    
+    The work function is called as work(job, *args). It reports progress
+    with job.progress() and calls job.check_cancelled() at chunk
+    boundaries, so cancellation is cooperative. Results, errors and
+    progress are passed back through a queue that the Tk main thread
+    drains with poll(); Tk widgets are never touched from the worker.
+    """
+    
+    def __init__(self, work, *args):
+        self._work = work
+        self._args = args
+        self._cancel = threading.Event()
+        self.events = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+    
+    def start(self) -> "BackgroundJob":
+        """Start the worker thread."""
+        self.thread.start()
+        return self
+    
+    def cancel(self) -> None:
+        """Ask the worker to stop at its next chunk boundary."""
+        self._cancel.set()
+    
+    @property
+    def cancelled(self) -> bool:
+        """True once cancel() has been called."""
+        return self._cancel.is_set()
+    
+    def check_cancelled(self) -> None:
+        """Raise JobCancelled if the job was cancelled (worker side)."""
+        if self._cancel.is_set():
+            raise JobCancelled()
+    
+    def progress(self, done: int, total: int, message: str = "") -> None:
+        """Report progress (worker side)."""
+        self.events.put(("progress", done, total, message))
+    
+    def _run(self):
+        try:
+            result = self._work(self, *self._args)
+        except JobCancelled:
+            self.events.put(("cancelled",))
+        except Exception as e:
+            self.events.put(("error", e))
+        else:
+            self.events.put(("done", result))
+    
+    def poll(self):
+        """
+        Drain pending events without blocking (main thread side).
+        
+        Returns:
+            (latest progress event or None, final event or None); the
+            final event is ("done", result), ("error", exception) or
+            ("cancelled",)
+        """
+        progress = outcome = None
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                return progress, outcome
+            if event[0] == "progress":
+                progress = event
+            else:
+                outcome = event
+
+
+def sweep_job(job: BackgroundJob, axes, chunk_size: int = JOB_CHUNK_SIZE):
+    """
+    Worker function summarizing a parameter sweep chunk by chunk.
+    
+    Returns:
+        (Sweep, statistics dict from SweepStats)
+    """
+    import sweep
+    
+    grid = sweep.Sweep(*axes, chunk_size=chunk_size)
+    stats = sweep.SweepStats()
+    for chunk in grid.chunks():
+        job.check_cancelled()
+        stats.update(chunk)
+        job.progress(chunk.stop, grid.size)
+    return grid, stats.result()
+
+
+def curve_job(job: BackgroundJob, x_name: str, x, fixed: dict,
+              chunk_size: int = JOB_CHUNK_SIZE):
+    """
+    Worker function computing KE, PE and total along one parameter.
+    
+    Args:
+        x_name: "mass", "velocity" or "height"
+        x: Values of that parameter
+        fixed: Scalar mass, velocity, height and gravity for the others
+        
+    Returns:
+        (x, {"KE": ke, "PE": pe, "Total": total}) arrays in joules
+    """
+    np = _numpy()
+    params = dict(fixed)
+    ke, pe, total = np.empty(len(x)), np.empty(len(x)), np.empty(len(x))
+    for start in range(0, len(x), chunk_size):
+        job.check_cancelled()
+        stop = min(start + chunk_size, len(x))
+        params[x_name] = x[start:stop]
+        EnergyCalculator.kinetic_energy_batch(
+            params["mass"], params["velocity"], out=ke[start:stop])
+        EnergyCalculator.potential_energy_batch(
+            params["mass"], params["height"], params["gravity"], out=pe[start:stop])
+        np.add(ke[start:stop], pe[start:stop], out=total[start:stop])
+        job.progress(stop, len(x))
+    return x, {"KE": ke, "PE": pe, "Total": total}
+
+
+def _job_progress(job: BackgroundJob):
+    """Progress callback for loaders: report, then stop if cancelled."""
+    def progress(done, total):
+        job.check_cancelled()
+        job.progress(done, total)
+    return progress
+
+
+def load_table_job(job: BackgroundJob, path: str, mapping, gravity: float):
+    """Worker function computing a CSV file or column set into a BatchTable."""
+    import batch_table
+    import columnar
+    
+    loader = batch_table.load_columns if columnar.is_manifest(path) else batch_table.load_csv
+    return loader(path, mapping, gravity, progress=_job_progress(job))
+
+
+def export_table_job(job: BackgroundJob, table, path: str):
+    """Worker function writing a BatchTable to CSV, JSONL or a column set."""
+    import batch_table
+    
+    batch_table.export(table, path, progress=_job_progress(job))
+    return path
 
 
 class EnergyCalculatorGUI:
@@ -23,6 +184,10 @@ class EnergyCalculatorGUI:
         self.accent_color = "#2196F3"
         self.root.configure(bg=self.bg_color)
         
+        # Background job status bar (packed first so it keeps its space)
+        self.job = None
+        self.create_job_bar()
+        
         # Create main notebook (tabbed interface)
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -31,8 +196,143 @@ class EnergyCalculatorGUI:
         self.create_kinetic_tab()
         self.create_potential_tab()
         self.create_total_tab()
+        self.create_sweep_tab()
+        self.create_plot_tab()
+        self.create_batch_tab()
         self.create_info_tab()
     
+    def create_job_bar(self):
+        """Create the progress bar and Cancel button shared by background jobs."""
+        bar = ttk.Frame(self.root, padding=(10, 0, 10, 10))
+        bar.pack(side=tk.BOTTOM, fill=tk.X)
+        
+        self.job_status = ttk.Label(bar, text="Ready", width=24)
+        self.job_status.pack(side=tk.LEFT)
+        self.job_cancel = ttk.Button(bar, text="Cancel", width=8,
+                                     command=self.cancel_job, state=tk.DISABLED)
+        self.job_cancel.pack(side=tk.RIGHT)
+        self.job_progress = ttk.Progressbar(bar, mode="determinate")
+        self.job_progress.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=10)
+    
+    def run_job(self, work, *args, label="Working", on_done=None):
+        """
+        Run work(job, *args) on a worker thread with progress and Cancel.
+        
+        Returns:
+            The BackgroundJob, or None if another job is still running
+        """
+        if self.job is not None:
+            messagebox.showinfo("Busy", "Another calculation is still running.")
+            return None
+        self.job = BackgroundJob(work, *args).start()
+        self._job_label = label
+        self._job_done = on_done
+        self.job_status.config(text=f"{label}...")
+        self.job_progress.config(value=0, maximum=1)
+        self.job_cancel.config(state=tk.NORMAL)
+        self.root.after(POLL_INTERVAL_MS, self._poll_job)
+        return self.job
+    
+    def cancel_job(self):
+        """Cancel the running background job."""
+        if self.job is not None:
+            self.job.cancel()
+            self.job_status.config(text="Cancelling...")
+    
+    def _poll_job(self):
+        """Apply worker events on the Tk thread, then reschedule until done."""
+        progress, outcome = self.job.poll()
+        if progress is not None and not self.job.cancelled:
+            _, done, total, message = progress
+            self.job_progress.config(value=done, maximum=total or 1)
+            percent = 100 * done / total if total else 0
+            self.job_status.config(text=message or f"{self._job_label} {percent:.0f}%")
+        if outcome is None:
+            self.root.after(POLL_INTERVAL_MS, self._poll_job)
+            return
+        
+        self.job = None
+        self.job_cancel.config(state=tk.DISABLED)
+        self.job_progress.config(value=0)
+        if outcome[0] == "done":
+            self.job_status.config(text="Done")
+            if self._job_done is not None:
+                self._job_done(outcome[1])
+        elif outcome[0] == "error":
+            self.job_status.config(text="Failed")
+            messagebox.showerror("Calculation Error", str(outcome[1]))
+        else:
+            self.job_status.config(text="Cancelled")
+    
+    def create_sweep_tab(self):
+        """Create Parameter Sweep tab (runs in the background)."""
+        frame = ttk.Frame(self.notebook, padding="20")
+        self.notebook.add(frame, text="Sweep")
+        
+        # Title
+        title = ttk.Label(frame, text="Parameter Sweep", 
+                         font=("Arial", 14, "bold"))
+        title.pack(pady=(0, 10))
+        
+        ttk.Label(frame, text="Axes: linspace:START:STOP:NUM, logspace:START:STOP:NUM or 1,2,5",
+                  foreground="gray").pack(pady=(0, 10))
+        
+        self.sweep_axes = {}
+        defaults = (("mass", "Mass (kg):", "linspace:1:1000:1000"),
+                    ("velocity", "Velocity (m/s):", "linspace:0:100:1000"),
+                    ("height", "Height (m):", "linspace:0:100:50"),
+                    ("gravity", "Gravity (m/s² or body names):", "Earth"))
+        for name, text, default in defaults:
+            ttk.Label(frame, text=text, font=("Arial", 11)).pack(anchor=tk.W, pady=(5, 2))
+            entry = ttk.Entry(frame, width=30)
+            entry.pack(fill=tk.X, pady=(0, 5))
+            entry.insert(0, default)
+            self.sweep_axes[name] = entry
+        
+        # Run button
+        self.sweep_button = ttk.Button(frame, text="Run Sweep", command=self.run_sweep)
+        self.sweep_button.pack(fill=tk.X, pady=10)
+        
+        # Result frame
+        result_frame = ttk.LabelFrame(frame, text="Result", padding="15")
+        result_frame.pack(fill=tk.X, pady=(10, 0))
+        
+        self.sweep_result = tk.Text(result_frame, height=7, width=50, 
+                                   font=("Courier", 10), state=tk.DISABLED)
+        self.sweep_result.pack(fill=tk.BOTH, expand=True)
+    
+    def run_sweep(self):
+        """Start a parameter sweep in the background."""
+        import sweep
+        
+        try:
+            axes = [sweep.parse_axis(name, entry.get())
+                    for name, entry in self.sweep_axes.items()]
+            size = 1
+            for axis in axes:
+                size *= len(axis)
+        except ValueError as e:
+            messagebox.showerror("Input Error", str(e))
+            return
+        self.run_job(sweep_job, axes, label=f"Sweeping {size:,} points",
+                     on_done=self.show_sweep)
+    
+    def show_sweep(self, outcome):
+        """Display the statistics of a finished sweep."""
+        grid, stats = outcome
+        low, high = stats["argmin"], stats["argmax"]
+        self.sweep_result.config(state=tk.NORMAL)
+        self.sweep_result.delete(1.0, tk.END)
+        self.sweep_result.insert(tk.END,
+            f"Points: {stats['count']:,} ({' × '.join(map(str, grid.shape))})\n"
+            f"Mean total energy = {stats['mean']:.2f} J\n"
+            f"Min = {stats['min']:.2f} J at m={low['mass']:g} v={low['velocity']:g} "
+            f"h={low['height']:g} g={low['gravity']:g}\n"
+            f"Max = {stats['max']:.2f} J at m={high['mass']:g} v={high['velocity']:g} "
+            f"h={high['height']:g} g={high['gravity']:g}"
+        )
+        self.sweep_result.config(state=tk.DISABLED)
+    
     def create_kinetic_tab(self):
         """Create Kinetic Energy calculation tab."""
         frame = ttk.Frame(self.notebook, padding="20")
@@ -110,12 +410,7 @@ class EnergyCalculatorGUI:
         self.pe_gravity.insert(0, "9.81")
         
         # Quick gravity buttons
-        ttk.Button(gravity_frame, text="Earth", width=8,
-                  command=lambda: self.pe_gravity.delete(0, tk.END) or self.pe_gravity.insert(0, "9.81")).pack(side=tk.LEFT, padx=(5, 2))
-        ttk.Button(gravity_frame, text="Moon", width=8,
-                  command=lambda: self.pe_gravity.delete(0, tk.END) or self.pe_gravity.insert(0, "1.62")).pack(side=tk.LEFT, padx=2)
-        ttk.Button(gravity_frame, text="Mars", width=8,
-                  command=lambda: self.pe_gravity.delete(0, tk.END) or self.pe_gravity.insert(0, "3.71")).pack(side=tk.LEFT, padx=2)
+        self.add_gravity_buttons(gravity_frame, self.pe_gravity)
         
         # Calculate button
         btn = ttk.Button(frame, text="Calculate Potential Energy", 
@@ -173,12 +468,7 @@ class EnergyCalculatorGUI:
         self.total_gravity.insert(0, "9.81")
         
         # Quick gravity buttons
-        ttk.Button(gravity_frame, text="Earth", width=8,
-                  command=lambda: self.total_gravity.delete(0, tk.END) or self.total_gravity.insert(0, "9.81")).pack(side=tk.LEFT, padx=(5, 2))
-        ttk.Button(gravity_frame, text="Moon", width=8,
-                  command=lambda: self.total_gravity.delete(0, tk.END) or self.total_gravity.insert(0, "1.62")).pack(side=tk.LEFT, padx=2)
-        ttk.Button(gravity_frame, text="Mars", width=8,
-                  command=lambda: self.total_gravity.delete(0, tk.END) or self.total_gravity.insert(0, "3.71")).pack(side=tk.LEFT, padx=2)
+        self.add_gravity_buttons(gravity_frame, self.total_gravity)
         
         # Calculate button
         btn = ttk.Button(frame, text="Calculate Total Energy", 
@@ -193,6 +483,230 @@ class EnergyCalculatorGUI:
                                    font=("Courier", 11), state=tk.DISABLED)
         self.total_result.pack(fill=tk.BOTH, expand=True)
     
+    def add_gravity_buttons(self, frame, entry):
+        """Add one quick-pick button per registry body that fills in its gravity."""
+        def use(body):
+            entry.delete(0, tk.END)
+            entry.insert(0, str(body.gravity))
+
+        for index, body in enumerate(bodies.quick_bodies()):
+            ttk.Button(frame, text=body.name, width=8,
+                      command=lambda body=body: use(body)).pack(
+                side=tk.LEFT, padx=(5, 2) if index == 0 else 2)
+
+    def create_plot_tab(self):
+        """Create Plot tab: energy curves along one parameter."""
+        from plot_canvas import CurvePlot
+        
+        frame = ttk.Frame(self.notebook, padding="10")
+        self.notebook.add(frame, text="Plot")
+        
+        controls = ttk.Frame(frame)
+        controls.pack(fill=tk.X)
+        ttk.Label(controls, text="X axis:").grid(row=0, column=0, sticky=tk.W)
+        self.plot_x = ttk.Combobox(controls, values=("velocity", "height", "mass"),
+                                   state="readonly", width=9)
+        self.plot_x.set("velocity")
+        self.plot_x.grid(row=0, column=1, padx=(2, 8))
+        self.plot_entries = {}
+        for column, (name, text, default) in enumerate(
+                (("start", "From:", "0"), ("stop", "To:", "100"),
+                 ("points", "Points:", "1000000")), start=1):
+            ttk.Label(controls, text=text).grid(row=0, column=2 * column, sticky=tk.W)
+            entry = ttk.Entry(controls, width=9)
+            entry.insert(0, default)
+            entry.grid(row=0, column=2 * column + 1, padx=(2, 8))
+            self.plot_entries[name] = entry
+        for column, (name, text, default) in enumerate(
+                (("mass", "m (kg):", "2"), ("velocity", "v (m/s):", "8"),
+                 ("height", "h (m):", "10"), ("gravity", "g:", "9.81"))):
+            ttk.Label(controls, text=text).grid(row=1, column=2 * column, sticky=tk.W,
+                                                pady=(6, 0))
+            entry = ttk.Entry(controls, width=9)
+            entry.insert(0, default)
+            entry.grid(row=1, column=2 * column + 1, padx=(2, 8), pady=(6, 0))
+            self.plot_entries[name] = entry
+        
+        ttk.Button(frame, text="Plot", command=self.run_plot).pack(fill=tk.X, pady=8)
+        ttk.Label(frame, text="Drag to pan, scroll to zoom, double-click to reset",
+                  foreground="gray").pack()
+        
+        canvas = tk.Canvas(frame, background="white", highlightthickness=0, height=400)
+        canvas.pack(fill=tk.BOTH, expand=True, pady=(4, 0))
+        self.plot = CurvePlot(canvas)
+    
+    def run_plot(self):
+        """Compute energy curves in the background and plot them."""
+        try:
+            np = _numpy()
+        except ImportError as e:
+            messagebox.showerror("Missing Dependency", str(e))
+            return
+        try:
+            x_name = self.plot_x.get()
+            points = int(self.plot_entries["points"].get())
+            if points < 2:
+                raise ValueError("Please plot at least 2 points.")
+            x = np.linspace(float(self.plot_entries["start"].get()),
+                            float(self.plot_entries["stop"].get()), points)
+            if x[0] > x[-1]:
+                x = x[::-1].copy()
+            fixed = {name: float(self.plot_entries[name].get())
+                     for name in ("mass", "velocity", "height")}
+            fixed["gravity"] = bodies.gravity_of(self.plot_entries["gravity"].get())
+        except ValueError as e:
+            messagebox.showerror("Input Error", str(e) or "Please enter valid numbers.")
+            return
+        axis_units = {"mass": "kg", "velocity": "m/s", "height": "m"}
+        
+        def show(outcome):
+            x_values, curves = outcome
+            colors = {"KE": "#2196F3", "PE": "#4CAF50", "Total": "#F44336"}
+            self.plot.set_data(x_values, {name: (y, colors[name]) for name, y in curves.items()},
+                               x_label=f"{x_name} ({axis_units[x_name]}) → energy (J)")
+        
+        self.run_job(curve_job, x_name, x, fixed, label=f"Computing {points:,} points",
+                     on_done=show)
+    
+    def create_batch_tab(self):
+        """Create Batch File tab with a virtualized result table."""
+        frame = ttk.Frame(self.notebook, padding="10")
+        self.notebook.add(frame, text="Batch File")
+        self.table = None
+        self.table_first = 0
+        
+        controls = ttk.Frame(frame)
+        controls.pack(fill=tk.X)
+        ttk.Button(controls, text="Open...", command=self.open_batch_file).pack(side=tk.LEFT)
+        self.batch_export = ttk.Button(controls, text="Export...", state=tk.DISABLED,
+                                       command=self.export_batch_file)
+        self.batch_export.pack(side=tk.LEFT, padx=5)
+        self.batch_gravity = ttk.Entry(controls, width=7)
+        self.batch_gravity.insert(0, "9.81")
+        self.batch_gravity.pack(side=tk.RIGHT)
+        ttk.Label(controls, text="g:").pack(side=tk.RIGHT)
+        ttk.Label(controls, text="Columns:").pack(side=tk.LEFT, padx=(10, 2))
+        self.batch_columns = ttk.Entry(controls, width=22)
+        self.batch_columns.pack(side=tk.LEFT)
+        ttk.Label(frame, text="Columns: blank to match header names, or e.g. m,v,h / "
+                              "mass=m,velocity=v,height=h,body=planet",
+                  foreground="gray").pack(anchor=tk.W, pady=(4, 6))
+        
+        table_frame = ttk.Frame(frame)
+        table_frame.pack(fill=tk.BOTH, expand=True)
+        self.batch_scroll = ttk.Scrollbar(table_frame, orient=tk.VERTICAL,
+                                          command=self.scroll_table)
+        self.batch_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.batch_tree = ttk.Treeview(table_frame, columns=[c for c, _ in TABLE_COLUMNS],
+                                       show="headings", height=TABLE_VISIBLE_ROWS,
+                                       selectmode="browse")
+        for name, width in TABLE_COLUMNS:
+            self.batch_tree.heading(name, text=name)
+            self.batch_tree.column(name, width=width, minwidth=40,
+                                   anchor=tk.W if name == "error" else tk.E,
+                                   stretch=name == "error")
+        # A fixed set of items is reused for whichever rows are on screen
+        for index in range(TABLE_VISIBLE_ROWS):
+            self.batch_tree.insert("", tk.END, iid=str(index))
+        self.batch_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        for sequence, step in (("<Button-4>", -3), ("<Button-5>", 3), ("<Up>", -1),
+                               ("<Down>", 1), ("<Prior>", -TABLE_VISIBLE_ROWS),
+                               ("<Next>", TABLE_VISIBLE_ROWS)):
+            self.batch_tree.bind(sequence, lambda event, step=step: self._step_table(step))
+        self.batch_tree.bind("<MouseWheel>", lambda event: self._step_table(
+            -3 if event.delta > 0 else 3))
+        
+        footer = ttk.Frame(frame)
+        footer.pack(fill=tk.X, pady=(6, 0))
+        self.batch_info = ttk.Label(footer, text="No file loaded")
+        self.batch_info.pack(side=tk.LEFT)
+        ttk.Button(footer, text="Go", width=4, command=self.jump_to_row).pack(side=tk.RIGHT)
+        self.batch_jump = ttk.Entry(footer, width=10)
+        self.batch_jump.pack(side=tk.RIGHT, padx=4)
+        self.batch_jump.bind("<Return>", lambda event: self.jump_to_row())
+        ttk.Label(footer, text="Row:").pack(side=tk.RIGHT)
+    
+    def open_batch_file(self):
+        """Pick a CSV file or column set and compute it in the background."""
+        import batch_stream
+        
+        path = filedialog.askopenfilename(
+            title="Open batch file",
+            filetypes=(("CSV or column set", "*.csv *.manifest.json"), ("All files", "*")))
+        if not path:
+            return
+        try:
+            spec = self.batch_columns.get().strip()
+            mapping = batch_stream.parse_column_spec(spec) if spec else None
+            gravity = bodies.gravity_of(self.batch_gravity.get())
+        except ValueError as e:
+            messagebox.showerror("Input Error", str(e))
+            return
+        self.run_job(load_table_job, path, mapping, gravity,
+                     label="Loading", on_done=self.show_table)
+    
+    def show_table(self, table):
+        """Swap in a freshly loaded table."""
+        if self.table is not None:
+            self.table.close()
+        self.table = table
+        self.batch_info.config(text=f"{table.rows:,} rows, {table.invalid:,} invalid")
+        self.batch_export.config(state=tk.NORMAL if table.rows else tk.DISABLED)
+        self.show_rows(0)
+    
+    def show_rows(self, first: int):
+        """Fill the reusable Treeview items with rows starting at first."""
+        rows = self.table.rows if self.table is not None else 0
+        first = max(0, min(first, rows - TABLE_VISIBLE_ROWS))
+        self.table_first = first
+        window = self.table.window(first, first + TABLE_VISIBLE_ROWS) if rows else []
+        for index in range(TABLE_VISIBLE_ROWS):
+            self.batch_tree.item(str(index), values=window[index] if index < len(window) else ())
+        if rows:
+            self.batch_scroll.set(first / rows, (first + len(window)) / rows)
+        else:
+            self.batch_scroll.set(0, 1)
+    
+    def scroll_table(self, action, amount, unit=None):
+        """Scrollbar command: move the visible window of rows."""
+        if self.table is None:
+            return
+        if action == "moveto":
+            self.show_rows(int(float(amount) * self.table.rows))
+        else:
+            step = TABLE_VISIBLE_ROWS if unit == "pages" else 1
+            self.show_rows(self.table_first + int(amount) * step)
+    
+    def _step_table(self, rows: int):
+        if self.table is not None:
+            self.show_rows(self.table_first + rows)
+        return "break"
+    
+    def jump_to_row(self):
+        """Scroll so that the requested (1-based) row is on screen and selected."""
+        if self.table is None:
+            return
+        try:
+            row = int(self.batch_jump.get()) - 1
+        except ValueError:
+            messagebox.showerror("Input Error", "Please enter a row number.")
+            return
+        row = max(0, min(row, self.table.rows - 1))
+        self.show_rows(row)
+        self.batch_tree.selection_set(str(row - self.table_first))
+    
+    def export_batch_file(self):
+        """Write the loaded results to CSV, JSONL or a column set."""
+        if self.table is None:
+            return
+        path = filedialog.asksaveasfilename(
+            title="Export results", defaultextension=".csv",
+            filetypes=(("CSV", "*.csv"), ("JSON Lines", "*.jsonl"),
+                       ("Column set", "*.manifest.json")))
+        if path:
+            self.run_job(export_table_job, self.table, path, label="Exporting",
+                         on_done=lambda p: self.batch_info.config(text=f"Exported to {p}"))
+    
     def create_info_tab(self):
         """Create Information tab."""
         frame = ttk.Frame(self.notebook, padding="20")
@@ -229,10 +743,7 @@ Energy:             joules (J)
 
 GRAVITY CONSTANTS:
 -----------------
-Earth:              9.81 m/s²
-Moon:               1.62 m/s²
-Mars:               3.71 m/s²
-Jupiter:            24.79 m/s²
+{gravity_constants}
 
 EXAMPLES:
 --------
@@ -260,7 +771,9 @@ Final:   PE = 0 J, KE = 196.2 J
 Total energy is conserved!
 """
         
-        info_text.insert(tk.END, info_content)
+        gravity_constants = "\n".join(
+            f"{(body.name + ':'):<20}{body.gravity} m/s²" for body in bodies.BODIES.values())
+        info_text.insert(tk.END, info_content.replace("{gravity_constants}", gravity_constants))
         info_text.config(state=tk.DISABLED)
     
     def calculate_kinetic(self):
@@ -278,7 +791,7 @@ Total energy is conserved!
                 f"Mass: {mass} kg\n"
                 f"Velocity: {velocity} m/s\n"
                 f"\nKinetic Energy = {result:.2f} J\n"
-                f"                = {result/1000:.3f} kJ"
+                f"                = {units.convert(result, 'J', 'kJ'):.3f} kJ"
             )
             self.ke_result.config(state=tk.DISABLED)
         except ValueError:
@@ -289,7 +802,7 @@ Total energy is conserved!
         try:
             mass = float(self.pe_mass.get())
             height = float(self.pe_height.get())
-            gravity = float(self.pe_gravity.get())
+            gravity = bodies.gravity_of(self.pe_gravity.get())
             
             result = EnergyCalculator.potential_energy(mass, height, gravity)
             
@@ -301,7 +814,7 @@ Total energy is conserved!
                 f"Height: {height} m\n"
                 f"Gravity: {gravity} m/s²\n"
                 f"\nPotential Energy = {result:.2f} J\n"
-                f"                 = {result/1000:.3f} kJ"
+                f"                 = {units.convert(result, 'J', 'kJ'):.3f} kJ"
             )
             self.pe_result.config(state=tk.DISABLED)
         except ValueError:
@@ -313,7 +826,7 @@ Total energy is conserved!
             mass = float(self.total_mass.get())
             velocity = float(self.total_velocity.get())
             height = float(self.total_height.get())
-            gravity = float(self.total_gravity.get())
+            gravity = bodies.gravity_of(self.total_gravity.get())
             
             ke = EnergyCalculator.kinetic_energy(mass, velocity)
             pe = EnergyCalculator.potential_energy(mass, height, gravity)
@@ -327,9 +840,9 @@ Total energy is conserved!
                 f"Velocity: {velocity} m/s\n"
                 f"Height: {height} m\n"
                 f"Gravity: {gravity} m/s²\n\n"
-                f"Kinetic Energy  = {ke:.2f} J ({ke/1000:.3f} kJ)\n"
-                f"Potential Energy = {pe:.2f} J ({pe/1000:.3f} kJ)\n"
-                f"\nTotal Mechanical Energy = {total:.2f} J ({total/1000:.3f} kJ)"
+                f"Kinetic Energy  = {ke:.2f} J ({units.convert(ke, 'J', 'kJ'):.3f} kJ)\n"
+                f"Potential Energy = {pe:.2f} J ({units.convert(pe, 'J', 'kJ'):.3f} kJ)\n"
+                f"\nTotal Mechanical Energy = {total:.2f} J ({units.convert(total, 'J', 'kJ'):.3f} kJ)"
             )
             self.total_result.config(state=tk.DISABLED)
         except ValueError:
@@ -1,28 +1,376 @@
 #!/usr/bin/env python3
 """
 Web Interface Launcher
-Opens the Energy Calculator web interface in your default browser
+Opens the Energy Calculator web interface in your default browser and
+serves the JSON compute API (/api/kinetic, /api/potential, /api/total)
+and, with --metrics, Prometheus metrics at /metrics
 """
 
+import argparse
+import email.utils
+import functools
+import gzip
+import hashlib
+import mimetypes
 import webbrowser
 import http.server
-import socketserver
 import threading
 import time
 import os
 import sys
+from urllib.parse import urlsplit
+
+import formulas
+import metrics
+import web_api
 
 PORT = 8000
-HANDLER = http.server.SimpleHTTPRequestHandler
+METRICS_PATH = "/metrics"
+# File types kept in the in-memory static asset cache
+CACHEABLE_SUFFIXES = (".html", ".css", ".js", ".json", ".svg", ".txt", ".ico", ".png")
+COMPRESSIBLE_SUFFIXES = (".html", ".css", ".js", ".json", ".svg", ".txt")
+
+
+class StaticAsset:
+    """A static file held in memory with its precomputed gzip body and ETag."""
+
+    def __init__(self, path, body, stat):
+        self.path = path
+        self.body = body
+        self.mtime_ns = stat.st_mtime_ns
+        self.size = stat.st_size
+        self.last_modified = email.utils.formatdate(stat.st_mtime, usegmt=True)
+        self.content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if self.content_type.startswith("text/"):
+            self.content_type += "; charset=utf-8"
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        self.gzip_body = None
+        self.gzip_etag = f'"{digest}-gz"'
+        if path.endswith(COMPRESSIBLE_SUFFIXES):
+            compressed = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(compressed) < len(body):
+                self.gzip_body = compressed
+
+    def is_stale(self, stat) -> bool:
+        """True if the file on disk changed since it was loaded."""
+        return stat.st_mtime_ns != self.mtime_ns or stat.st_size != self.size
+
+
+class StaticAssetCache:
+    """
+    In-memory cache of static files keyed by absolute path.
+
+    Each lookup costs one os.stat(); an asset is re-read (and its gzip body
+    and ETag recomputed) only when the file's mtime or size changed.
+    """
+
+    def __init__(self, directory):
+        self.directory = os.path.abspath(directory)
+        self._assets = {}
+        self._lock = threading.Lock()
+
+    def preload(self):
+        """Load every cacheable file at the top of the directory."""
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(CACHEABLE_SUFFIXES):
+                self.get(os.path.join(self.directory, name))
+        return self
+
+    def get(self, path):
+        """
+        Return the cached asset for a path, reloading it if it changed.
+
+        Returns:
+            StaticAsset, or None if the path is not a cacheable regular file
+        """
+        if not path.endswith(CACHEABLE_SUFFIXES):
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            with self._lock:
+                self._assets.pop(path, None)
+            return None
+        asset = self._assets.get(path)
+        if asset is not None and not asset.is_stale(stat):
+            return asset
+        if not os.path.isfile(path):
+            return None
+        with open(path, "rb") as f:
+            body = f.read()
+        asset = StaticAsset(path, body, stat)
+        with self._lock:
+            self._assets[path] = asset
+        return asset
+
+    def __len__(self):
+        return len(self._assets)
+
+
+def _accepts_gzip(header) -> bool:
+    """True if Accept-Encoding allows gzip; an explicit gzip entry overrides "*"."""
+    weights = {}
+    for part in (header or "").split(","):
+        coding, *params = part.split(";")
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    # A malformed weight is treated as "not acceptable"
+                    q = 0.0
+        weights[coding.strip().lower()] = q
+    return weights.get("gzip", weights.get("*", 0.0)) > 0
+
+
+def _etag_matches(header, etags) -> bool:
+    """Weak If-None-Match comparison, as required for GET/HEAD."""
+    candidates = [tag.strip() for tag in header.split(",")]
+    if "*" in candidates:
+        return True
+    return any((tag[2:] if tag.startswith("W/") else tag) in etags
+               for tag in candidates)
+
+
+class EnergyRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """Serves the static pages plus the JSON compute API over HTTP/1.1."""
+
+    # HTTP/1.1 keeps connections alive between requests; without Nagle,
+    # the separate header and body writes are not held back by delayed ACKs
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    quiet = False
+    asset_cache = None
+    response_cache = None
+    cache_control = "no-cache"
+
+    def do_GET(self):
+        """Serve API requests from the query string, files otherwise."""
+        url = urlsplit(self.path)
+        if web_api.is_api_path(url.path):
+            self.send_api(*web_api.handle_request(
+                url.path, web_api.parse_query(url.query), self.response_cache))
+        elif not self.send_cached(url.path):
+            super().do_GET()
+
+    def do_HEAD(self):
+        """Serve headers for static files, from the cache where possible."""
+        if not self.send_cached(urlsplit(self.path).path, head=True):
+            super().do_HEAD()
+
+    def send_cached(self, url_path, head=False):
+        """
+        Answer a static file request from the asset cache.
+
+        Returns:
+            False if the file is not cacheable and the default handler
+            should serve it
+        """
+        if self.asset_cache is None:
+            return False
+        path = self.translate_path(url_path)
+        if os.path.isdir(path):
+            if not url_path.endswith("/"):
+                return False
+            path = os.path.join(path, "index.html")
+        asset = self.asset_cache.get(path)
+        if asset is None:
+            return False
+
+        use_gzip = asset.gzip_body is not None and _accepts_gzip(
+            self.headers.get("Accept-Encoding"))
+        etag = asset.gzip_etag if use_gzip else asset.etag
+        if self.not_modified(asset):
+            self.send_response(304)
+            self.send_asset_headers(asset, etag)
+            self.end_headers()
+            return True
+
+        body = asset.gzip_body if use_gzip else asset.body
+        self.send_response(200)
+        self.send_asset_headers(asset, etag)
+        self.send_header("Content-Type", asset.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+        return True
+
+    def not_modified(self, asset):
+        """Evaluate If-None-Match, falling back to If-Modified-Since."""
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return _etag_matches(if_none_match, (asset.etag, asset.gzip_etag))
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+            return int(asset.mtime_ns // 1_000_000_000) <= since.timestamp()
+        return False
+
+    def send_asset_headers(self, asset, etag):
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", asset.last_modified)
+        self.send_header("Cache-Control", self.cache_control)
+        self.send_header("Vary", "Accept-Encoding")
+
+    def do_POST(self):
+        """Serve API requests carrying a JSON object body."""
+        url = urlsplit(self.path)
+        if not web_api.is_api_path(url.path):
+            self.send_error(405, "POST is only supported for /api/ endpoints")
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.send_error(400, "Invalid Content-Length")
+            return
+        body = self.rfile.read(length)
+        try:
+            params = web_api.parse_json_body(body)
+        except web_api.ApiError as e:
+            self.send_api(e.status, web_api.encode({"error": e.message}))
+            return
+        params.update(web_api.parse_query(url.query))
+        self.send_api(*web_api.handle_request(url.path, params, self.response_cache))
+
+    def send_api(self, status, body):
+        """Send a JSON API response with an explicit length for keep-alive."""
+        self.send_response(status)
+        self.send_header("Content-Type", web_api.JSON_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
 
+class InstrumentedRequestHandler(EnergyRequestHandler):
+    """EnergyRequestHandler that records request metrics and serves /metrics."""
 
-def start_server():
-    """Start the HTTP server."""
-    with socketserver.TCPServer(("", PORT), HANDLER) as httpd:
-        print(f"\n✅ Server running at: http://localhost:{PORT}")
-        print(f"📂 Serving from: {os.getcwd()}\n")
-        print("Press Ctrl+C to stop the server")
-        
+    _started = None
+    _status = None
+
+    def parse_request(self):
+        # Timing starts once the request line has arrived, so idle
+        # keep-alive time is not counted as latency
+        self._started = time.perf_counter_ns()
+        self._status = None
+        return super().parse_request()
+
+    def handle_one_request(self):
+        self._started = None
+        super().handle_one_request()
+        if self._started is not None and self._status is not None:
+            metrics.observe_request(self.command or "", self.endpoint_label(),
+                                    self._status,
+                                    time.perf_counter_ns() - self._started)
+
+    def send_response(self, code, message=None):
+        self._status = code
+        super().send_response(code, message)
+
+    def endpoint_label(self):
+        """Bounded endpoint name for metric labels."""
+        path = urlsplit(self.path).path
+        if path == METRICS_PATH:
+            return METRICS_PATH
+        if web_api.is_api_path(path):
+            endpoint = path[len(web_api.API_PREFIX):].strip("/")
+            known = (*web_api.ENDPOINTS, web_api.CACHE_STATS_ENDPOINT,
+                     web_api.BODIES_ENDPOINT, web_api.FORMULAS_ENDPOINT,
+                     *(web_api.FORMULA_PREFIX + name for name in formulas.names()))
+            return web_api.API_PREFIX + endpoint if endpoint in known else "api_unknown"
+        return "static"
+
+    def do_GET(self):
+        """Serve /metrics, everything else as usual."""
+        if urlsplit(self.path).path == METRICS_PATH:
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", metrics.CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        super().do_GET()
+
+
+HANDLER = EnergyRequestHandler
+
+
+def create_server(host="", port=PORT, quiet=False, directory=None,
+                  cache_assets=True, max_age=0,
+                  response_cache_size=web_api.DEFAULT_CACHE_SIZE,
+                  response_cache_ttl=web_api.DEFAULT_CACHE_TTL,
+                  instrument=False):
+    """
+    Create (and bind) a threaded HTTP server for the calculator.
+
+    Each connection is handled on its own daemon thread. Static files are
+    preloaded into a StaticAssetCache and served with ETags, conditional
+    GET and precompressed gzip bodies.
+
+    Args:
+        host: Interface to bind (default: all interfaces)
+        port: TCP port (0 picks a free port)
+        quiet: Suppress per-request access logging
+        directory: Directory of static files (default: current directory)
+        cache_assets: Serve static files from the in-memory cache
+        max_age: Seconds browsers may reuse a page without revalidating
+            (0 means always revalidate, which is cheap thanks to 304s)
+        response_cache_size: Entries in the API response cache (0 disables it)
+        response_cache_ttl: Seconds an API response stays cached
+        instrument: Enable calculator instrumentation (see metrics.py),
+            record per-request metrics and serve them at /metrics
+
+    Returns:
+        A bound ThreadingHTTPServer, ready for serve_forever()
+    """
+    directory = directory or os.getcwd()
+    attributes = {
+        "quiet": quiet,
+        "asset_cache": StaticAssetCache(directory).preload() if cache_assets else None,
+        "cache_control": f"public, max-age={max_age}" if max_age > 0 else "no-cache",
+        "response_cache": create_response_cache(response_cache_size, response_cache_ttl),
+    }
+    if instrument:
+        metrics.enable()
+    base = InstrumentedRequestHandler if instrument else HANDLER
+    handler = type("Handler", (base,), attributes)
+    handler = functools.partial(handler, directory=directory)
+    httpd = http.server.ThreadingHTTPServer((host, port), handler)
+    httpd.daemon_threads = True
+    return httpd
+
+
+def create_response_cache(size, ttl):
+    """Build the API response cache, or None when size is 0."""
+    return web_api.ResponseCache(size, ttl) if size > 0 else None
+
+
+def start_server(httpd):
+    """Run the HTTP server until interrupted."""
+    port = httpd.server_address[1]
+    print(f"\n✅ Server running at: http://localhost:{port}")
+    print(f"📂 Serving from: {os.getcwd()}")
+    print(f"🧮 Compute API: http://localhost:{port}/api/total?mass=2&velocity=3&height=1\n")
+    print("Press Ctrl+C to stop the server")
+
+    with httpd:
         try:
             httpd.serve_forever()
         except KeyboardInterrupt:
@@ -30,36 +378,97 @@ def start_server():
             sys.exit(0)
 
 
-def main():
+def parse_args(argv=None):
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Energy Calculator web server")
+    parser.add_argument("--host", default="", help="Interface to bind (default: all)")
+    parser.add_argument("--port", type=int, default=PORT,
+                        help=f"Port to listen on (default: {PORT})")
+    parser.add_argument("--headless", action="store_true",
+                        help="Serve without opening a browser")
+    parser.add_argument("--quiet", action="store_true",
+                        help="Do not log every request")
+    parser.add_argument("--no-cache", dest="cache_assets", action="store_false",
+                        help="Read static files from disk on every request")
+    parser.add_argument("--max-age", type=int, default=0,
+                        help="Cache-Control max-age for static files (default: 0)")
+    parser.add_argument("--response-cache-size", type=int, default=web_api.DEFAULT_CACHE_SIZE,
+                        help="API responses kept in the LRU cache; 0 disables it "
+                             f"(default: {web_api.DEFAULT_CACHE_SIZE})")
+    parser.add_argument("--response-cache-ttl", type=float, default=web_api.DEFAULT_CACHE_TTL,
+                        help="Seconds an API response stays cached "
+                             f"(default: {web_api.DEFAULT_CACHE_TTL:g})")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Instrument the calculator and serve Prometheus "
+                             f"metrics at {METRICS_PATH} (threaded server only)")
+    parser.add_argument("--formulas", metavar="FILE", action="append", default=[],
+                        help="Register the formulas in an INI file for "
+                             f"{web_api.API_PREFIX}{web_api.FORMULA_PREFIX}NAME (repeatable)")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Run the asyncio API server (with bulk endpoints) "
+                             "instead; implies --headless")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """Main entry point."""
+    args = parse_args(argv)
+    try:
+        for path in args.formulas:
+            formulas.load_config_file(path)
+    except (OSError, formulas.FormulaError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
     # Change to script directory
     script_dir = os.path.dirname(os.path.abspath(__file__))
     os.chdir(script_dir)
-    
+
     # Check if index.html exists
     if not os.path.exists("index.html"):
         print("❌ Error: index.html not found in the current directory")
         print(f"📂 Current directory: {os.getcwd()}")
         sys.exit(1)
-    
+
     print("=" * 50)
     print("Energy Calculator - Web Interface")
     print("=" * 50)
-    
+
+    if args.use_async:
+        import asyncio
+        import async_server
+
+        try:
+            asyncio.run(async_server.serve(
+                args.host, args.port,
+                create_response_cache(args.response_cache_size, args.response_cache_ttl)))
+        except KeyboardInterrupt:
+            print("\n\n✓ Server stopped successfully")
+        return
+
+    # Binding happens here, so the server accepts connections before the
+    # browser is opened
+    httpd = create_server(args.host, args.port, quiet=args.quiet,
+                          cache_assets=args.cache_assets, max_age=args.max_age,
+                          response_cache_size=args.response_cache_size,
+                          response_cache_ttl=args.response_cache_ttl,
+                          instrument=args.metrics)
+
+    if args.headless:
+        start_server(httpd)
+        return
+
     # Start server in a background thread
-    server_thread = threading.Thread(target=start_server, daemon=True)
+    server_thread = threading.Thread(target=start_server, args=(httpd,), daemon=True)
     server_thread.start()
-    
-    # Give server a moment to start
-    time.sleep(1)
-    
+
     # Open in default browser
-    url = f"http://localhost:{PORT}/index.html"
+    url = f"http://localhost:{httpd.server_address[1]}/index.html"
     print(f"\n🌐 Opening web interface in your browser...")
     print(f"🔗 Opening: {url}\n")
-    
+
     webbrowser.open(url)
-    
+
     # Keep the server running
     try:
         while True:
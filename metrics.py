@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+"""
+Opt-in instrumentation for the Energy Calculator
+
+Nothing is measured until enable() is called. enable() swaps the
+EnergyCalculator entry points and the batch engines' chunk functions for
+instrumented wrappers, and disable() puts the originals back, so a process
+that never enables instrumentation runs exactly the uninstrumented code.
+
+While enabled the module records:
+
+    energy_calls_total{function}                calls per entry point
+    energy_rows_total{function}                 rows computed
+    energy_call_errors_total{function}          calls that raised
+    energy_validation_failures_total{reason}    failing rows by reason
+    energy_call_duration_seconds{function}      latency histogram
+    http_requests_total{method,endpoint,status} web requests (launch_web)
+    http_request_duration_seconds{endpoint}     web latency histogram
+
+Only the outermost instrumented call on a thread is recorded, so
+total_mechanical_energy() counts once rather than also counting the
+kinetic and potential calls it makes, and a batch engine chunk counts as
+one "stream_chunk", "columnar_chunk" or "bulk_chunk" call. Validation
+failures are counted wherever rows are validated. ParallelBatchEngine
+calls are recorded in the calling process ("parallel_total_mechanical_energy",
+or "parallel_chunks" for columnar runs with workers > 1), with their rows
+and latency; the validation failures found inside worker processes are
+not broken down by reason.
+
+Each thread records into its own cells, so instrumented calls on
+different threads never wait on a lock; render() and summary() add the
+threads' values together.
+
+Histograms use power-of-two buckets from 64 ns to about 69 s: the bucket
+of a duration is the bit length of its nanosecond count, so observing a
+value costs no floating-point work or search. render() produces the
+Prometheus text exposition format and summary() a plain-text table.
+"""
+
+import functools
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Tuple, Union
+
+from energy_calculator import EnergyCalculator, NEGATIVE_VALUE_MESSAGES
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+MIN_BUCKET_BITS = 6         # first bucket: <= 2**6 ns
+MAX_BUCKET_BITS = 36        # last finite bucket: <= 2**36 ns (~68.7 s)
+BUCKET_BOUNDS = tuple(2 ** bits / 1e9
+                      for bits in range(MIN_BUCKET_BITS, MAX_BUCKET_BITS + 1))
+
+# Guards the lists of per-thread shards; recording itself takes no lock
+_shards_lock = threading.Lock()
+
+# Scalar ValueError messages and batch report columns map to these reasons
+REASONS = {role: f"negative_{role}" for role in NEGATIVE_VALUE_MESSAGES}
+_MESSAGE_REASONS = {message: REASONS[role]
+                    for role, message in NEGATIVE_VALUE_MESSAGES.items()}
+
+
+def bucket_index(ns: int) -> int:
+    """Histogram bucket of a duration in nanoseconds."""
+    # ns in (2**(k-1), 2**k] has (ns - 1).bit_length() == k
+    return (min(max((ns - 1).bit_length(), MIN_BUCKET_BITS), MAX_BUCKET_BITS + 1)
+            - MIN_BUCKET_BITS)
+
+
+def _add_into(target: Dict[tuple, list], values: Dict[tuple, list]) -> None:
+    """Add one shard's cells into target, cell by cell."""
+    for labels, cell in list(values.items()):
+        total = target.get(labels)
+        if total is None:
+            target[labels] = list(cell)
+        else:
+            total[:] = [a + b for a, b in zip(total, cell)]
+
+
+class _Metric:
+    """
+    Values per label combination, kept in one shard per recording thread.
+
+    A thread only writes its own shard, so recording takes no lock and
+    threads never contend; readers add the shards together. Shards of
+    finished threads are folded into one, so a server that starts a thread
+    per request does not accumulate them.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._finished: Dict[tuple, list] = {}
+        self._shards: List[Tuple[threading.Thread, Dict[tuple, list]]] = []
+        self._local = threading.local()
+
+    def _new_cell(self) -> list:
+        raise NotImplementedError
+
+    def _fold_finished(self) -> None:
+        # Called with _shards_lock held; a finished thread writes no more
+        live = []
+        for thread, values in self._shards:
+            if thread.is_alive():
+                live.append((thread, values))
+            else:
+                _add_into(self._finished, values)
+        self._shards = live
+
+    def cell(self, labels: tuple = ()) -> list:
+        """This thread's cell for one label combination, created at 0."""
+        try:
+            values = self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            with _shards_lock:
+                self._fold_finished()
+                self._shards.append((threading.current_thread(), values))
+        cell = values.get(labels)
+        if cell is None:
+            cell = values[labels] = self._new_cell()
+        return cell
+
+    @property
+    def values(self) -> Dict[tuple, list]:
+        """Every thread's cells added together, per label combination."""
+        with _shards_lock:
+            self._fold_finished()
+            merged = {labels: list(cell) for labels, cell in self._finished.items()}
+            for _, values in self._shards:
+                _add_into(merged, values)
+        return merged
+
+    def reset(self) -> None:
+        """Zero every value; cells handed out keep working."""
+        with _shards_lock:
+            for values in [self._finished] + [values for _, values in self._shards]:
+                for cell in list(values.values()):
+                    cell[:] = [0] * len(cell)
+
+
+class Counter(_Metric):
+    """
+    A monotonically increasing value per label combination.
+
+    Each label combination owns a one-element list per thread; hot paths
+    fetch it once with cell() and then add to it directly.
+    """
+
+    kind = "counter"
+
+    def _new_cell(self) -> list:
+        return [0]
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        """Add amount to the value for one label combination."""
+        self.cell(labels)[0] += amount
+
+    def get(self, labels: tuple = ()) -> float:
+        """Current value for one label combination (0 if never incremented)."""
+        return self.values.get(labels, [0])[0]
+
+    def samples(self) -> Iterable[Tuple[str, tuple, tuple, float]]:
+        """(suffix, label names, label values, value) for rendering."""
+        for labels, (value,) in sorted(self.values.items()):
+            yield "", self.labels, labels, value
+
+
+class Histogram(_Metric):
+    """
+    Log-bucketed latency distribution per label combination.
+
+    Each label combination owns a list of bucket counts (the last bucket
+    is +Inf) followed by the sum of observations in nanoseconds.
+    """
+
+    kind = "histogram"
+
+    def _new_cell(self) -> list:
+        return [0] * (len(BUCKET_BOUNDS) + 2)
+
+    def observe_ns(self, labels: tuple, ns: int) -> None:
+        """Record one duration given in nanoseconds."""
+        entry = self.cell(labels)
+        entry[bucket_index(ns)] += 1
+        entry[-1] += ns
+
+    def count(self, labels: tuple = ()) -> int:
+        """Number of observations for one label combination."""
+        entry = self.values.get(labels)
+        return sum(entry[:-1]) if entry else 0
+
+    def total_seconds(self, labels: tuple = ()) -> float:
+        """Sum of the observations for one label combination, in seconds."""
+        entry = self.values.get(labels)
+        return entry[-1] / 1e9 if entry else 0.0
+
+    def quantile(self, labels: tuple, q: float) -> Union[float, None]:
+        """
+        Upper bound in seconds of the bucket holding the q-quantile.
+
+        Returns None without observations and inf for the overflow bucket.
+        """
+        entry = self.values.get(labels)
+        total = sum(entry[:-1]) if entry else 0
+        if not total:
+            return None
+        seen = 0
+        for bound, count in zip(BUCKET_BOUNDS + (float("inf"),), entry):
+            seen += count
+            if seen >= q * total and seen:
+                return bound
+        return float("inf")
+
+    def samples(self) -> Iterable[Tuple[str, tuple, tuple, float]]:
+        """Cumulative buckets, sum and count for rendering."""
+        names = self.labels + ("le",)
+        for labels, entry in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKET_BOUNDS, entry):
+                cumulative += count
+                yield "_bucket", names, labels + (repr(bound),), cumulative
+            cumulative += entry[-2]
+            yield "_bucket", names, labels + ("+Inf",), cumulative
+            yield "_sum", self.labels, labels, entry[-1] / 1e9
+            yield "_count", self.labels, labels, cumulative
+
+
+CALLS = Counter("energy_calls_total",
+                "Calls of calculator entry points", ("function",))
+ROWS = Counter("energy_rows_total",
+               "Rows computed by calculator entry points", ("function",))
+CALL_ERRORS = Counter("energy_call_errors_total",
+                      "Calculator calls that raised an exception", ("function",))
+VALIDATION_FAILURES = Counter("energy_validation_failures_total",
+                              "Input rows that failed validation", ("reason",))
+CALL_DURATION = Histogram("energy_call_duration_seconds",
+                          "Latency of calculator entry points", ("function",))
+HTTP_REQUESTS = Counter("http_requests_total",
+                        "HTTP requests handled", ("method", "endpoint", "status"))
+HTTP_DURATION = Histogram("http_request_duration_seconds",
+                          "Latency of HTTP requests", ("endpoint",))
+METRICS = (CALLS, ROWS, CALL_ERRORS, VALIDATION_FAILURES, CALL_DURATION,
+           HTTP_REQUESTS, HTTP_DURATION)
+
+
+class _CallState(threading.local):
+    # A class default keeps the per-call check free of AttributeError
+    active = False
+
+    def __init__(self):
+        # This thread's (calls, rows, errors, duration) cells per function
+        self.cells = {}
+
+
+_local = _CallState()
+_originals: List[Tuple[object, str, object]] = []
+
+
+def _instrument(func: Callable, name: str, rows: Callable[[object, tuple], int]) -> Callable:
+    """
+    Wrap an entry point so its outermost calls are counted and timed.
+
+    rows(result, args) returns the number of rows the call computed.
+    """
+    labels = (name,)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        state = _local
+        if state.active:
+            return func(*args, **kwargs)
+        cells = state.cells.get(name)
+        if cells is None:
+            cells = state.cells[name] = (CALLS.cell(labels), ROWS.cell(labels),
+                                         CALL_ERRORS.cell(labels), CALL_DURATION.cell(labels))
+        calls, rows_total, errors, duration = cells
+        state.active = True
+        started = time.perf_counter_ns()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            elapsed = time.perf_counter_ns() - started
+            calls[0] += 1
+            errors[0] += 1
+            duration[bucket_index(elapsed)] += 1
+            duration[-1] += elapsed
+            reason = _MESSAGE_REASONS.get(str(e))
+            if reason is not None:
+                VALIDATION_FAILURES.inc((reason,))
+            raise
+        finally:
+            state.active = False
+        elapsed = time.perf_counter_ns() - started
+        # The cells belong to this thread, so they are updated without a lock
+        calls[0] += 1
+        rows_total[0] += rows(result, args)
+        duration[bucket_index(elapsed)] += 1
+        duration[-1] += elapsed
+        return result
+
+    return wrapper
+
+
+def _count_report(func: Callable) -> Callable:
+    """Wrap the batch validation screen to count failing rows per column."""
+    @functools.wraps(func)
+    def wrapper(np, shape, arrays):
+        report = func(np, shape, arrays)
+        for role, count in report.counts().items():
+            VALIDATION_FAILURES.inc((REASONS[role],), count)
+        return report
+    return wrapper
+
+
+def _one_row(result, args) -> int:
+    return 1
+
+
+def _result_rows(result, args) -> int:
+    return int(getattr(result, "size", 1))
+
+
+def _report_rows(report, args) -> int:
+    rows = 1
+    for length in report.shape:
+        rows *= length
+    return rows
+
+
+def _stream_chunk_rows(result: dict, args) -> int:
+    # Negative values were counted by the validation screen; parse and
+    # body errors only show up in the per-row messages
+    for message in result["error"]:
+        if message:
+            if "is not a number" in message:
+                VALIDATION_FAILURES.inc(("not_a_number",))
+            if "Unknown body" in message:
+                VALIDATION_FAILURES.inc(("unknown_body",))
+    return len(result["error"])
+
+
+def _engine_rows(result, args) -> int:
+    # run_chunks(self, func, rows, ...)
+    return args[2]
+
+
+def _bulk_rows(result: tuple, args) -> int:
+    return len(result[1][0])
+
+
+def _columnar_chunk_rows(invalid: int, args) -> int:
+    import columnar
+
+    _, target, _, start, stop = args[:5]
+    if invalid:
+        flags = target["invalid"][start:stop]
+        unknown = int((flags & columnar.INVALID_FLAGS["body"]).astype(bool).sum())
+        if unknown:
+            VALIDATION_FAILURES.inc(("unknown_body",), unknown)
+    return stop - start
+
+
+def _patch(owner, attribute: str, replacement, static: bool = False) -> None:
+    _originals.append((owner, attribute, owner.__dict__[attribute]))
+    setattr(owner, attribute, staticmethod(replacement) if static else replacement)
+
+
+def enabled() -> bool:
+    """True while instrumentation is installed."""
+    return bool(_originals)
+
+
+def enable(calculator: Union[type, None] = None) -> None:
+    """
+    Install the instrumented wrappers (a no-op if already enabled).
+
+    Args:
+        calculator: Another EnergyCalculator class to instrument as well.
+            The command line passes its own: run as a script, the
+            calculator module is __main__, a copy separate from the
+            energy_calculator module the other modules import
+    """
+    if _originals:
+        return
+    import async_server
+    import batch_stream
+    import columnar
+    import parallel
+
+    entry_points = {
+        "kinetic_energy": _one_row,
+        "potential_energy": _one_row,
+        "total_mechanical_energy": _one_row,
+        "kinetic_energy_batch": _result_rows,
+        "potential_energy_batch": _result_rows,
+        "total_mechanical_energy_batch": _result_rows,
+        "validate_batch": _report_rows,
+    }
+    classes = [EnergyCalculator]
+    if calculator is not None and calculator is not EnergyCalculator:
+        classes.append(calculator)
+    for cls in classes:
+        for name, rows in entry_points.items():
+            _patch(cls, name, _instrument(getattr(cls, name), name, rows), static=True)
+        _patch(cls, "_batch_report", _count_report(cls._batch_report), static=True)
+    _patch(batch_stream, "compute_chunk",
+           _instrument(batch_stream.compute_chunk, "stream_chunk", _stream_chunk_rows))
+    _patch(columnar, "_process_chunk",
+           _instrument(columnar._process_chunk, "columnar_chunk", _columnar_chunk_rows))
+    _patch(async_server, "compute_bulk",
+           _instrument(async_server.compute_bulk, "bulk_chunk", _bulk_rows))
+    engine = parallel.ParallelBatchEngine
+    for name in ("kinetic_energy", "potential_energy", "total_mechanical_energy"):
+        _patch(engine, name,
+               _instrument(getattr(engine, name), f"parallel_{name}", _result_rows))
+    _patch(engine, "run_chunks",
+           _instrument(engine.run_chunks, "parallel_chunks", _engine_rows))
+
+
+def disable() -> None:
+    """Restore the uninstrumented functions; recorded values are kept."""
+    while _originals:
+        owner, attribute, original = _originals.pop()
+        setattr(owner, attribute, original)
+
+
+def reset() -> None:
+    """Clear every recorded value."""
+    for metric in METRICS:
+        metric.reset()
+
+
+def observe_request(method: str, endpoint: str, status: int, ns: int) -> None:
+    """Record one handled HTTP request."""
+    HTTP_REQUESTS.inc((method, endpoint, str(status)))
+    HTTP_DURATION.observe_ns((endpoint,), ns)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in METRICS:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for suffix, names, values, value in metric.samples():
+            labels = ",".join(f'{name}="{_escape(str(label))}"'
+                              for name, label in zip(names, values))
+            selector = f"{{{labels}}}" if labels else ""
+            lines.append(f"{metric.name}{suffix}{selector} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _format_seconds(seconds: Union[float, None]) -> str:
+    if seconds is None:
+        return "-"
+    if seconds == float("inf"):
+        return "inf"
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+
+def summary() -> str:
+    """Recorded calculator and request metrics as a plain-text report."""
+    lines = [f"{'function':<30} {'calls':>9} {'rows':>12} {'errors':>7} "
+             f"{'mean':>9} {'p50 <=':>9} {'p99 <=':>9}"]
+    for (function,) in sorted(CALLS.values):
+        labels = (function,)
+        calls = CALLS.get(labels)
+        if not calls:
+            continue
+        mean = CALL_DURATION.total_seconds(labels) / calls if calls else None
+        lines.append(f"{function:<30} {int(calls):>9} {int(ROWS.get(labels)):>12} "
+                     f"{int(CALL_ERRORS.get(labels)):>7} {_format_seconds(mean):>9} "
+                     f"{_format_seconds(CALL_DURATION.quantile(labels, 0.5)):>9} "
+                     f"{_format_seconds(CALL_DURATION.quantile(labels, 0.99)):>9}")
+    if len(lines) == 1:
+        lines.append("(no calculator calls recorded)")
+    failures = [(reason, count) for (reason,), (count,)
+                in sorted(VALIDATION_FAILURES.values.items()) if count]
+    if failures:
+        lines.append("validation failures: " + ", ".join(
+            f"{reason}={int(count)}" for reason, count in failures))
+    requests = sum(count for count, in HTTP_REQUESTS.values.values())
+    if requests:
+        lines.append(f"http requests: {int(requests)}")
+    return "\n".join(lines)
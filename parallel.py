@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Multi-core batch engine for the Energy Calculator
+
+Splits large batch inputs into row chunks and runs them on a pool of
+worker processes. Input and output columns live in
+multiprocessing.shared_memory blocks, so workers read and write them in
+place and only chunk boundaries and block names are pickled. Small inputs
+are computed in-process, where pool overhead would dominate.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, NamedTuple, Union
+
+import precision as precision_modes
+from energy_calculator import (
+    BatchValidationError,
+    EnergyCalculator,
+    ValidationReport,
+    _numpy,
+)
+
+DEFAULT_CHUNK_ROWS = 1 << 20
+# Below this many rows the batch is computed in the calling process
+DEFAULT_MIN_PARALLEL_ROWS = 1 << 21
+
+KINDS = {
+    "kinetic": ("mass", "velocity"),
+    "potential": ("mass", "height", "gravity"),
+    "total": ("mass", "velocity", "height", "gravity"),
+}
+
+
+class ChunkTiming(NamedTuple):
+    """Timing breakdown of one chunk, in seconds."""
+    index: int
+    start: int
+    stop: int
+    worker: int
+    queued: float
+    compute: float
+    wall: float
+
+
+def _run_timed(func, start, stop, args):
+    """Worker-side wrapper recording when a chunk started and finished."""
+    began = time.time()
+    payload = func(start, stop, *args)
+    return payload, began, time.time(), os.getpid()
+
+
+def _attach(name: str, rows: int, dtype="float64"):
+    np = _numpy()
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray((rows,), dtype=dtype, buffer=block.buf)
+
+
+def _shared_chunk(start, stop, kind, rows, inputs, out_name, on_invalid,
+                  precision="float64"):
+    """
+    Compute one chunk of a shared-memory batch inside a worker.
+
+    Args:
+        start, stop: Row range of the chunk
+        kind: "kinetic", "potential" or "total"
+        rows: Total rows in every shared column
+        inputs: Dict mapping role to ("shm", name) or ("scalar", value)
+        out_name: Shared memory block receiving the results
+        on_invalid: "raise", "nan" or "ignore"
+        precision: "float64" or "float32"; also the dtype of the output block
+
+    Returns:
+        Dict mapping each failing role to absolute indices of its bad rows
+    """
+    np = _numpy()
+    blocks = []
+    try:
+        columns = {}
+        for role, (source, value) in inputs.items():
+            if source == "shm":
+                block, array = _attach(value, rows)
+                blocks.append(block)
+                columns[role] = array[start:stop]
+            else:
+                columns[role] = value
+        block, out = _attach(out_name, rows, precision)
+        blocks.append(block)
+        out = out[start:stop]
+
+        failures = {}
+        report = None
+        if on_invalid != "ignore":
+            report = EnergyCalculator.validate_batch(precision, **columns)
+            failures = {role: np.flatnonzero(bad) + start
+                        for role, bad in report.failures.items()}
+        if kind == "kinetic":
+            EnergyCalculator.kinetic_energy_batch(
+                columns["mass"], columns["velocity"], on_invalid="ignore", out=out,
+                precision=precision)
+        elif kind == "potential":
+            EnergyCalculator.potential_energy_batch(
+                columns["mass"], columns["height"], columns["gravity"],
+                on_invalid="ignore", out=out, precision=precision)
+        else:
+            EnergyCalculator.total_mechanical_energy_batch(
+                columns["mass"], columns["velocity"], columns["height"],
+                columns["gravity"], on_invalid="ignore", out=out, precision=precision)
+        if report is not None and not report.ok and on_invalid == "nan":
+            out[report.mask] = float("nan")
+        # Views must be released before the blocks can be closed
+        del columns, out
+        return failures
+    finally:
+        for block in blocks:
+            block.close()
+
+
+class ParallelBatchEngine:
+    """
+    Process-pool executor for the EnergyCalculator batch API.
+
+    The pool is created on first use and reused until close() (or the end
+    of a with block). After each call, ``timings`` holds one ChunkTiming
+    per chunk in row order.
+    """
+
+    def __init__(self, workers: Union[int, None] = None,
+                 chunk_size: int = DEFAULT_CHUNK_ROWS,
+                 min_parallel_rows: int = DEFAULT_MIN_PARALLEL_ROWS):
+        if chunk_size <= 0:
+            raise ValueError("Chunk size must be positive")
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.min_parallel_rows = min_parallel_rows
+        self.timings: List[ChunkTiming] = []
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        """Shut down the worker pool."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def use_pool(self, rows: int) -> bool:
+        """True if a batch of this many rows is worth sending to workers."""
+        return self.workers > 1 and rows >= self.min_parallel_rows
+
+    def run_chunks(self, func, rows: int, *args) -> list:
+        """
+        Run func(start, stop, *args) for every chunk on the worker pool.
+
+        func must be a picklable module-level function. Results are
+        returned in chunk order and ``timings`` is refreshed.
+
+        Args:
+            func: Chunk function executed in the workers
+            rows: Total number of rows to split
+            *args: Extra picklable arguments passed to every call
+
+        Returns:
+            List of func results in chunk order
+        """
+        bounds = [(start, min(start + self.chunk_size, rows))
+                  for start in range(0, rows, self.chunk_size)]
+        pool = self._executor()
+        submitted = []
+        for start, stop in bounds:
+            submitted.append((time.time(), pool.submit(
+                _run_timed, func, start, stop, args)))
+        results = []
+        self.timings = []
+        for index, ((start, stop), (sent, future)) in enumerate(zip(bounds, submitted)):
+            payload, began, finished, pid = future.result()
+            results.append(payload)
+            self.timings.append(ChunkTiming(
+                index, start, stop, pid, max(began - sent, 0.0),
+                finished - began, time.time() - sent))
+        return results
+
+    def _compute(self, kind: str, on_invalid: str, precision: str, **columns):
+        if on_invalid not in ("raise", "nan", "ignore"):
+            raise ValueError(f"Unknown on_invalid mode: {on_invalid!r}")
+        if precision_modes.is_exact(precision_modes.check(precision)):
+            raise ValueError("The parallel engine computes in float64 or float32; "
+                             f"use the EnergyCalculator batch API for {precision}")
+        np = _numpy()
+        arrays = {role: np.asarray(columns[role], dtype=np.float64)
+                  for role in KINDS[kind]}
+        shape = np.broadcast_shapes(*(a.shape for a in arrays.values()))
+        rows = shape[0] if len(shape) == 1 else 0
+
+        if len(shape) != 1 or not self.use_pool(rows):
+            began = time.perf_counter()
+            result = self._compute_local(kind, on_invalid, precision, arrays)
+            elapsed = time.perf_counter() - began
+            size = int(np.prod(shape))
+            self.timings = [ChunkTiming(0, 0, size, os.getpid(), 0.0, elapsed, elapsed)]
+            return result
+
+        blocks = []
+        try:
+            inputs = {}
+            for role, array in arrays.items():
+                if array.size == 1:
+                    # Broadcast columns such as a one-element gravity array
+                    # go by value: workers attach every block as rows long
+                    inputs[role] = ("scalar", float(array.reshape(())))
+                    continue
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                blocks.append(block)
+                np.ndarray(array.shape, dtype=np.float64, buffer=block.buf)[:] = array
+                inputs[role] = ("shm", block.name)
+            dtype = precision_modes.dtype(np, precision)
+            out_block = shared_memory.SharedMemory(
+                create=True, size=rows * np.dtype(dtype).itemsize)
+            blocks.append(out_block)
+
+            chunk_failures = self.run_chunks(
+                _shared_chunk, rows, kind, rows, inputs, out_block.name, on_invalid,
+                precision)
+            result = np.ndarray((rows,), dtype=dtype, buffer=out_block.buf).copy()
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+        failures = {}
+        for chunk in chunk_failures:
+            for role, indices in chunk.items():
+                failures.setdefault(role, np.zeros(rows, dtype=bool))[indices] = True
+        report = ValidationReport(shape, failures)
+        if not report.ok and on_invalid == "raise":
+            raise BatchValidationError(report)
+        return result
+
+    @staticmethod
+    def _compute_local(kind, on_invalid, precision, arrays):
+        if kind == "kinetic":
+            return EnergyCalculator.kinetic_energy_batch(
+                arrays["mass"], arrays["velocity"], on_invalid=on_invalid,
+                precision=precision)
+        if kind == "potential":
+            return EnergyCalculator.potential_energy_batch(
+                arrays["mass"], arrays["height"], arrays["gravity"],
+                on_invalid=on_invalid, precision=precision)
+        return EnergyCalculator.total_mechanical_energy_batch(
+            arrays["mass"], arrays["velocity"], arrays["height"],
+            arrays["gravity"], on_invalid=on_invalid, precision=precision)
+
+    def kinetic_energy(self, mass, velocity, on_invalid: str = "raise",
+                       precision: str = "float64"):
+        """
+        Parallel counterpart of EnergyCalculator.kinetic_energy_batch.
+
+        precision is "float64" or "float32"; the exact modes are not
+        available here.
+        """
+        return self._compute("kinetic", on_invalid, precision, mass=mass, velocity=velocity)
+
+    def potential_energy(self, mass, height, gravity=EnergyCalculator.GRAVITY,
+                         on_invalid: str = "raise", precision: str = "float64"):
+        """Parallel counterpart of EnergyCalculator.potential_energy_batch."""
+        return self._compute("potential", on_invalid, precision, mass=mass, height=height,
+                             gravity=gravity)
+
+    def total_mechanical_energy(self, mass, velocity, height,
+                                gravity=EnergyCalculator.GRAVITY,
+                                on_invalid: str = "raise", precision: str = "float64"):
+        """Parallel counterpart of EnergyCalculator.total_mechanical_energy_batch."""
+        return self._compute("total", on_invalid, precision, mass=mass, velocity=velocity,
+                             height=height, gravity=gravity)
+
+    def timing_report(self) -> str:
+        """Format the per-chunk timings of the last call as a table."""
+        return format_timings(self.timings)
+
+
+def format_timings(timings: List[ChunkTiming]) -> str:
+    """Format per-chunk timings as a plain-text table."""
+    lines = [f"{'chunk':>5} {'rows':>10} {'worker':>7} {'queued ms':>10} "
+             f"{'compute ms':>11} {'wall ms':>9}"]
+    for t in timings:
+        lines.append(f"{t.index:>5} {t.stop - t.start:>10} {t.worker:>7} "
+                     f"{t.queued * 1e3:>10.2f} {t.compute * 1e3:>11.2f} "
+                     f"{t.wall * 1e3:>9.2f}")
+    return "\n".join(lines)
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Line plots of large series on a plain tkinter Canvas
+
+Series with more points than the plot has pixel columns are drawn as a
+per-pixel min/max envelope: for every column only the lowest and highest
+value falling into it are kept, which preserves spikes that plain
+subsampling would drop. Bucketing uses one searchsorted over the (sorted)
+x values and one reduceat per series, and only the visible slice of the
+data is touched.
+
+CurvePlot keeps its canvas items (one line per series, the frame, tick
+lines and labels) for its whole life and moves them with coords() on each
+redraw. Redraws are coalesced through after_idle. Panning by whole pixels
+reuses the buckets already computed and only buckets the newly exposed
+columns.
+"""
+
+import tkinter as tk
+
+from energy_calculator import _numpy
+
+TICKS = 5
+
+
+def minmax_buckets(x, y, x0: float, pixel_width: float, columns: int):
+    """
+    Reduce a series to per-pixel-column minima and maxima.
+
+    Args:
+        x: Sorted x values
+        y: y values matching x
+        x0: x coordinate of the left edge of the first column
+        pixel_width: Data units per pixel column
+        columns: Number of columns
+
+    Returns:
+        (ymin, ymax) float64 arrays of length columns, NaN where a column
+        holds no points
+    """
+    np = _numpy()
+    edges = x0 + pixel_width * np.arange(columns + 1)
+    index = np.searchsorted(x, edges)
+    lo, hi = index[:-1], index[1:]
+    filled = hi > lo
+    ymin = np.full(columns, np.nan)
+    ymax = np.full(columns, np.nan)
+    if filled.any():
+        # Empty columns have lo == hi, so the filled starts partition the
+        # visible slice exactly and reduceat reduces each column's points
+        segment = y[index[0]:index[-1]]
+        starts = lo[filled] - index[0]
+        ymin[filled] = np.minimum.reduceat(segment, starts)
+        ymax[filled] = np.maximum.reduceat(segment, starts)
+    return ymin, ymax
+
+
+class CurvePlot:
+    """
+    Interactive line plot of one x array against several y series.
+
+    Drag to pan, use the mouse wheel to zoom around the pointer and
+    double-click to fit all data.
+    """
+
+    MARGINS = (64, 12, 12, 36)  # left, top, right, bottom in pixels
+
+    def __init__(self, canvas: tk.Canvas, x_label: str = ""):
+        self.canvas = canvas
+        self.x = None
+        self.series = {}     # name -> (y, color)
+        self.items = {}      # name -> (line item, legend item), reused
+        self.x0 = 0.0
+        self.pixel_width = 1.0
+        self.x_label = x_label
+        self._cache = None   # (x0, pixel_width, columns, {name: (ymin, ymax)})
+        self._pending = False
+        self._drag_x = None
+
+        self.frame = canvas.create_rectangle(0, 0, 0, 0, outline="gray")
+        self.x_ticks = [(canvas.create_line(0, 0, 0, 0, fill="#e0e0e0"),
+                         canvas.create_text(0, 0, anchor=tk.N, font=("Arial", 8)))
+                        for _ in range(TICKS)]
+        self.y_ticks = [(canvas.create_line(0, 0, 0, 0, fill="#e0e0e0"),
+                         canvas.create_text(0, 0, anchor=tk.E, font=("Arial", 8)))
+                        for _ in range(TICKS)]
+        self.title = canvas.create_text(0, 0, anchor=tk.S, font=("Arial", 9))
+
+        canvas.bind("<Configure>", lambda event: self.request_redraw())
+        canvas.bind("<ButtonPress-1>", self._start_pan)
+        canvas.bind("<B1-Motion>", self._pan)
+        canvas.bind("<Double-Button-1>", lambda event: self.fit())
+        canvas.bind("<MouseWheel>", lambda e: self._zoom(e.x, 0.8 if e.delta > 0 else 1.25))
+        canvas.bind("<Button-4>", lambda e: self._zoom(e.x, 0.8))
+        canvas.bind("<Button-5>", lambda e: self._zoom(e.x, 1.25))
+
+    def set_data(self, x, series: dict, x_label: str = None) -> None:
+        """
+        Replace the plotted data.
+
+        Args:
+            x: Sorted 1-D x values
+            series: Dict mapping series name to (y array, color)
+            x_label: Optional new x axis label
+        """
+        self.x = x
+        self.series = dict(series)
+        if x_label is not None:
+            self.x_label = x_label
+        for name, (line, legend) in self.items.items():
+            if name not in self.series:
+                self.canvas.itemconfigure(line, state=tk.HIDDEN)
+                self.canvas.itemconfigure(legend, state=tk.HIDDEN)
+        for name, (_, color) in self.series.items():
+            if name not in self.items:
+                self.items[name] = (
+                    self.canvas.create_line(0, 0, 0, 0, fill=color, width=1),
+                    self.canvas.create_text(0, 0, anchor=tk.NE, fill=color,
+                                            font=("Arial", 9, "bold"), text=name))
+            line, legend = self.items[name]
+            self.canvas.itemconfigure(line, fill=color, state=tk.NORMAL)
+            self.canvas.itemconfigure(legend, fill=color, state=tk.NORMAL)
+        self.fit()
+
+    def fit(self) -> None:
+        """Show the whole x range."""
+        if self.x is None or not len(self.x):
+            return
+        left, _, right, _ = self._area()
+        columns = max(right - left, 1)
+        span = float(self.x[-1] - self.x[0]) or 1.0
+        self.x0 = float(self.x[0])
+        # Widen slightly so the last point falls inside the last column
+        self.pixel_width = span / columns * (1 + 1e-9)
+        self._cache = None
+        self.request_redraw()
+
+    def request_redraw(self) -> None:
+        """Schedule one redraw for when Tk is idle."""
+        if not self._pending:
+            self._pending = True
+            self.canvas.after_idle(self.redraw)
+
+    def _area(self):
+        width = max(self.canvas.winfo_width(), 2)
+        height = max(self.canvas.winfo_height(), 2)
+        left, top, right, bottom = self.MARGINS
+        return left, top, max(width - right, left + 1), max(height - bottom, top + 1)
+
+    def _start_pan(self, event):
+        self._drag_x = event.x
+
+    def _pan(self, event):
+        if self._drag_x is None:
+            return
+        # Pan in whole pixels so cached buckets can be shifted and reused
+        shift = self._drag_x - event.x
+        self._drag_x = event.x
+        if shift:
+            self.x0 += shift * self.pixel_width
+            self.request_redraw()
+
+    def _zoom(self, pointer_x: int, factor: float):
+        if self.x is None:
+            return
+        left = self.MARGINS[0]
+        anchor = self.x0 + (pointer_x - left) * self.pixel_width
+        self.pixel_width *= factor
+        self.x0 = anchor - (pointer_x - left) * self.pixel_width
+        self._cache = None
+        self.request_redraw()
+
+    def _buckets(self, columns: int) -> dict:
+        """Per-series (ymin, ymax) for the current view, reusing the cache."""
+        np = _numpy()
+        x0, width = self.x0, self.pixel_width
+        cache = self._cache
+        if cache is not None and cache[1] == width and cache[2] == columns:
+            shift = round((x0 - cache[0]) / width)
+            if shift == 0:
+                return cache[3]
+            if 0 < abs(shift) < columns:
+                buckets = {}
+                for name, (y, _) in self.series.items():
+                    old_min, old_max = cache[3][name]
+                    if shift > 0:
+                        new_min, new_max = minmax_buckets(
+                            self.x, y, cache[0] + columns * width, width, shift)
+                        buckets[name] = (np.concatenate((old_min[shift:], new_min)),
+                                         np.concatenate((old_max[shift:], new_max)))
+                    else:
+                        new_min, new_max = minmax_buckets(
+                            self.x, y, cache[0] + shift * width, width, -shift)
+                        buckets[name] = (np.concatenate((new_min, old_min[:shift])),
+                                         np.concatenate((new_max, old_max[:shift])))
+                # Keep x0 on the cached pixel grid so shifts stay exact
+                self.x0 = cache[0] + shift * width
+                self._cache = (self.x0, width, columns, buckets)
+                return buckets
+        buckets = {name: minmax_buckets(self.x, y, x0, width, columns)
+                   for name, (y, _) in self.series.items()}
+        self._cache = (x0, width, columns, buckets)
+        return buckets
+
+    def redraw(self) -> None:
+        """Recompute the visible envelope and move the existing items."""
+        self._pending = False
+        canvas = self.canvas
+        left, top, right, bottom = self._area()
+        canvas.coords(self.frame, left, top, right, bottom)
+        canvas.coords(self.title, (left + right) / 2, canvas.winfo_height() - 2)
+        canvas.itemconfigure(self.title, text=self.x_label)
+        if self.x is None or not len(self.x) or not self.series:
+            return
+        np = _numpy()
+        columns = right - left
+        x1 = self.x0 + columns * self.pixel_width
+        first, last = np.searchsorted(self.x, (self.x0, x1))
+
+        if last - first <= columns:
+            # Zoomed in: draw the actual points, plus one beyond each edge
+            lo, hi = max(first - 1, 0), min(last + 1, len(self.x))
+            xs = self.x[lo:hi]
+            px = left + (xs - self.x0) / self.pixel_width
+            visible = {name: (y[lo:hi], y[lo:hi]) for name, (y, _) in self.series.items()}
+            self._cache = None
+        else:
+            px = left + np.arange(columns) + 0.5
+            visible = self._buckets(columns)
+
+        lows = [np.nanmin(low) for low, _ in visible.values() if np.isfinite(low).any()]
+        highs = [np.nanmax(high) for _, high in visible.values() if np.isfinite(high).any()]
+        y_lo, y_hi = (min(lows), max(highs)) if lows else (0.0, 1.0)
+        if y_hi <= y_lo:
+            y_lo, y_hi = y_lo - 1.0, y_hi + 1.0
+        scale = (bottom - top) / (y_hi - y_lo)
+
+        for index, (name, (low, high)) in enumerate(visible.items()):
+            line, legend = self.items[name]
+            keep = np.isfinite(low) & np.isfinite(high)
+            points = np.empty((int(keep.sum()), 4))
+            points[:, 0] = points[:, 2] = px[keep]
+            points[:, 1] = bottom - (low[keep] - y_lo) * scale
+            points[:, 3] = bottom - (high[keep] - y_lo) * scale
+            flat = points.ravel()
+            if len(flat) >= 4:
+                canvas.coords(line, flat.tolist())
+                canvas.itemconfigure(line, state=tk.NORMAL)
+            else:
+                canvas.itemconfigure(line, state=tk.HIDDEN)
+            canvas.coords(legend, right - 6, top + 4 + 14 * index)
+
+        for i, (grid, label) in enumerate(self.x_ticks):
+            px_tick = left + (right - left) * i / (TICKS - 1)
+            canvas.coords(grid, px_tick, top, px_tick, bottom)
+            canvas.coords(label, px_tick, bottom + 3)
+            canvas.itemconfigure(label, text=f"{self.x0 + (px_tick - left) * self.pixel_width:.4g}")
+        for i, (grid, label) in enumerate(self.y_ticks):
+            py_tick = bottom - (bottom - top) * i / (TICKS - 1)
+            canvas.coords(grid, left, py_tick, right, py_tick)
+            canvas.coords(label, left - 4, py_tick)
+            canvas.itemconfigure(label, text=f"{y_lo + (bottom - py_tick) / scale:.4g}")
+        for _, (line, legend) in self.items.items():
+            canvas.tag_raise(line)
+            canvas.tag_raise(legend)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Numeric precision modes for the Energy Calculator
+
+    float64   IEEE double precision (the default; what plain floats give)
+    float32   single precision: half the memory traffic of float64 for bulk
+              screening, about 7 significant digits
+    fraction  exact rational arithmetic with fractions.Fraction
+    decimal   decimal.Decimal arithmetic with DECIMAL_PRECISION digits
+
+In the exact modes inputs are taken as written: the string "0.1" and the
+float 0.1 both become exactly one tenth (floats are converted through
+their shortest repr), so results are reproducible regardless of binary
+rounding. Results are Fraction or Decimal objects; batches hold them in
+NumPy object arrays, which are orders of magnitude slower than the float
+modes and meant for audit-sized inputs.
+
+Scalar float32 results are returned as Python floats holding float32
+values. They are computed by rounding after every operation, which gives
+the same results as NumPy float32 arithmetic because a double holds the
+exact product or sum of two singles.
+"""
+
+import contextlib
+import decimal
+import struct
+from decimal import Context, Decimal, InvalidOperation
+from fractions import Fraction
+
+FLOAT64 = "float64"
+FLOAT32 = "float32"
+FRACTION = "fraction"
+DECIMAL = "decimal"
+MODES = (FLOAT64, FLOAT32, FRACTION, DECIMAL)
+EXACT_MODES = (FRACTION, DECIMAL)
+DEFAULT = FLOAT64
+
+# Enough digits that products of three 17-digit inputs are not rounded
+DECIMAL_PRECISION = 64
+DECIMAL_CONTEXT = Context(prec=DECIMAL_PRECISION)
+
+
+def check(mode: str) -> str:
+    """
+    Validate a precision mode name.
+
+    Raises:
+        ValueError: If the mode is not one of MODES
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown precision mode: {mode!r} "
+                         f"(choose from {', '.join(MODES)})")
+    return mode
+
+
+def is_exact(mode: str) -> bool:
+    """True for the Fraction and Decimal modes."""
+    return mode in EXACT_MODES
+
+
+def round_float32(value: float) -> float:
+    """Round a float to the nearest float32 value (inf when out of range)."""
+    try:
+        return struct.unpack("<f", struct.pack("<f", value))[0]
+    except OverflowError:
+        return float("inf") if value > 0 else float("-inf")
+
+
+def _exact(value, mode: str):
+    if isinstance(value, Fraction if mode == FRACTION else Decimal):
+        number = value
+    elif isinstance(value, int) and not isinstance(value, bool):
+        number = Fraction(value) if mode == FRACTION else Decimal(value)
+    elif isinstance(value, Fraction):
+        number = DECIMAL_CONTEXT.divide(Decimal(value.numerator), Decimal(value.denominator))
+    else:
+        # Strings are parsed as written; floats through their shortest repr
+        text = value.strip() if isinstance(value, str) else repr(float(value))
+        try:
+            number = Fraction(text) if mode == FRACTION else Decimal(text)
+        except (ValueError, ZeroDivisionError, InvalidOperation):
+            raise ValueError(f"{value!r} is not a number") from None
+    if mode == DECIMAL and not number.is_finite():
+        raise ValueError(f"{value!r} is not a finite number")
+    return number
+
+
+def convert(value, mode: str):
+    """
+    Convert one input value to the number type of a precision mode.
+
+    Args:
+        value: A number, or a numeric string for the exact modes
+        mode: One of MODES
+
+    Returns:
+        float for float64 and float32, Fraction or Decimal otherwise
+
+    Raises:
+        ValueError: If the value is not a (finite, for the exact modes)
+            number
+    """
+    if mode == FLOAT64:
+        return float(value)
+    if mode == FLOAT32:
+        return round_float32(float(value))
+    try:
+        return _exact(value, mode)
+    except (TypeError, OverflowError):
+        raise ValueError(f"{value!r} is not a finite number") from None
+
+
+def context(mode: str):
+    """Context manager for arithmetic in a mode (the Decimal context)."""
+    if mode == DECIMAL:
+        return decimal.localcontext(DECIMAL_CONTEXT)
+    return contextlib.nullcontext()
+
+
+def half(mode: str):
+    """The constant 1/2 in a mode's number type."""
+    if mode == FRACTION:
+        return Fraction(1, 2)
+    if mode == DECIMAL:
+        return Decimal("0.5")
+    return 0.5
+
+
+def kinetic_energy(mass, velocity, mode: str):
+    """KE = 1/2 m v² on inputs already converted to the mode."""
+    if mode == FLOAT64:
+        # Same expression as EnergyCalculator.kinetic_energy
+        return 0.5 * mass * velocity ** 2
+    if mode == FLOAT32:
+        return round_float32(round_float32(round_float32(mass * velocity) * velocity) * 0.5)
+    with context(mode):
+        return mass * velocity * velocity * half(mode)
+
+
+def potential_energy(mass, height, gravity, mode: str):
+    """PE = m g h on inputs already converted to the mode."""
+    if mode == FLOAT64:
+        return mass * gravity * height
+    if mode == FLOAT32:
+        return round_float32(round_float32(mass * height) * gravity)
+    with context(mode):
+        return mass * height * gravity
+
+
+def add(a, b, mode: str):
+    """a + b rounded as the mode requires."""
+    if mode == FLOAT32:
+        return round_float32(a + b)
+    with context(mode):
+        return a + b
+
+
+def dtype(np, mode: str):
+    """NumPy dtype holding a mode's values (object for the exact modes)."""
+    return {FLOAT64: np.float64, FLOAT32: np.float32}.get(mode, object)
+
+
+def convert_array(np, values, mode: str):
+    """
+    Convert an array, sequence or scalar to a NumPy array of a mode.
+
+    Float modes use a plain dtype conversion; the exact modes convert
+    every element with convert().
+
+    Raises:
+        ValueError: If an element cannot be converted in an exact mode
+    """
+    if not is_exact(mode):
+        return np.asarray(values, dtype=dtype(np, mode))
+    source = np.asarray(values, dtype=object)
+    out = np.empty(source.shape, dtype=object)
+    flat_out = out.reshape(-1)
+    for i, value in enumerate(source.reshape(-1).tolist()):
+        flat_out[i] = convert(value, mode)
+    return out
+
+
+def to_json(value):
+    """
+    JSON-ready form of a result: Fraction and Decimal become strings so no
+    digits are lost, floats stay numbers and NaN becomes None.
+    """
+    if isinstance(value, (Fraction, Decimal)):
+        return str(value)
+    return None if value != value else value
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Content-addressed on-disk store for batch results
+
+Re-running the batch mode on the same input, or on an input where only a
+few chunks changed, should not recompute everything. A ResultCache keeps
+the rendered output of each chunk in a directory, indexed by SQLite::
+
+    <directory>/index.sqlite3           key, size, rows, invalid, last use;
+                                        size limit and hit/miss counts
+    <directory>/objects/ab/abcdef...    one file per chunk
+
+Keys are SHA-256 digests over a description of the computation (the
+formula, precision mode, units, default gravity and output format, see
+context_key) and the content of each input column of the chunk, so a
+changed value, a different precision or a new formula never reuses a stale
+result. Entries are evicted least recently used first once the store grows
+past its size limit, which is kept in the index and defaults to
+DEFAULT_MAX_BYTES.
+
+Several processes may share a store: SQLite serializes the index updates
+and object files are written to a temporary name and renamed into place.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from typing import Dict, Iterable, Union
+
+INDEX_NAME = "index.sqlite3"
+OBJECTS_DIR = "objects"
+DEFAULT_MAX_BYTES = 1 << 30
+# Bumped when the layout of stored chunks changes
+CACHE_FORMAT = 1
+_SIZE = re.compile(r"^\s*(\d+(?:\.\d*)?)\s*([kmgt]?)(?:i?b)?\s*$", re.IGNORECASE)
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    rows INTEGER NOT NULL,
+    invalid INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value);
+"""
+
+
+def default_directory() -> str:
+    """
+    The store used when none is given: $ENERGY_CALCULATOR_CACHE, else
+    energy-calculator under $XDG_CACHE_HOME (default ~/.cache).
+    """
+    if os.environ.get("ENERGY_CALCULATOR_CACHE"):
+        return os.environ["ENERGY_CALCULATOR_CACHE"]
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "energy-calculator")
+
+
+def parse_size(text: str) -> int:
+    """
+    Parse a byte count such as "1048576", "500M", "2GiB" or "1.5g".
+
+    Raises:
+        ValueError: For anything else
+    """
+    match = _SIZE.match(text)
+    if not match:
+        raise ValueError(f"Invalid size: {text!r} (use e.g. 500M or 2G)")
+    number, prefix = match.groups()
+    return int(float(number) * 1024 ** " kmgt".index(prefix.lower() or " "))
+
+
+def format_size(size: int) -> str:
+    """Bytes in the largest binary unit that keeps the number at least 1."""
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024 or unit == "GiB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def context_key(**parts) -> str:
+    """
+    Digest of everything besides the input data that determines a result.
+
+    Args:
+        **parts: JSON-serializable description, e.g. formula, precision,
+            units, gravity and output format
+
+    Returns:
+        Hex digest to pass to chunk_key
+    """
+    text = json.dumps({"cache_format": CACHE_FORMAT, **parts}, sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def column_digest(values) -> bytes:
+    """
+    Content hash of one input column of a chunk.
+
+    Buffers (NumPy arrays, array('d'), bytes) are hashed as raw bytes;
+    lists of raw text or JSON values are hashed through their JSON
+    encoding, so "1" and 1 stay distinct.
+    """
+    if isinstance(values, (list, tuple)):
+        data = json.dumps(values, separators=(",", ":")).encode()
+    else:
+        data = memoryview(values).cast("B")
+    return hashlib.sha256(data).digest()
+
+
+def chunk_key(context: str, columns: Dict[str, object]) -> str:
+    """
+    Key of one chunk: the context digest plus each named column's hash.
+
+    Args:
+        context: Digest from context_key
+        columns: Input role -> column values (see column_digest)
+
+    Returns:
+        Hex SHA-256 key
+    """
+    digest = hashlib.sha256(context.encode())
+    for role in sorted(columns):
+        digest.update(role.encode() + b"\0" + column_digest(columns[role]))
+    return digest.hexdigest()
+
+
+class CacheEntry:
+    """A stored chunk: its data and the row counts recorded with it."""
+
+    __slots__ = ("data", "rows", "invalid")
+
+    def __init__(self, data: bytes, rows: int, invalid: int):
+        self.data = data
+        self.rows = rows
+        self.invalid = invalid
+
+
+class ResultCache:
+    """
+    A size-bounded, least-recently-used store of chunk results.
+
+    Args:
+        directory: Store directory, created if needed (default:
+            default_directory())
+        max_bytes: Size limit for the stored objects; saved in the index
+            so later runs and prune keep using it (default: the saved
+            limit, else DEFAULT_MAX_BYTES)
+
+    Attributes:
+        hits: Chunks found by get() through this instance
+        misses: Chunks get() did not find
+
+    The lifetime hit and miss counts in the index are updated by flush(),
+    which close() and stats() call, rather than on every lookup.
+    """
+
+    def __init__(self, directory: Union[str, None] = None,
+                 max_bytes: Union[int, None] = None):
+        self.directory = directory or default_directory()
+        os.makedirs(os.path.join(self.directory, OBJECTS_DIR), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(self.directory, INDEX_NAME),
+                                   timeout=30, isolation_level=None)
+        # Index updates need not survive a power cut, only stay consistent
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        self._db.executescript(_SCHEMA)
+        if max_bytes is not None:
+            if max_bytes < 0:
+                raise ValueError("Cache size limit cannot be negative")
+            self._set("max_bytes", max_bytes)
+        self.hits = self.misses = 0
+        self._unflushed = {"hits": 0, "misses": 0}
+
+    def close(self) -> None:
+        """Write the pending hit and miss counts and close the index."""
+        self.flush()
+        self._db.close()
+
+    def flush(self) -> None:
+        """Add the hits and misses since the last flush to the index's counts."""
+        for name, count in self._unflushed.items():
+            if count:
+                self._db.execute("INSERT INTO meta VALUES (?, ?) ON CONFLICT(name) "
+                                 "DO UPDATE SET value = value + excluded.value",
+                                 (name, count))
+                self._unflushed[name] = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def max_bytes(self) -> int:
+        """The store's size limit in bytes."""
+        return int(self._get("max_bytes", DEFAULT_MAX_BYTES))
+
+    def _get(self, name: str, default=None):
+        row = self._db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return default if row is None else row[0]
+
+    def _set(self, name: str, value) -> None:
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (name, value))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, OBJECTS_DIR, key[:2], key)
+
+    def get(self, key: str) -> Union[CacheEntry, None]:
+        """
+        Look up a chunk and mark it used.
+
+        Returns:
+            The CacheEntry, or None when the key is not stored
+        """
+        row = self._db.execute("SELECT rows, invalid FROM entries WHERE key = ?",
+                               (key,)).fetchone()
+        data = None
+        if row is not None:
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                # Removed behind the index's back: forget it
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+        if data is None:
+            self.misses += 1
+            self._unflushed["misses"] += 1
+            return None
+        self.hits += 1
+        self._unflushed["hits"] += 1
+        self._db.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+        return CacheEntry(data, *row)
+
+    def put(self, key: str, data: bytes, rows: int, invalid: int = 0) -> None:
+        """
+        Store a chunk, then evict least recently used entries over the limit.
+
+        Data larger than the whole limit is not stored.
+        """
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "wb") as f:
+            f.write(data)
+        os.replace(temp, path)
+        now = time.time()
+        self._db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                         (key, len(data), rows, invalid, now, now))
+        self.prune(self.max_bytes)
+
+    def _remove(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def prune(self, max_bytes: Union[int, None] = None,
+              older_than: Union[float, None] = None) -> dict:
+        """
+        Evict entries.
+
+        Args:
+            max_bytes: Evict least recently used entries until the store
+                fits in this many bytes (default: the store's limit)
+            older_than: Also evict entries unused for this many seconds
+
+        Returns:
+            Dict with the "entries" and "bytes" removed
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        removed = []
+        if older_than is not None:
+            removed += self._db.execute(
+                "SELECT key, size FROM entries WHERE last_used < ?",
+                (time.time() - older_than,)).fetchall()
+            self._remove(key for key, _ in removed)
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total > max_bytes:
+            for key, size in self._db.execute(
+                    "SELECT key, size FROM entries ORDER BY last_used").fetchall():
+                if total <= max_bytes:
+                    break
+                removed.append((key, size))
+                self._remove([key])
+                total -= size
+        return {"entries": len(removed), "bytes": sum(size for _, size in removed)}
+
+    def clear(self) -> dict:
+        """Remove every entry; returns the counts as prune does."""
+        return self.prune(max_bytes=0)
+
+    def stats(self) -> dict:
+        """Entry count, size, limit and lifetime hit/miss counts of the store."""
+        self.flush()
+        entries, size, rows, oldest = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(rows), 0), "
+            "MIN(last_used) FROM entries").fetchone()
+        hits, misses = int(self._get("hits", 0)), int(self._get("misses", 0))
+        return {
+            "directory": os.path.abspath(self.directory),
+            "entries": entries,
+            "rows": rows,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else None,
+            "least_recently_used": oldest,
+        }
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Lazy parameter sweeps over mass × velocity × height × gravity grids
+
+A Sweep describes the full Cartesian grid of its four axes without ever
+building it. Points are produced in C order (gravity varies fastest) as
+chunks of at most ``chunk_size`` points. Each chunk is a dense sub-block
+of the grid: a run of one axis combined with every value of the axes
+after it, so its parameters are small broadcastable views and its energies
+are computed by broadcasting. KE is computed once per mass × velocity
+pair and PE once per mass × height × gravity triple in the chunk; only the
+total is written point by point, into a buffer reused across chunks.
+
+Chunks stream to CSV/JSONL, to memory-mapped binary columns, or into
+running reducers (SweepStats, Histogram), so peak memory depends on the
+chunk size and not on the grid size.
+"""
+
+from typing import Dict, Iterator, List, Union
+
+import bodies
+from energy_calculator import EnergyCalculator, NEGATIVE_VALUE_MESSAGES, _numpy
+
+AXES = ("mass", "velocity", "height", "gravity")
+RESULTS = ("kinetic_energy", "potential_energy", "total_energy")
+FIELDS = AXES + RESULTS
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+def parse_axis(name: str, spec: str):
+    """
+    Parse a command-line axis specification into a float64 array.
+
+    Accepted forms:
+        ``linspace:START:STOP:NUM``  evenly spaced values, endpoints included
+        ``logspace:START:STOP:NUM``  10**x for x evenly spaced from START to STOP
+        ``1,2.5,10``                 explicit values
+        ``Earth,Moon`` / ``bodies``  body names or every registered body
+                                     (gravity axis only)
+
+    Raises:
+        ValueError: If the specification is malformed
+    """
+    np = _numpy()
+    spec = spec.strip()
+    kind, _, rest = spec.partition(":")
+    if kind in ("linspace", "logspace"):
+        parts = rest.split(":")
+        if len(parts) != 3:
+            raise ValueError(f"{name}: expected {kind}:START:STOP:NUM")
+        try:
+            start, stop, num = float(parts[0]), float(parts[1]), int(parts[2])
+        except ValueError:
+            raise ValueError(f"{name}: invalid {kind} bounds {rest!r}") from None
+        return getattr(np, kind)(start, stop, num)
+    if name == "gravity" and spec.lower() == "bodies":
+        return np.array([body.gravity for body in bodies.BODIES.values()])
+    values = []
+    for item in spec.split(","):
+        try:
+            values.append(bodies.gravity_of(item) if name == "gravity" else float(item))
+        except ValueError:
+            raise ValueError(f"{name}: {item.strip()!r} is not a number") from None
+    return np.array(values, dtype=np.float64)
+
+
+class SweepChunk:
+    """
+    One dense sub-block of a sweep grid.
+
+    Parameters and the KE/PE arrays are broadcastable to ``shape``; the
+    total is a full array of that shape. ``total`` lives in a buffer that
+    the next chunk overwrites, so copy it if you keep it.
+    """
+
+    def __init__(self, start: int, shape: tuple, params: dict,
+                 kinetic, potential, total):
+        self.start = start
+        self.shape = shape
+        self.size = total.size
+        self.arrays = {**params, "kinetic_energy": kinetic,
+                       "potential_energy": potential, "total_energy": total}
+
+    @property
+    def stop(self) -> int:
+        """Flat grid index one past the last point of the chunk."""
+        return self.start + self.size
+
+    def flat(self, field: str):
+        """A field as a 1-D array of the chunk's points in grid order."""
+        np = _numpy()
+        return np.broadcast_to(self.arrays[field], self.shape).reshape(-1)
+
+    def point(self, index: int) -> Dict[str, float]:
+        """Parameters of the chunk-local point at a flat index."""
+        np = _numpy()
+        position = np.unravel_index(index, self.shape)
+        point = {}
+        for name in AXES:
+            values = np.broadcast_to(self.arrays[name], self.shape)
+            point[name] = float(values[position])
+        return point
+
+
+class Sweep:
+    """
+    A lazily evaluated Cartesian parameter grid.
+
+    Each axis is a scalar or a 1-D sequence; scalars become axes of
+    length one. Axes are validated once, up front, so no point of the grid
+    can fail.
+    """
+
+    def __init__(self, mass, velocity, height, gravity=EnergyCalculator.GRAVITY,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        if chunk_size <= 0:
+            raise ValueError("Chunk size must be positive")
+        np = _numpy()
+        self.axes = {}
+        for name, values in zip(AXES, (mass, velocity, height, gravity)):
+            array = np.atleast_1d(np.asarray(values, dtype=np.float64))
+            if array.ndim != 1 or not array.size:
+                raise ValueError(f"The {name} axis must be a non-empty 1-D sequence")
+            if np.fmin.reduce(array) < 0:
+                raise ValueError(NEGATIVE_VALUE_MESSAGES[name])
+            self.axes[name] = array
+        self.chunk_size = chunk_size
+
+    @property
+    def shape(self) -> tuple:
+        """Grid shape in (mass, velocity, height, gravity) order."""
+        return tuple(len(values) for values in self.axes.values())
+
+    @property
+    def size(self) -> int:
+        """Total number of grid points."""
+        size = 1
+        for length in self.shape:
+            size *= length
+        return size
+
+    def point(self, index: int) -> Dict[str, float]:
+        """Parameters of the grid point at a flat C-order index."""
+        np = _numpy()
+        position = np.unravel_index(index, self.shape)
+        return {name: float(values[i])
+                for (name, values), i in zip(self.axes.items(), position)}
+
+    def chunks(self) -> Iterator[SweepChunk]:
+        """Yield the grid as SweepChunks in flat index order."""
+        np = _numpy()
+        shape = self.shape
+        ndim = len(shape)
+        # Trailing axes whose whole block fits in a chunk are taken in full;
+        # the axis before them is cut into runs of ``step`` values
+        split, inner = ndim, 1
+        while split > 0 and inner * shape[split - 1] <= self.chunk_size:
+            split -= 1
+            inner *= shape[split]
+        if split == 0:
+            inner //= shape[0]
+            step = shape[0]
+        else:
+            split -= 1
+            step = self.chunk_size // inner
+        buffer = np.empty(step * inner)
+        axes = list(self.axes.values())
+        trailing = ndim - split
+
+        for outer in np.ndindex(*shape[:split]):
+            for lo in range(0, shape[split], step):
+                hi = min(lo + step, shape[split])
+                chunk_shape = (hi - lo,) + shape[split + 1:]
+                params = {}
+                for axis, (name, values) in enumerate(zip(AXES, axes)):
+                    if axis < split:
+                        params[name] = values[outer[axis]]
+                    else:
+                        view = values[lo:hi] if axis == split else values
+                        dims = [1] * trailing
+                        dims[axis - split] = -1
+                        params[name] = view.reshape(dims)
+                kinetic = EnergyCalculator.kinetic_energy_batch(
+                    params["mass"], params["velocity"], on_invalid="ignore")
+                potential = EnergyCalculator.potential_energy_batch(
+                    params["mass"], params["height"], params["gravity"],
+                    on_invalid="ignore")
+                size = (hi - lo) * inner
+                total = buffer[:size].reshape(chunk_shape)
+                np.add(kinetic, potential, out=total)
+                start = int(np.ravel_multi_index(
+                    outer + (lo,) + (0,) * (trailing - 1), shape))
+                yield SweepChunk(start, chunk_shape, params, kinetic, potential, total)
+
+    def run(self, *reducers) -> tuple:
+        """
+        Feed every chunk to reducers (objects with an update(chunk) method).
+
+        Returns:
+            The reducers, for chaining
+        """
+        for chunk in self.chunks():
+            for reducer in reducers:
+                reducer.update(chunk)
+        return reducers
+
+
+class SweepStats:
+    """Running count, sum, mean and extremes (with their points) of one field."""
+
+    def __init__(self, field: str = "total_energy"):
+        if field not in RESULTS:
+            raise ValueError(f"Field must be one of: {', '.join(RESULTS)}")
+        self.field = field
+        self.count = 0
+        self.sum = 0.0
+        self.min = self.max = None
+        self.argmin = self.argmax = None
+
+    def update(self, chunk: SweepChunk) -> None:
+        """Fold one chunk into the running statistics."""
+        values = chunk.flat(self.field)
+        self.count += values.size
+        self.sum += float(values.sum())
+        low, high = int(values.argmin()), int(values.argmax())
+        if self.min is None or values[low] < self.min:
+            self.min, self.argmin = float(values[low]), chunk.point(low)
+        if self.max is None or values[high] > self.max:
+            self.max, self.argmax = float(values[high]), chunk.point(high)
+
+    def result(self) -> dict:
+        """The statistics as a JSON-ready dict."""
+        return {"field": self.field, "count": self.count, "sum": self.sum,
+                "mean": self.sum / self.count if self.count else None,
+                "min": self.min, "argmin": self.argmin,
+                "max": self.max, "argmax": self.argmax}
+
+
+class Histogram:
+    """Running histogram of one field over fixed bin edges."""
+
+    def __init__(self, edges, field: str = "total_energy"):
+        np = _numpy()
+        self.field = field
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+
+    def update(self, chunk: SweepChunk) -> None:
+        """Add one chunk's values to the bin counts."""
+        np = _numpy()
+        self.counts += np.histogram(chunk.flat(self.field), bins=self.edges)[0]
+
+
+def write_text(sweep: Sweep, stream, fmt: str = "csv",
+               fields: Union[List[str], None] = None, reducers=()) -> int:
+    """
+    Stream a sweep as CSV or JSON Lines.
+
+    Args:
+        sweep: Sweep to evaluate
+        stream: Text stream receiving the rows
+        fmt: "csv" or "jsonl"
+        fields: Columns to write (default: all of FIELDS)
+        reducers: Reducers updated with every chunk on the way
+
+    Returns:
+        Number of rows written
+    """
+    import batch_stream
+
+    fields = tuple(fields or FIELDS)
+    writer = batch_stream.write_csv if fmt == "csv" else batch_stream.write_jsonl
+    rows = 0
+
+    def results():
+        nonlocal rows
+        for chunk in sweep.chunks():
+            for reducer in reducers:
+                reducer.update(chunk)
+            rows += chunk.size
+            yield {field: chunk.flat(field) for field in fields}
+
+    writer(stream, results(), fields)
+    return rows
+
+
+def write_columns(sweep: Sweep, path: str,
+                  fields: Union[List[str], None] = None, dtype="<f8",
+                  npy: bool = False, reducers=()) -> int:
+    """
+    Stream a sweep into memory-mapped binary columns (see columnar.py).
+
+    Args:
+        sweep: Sweep to evaluate
+        path: Output .manifest.json path
+        fields: Columns to write (default: all of FIELDS)
+        dtype: Column dtype, "<f8" or "<f4"
+        npy: Write .npy files instead of raw little-endian files
+        reducers: Reducers updated with every chunk on the way
+
+    Returns:
+        Number of rows written
+    """
+    import columnar
+
+    np = _numpy()
+    fields = tuple(fields or FIELDS)
+    target = columnar.ColumnSet.create(path, sweep.size, fields, dtype=dtype, npy=npy)
+    for chunk in sweep.chunks():
+        for reducer in reducers:
+            reducer.update(chunk)
+        for field in fields:
+            np.copyto(target[field][chunk.start:chunk.stop].reshape(chunk.shape),
+                      chunk.arrays[field], casting="same_kind")
+    target.flush()
+    return sweep.size
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the asyncio compute server
+"""
+
+import asyncio
+import http.client
+import json
+import socket
+import threading
+import unittest
+from unittest import mock
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import async_server
+
+
+@unittest.skipIf(np is None, "NumPy is required for bulk requests")
+class TestAsyncServer(unittest.TestCase):
+    """Tests against a live asyncio server running in a background thread."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.loop = asyncio.new_event_loop()
+        cls.server = cls.loop.run_until_complete(async_server.start("127.0.0.1", 0))
+        cls.port = cls.server.sockets[0].getsockname()[1]
+        cls.thread = threading.Thread(target=cls.loop.run_forever, daemon=True)
+        cls.thread.start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.loop.call_soon_threadsafe(cls.server.close)
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+        cls.thread.join(5)
+    
+    def connect(self):
+        return http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+    
+    def test_per_row_endpoint_keep_alive(self):
+        """Test per-row endpoints answer repeatedly on one connection."""
+        conn = self.connect()
+        for velocity in (1, 2, 3):
+            conn.request("GET", f"/api/kinetic?mass=2&velocity={velocity}")
+            response = conn.getresponse()
+            self.assertEqual(response.status, 200)
+            self.assertEqual(json.loads(response.read())["kinetic_energy"], velocity ** 2)
+        conn.close()
+    
+    def test_bulk_json_rows_streamed(self):
+        """Test a JSON array of rows comes back chunked with invalid rows flagged."""
+        rows = [{"mass": 2, "velocity": 3, "height": 1}] * 20000
+        rows.append({"mass": -1, "velocity": 1, "height": 1})
+        conn = self.connect()
+        conn.request("POST", "/api/bulk/total?gravity=1.62", body=json.dumps(rows),
+                     headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        self.assertEqual(response.getheader("Transfer-Encoding"), "chunked")
+        data = json.loads(response.read())
+        self.assertEqual(data["columns"], ["kinetic_energy", "potential_energy", "total_energy"])
+        self.assertEqual(len(data["rows"]), 20001)
+        self.assertAlmostEqual(data["rows"][0][2], 9 + 2 * 1.62)
+        self.assertEqual(data["rows"][-1], [None, None, None])
+        self.assertEqual(data["invalid"], [[20000, "Mass cannot be negative"]])
+        conn.close()
+    
+    def test_bulk_binary_columns(self):
+        """Test binary float64 columns in and row-major float64 out."""
+        mass = np.array([1.0, 2.0, 4.0])
+        velocity = np.array([2.0, 3.0, 1.0])
+        conn = self.connect()
+        conn.request("POST", "/api/bulk/kinetic",
+                     body=np.concatenate([mass, velocity]).astype("<f8").tobytes(),
+                     headers={"Content-Type": "application/octet-stream",
+                              "X-Columns": "mass,velocity"})
+        response = conn.getresponse()
+        self.assertEqual(response.getheader("X-Columns"), "kinetic_energy")
+        self.assertEqual(response.getheader("X-Invalid-Rows"), "0")
+        result = np.frombuffer(response.read(), dtype="<f8")
+        np.testing.assert_array_equal(result, [2.0, 9.0, 2.0])
+        conn.close()
+    
+    def test_bulk_body_column(self):
+        """Test JSON rows may name a body instead of giving gravity."""
+        rows = [{"mass": 1, "height": 1, "body": "Moon"},
+                {"mass": 1, "height": 1, "body": "Mars"}]
+        conn = self.connect()
+        conn.request("POST", "/api/bulk/potential", body=json.dumps(rows),
+                     headers={"Content-Type": "application/json"})
+        data = json.loads(conn.getresponse().read())
+        self.assertEqual(data["rows"], [[1.62], [3.71]])
+        conn.request("POST", "/api/bulk/potential",
+                     body=json.dumps({"mass": [1], "height": [1], "body": ["Pluto"]}),
+                     headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        self.assertEqual(response.status, 400)
+        self.assertEqual(json.loads(response.read())["error"], "Unknown body 'Pluto' in row 0")
+        conn.close()
+    
+    def test_bulk_errors(self):
+        """Test malformed bulk requests are rejected with 400."""
+        conn = self.connect()
+        conn.request("POST", "/api/bulk/total", body=json.dumps({"mass": [1, 2]}),
+                     headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        self.assertEqual(response.status, 400)
+        self.assertEqual(json.loads(response.read())["error"], "Missing column 'velocity'")
+        conn.close()
+    
+    def raw_request(self, data: bytes) -> bytes:
+        """Send raw bytes and return the status line of the answer."""
+        with socket.create_connection(("127.0.0.1", self.port), timeout=5) as sock:
+            sock.sendall(data)
+            return sock.makefile("rb").readline()
+    
+    def test_oversized_and_slow_requests(self):
+        """Test overlong headers get 431 and a stalled request 408."""
+        line = b"X-Long: " + b"a" * async_server.MAX_LINE_BYTES + b"\r\n"
+        self.assertTrue(self.raw_request(b"GET /api/kinetic HTTP/1.1\r\n" + line + b"\r\n")
+                        .startswith(b"HTTP/1.1 431 "))
+        headers = b"".join(b"X-%d: 1\r\n" % i for i in range(async_server.MAX_HEADERS + 1))
+        self.assertTrue(self.raw_request(b"GET /api/kinetic HTTP/1.1\r\n" + headers + b"\r\n")
+                        .startswith(b"HTTP/1.1 431 "))
+        self.assertTrue(self.raw_request(b"GET /" + b"a" * async_server.MAX_LINE_BYTES)
+                        .startswith(b"HTTP/1.1 414 "))
+        with mock.patch.object(async_server, "REQUEST_TIMEOUT", 0.1):
+            # Headers never finish: the request line alone is not enough
+            self.assertTrue(self.raw_request(b"GET /api/kinetic HTTP/1.1\r\nHost: x\r\n")
+                            .startswith(b"HTTP/1.1 408 "))
+    
+    def test_bulk_does_not_block_other_requests(self):
+        """Test per-row requests are answered while a bulk computation runs."""
+        release = threading.Event()
+        compute_bulk = async_server.compute_bulk
+        
+        def slow_compute(endpoint, columns, precision):
+            self.assertTrue(release.wait(5))
+            return compute_bulk(endpoint, columns, precision)
+        
+        with mock.patch.object(async_server, "compute_bulk", slow_compute):
+            bulk = self.connect()
+            bulk.request("POST", "/api/bulk/kinetic",
+                         body=json.dumps({"mass": [2], "velocity": [3]}),
+                         headers={"Content-Type": "application/json"})
+            conn = self.connect()
+            conn.request("GET", "/api/kinetic?mass=2&velocity=1")
+            self.assertEqual(conn.getresponse().status, 200)
+            release.set()
+            self.assertEqual(json.loads(bulk.getresponse().read())["rows"], [[9.0]])
+        bulk.close()
+        conn.close()
+    
+    def test_bulk_streams_before_batch_is_done(self):
+        """Test the first rows arrive while later slices are still computing."""
+        release = threading.Event()
+        compute_bulk = async_server.compute_bulk
+        
+        def slow_compute(endpoint, columns, precision):
+            if columns["mass"][0] > 2:
+                self.assertTrue(release.wait(5))
+            return compute_bulk(endpoint, columns, precision)
+        
+        with mock.patch.object(async_server, "compute_bulk", slow_compute), \
+                mock.patch.object(async_server, "STREAM_ROWS", 2):
+            conn = self.connect()
+            conn.request("POST", "/api/bulk/kinetic",
+                         body=json.dumps({"mass": [1, 2, 3, -4], "velocity": [1, 1, 1, 1]}),
+                         headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            first = b""
+            while b"[1.0]" not in first:
+                first += response.read1()
+            release.set()
+            data = json.loads(first + response.read())
+        self.assertEqual(data["rows"], [[0.5], [1.0], [1.5], [None]])
+        self.assertEqual(data["invalid"], [[3, "Mass cannot be negative"]])
+        conn.close()
+    
+    def test_unexpected_errors(self):
+        """Test a crash answers 500, or closes the stream once it has started."""
+        body = json.dumps({"mass": [1], "velocity": [1]})
+        with mock.patch.object(async_server, "parse_bulk_body", side_effect=MemoryError), \
+                self.assertLogs("async_server", "ERROR"):
+            conn = self.connect()
+            conn.request("POST", "/api/bulk/kinetic", body=body,
+                         headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            self.assertEqual(response.status, 500)
+            self.assertEqual(json.loads(response.read()), {"error": "Internal server error"})
+            conn.close()
+        with mock.patch.object(async_server, "compute_bulk", side_effect=FloatingPointError), \
+                self.assertLogs("async_server", "ERROR"):
+            conn = self.connect()
+            conn.request("POST", "/api/bulk/kinetic", body=body,
+                         headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            self.assertEqual(response.status, 200)
+            with self.assertRaises(http.client.IncompleteRead):
+                response.read()
+            conn.close()
+    
+    def test_expect_continue(self):
+        """Test Expect: 100-continue is answered before the body is sent."""
+        body = json.dumps({"mass": [2], "velocity": [3]}).encode()
+        with socket.create_connection(("127.0.0.1", self.port), timeout=5) as sock:
+            sock.sendall(b"POST /api/bulk/kinetic HTTP/1.1\r\nHost: x\r\n"
+                         b"Content-Type: application/json\r\nConnection: close\r\n"
+                         b"Expect: 100-continue\r\nContent-Length: %d\r\n\r\n" % len(body))
+            stream = sock.makefile("rb")
+            self.assertEqual(stream.readline(), b"HTTP/1.1 100 Continue\r\n")
+            self.assertEqual(stream.readline(), b"\r\n")
+            sock.sendall(body)
+            self.assertTrue(stream.readline().startswith(b"HTTP/1.1 200 "))
+
+
+if __name__ == "__main__":
+    unittest.main()
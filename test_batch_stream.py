@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the streaming batch mode
+"""
+
+import io
+import json
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if np is not None:
+    import batch_stream
+    from energy_calculator import main
+
+
+class TestColumnSpec(unittest.TestCase):
+    """Tests for --columns parsing."""
+    
+    @unittest.skipIf(np is None, "NumPy is required for batch calculations")
+    def test_positional_and_named(self):
+        """Test both positional and role=name specifications."""
+        self.assertEqual(batch_stream.parse_column_spec("m,v,h"),
+                         {"mass": "m", "velocity": "v", "height": "h"})
+        self.assertEqual(
+            batch_stream.parse_column_spec("height=h,mass=m,velocity=v,gravity=g"),
+            {"height": "h", "mass": "m", "velocity": "v", "gravity": "g"})
+    
+    @unittest.skipIf(np is None, "NumPy is required for batch calculations")
+    def test_incomplete_spec(self):
+        """Test a missing required column is rejected."""
+        with self.assertRaises(ValueError):
+            batch_stream.parse_column_spec("mass=m,velocity=v")
+        with self.assertRaisesRegex(ValueError, "cannot be optional: mass"):
+            batch_stream.parse_column_spec("m?,v,h")
+
+
+@unittest.skipIf(np is None, "NumPy is required for batch calculations")
+class TestRunBatch(unittest.TestCase):
+    """Tests for the chunked CSV/JSONL pipeline."""
+    
+    CSV_INPUT = "m,v,h,g\n1,2,3,9.81\n-1,2,3,1\nabc,1,1,1\n2,0,1,1.62\n"
+    
+    def test_csv_roundtrip_across_chunks(self):
+        """Test results are identical regardless of chunk size."""
+        outputs = []
+        for chunk_size in (1, 3, 100):
+            out = io.StringIO()
+            stats = batch_stream.run_batch(
+                io.StringIO(self.CSV_INPUT), out,
+                batch_stream.parse_column_spec("m,v,h,g"), chunk_size=chunk_size)
+            self.assertEqual(stats, {"rows": 4, "invalid": 2})
+            outputs.append(out.getvalue())
+        self.assertEqual(len(set(outputs)), 1)
+        lines = outputs[0].splitlines()
+        self.assertEqual(lines[0].split(",")[4:],
+                         ["kinetic_energy", "potential_energy", "total_energy", "error"])
+        self.assertTrue(lines[1].endswith("2.0,29.43,31.43,"))
+        self.assertTrue(lines[2].endswith("Mass cannot be negative"))
+        self.assertTrue(lines[3].endswith("Mass is not a number"))
+    
+    def test_jsonl_default_gravity(self):
+        """Test JSONL input without a gravity column uses the default."""
+        data = '{"mass": 2, "velocity": 3, "height": 1}\n\n{"mass": -2, "velocity": 3, "height": 1}\n'
+        out = io.StringIO()
+        batch_stream.run_batch(
+            io.StringIO(data), out, batch_stream.parse_column_spec("mass,velocity,height"),
+            in_format="jsonl", out_format="jsonl", gravity=1.62)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertAlmostEqual(rows[0]["total_energy"], 9 + 2 * 1.62)
+        self.assertIsNone(rows[1]["total_energy"])
+        self.assertEqual(rows[1]["error"], "Mass cannot be negative")
+    
+    def test_optional_gravity_column(self):
+        """Test an optional gravity column is used only when the input has one."""
+        mapping = batch_stream.parse_column_spec("mass,velocity,height,gravity?")
+        for data, expected in (("mass,velocity,height\n2,0,1\n", "3.24"),
+                               ("mass,velocity,height,gravity\n2,0,1,3.71\n", "7.42")):
+            out = io.StringIO()
+            batch_stream.run_batch(io.StringIO(data), out, mapping, gravity=1.62)
+            self.assertEqual(out.getvalue().splitlines()[1].split(",")[5], expected)
+        out = io.StringIO()
+        batch_stream.run_batch(io.StringIO('{"mass": 2, "velocity": 0, "height": 1}\n'), out,
+                               mapping, in_format="jsonl", out_format="jsonl", gravity=1.62)
+        self.assertEqual(json.loads(out.getvalue())["potential_energy"], 3.24)
+    
+    def test_jsonl_non_object_line(self):
+        """Test a JSONL line that is not an object is reported with its number."""
+        mapping = batch_stream.parse_column_spec("mass,velocity,height")
+        for line, message in (("[1, 2, 3]", "line 3: expected a JSON object"),
+                              ("{oops", "line 3: ")):
+            data = '{"mass": 2, "velocity": 3, "height": 1}\n\n' + line + "\n"
+            with self.assertRaisesRegex(ValueError, message):
+                batch_stream.run_batch(io.StringIO(data), io.StringIO(), mapping,
+                                       in_format="jsonl")
+    
+    def test_missing_header_column(self):
+        """Test an unknown column name raises ValueError."""
+        with self.assertRaises(ValueError):
+            batch_stream.run_batch(
+                io.StringIO(self.CSV_INPUT), io.StringIO(),
+                batch_stream.parse_column_spec("mass,v,h"))
+    
+    def test_body_column(self):
+        """Test a per-row body column replaces gravity and flags unknown names."""
+        data = "m,v,h,planet\n2,0,1,Moon\n2,0,1,Pluto\n"
+        out = io.StringIO()
+        stats = batch_stream.run_batch(
+            io.StringIO(data), out,
+            batch_stream.parse_column_spec("mass=m,velocity=v,height=h,body=planet"))
+        self.assertEqual(stats, {"rows": 2, "invalid": 1})
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[1].endswith("3.24,3.24,"))
+        self.assertTrue(lines[2].endswith("Unknown body 'Pluto'"))
+    
+    def test_cli_batch_files(self):
+        """Test the batch subcommand reads and writes files."""
+        import os
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, "in.csv")
+            dst = os.path.join(tmp, "out.jsonl")
+            with open(src, "w") as f:
+                f.write(self.CSV_INPUT)
+            code = main(["batch", "--in", src, "--out", dst, "--columns", "m,v,h,g"])
+            self.assertEqual(code, 0)
+            with open(dst) as f:
+                self.assertEqual(len(f.read().splitlines()), 4)
+
+            # The default --columns needs no gravity column
+            with open(src, "w") as f:
+                f.write("mass,velocity,height\n1,2,3\n")
+            self.assertEqual(main(["batch", "--in", src, "--out", dst]), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Unit tests for column-oriented batch result tables
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if np is not None:
+    import batch_table
+    import columnar
+
+
+@unittest.skipIf(np is None, "NumPy is required for batch tables")
+class TestBatchTable(unittest.TestCase):
+    """Tests for loading, windowing and exporting tables."""
+    
+    CSV_INPUT = "mass,velocity,height,planet\n1,2,3,Earth\n-1,2,3,Moon\n2,0,1,Mars\n"
+    
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        self.csv = os.path.join(self.tmp, "in.csv")
+        with open(self.csv, "w") as f:
+            f.write(self.CSV_INPUT)
+    
+    def tearDown(self):
+        self._tmp.cleanup()
+    
+    def test_load_csv_window(self):
+        """Test rows are computed into columns and formatted per window."""
+        seen = []
+        table = batch_table.load_csv(self.csv, chunk_size=2,
+                                     progress=lambda done, total: seen.append((done, total)))
+        self.assertEqual((table.rows, table.invalid), (3, 1))
+        self.assertEqual(seen[-1][0], seen[-1][1])
+        rows = table.window(1, 10)
+        self.assertEqual(rows[0][0], 2)
+        self.assertEqual(rows[0][-1], "Mass cannot be negative")
+        self.assertEqual(rows[1][1:5], ("2", "0", "1", "9.81"))
+        self.assertEqual(rows[1][-2], "19.62")
+    
+    def test_auto_mapping_and_body_column(self):
+        """Test header names are matched and a body column can be mapped."""
+        self.assertEqual(batch_table.auto_mapping(["height", "mass", "velocity", "x"]),
+                         {"mass": "mass", "velocity": "velocity", "height": "height"})
+        with self.assertRaises(ValueError):
+            batch_table.auto_mapping(["mass", "velocity"])
+        table = batch_table.load_csv(self.csv, mapping={
+            "mass": "mass", "velocity": "velocity", "height": "height", "body": "planet"})
+        self.assertEqual(table.columns["gravity"].tolist()[2], 3.71)
+    
+    def test_header_units(self):
+        """Test units declared in the header are converted to SI."""
+        path = os.path.join(self.tmp, "units.csv")
+        with open(path, "w") as f:
+            f.write("mass[lb],velocity[mph],height\n10,2,0\n")
+        self.assertEqual(batch_table.auto_mapping(["mass[lb]", "velocity[mph]", "height"]),
+                         {"mass": "mass[lb]", "velocity": "velocity[mph]", "height": "height"})
+        table = batch_table.load_csv(path)
+        mass, velocity = 10 * 0.45359237, 2 * 0.44704
+        self.assertAlmostEqual(table.columns["mass"][0], mass)
+        self.assertAlmostEqual(table.columns["kinetic_energy"][0], 0.5 * mass * velocity ** 2)
+    
+    def test_manifest_units(self):
+        """Test input units declared in a manifest are converted to SI."""
+        np.array([10.0, 20.0]).tofile(os.path.join(self.tmp, "u.mass.f64"))
+        np.array([2.0, 4.0]).tofile(os.path.join(self.tmp, "u.velocity.f64"))
+        np.array([0.0, 1.0]).tofile(os.path.join(self.tmp, "u.height.f64"))
+        manifest = os.path.join(self.tmp, "u.manifest.json")
+        columnar.write_manifest(manifest, 2, {
+            "mass": {"file": "u.mass.f64", "dtype": "<f8", "unit": "lb"},
+            "velocity": {"file": "u.velocity.f64", "dtype": "<f8", "unit": "mph"},
+            "height": {"file": "u.height.f64", "dtype": "<f8"}})
+        table = batch_table.load_columns(manifest, chunk_size=1)
+        mass, velocity = np.array([10.0, 20.0]) * 0.45359237, np.array([2.0, 4.0]) * 0.44704
+        np.testing.assert_allclose(table.columns["mass"], mass)
+        np.testing.assert_allclose(table.columns["velocity"], velocity)
+        np.testing.assert_allclose(table.columns["kinetic_energy"], 0.5 * mass * velocity ** 2)
+        self.assertEqual(table.window(1, 2)[0][1], f"{mass[1]:.6g}")
+        table.close()
+    
+    def test_progress_can_cancel(self):
+        """Test an exception from the progress callback aborts loading."""
+        def stop(done, total):
+            raise KeyboardInterrupt
+        with self.assertRaises(KeyboardInterrupt):
+            batch_table.load_csv(self.csv, chunk_size=1, progress=stop)
+    
+    def test_column_set_and_export(self):
+        """Test binary columns load through memory maps and export round-trips."""
+        np.array([1.0, -2.0, 3.0]).tofile(os.path.join(self.tmp, "c.mass.f64"))
+        np.array([2.0, 2.0, 0.0]).tofile(os.path.join(self.tmp, "c.velocity.f64"))
+        np.array([0.0, 1.0, 2.0]).tofile(os.path.join(self.tmp, "c.height.f64"))
+        manifest = os.path.join(self.tmp, "c.manifest.json")
+        columnar.write_manifest(manifest, 3, {
+            name: {"file": f"c.{name}.f64", "dtype": "<f8"}
+            for name in ("mass", "velocity", "height")})
+        table = batch_table.load_columns(manifest, gravity=1.62)
+        self.assertIsInstance(table.columns["total_energy"], np.memmap)
+        self.assertEqual(table.window(1, 2)[0][-1], "Mass cannot be negative")
+        
+        out = os.path.join(self.tmp, "out.jsonl")
+        batch_table.export(table, out, chunk_size=2)
+        with open(out) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), 3)
+        self.assertAlmostEqual(records[2]["potential_energy"], 3 * 2 * 1.62)
+        self.assertIsNone(records[1]["total_energy"])
+        self.assertEqual(records[1]["error"], "Mass cannot be negative")
+        
+        copy = os.path.join(self.tmp, "copy.manifest.json")
+        batch_table.export(table, copy)
+        np.testing.assert_array_equal(columnar.ColumnSet.open(copy)["gravity"], [1.62] * 3)
+        table.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the benchmark harness and its regression check
+"""
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from benchmarks import cases, harness
+from benchmarks.__main__ import main
+
+
+def _document(**medians):
+    return {"version": harness.FORMAT_VERSION, "metadata": {},
+            "benchmarks": [{"name": name, "min_ns": value, "median_ns": value,
+                            "mean_ns": value} for name, value in medians.items()]}
+
+
+class TestMeasure(unittest.TestCase):
+    """Tests for timing and result documents."""
+
+    def test_measure_reports_per_call_statistics(self):
+        """Test the loop count is calibrated and values are per call."""
+        calls = []
+        result = harness.measure(lambda: calls.append(None), repeat=3, min_time=0.001)
+        self.assertEqual(result["repeat"], 3)
+        self.assertEqual(len(result["values_ns"]), 3)
+        self.assertGreaterEqual(result["loops"], 1)
+        self.assertLessEqual(result["min_ns"], result["median_ns"])
+        self.assertGreater(len(calls), 4 * result["loops"] - 1)
+
+    def test_run_suite_writes_metadata_and_pyperf(self):
+        """Test a run produces JSON with metadata and a pyperf conversion."""
+        @contextlib.contextmanager
+        def setup():
+            yield lambda: sum(range(10))
+        benchmark = harness.Benchmark("tiny.sum", "tiny", setup, items=10)
+        document = harness.run_suite([benchmark], repeat=2, min_time=0.001)
+        self.assertEqual(document["metadata"]["repeat"], 2)
+        self.assertIn("python_version", document["metadata"])
+        result = document["benchmarks"][0]
+        self.assertAlmostEqual(result["items_per_second"], 10 / (result["median_ns"] / 1e9))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "results.json")
+            harness.write_results(document, path)
+            self.assertEqual(harness.load_results(path)["benchmarks"][0]["name"], "tiny.sum")
+            harness.write_pyperf(document, os.path.join(tmp, "pyperf.json"))
+            with open(os.path.join(tmp, "pyperf.json"), encoding="utf-8") as f:
+                pyperf = json.load(f)
+        self.assertEqual(pyperf["benchmarks"][0]["metadata"]["name"], "tiny.sum")
+        self.assertEqual(len(pyperf["benchmarks"][0]["runs"][0]["values"]), 2)
+
+    def test_load_rejects_other_files(self):
+        """Test a JSON file that is not a result document is refused."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "other.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"version": "1.0"}, f)
+            with self.assertRaises(ValueError):
+                harness.load_results(path)
+
+
+class TestCompare(unittest.TestCase):
+    """Tests for baseline comparison."""
+
+    def test_statuses(self):
+        """Test regressions, improvements, new and missing benchmarks."""
+        baseline = _document(same=100.0, slower=100.0, faster=100.0, gone=100.0)
+        current = _document(same=105.0, slower=125.0, faster=50.0, added=1.0)
+        statuses = {c.name: c.status for c in harness.compare(baseline, current, 0.10)}
+        self.assertEqual(statuses, {"same": "ok", "slower": "regression",
+                                    "faster": "improvement", "gone": "missing",
+                                    "added": "new"})
+
+    def test_threshold_is_configurable(self):
+        """Test a looser threshold accepts the same slowdown."""
+        comparison, = harness.compare(_document(a=100.0), _document(a=125.0), 0.30)
+        self.assertEqual(comparison.status, "ok")
+        self.assertAlmostEqual(comparison.ratio, 1.25)
+
+    def test_compare_command_exit_status(self):
+        """Test the compare subcommand fails only on regressions."""
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = {}
+            for name, value in (("base", 100.0), ("ok", 101.0), ("slow", 150.0)):
+                paths[name] = os.path.join(tmp, f"{name}.json")
+                harness.write_results(_document(a=value), paths[name])
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(main(["compare", paths["base"], paths["ok"]]), 0)
+                self.assertEqual(main(["compare", paths["base"], paths["slow"]]), 1)
+                self.assertEqual(main(["compare", paths["base"], paths["slow"],
+                                       "--threshold", "0.6"]), 0)
+
+
+class TestCases(unittest.TestCase):
+    """Tests for the benchmark list."""
+
+    def test_batch_sizes_follow_max_rows(self):
+        """Test batch cases run at each power of ten up to the maximum."""
+        names = [b.name for b in cases.build(("batch",), max_rows=10 ** 4)]
+        if not names:
+            self.skipTest("NumPy is not installed")
+        self.assertIn("batch.total_mechanical_energy[1e4]", names)
+        self.assertNotIn("batch.total_mechanical_energy[1e5]", names)
+
+    def test_unknown_group(self):
+        """Test an unknown group is rejected."""
+        with self.assertRaises(ValueError):
+            cases.build(("gpu",))
+
+    def test_scalar_and_web_cases_run(self):
+        """Test a scalar case and a web case run end to end."""
+        selected = [b for b in cases.build(("scalar", "web"), web_requests=2)
+                    if b.name in ("scalar.kinetic_energy", "web.threaded.api_total.distinct")]
+        document = harness.run_suite(selected, repeat=1, min_time=0.001)
+        self.assertEqual(len(document["benchmarks"]), 2)
+
+    def test_precision_cases_record_error(self):
+        """Test precision cases store their error against exact arithmetic."""
+        selected = [b for b in cases.build(("precision",)) if b.name.startswith("precision.float")]
+        if not selected:
+            self.skipTest("NumPy is not installed")
+        document = harness.run_suite(selected, repeat=1, min_time=0.001)
+        errors = {r["params"]["precision"]: r["params"]["max_rel_error"]
+                  for r in document["benchmarks"]}
+        self.assertLess(errors["float64"], 1e-15)
+        self.assertLess(errors["float32"], 1e-6)
+        self.assertGreater(errors["float32"], errors["float64"])
+        self.assertIn("rel.error", harness.format_results(document))
+
+
+if __name__ == "__main__":
+    unittest.main()
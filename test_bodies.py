@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the celestial body registry
+"""
+
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import bodies
+from energy_calculator import EnergyCalculator
+
+
+class TestRegistry(unittest.TestCase):
+    """Tests for scalar registry lookups."""
+    
+    def test_lookup_is_case_insensitive(self):
+        """Test names resolve regardless of case and surrounding spaces."""
+        self.assertEqual(bodies.get_body(" moon ").gravity, 1.62)
+        self.assertEqual(EnergyCalculator.gravity_for("JUPITER"), 24.79)
+        with self.assertRaises(ValueError):
+            bodies.get_body("Pluto")
+    
+    def test_gravity_of_numbers_and_names(self):
+        """Test gravity may be given as a number, a numeric string or a name."""
+        self.assertEqual(bodies.gravity_of("Mars"), 3.71)
+        self.assertEqual(bodies.gravity_of("2.5"), 2.5)
+        self.assertEqual(bodies.gravity_of(7), 7.0)
+        with self.assertRaises(ValueError):
+            bodies.gravity_of("Vulcan")
+    
+    def test_quick_bodies_match_ui_presets(self):
+        """Test the quick-pick bodies are the ones the UIs always offered."""
+        self.assertEqual([b.name for b in bodies.quick_bodies()],
+                         ["Earth", "Moon", "Mars", "Jupiter"])
+        self.assertEqual(bodies.as_dicts()[0]["name"], "Earth")
+
+
+@unittest.skipIf(np is None, "NumPy is required for vectorized lookups")
+class TestVectorizedLookup(unittest.TestCase):
+    """Tests for column-wise name and code lookups."""
+    
+    def test_gravity_for_names(self):
+        """Test a column of names maps to gravity with unknown names flagged."""
+        gravity, unknown = bodies.gravity_for_names(["Earth", "moon", "Pluto", "Earth"])
+        np.testing.assert_array_equal(gravity[[0, 1, 3]], [9.81, 1.62, 9.81])
+        self.assertTrue(np.isnan(gravity[2]))
+        self.assertEqual(unknown.tolist(), [False, False, True, False])
+    
+    def test_categories_to_codes(self):
+        """Test categorical labels remap onto registry codes."""
+        codes = bodies.categories_to_codes(["Mars", "Earth"])
+        np.testing.assert_array_equal(bodies.gravity_for_codes(codes), [3.71, 9.81])
+
+
+if __name__ == "__main__":
+    unittest.main()
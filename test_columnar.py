@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Unit tests for memory-mapped binary column files
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if np is not None:
+    import columnar
+    from energy_calculator import EnergyCalculator, main
+
+
+@unittest.skipIf(np is None, "NumPy is required for binary columns")
+class TestColumnSet(unittest.TestCase):
+    """Tests for manifests and memory-mapped columns."""
+    
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        self.mass = np.array([1.0, 2.0, -3.0, 4.0])
+        self.velocity = np.array([2.0, 0.0, 1.0, 3.0], dtype="<f4")
+        self.height = np.array([3.0, 1.0, 1.0, 0.5])
+        self.mass.astype("<f8").tofile(os.path.join(self.tmp, "in.mass.f64"))
+        self.velocity.tofile(os.path.join(self.tmp, "in.velocity.f32"))
+        np.save(os.path.join(self.tmp, "in.height.npy"), self.height)
+        self.manifest = os.path.join(self.tmp, "in.manifest.json")
+        columnar.write_manifest(self.manifest, 4, {
+            "mass": {"file": "in.mass.f64", "dtype": "<f8"},
+            "velocity": {"file": "in.velocity.f32", "dtype": "float32"},
+            "height": {"file": "in.height.npy"},
+        })
+    
+    def tearDown(self):
+        self._tmp.cleanup()
+    
+    def test_open_maps_without_copying(self):
+        """Test columns are memory-mapped with the declared dtypes."""
+        columns = columnar.ColumnSet.open(self.manifest)
+        self.assertEqual(columns.rows, 4)
+        self.assertIsInstance(columns["mass"], np.memmap)
+        self.assertEqual(columns["velocity"].dtype, np.float32)
+        np.testing.assert_array_equal(columns["height"], self.height)
+    
+    def test_short_file_rejected(self):
+        """Test a raw file with too few rows is reported."""
+        columnar.write_manifest(self.manifest, 10, {
+            "mass": {"file": "in.mass.f64", "dtype": "<f8"}})
+        with self.assertRaises(ValueError):
+            columnar.ColumnSet.open(self.manifest)
+    
+    def test_run_columnar(self):
+        """Test results and invalid flags written to output columns."""
+        out = os.path.join(self.tmp, "out.manifest.json")
+        stats = columnar.run_columnar(
+            self.manifest, out,
+            {"mass": "mass", "velocity": "velocity", "height": "height"},
+            chunk_size=3, gravity=1.62)
+        self.assertEqual(stats, {"rows": 4, "invalid": 1})
+        result = columnar.ColumnSet.open(out)
+        expected = EnergyCalculator.total_mechanical_energy_batch(
+            self.mass, self.velocity, self.height, 1.62, on_invalid="nan")
+        np.testing.assert_allclose(result["total_energy"], expected)
+        self.assertEqual(result["invalid"].tolist(), [0, 0, 1, 0])
+        with open(out) as f:
+            self.assertEqual(json.load(f)["rows"], 4)
+    
+    def test_categorical_body_column(self):
+        """Test a uint8 body column resolves gravity through its categories."""
+        np.array([0, 1, 2, 7], dtype=np.uint8).tofile(os.path.join(self.tmp, "in.body.u1"))
+        with open(self.manifest) as f:
+            columns = json.load(f)["columns"]
+        columns["body"] = {"file": "in.body.u1", "dtype": "<u1",
+                           "categories": ["Moon", "Earth", "Mars"]}
+        columnar.write_manifest(self.manifest, 4, columns)
+        out = os.path.join(self.tmp, "out.manifest.json")
+        stats = columnar.run_columnar(
+            self.manifest, out, {"mass": "mass", "velocity": "velocity",
+                                 "height": "height", "body": "body"})
+        self.assertEqual(stats, {"rows": 4, "invalid": 2})
+        result = columnar.ColumnSet.open(out)
+        self.assertAlmostEqual(float(result["potential_energy"][0]), 3 * 1.62)
+        self.assertAlmostEqual(float(result["potential_energy"][1]), 2 * 9.81)
+        self.assertEqual(result["invalid"].tolist(), [0, 0, 1, 16])
+    
+    def test_cli_npy_float32_output(self):
+        """Test the batch subcommand with manifests and .npy output."""
+        out = os.path.join(self.tmp, "res.manifest.json")
+        code = main(["batch", "--in", self.manifest, "--out", out,
+                     "--columns", "mass,velocity,height",
+                     "--out-dtype", "float32", "--npy"])
+        self.assertEqual(code, 0)
+        result = columnar.ColumnSet.open(out)
+        self.assertEqual(result["kinetic_energy"].dtype, np.float32)
+        self.assertAlmostEqual(float(result["kinetic_energy"][3]), 18.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
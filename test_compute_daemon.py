@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the compute daemon and its client
+"""
+
+import contextlib
+import io
+import math
+import os
+import statistics
+import tempfile
+import threading
+import time
+import unittest
+
+import compute_daemon
+import daemon_client
+from daemon_client import DaemonClient
+from energy_calculator import EnergyCalculator, main
+
+
+class TestComputeDaemon(unittest.TestCase):
+    """Tests against a live daemon serving from a background thread."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory(prefix="energy-daemon-")
+        cls.path = os.path.join(cls.tmp.name, "energy.sock")
+        cls.server = compute_daemon.create_server(cls.path)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join(5)
+        cls.tmp.cleanup()
+
+    def test_scalar_matches_api(self):
+        """Test scalar requests give the scalar API's results and errors."""
+        with DaemonClient(self.path) as client:
+            self.assertEqual(client.calculate("kinetic", [10.0, 5.0]),
+                             EnergyCalculator.kinetic_energy(10.0, 5.0))
+            self.assertEqual(client.calculate("potential", [2.0, 3.0], 1.62),
+                             EnergyCalculator.potential_energy(2.0, 3.0, 1.62))
+            self.assertEqual(client.calculate("total", [10.0, 5.0, 3.0]), 419.3)
+            with self.assertRaisesRegex(ValueError, "^Velocity cannot be negative$"):
+                client.calculate("total", [10.0, -5.0, 3.0])
+            # The connection survives a rejected request
+            self.assertEqual(client.calculate("kinetic", [2.0, 1.0]), 1.0)
+
+    def test_batch(self):
+        """Test batch requests compute per row and mark invalid rows NaN."""
+        with DaemonClient(self.path) as client:
+            results, invalid = client.calculate_batch(
+                "total", [[1.0, 2.0, -1.0], [2.0, 3.0, 1.0], [1.0, 1.0, 1.0]], [9.81, 1.62, 9.81])
+            self.assertEqual(invalid, 1)
+            self.assertAlmostEqual(results[0], 2.0 + 9.81)
+            self.assertAlmostEqual(results[1], 9.0 + 2 * 1.62)
+            self.assertTrue(math.isnan(results[2]))
+            results, invalid = client.calculate_batch("kinetic", [[], []])
+            self.assertEqual((len(results), invalid), (0, 0))
+            with self.assertRaises(ValueError):
+                client.calculate_batch("kinetic", [[1.0, 2.0], [1.0]])
+
+    def test_malformed_requests(self):
+        """Test bad requests are answered with errors, not dropped."""
+        with DaemonClient(self.path) as client:
+            with self.assertRaisesRegex(ValueError, "too short"):
+                client.request(b"S")
+            with self.assertRaisesRegex(ValueError, "Unknown command code 7"):
+                client.request(bytes((daemon_client.SCALAR, 7)))
+            with self.assertRaisesRegex(ValueError, "total takes 4 values"):
+                client.request(bytes((daemon_client.SCALAR, 2)) + bytes(8))
+            with self.assertRaisesRegex(ValueError, "Unknown request kind"):
+                client.request(b"X\x00")
+
+    def test_concurrent_clients(self):
+        """Test several connections are served at the same time."""
+        errors = []
+
+        def work(mass):
+            try:
+                with DaemonClient(self.path, timeout=10) as client:
+                    for _ in range(200):
+                        if client.calculate("kinetic", [mass, 2.0]) != 2.0 * mass:
+                            errors.append(mass)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=work, args=(float(m),)) for m in range(1, 9)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+        self.assertEqual(errors, [])
+
+    def test_round_trip_is_sub_millisecond(self):
+        """Test a scalar call on an open connection takes well under 1 ms."""
+        with DaemonClient(self.path) as client:
+            timings = []
+            for _ in range(500):
+                start = time.perf_counter()
+                client.calculate("total", [10.0, 5.0, 3.0])
+                timings.append(time.perf_counter() - start)
+        self.assertLess(statistics.median(timings), 1e-3)
+
+    def test_client_command(self):
+        """Test the client subcommand for one calculation and for stdin rows."""
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.assertEqual(main(["client", "--socket", self.path, "total", "10", "5", "3"]), 0)
+        self.assertEqual(out.getvalue(), "419.3\n")
+        out, err = io.StringIO(), io.StringIO()
+        rows = io.StringIO("# mass velocity height [gravity]\n10 5 3\n1,2,3,1.62\n\n-1 1 1\n")
+        with contextlib.redirect_stderr(err):
+            code = daemon_client.run_client(self.path, "total", None, 9.81, rows, out)
+        self.assertEqual(code, 0)
+        self.assertEqual(out.getvalue().split(), ["419.3", str(2.0 + 3 * 1.62), "nan"])
+        self.assertEqual(err.getvalue(), "Processed 3 rows (1 invalid)\n")
+        with contextlib.redirect_stderr(io.StringIO()) as err:
+            code = daemon_client.run_client(self.path, "total", None, 9.81,
+                                            io.StringIO("1 2\n"), io.StringIO())
+        self.assertEqual(code, 2)
+        self.assertIn("line 1", err.getvalue())
+
+    def test_socket_in_use(self):
+        """Test a second daemon cannot take over a live socket."""
+        with self.assertRaisesRegex(OSError, "already listening"):
+            compute_daemon.create_server(self.path)
+
+
+class TestDaemonSetup(unittest.TestCase):
+    """Tests for argument parsing and socket file handling."""
+
+    def test_parse_client_argv(self):
+        """Test the client fast path and what it leaves to argparse."""
+        parse = daemon_client.parse_client_argv
+        self.assertEqual(parse(["--socket", "s", "total", "1", "2", "3", "--gravity=1.62"]),
+                         ("s", "total", [1.0, 2.0, 3.0], 1.62))
+        self.assertEqual(parse(["kinetic", "--socket=s"]), ("s", "kinetic", None, 9.81))
+        self.assertIsNone(parse(["total", "1", "2", "3"]))
+        self.assertIsNone(parse(["--socket", "s", "total", "1", "2"]))
+        self.assertIsNone(parse(["--socket", "s", "potential", "1", "2", "--gravity", "Moon"]))
+
+    def test_unreachable_daemon(self):
+        """Test the client reports a missing daemon with exit status 1."""
+        with tempfile.TemporaryDirectory() as tmp, \
+                contextlib.redirect_stderr(io.StringIO()) as err:
+            code = daemon_client.run_client(os.path.join(tmp, "none.sock"), "kinetic", [1.0, 1.0])
+        self.assertEqual(code, 1)
+        self.assertIn("cannot reach the daemon", err.getvalue())
+
+    def test_stale_socket_replaced(self):
+        """Test a socket file left by a dead daemon is replaced and removed on close."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "energy.sock")
+            compute_daemon.create_server(path).socket.close()
+            self.assertTrue(os.path.exists(path))
+            server = compute_daemon.create_server(path)
+            server.server_close()
+            self.assertFalse(os.path.exists(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
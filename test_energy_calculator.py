@@ -4,7 +4,13 @@ Unit tests for the Energy Calculator
 """
 
 import unittest
-from energy_calculator import EnergyCalculator
+from array import array
+from energy_calculator import EnergyCalculator, BatchValidationError
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 class TestKineticEnergy(unittest.TestCase):
@@ -129,5 +135,178 @@ class TestPhysicalExamples(unittest.TestCase):
         self.assertAlmostEqual(initial_total, final_ke, places=1)
 
 
+class TestInverseSolvers(unittest.TestCase):
+    """Tests for the scalar inverse solvers."""
+    
+    def test_round_trips(self):
+        """Test each solver inverts the forward calculation."""
+        ke = EnergyCalculator.kinetic_energy(1500, 25)
+        self.assertAlmostEqual(EnergyCalculator.velocity_from_kinetic_energy(ke, 1500), 25)
+        pe = EnergyCalculator.potential_energy(2, 30, 1.62)
+        self.assertAlmostEqual(EnergyCalculator.height_from_potential_energy(pe, 2, 1.62), 30)
+        total = EnergyCalculator.total_mechanical_energy(70, 5, 12)
+        self.assertAlmostEqual(EnergyCalculator.velocity_for_total_energy(total, 70, 12), 5)
+        self.assertAlmostEqual(EnergyCalculator.mass_for_total_energy(total, 5, 12), 70)
+    
+    def test_drop_height(self):
+        """Test the drop height inverts v = √(2gh)."""
+        velocity = (2 * 9.81 * 20) ** 0.5
+        self.assertAlmostEqual(EnergyCalculator.drop_height_for_impact_velocity(velocity), 20)
+        self.assertAlmostEqual(
+            EnergyCalculator.drop_height_for_impact_velocity(velocity, 1.62), 20 * 9.81 / 1.62)
+    
+    def test_domain_errors(self):
+        """Test inputs outside each solver's domain raise ValueError."""
+        cases = [
+            (EnergyCalculator.velocity_from_kinetic_energy, (-1, 1),
+             "Kinetic energy cannot be negative"),
+            (EnergyCalculator.velocity_from_kinetic_energy, (1, 0), "Mass must be positive"),
+            (EnergyCalculator.height_from_potential_energy, (1, 1, 0),
+             "Gravitational acceleration must be positive"),
+            (EnergyCalculator.drop_height_for_impact_velocity, (-1,),
+             "Velocity cannot be negative"),
+            (EnergyCalculator.velocity_for_total_energy, (10, 1, 2),
+             "Total energy is less than the potential energy"),
+            (EnergyCalculator.mass_for_total_energy, (10, 0, 0),
+             "Velocity or height must be positive"),
+        ]
+        for solver, args, message in cases:
+            with self.assertRaisesRegex(ValueError, message):
+                solver(*args)
+
+
+@unittest.skipIf(np is None, "NumPy is required for batch calculations")
+class TestBatchInverseSolvers(unittest.TestCase):
+    """Tests for the vectorized inverse solvers."""
+    
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        self.mass = rng.uniform(0.1, 100.0, 200)
+        self.velocity = rng.uniform(0.0, 50.0, 200)
+        self.height = rng.uniform(0.0, 1000.0, 200)
+        self.total = EnergyCalculator.total_mechanical_energy_batch(
+            self.mass, self.velocity, self.height)
+    
+    def test_match_scalar(self):
+        """Test batch results equal the scalar solvers row by row."""
+        cases = [
+            (EnergyCalculator.velocity_from_kinetic_energy, (self.total, self.mass)),
+            (EnergyCalculator.height_from_potential_energy, (self.total, self.mass)),
+            (EnergyCalculator.drop_height_for_impact_velocity, (self.velocity,)),
+            (EnergyCalculator.velocity_for_total_energy,
+             (self.total, self.mass, self.height)),
+            (EnergyCalculator.mass_for_total_energy,
+             (self.total, self.velocity, self.height)),
+        ]
+        for solver, args in cases:
+            batch = getattr(EnergyCalculator, solver.__name__ + "_batch")(*args)
+            expected = [solver(*row) for row in zip(*args)]
+            self.assertEqual(batch.tolist(), expected, solver.__name__)
+    
+    def test_round_trip_and_out(self):
+        """Test solving for velocity recovers the inputs into a given buffer."""
+        out = np.empty(200)
+        result = EnergyCalculator.velocity_for_total_energy_batch(
+            self.total, self.mass, self.height, out=out)
+        self.assertIs(result, out)
+        np.testing.assert_allclose(out, self.velocity, rtol=1e-6, atol=1e-6)
+    
+    def test_invalid_rows(self):
+        """Test every out-of-domain row is reported, or NaN when requested."""
+        total, mass, height = [10.0, -1.0, 1.0, 10.0], [1.0, 1.0, 1.0, 0.0], [0.0, 0.0, 1.0, 0.0]
+        with self.assertRaises(BatchValidationError) as ctx:
+            EnergyCalculator.velocity_for_total_energy_batch(total, mass, height)
+        self.assertEqual(ctx.exception.report.errors(), [
+            (1, "Total energy cannot be negative"), (3, "Mass must be positive")])
+        with self.assertRaises(BatchValidationError) as ctx:
+            EnergyCalculator.velocity_for_total_energy_batch(total[2:3], mass[2:3], height[2:3])
+        self.assertEqual(ctx.exception.report.errors(),
+                         [(0, "Total energy is less than the potential energy")])
+        result = EnergyCalculator.velocity_for_total_energy_batch(
+            total, mass, height, on_invalid="nan")
+        self.assertAlmostEqual(result[0], 20 ** 0.5)
+        self.assertTrue(np.isnan(result[1:]).all())
+        mass_budget = EnergyCalculator.mass_for_total_energy_batch(
+            [1.0, 1.0], [0.0, 1.0], 0.0, on_invalid="nan")
+        self.assertTrue(np.isnan(mass_budget[0]))
+        self.assertEqual(mass_budget[1], 2.0)
+
+
+@unittest.skipIf(np is None, "NumPy is required for batch calculations")
+class TestBatchCalculations(unittest.TestCase):
+    """Tests for the vectorized batch API."""
+    
+    def test_batch_matches_scalar(self):
+        """Test batch results agree with the scalar functions row by row."""
+        mass = np.array([0.0, 1.0, 2.5, 1000.0])
+        velocity = np.array([3.0, 0.0, 4.0, 20.0])
+        height = np.array([1.0, 10.0, 0.0, 5.0])
+        ke = EnergyCalculator.kinetic_energy_batch(mass, velocity)
+        pe = EnergyCalculator.potential_energy_batch(mass, height, 1.62)
+        total = EnergyCalculator.total_mechanical_energy_batch(
+            mass, velocity, height)
+        for i in range(len(mass)):
+            m, v, h = mass[i], velocity[i], height[i]
+            self.assertAlmostEqual(ke[i], EnergyCalculator.kinetic_energy(m, v))
+            self.assertAlmostEqual(
+                pe[i], EnergyCalculator.potential_energy(m, h, 1.62))
+            self.assertAlmostEqual(
+                total[i], EnergyCalculator.total_mechanical_energy(m, v, h))
+    
+    def test_batch_broadcasting(self):
+        """Test scalars and per-row gravity broadcast against arrays."""
+        pe = EnergyCalculator.potential_energy_batch(
+            2.0, [1.0, 2.0], gravity=[9.81, 1.62])
+        np.testing.assert_allclose(pe, [19.62, 6.48])
+        total = EnergyCalculator.total_mechanical_energy_batch(
+            2.0, 3.0, [0.0, 1.0], gravity=np.array([[9.81], [1.62]]))
+        self.assertEqual(total.shape, (2, 2))
+        self.assertAlmostEqual(total[1, 1], 9 + 2 * 1.62)
+    
+    def test_batch_accepts_buffer_protocol(self):
+        """Test array('d') inputs are accepted without conversion."""
+        ke = EnergyCalculator.kinetic_energy_batch(
+            array("d", [2.0, 4.0]), array("d", [3.0, 1.0]))
+        np.testing.assert_allclose(ke, [9.0, 2.0])
+    
+    def test_batch_reports_every_invalid_row(self):
+        """Test validation collects all bad rows instead of the first."""
+        with self.assertRaises(BatchValidationError) as ctx:
+            EnergyCalculator.total_mechanical_energy_batch(
+                [1.0, -1.0, 2.0, 3.0], [1.0, 1.0, -2.0, 1.0], [0.0, 0.0, 0.0, -5.0])
+        report = ctx.exception.report
+        self.assertEqual(report.invalid_rows().tolist(), [1, 2, 3])
+        self.assertEqual(report.counts(), {"mass": 1, "velocity": 1, "height": 1})
+        self.assertEqual(report.errors()[1], (2, "Velocity cannot be negative"))
+        self.assertIsInstance(ctx.exception, ValueError)
+    
+    def test_batch_negative_next_to_nan(self):
+        """Test a NaN elsewhere in a column does not hide negative values."""
+        report = EnergyCalculator.validate_batch(mass=[float("nan"), -1.0])
+        self.assertEqual(report.invalid_rows().tolist(), [1])
+    
+    def test_batch_scalar_nan_mode(self):
+        """Test scalar inputs in "nan" mode give NaN rather than failing."""
+        for result in (EnergyCalculator.kinetic_energy_batch(-1.0, 2.0, on_invalid="nan"),
+                       EnergyCalculator.potential_energy_batch(-1.0, 2.0, on_invalid="nan"),
+                       EnergyCalculator.total_mechanical_energy_batch(
+                           -1.0, 2.0, 1.0, on_invalid="nan")):
+            self.assertTrue(np.isnan(result))
+        self.assertEqual(EnergyCalculator.kinetic_energy_batch(1.0, 2.0, on_invalid="nan"), 2.0)
+    
+    def test_batch_nan_mode(self):
+        """Test invalid rows become NaN when requested."""
+        ke = EnergyCalculator.kinetic_energy_batch(
+            [1.0, -1.0], [2.0, 2.0], on_invalid="nan")
+        self.assertEqual(ke[0], 2.0)
+        self.assertTrue(np.isnan(ke[1]))
+    
+    def test_validate_batch(self):
+        """Test standalone validation of batch columns."""
+        report = EnergyCalculator.validate_batch(mass=[1.0, 2.0], gravity=-1.0)
+        self.assertFalse(report.ok)
+        self.assertEqual(report.mask.tolist(), [True, True])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Unit tests for compact energy state records
+"""
+
+import math
+import sys
+import unittest
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from energy_calculator import BatchValidationError, EnergyCalculator
+from energy_state import STATE_SIZE, EnergyState, EnergyStateArray
+
+
+class TestEnergyState(unittest.TestCase):
+    """Tests for the single __slots__ record."""
+
+    def test_compute_and_total(self):
+        """Test energies match the scalar API and start as NaN."""
+        state = EnergyState(2.0, 3.0, 4.0, 1.62)
+        self.assertTrue(math.isnan(state.total_energy))
+        state.compute()
+        self.assertEqual(state.kinetic_energy, EnergyCalculator.kinetic_energy(2.0, 3.0))
+        self.assertEqual(state.total_energy,
+                         EnergyCalculator.total_mechanical_energy(2.0, 3.0, 4.0, 1.62))
+        with self.assertRaises(ValueError):
+            EnergyState(-1.0, 1.0, 1.0).compute()
+
+    def test_compact(self):
+        """Test the record has no instance dict and rejects unknown fields."""
+        state = EnergyState(1.0, 1.0, 1.0)
+        self.assertFalse(hasattr(state, "__dict__"))
+        self.assertLessEqual(sys.getsizeof(state), 80)
+        with self.assertRaises(AttributeError):
+            state.colour = "red"
+
+
+class TestEnergyStateArray(unittest.TestCase):
+    """Tests for the array('d') backed collection."""
+
+    def test_views_write_through(self):
+        """Test indexing gives live views over 48-byte records."""
+        states = EnergyStateArray.from_states([EnergyState(1.0, 2.0, 3.0), (4.0, 5.0, 6.0, 1.62)])
+        self.assertEqual(len(states), 2)
+        self.assertEqual(states.nbytes, 2 * STATE_SIZE)
+        self.assertEqual(STATE_SIZE, 48)
+        view = states[-1]
+        view.velocity = 0.5
+        self.assertEqual(states.buffer[7], 0.5)
+        self.assertEqual(view.copy(), EnergyState(4.0, 0.5, 6.0, 1.62))
+        states[0] = EnergyState(7.0, 8.0, 9.0)
+        self.assertEqual(states[0].mass, 7.0)
+
+    def test_rejects_bad_records(self):
+        """Test partial records and out-of-range rows are refused."""
+        with self.assertRaises(ValueError):
+            EnergyStateArray(array("d", [1.0, 2.0]))
+        states = EnergyStateArray()
+        with self.assertRaises(ValueError):
+            states.append((1.0, 2.0))
+        states.append((1.0, 2.0, 3.0, 4.0))
+        with self.assertRaises(ValueError):
+            states[0] = (1.0, 2.0)
+        with self.assertRaises(IndexError):
+            states[1]
+        with self.assertRaises(TypeError):
+            states[0.5]
+
+    def test_slices(self):
+        """Test slicing copies the selected records into a new array."""
+        states = EnergyStateArray.from_states([(float(i), 1.0, 2.0, 3.0) for i in range(5)])
+        part = states[1:4]
+        self.assertIsInstance(part, EnergyStateArray)
+        self.assertEqual([view.mass for view in part], [1.0, 2.0, 3.0])
+        self.assertEqual([view.mass for view in states[::-2]], [4.0, 2.0, 0.0])
+        self.assertEqual(len(states[4:1]), 0)
+        part[0].mass = 9.0
+        self.assertEqual(states[1].mass, 1.0)
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_batch_entry_points(self):
+        """Test strided column views feed the batch functions without copies."""
+        rng = np.random.default_rng(5)
+        mass, velocity, height = rng.uniform(0.0, 100.0, (3, 1000))
+        states = EnergyStateArray.from_columns(mass, velocity, height, 1.62)
+        columns = states.columns()
+        self.assertEqual(columns["mass"].strides, (STATE_SIZE,))
+        columns["gravity"][0] = 1.62
+        self.assertEqual(states.buffer[3], 1.62)
+        expected = EnergyCalculator.total_mechanical_energy_batch(mass, velocity, height, 1.62)
+        np.testing.assert_array_equal(
+            EnergyCalculator.total_mechanical_energy_batch(**columns), expected)
+        del columns
+        states.compute()
+        self.assertAlmostEqual(states[10].total_energy, expected[10], delta=1e-9)
+        self.assertEqual(states[10].potential_energy,
+                         EnergyCalculator.potential_energy(mass[10], height[10], 1.62))
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_compute_validation(self):
+        """Test raise mode writes nothing for bad input and nan mode marks it."""
+        states = EnergyStateArray.from_states([(1.0, 1.0, 1.0, 9.81), (-1.0, 1.0, 1.0, 9.81)])
+        with self.assertRaises(BatchValidationError):
+            states.compute()
+        self.assertTrue(math.isnan(states[0].kinetic_energy))
+        states.compute(on_invalid="nan")
+        self.assertEqual(states[0].kinetic_energy, 0.5)
+        self.assertTrue(math.isnan(states[1].potential_energy))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Unit tests for EnergyTable cached columns
+"""
+
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from energy_calculator import BatchValidationError, EnergyCalculator
+
+if np is not None:
+    from energy_table import EnergyTable
+
+
+@unittest.skipIf(np is None, "NumPy is required for energy tables")
+class TestEnergyTable(unittest.TestCase):
+    """Tests for lazy computation and dirty-chunk tracking."""
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.mass = rng.uniform(0.1, 100.0, 1000)
+        self.velocity = rng.uniform(0.0, 50.0, 1000)
+        self.height = rng.uniform(0.0, 1000.0, 1000)
+        self.table = EnergyTable(self.mass, self.velocity, self.height, chunk_size=100)
+
+    def assert_matches_batch(self, gravity=EnergyCalculator.GRAVITY):
+        for name, expected in (
+                ("kinetic_energy", EnergyCalculator.kinetic_energy_batch(
+                    self.mass, self.velocity)),
+                ("potential_energy", EnergyCalculator.potential_energy_batch(
+                    self.mass, self.height, gravity)),
+                ("total_energy", EnergyCalculator.total_mechanical_energy_batch(
+                    self.mass, self.velocity, self.height, gravity))):
+            np.testing.assert_allclose(self.table[name], expected, rtol=1e-15)
+
+    def test_lazy_and_cached(self):
+        """Test columns are computed on first access, once per chunk."""
+        self.assertEqual(self.table.dirty_chunks("total_energy"), list(range(10)))
+        self.assert_matches_batch()
+        self.assertEqual(self.table.recomputed, {
+            "kinetic_energy": 10, "potential_energy": 10, "total_energy": 10})
+        self.table["total_energy"]
+        self.assertEqual(self.table.recomputed["total_energy"], 10)
+
+    def test_gravity_reuses_kinetic_energy(self):
+        """Test a new gravity recomputes PE and the total but not KE."""
+        self.table["total_energy"]
+        self.table["gravity"] = 1.62
+        self.assertEqual(self.table.dirty_chunks("kinetic_energy"), [])
+        self.assert_matches_batch(1.62)
+        self.assertEqual(self.table.recomputed, {
+            "kinetic_energy": 10, "potential_energy": 20, "total_energy": 20})
+
+    def test_partial_edits(self):
+        """Test editing a few rows recomputes only the chunks holding them."""
+        self.table["total_energy"]
+        rows = np.array([5, 950, -1])
+        self.table["velocity", rows] = 0.0
+        self.velocity[rows] = 0.0
+        self.assertEqual(self.table.dirty_chunks("kinetic_energy"), [0, 9])
+        self.assertEqual(self.table.dirty_chunks("potential_energy"), [])
+        self.table["height", 250:260] = [1.0] * 10
+        self.height[250:260] = 1.0
+        mask = np.zeros(1000, dtype=bool)
+        mask[420] = True
+        self.table.set_column("mass", 2.0, mask)
+        self.mass[420] = 2.0
+        self.assertEqual(self.table.dirty_chunks("total_energy"), [0, 2, 4, 9])
+        self.assert_matches_batch()
+        self.assertEqual(self.table.recomputed["kinetic_energy"], 13)
+
+    def test_validation(self):
+        """Test negative values are refused in raise mode and NaN in nan mode."""
+        with self.assertRaises(BatchValidationError):
+            self.table["mass", 3] = -1.0
+        self.assertEqual(self.table["mass"][3], self.mass[3])
+        with self.assertRaises(BatchValidationError):
+            EnergyTable([1.0, -1.0], 1.0, 1.0)
+        table = EnergyTable([1.0, -1.0], 2.0, 1.0, on_invalid="nan")
+        self.assertTrue(np.isnan(table["total_energy"][1]))
+        self.assertEqual(table["total_energy"][0], 2.0 + 9.81)
+
+    def test_empty_table(self):
+        """Test a table without rows has empty columns and accepts writes."""
+        table = EnergyTable([], [], [])
+        self.assertEqual(len(table), 0)
+        table["gravity"] = 1.62
+        table["mass", []] = []
+        for name, values in table.as_dict().items():
+            self.assertEqual(values.shape, (0,), name)
+
+    def test_read_only_columns(self):
+        """Test columns cannot be changed behind the table's back."""
+        with self.assertRaises(ValueError):
+            self.table["velocity"][0] = 1.0
+        with self.assertRaises(KeyError):
+            self.table["total_energy"] = 0.0
+        with self.assertRaises(IndexError):
+            self.table["mass", 1000] = 1.0
+
+
+if __name__ == "__main__":
+    unittest.main()
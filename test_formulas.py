@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Unit tests for user-defined formula kernels
+"""
+
+import math
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import formulas
+from energy_calculator import BatchValidationError, EnergyCalculator
+
+SPRING_CONFIG = """
+[test_spring]
+expression = 0.5 * k * x**2
+description = Spring from a config string
+k = N/m
+x = m [any]
+
+[test_drop]
+expression = m * g * h
+m = kg
+h = m
+g = m/s^2 [0, inf) = 1.62
+"""
+
+
+class TestParsing(unittest.TestCase):
+    """Tests for units, domains and expression checks."""
+
+    def test_units(self):
+        """Test derived units reduce to the same exponents as base units."""
+        self.assertEqual(formulas.parse_unit("J"), formulas.parse_unit("kg*m^2/s^2"))
+        self.assertEqual(formulas.parse_unit("N/m"), formulas.parse_unit("kg/s**2"))
+        self.assertEqual(formulas.format_unit(formulas.parse_unit("W")), "kg*m^2/s^3")
+        with self.assertRaises(formulas.FormulaError):
+            formulas.parse_unit("furlong")
+
+    def test_domains(self):
+        """Test interval parsing and the messages of the common domains."""
+        domain = formulas.parse_domain("[0, c)")
+        self.assertTrue(domain.contains(0.0))
+        self.assertFalse(domain.contains(299792458.0))
+        self.assertEqual(formulas.parse_domain("[0, inf)").message("Mass"),
+                         "Mass cannot be negative")
+        self.assertEqual(formulas.parse_domain("(0, inf)").message("Distance"),
+                         "Distance must be positive")
+        with self.assertRaises(formulas.FormulaError):
+            formulas.parse_domain("[1, 0]")
+
+    def test_rejected_definitions(self):
+        """Test wrong units, unknown names and unsupported syntax are refused."""
+        cases = [
+            ("mass * velocity", {"mass": "kg", "velocity": "m/s"}, "units of kg.m/s,"),
+            ("mass * velocity**2 + mass", {"mass": "kg", "velocity": "m/s"}, "Cannot add"),
+            ("0.5 * mass * speed**2", {"mass": "kg", "velocity": "m/s"}, "Unknown name"),
+            ("__import__('os')", {}, "Unsupported call"),
+            ("mass.real", {"mass": "J"}, "Unsupported syntax"),
+            ("mass", {"mass": "J", "extra": "kg"}, "unused"),
+            ("exp(mass)", {"mass": "J"}, "dimensionless"),
+        ]
+        for expression, variables, message in cases:
+            with self.assertRaisesRegex(formulas.FormulaError, message):
+                formulas.compile_formula("bad", expression, variables)
+
+    def test_kernels_are_cached(self):
+        """Test the same definition compiles once, whatever its spacing."""
+        variables = {"mass": "kg", "velocity": "m/s"}
+        first = formulas.compile_formula("k2", "0.5*mass*velocity**2", variables)
+        second = formulas.compile_formula("k2", "0.5 * mass * velocity ** 2", variables)
+        self.assertIs(first, second)
+
+
+class TestScalar(unittest.TestCase):
+    """Tests for the pure-Python fallback kernels."""
+
+    def test_builtins_match_calculator(self):
+        """Test the built-in kinetic and potential formulas match the calculator."""
+        self.assertEqual(formulas.get("kinetic").scalar(mass=2, velocity=3),
+                         EnergyCalculator.kinetic_energy(2, 3))
+        self.assertAlmostEqual(formulas.get("potential")(mass=2, height=3),
+                               EnergyCalculator.potential_energy(2, 3))
+
+    def test_new_formulas(self):
+        """Test rotational, elastic, relativistic and inverse-square energies."""
+        self.assertEqual(formulas.get("rotational_kinetic")(
+            moment_of_inertia=2, angular_velocity=-3), 9.0)
+        self.assertEqual(formulas.get("elastic_potential")(
+            spring_constant=100, displacement=-0.1), 0.5000000000000001)
+        relativistic = formulas.get("relativistic_kinetic")
+        self.assertAlmostEqual(relativistic(mass=1, velocity=30), 450.0, places=9)
+        gamma = 1 / math.sqrt(1 - 0.6 ** 2)
+        self.assertAlmostEqual(relativistic(mass=1, velocity=0.6 * 299792458.0),
+                               (gamma - 1) * 299792458.0 ** 2, delta=1e3)
+        self.assertAlmostEqual(formulas.get("gravitational_potential")(
+            central_mass=5.972e24, mass=1, distance=6.371e6), -6.2565e7, delta=1e4)
+
+    def test_domain_errors(self):
+        """Test out-of-domain and missing values raise ValueError."""
+        with self.assertRaisesRegex(ValueError, "Velocity must be in"):
+            formulas.get("relativistic_kinetic")(mass=1, velocity=3e8)
+        with self.assertRaisesRegex(ValueError, "Distance must be positive"):
+            formulas.get("gravitational_potential")(central_mass=1, mass=1, distance=0)
+        with self.assertRaisesRegex(ValueError, "missing variable"):
+            formulas.get("kinetic").scalar(mass=1)
+
+
+class TestRegistry(unittest.TestCase):
+    """Tests for registering formulas from configuration text."""
+
+    def test_load_config(self):
+        """Test sections become named kernels with defaults applied."""
+        spring, drop = formulas.load_config(SPRING_CONFIG, replace=True)
+        self.assertIs(formulas.get("test_spring"), spring)
+        self.assertEqual(spring.description, "Spring from a config string")
+        self.assertAlmostEqual(drop(m=2, h=10), 32.4)
+        self.assertIn("test_drop", formulas.names())
+        with self.assertRaises(formulas.FormulaError):
+            formulas.load_config("[test_broken]\nunit = J\n")
+
+    def test_duplicate_name(self):
+        """Test a different definition cannot silently take an existing name."""
+        with self.assertRaises(formulas.FormulaError):
+            formulas.register("kinetic", "mass * velocity**2", {"mass": "kg", "velocity": "m/s"})
+        with self.assertRaises(ValueError):
+            formulas.get("nope")
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestBatch(unittest.TestCase):
+    """Tests for the vectorized kernels."""
+
+    def test_matches_scalar(self):
+        """Test batch results equal the scalar kernel row by row."""
+        kernel = formulas.get("relativistic_kinetic")
+        velocity = np.array([0.0, 1.0, 1e5, 1e8, 2.9e8])
+        result = kernel.batch(mass=2.0, velocity=velocity)
+        expected = [kernel.scalar(mass=2.0, velocity=v) for v in velocity]
+        np.testing.assert_allclose(result, expected, rtol=1e-12)
+
+    def test_on_invalid_modes(self):
+        """Test raise reports rows with the formula's messages, nan masks them."""
+        kernel = formulas.get("gravitational_potential")
+        distance = np.array([1.0, 0.0, 2.0])
+        with self.assertRaises(BatchValidationError) as raised:
+            kernel.batch(central_mass=1.0, mass=1.0, distance=distance)
+        self.assertEqual(raised.exception.report.errors(),
+                         [(1, "Distance must be positive")])
+        result = kernel.batch(on_invalid="nan", central_mass=1.0, mass=1.0, distance=distance)
+        self.assertTrue(np.isnan(result[1]))
+        self.assertEqual(result[2], -formulas.CONSTANTS["G"][0] / 2)
+
+    def test_out_and_inputs_untouched(self):
+        """Test out= is filled and an identity formula does not alias its input."""
+        kernel = formulas.compile_formula("identity", "energy", {"energy": "J"})
+        energy = np.array([1.0, -1.0])
+        result = kernel.batch(on_invalid="nan", energy=energy)
+        self.assertEqual(energy[1], -1.0)
+        self.assertTrue(np.isnan(result[1]))
+        out = np.empty(2)
+        self.assertIs(formulas.get("kinetic").batch(out=out, mass=[1, 2], velocity=2), out)
+        np.testing.assert_array_equal(out, [2.0, 4.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the GUI's background job layer (no display needed)
+"""
+
+import threading
+import time
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import gui_calculator
+except ImportError:
+    gui_calculator = None
+
+
+def wait_for_outcome(job, timeout=10):
+    """Poll a job like the Tk loop does until it finishes."""
+    deadline = time.monotonic() + timeout
+    last_progress = None
+    while time.monotonic() < deadline:
+        progress, outcome = job.poll()
+        last_progress = progress or last_progress
+        if outcome is not None:
+            return last_progress, outcome
+        time.sleep(0.005)
+    raise AssertionError("job did not finish")
+
+
+@unittest.skipIf(gui_calculator is None, "tkinter is not available")
+class TestBackgroundJob(unittest.TestCase):
+    """Tests for the worker thread / queue layer."""
+    
+    def test_result_and_coalesced_progress(self):
+        """Test the result arrives and only the latest progress is reported."""
+        def work(job, n):
+            for i in range(1, n + 1):
+                job.progress(i, n)
+            return n * 2
+        job = gui_calculator.BackgroundJob(work, 50).start()
+        job.thread.join(5)
+        progress, outcome = job.poll()
+        self.assertEqual(progress, ("progress", 50, 50, ""))
+        self.assertEqual(outcome, ("done", 100))
+    
+    def test_cooperative_cancel(self):
+        """Test cancellation stops the worker at its next chunk boundary."""
+        started = threading.Event()
+        chunks = []
+        
+        def work(job):
+            while True:
+                job.check_cancelled()
+                chunks.append(1)
+                started.set()
+                time.sleep(0.001)
+        job = gui_calculator.BackgroundJob(work).start()
+        started.wait(5)
+        job.cancel()
+        _, outcome = wait_for_outcome(job)
+        self.assertEqual(outcome, ("cancelled",))
+        self.assertTrue(job.cancelled)
+    
+    def test_error_is_reported(self):
+        """Test exceptions in the worker are passed back, not raised."""
+        def work(job):
+            raise ValueError("bad input")
+        _, outcome = wait_for_outcome(gui_calculator.BackgroundJob(work).start())
+        self.assertEqual(outcome[0], "error")
+        self.assertEqual(str(outcome[1]), "bad input")
+    
+    @unittest.skipIf(np is None, "NumPy is required for sweeps")
+    def test_sweep_job(self):
+        """Test the sweep worker reports progress per chunk and summarizes."""
+        axes = ([1.0, 2.0], np.linspace(0, 10, 100), [0.0, 5.0], [9.81])
+        job = gui_calculator.BackgroundJob(gui_calculator.sweep_job, axes, 64).start()
+        progress, outcome = wait_for_outcome(job)
+        grid, stats = outcome[1]
+        self.assertEqual(progress[1:3], (400, 400))
+        self.assertEqual(stats["count"], grid.size)
+        self.assertEqual(stats["argmax"]["mass"], 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the web server and JSON compute API
+"""
+
+import gzip
+import http.client
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+import formulas
+import metrics
+import web_api
+from launch_web import _accepts_gzip, create_server
+
+
+class TestWebApi(unittest.TestCase):
+    """Tests for transport-independent API handling."""
+    
+    def test_total(self):
+        """Test the total endpoint returns KE, PE and their sum."""
+        status, body = web_api.handle_request(
+            "/api/total", {"mass": "2", "velocity": "3", "height": "1"})
+        data = json.loads(body)
+        self.assertEqual(status, 200)
+        self.assertAlmostEqual(data["total_energy"], 9 + 2 * 9.81)
+        self.assertEqual(data["inputs"]["gravity"], 9.81)
+    
+    def test_validation_errors(self):
+        """Test negative, missing and non-numeric inputs give 400."""
+        cases = [
+            ({"mass": "-1", "velocity": "3"}, "Mass cannot be negative"),
+            ({"mass": "1"}, "Missing parameter 'velocity'"),
+            ({"mass": "x", "velocity": "3"}, "Parameter 'mass' must be a number"),
+        ]
+        for params, message in cases:
+            status, body = web_api.handle_request("/api/kinetic", params)
+            self.assertEqual(status, 400)
+            self.assertEqual(json.loads(body)["error"], message)
+    
+    def test_response_cache_canonical_keys(self):
+        """Test equivalent spellings and preset names share one cache entry."""
+        cache = web_api.ResponseCache(max_entries=10)
+        spellings = ["9.81", "9.810", "Earth", "earth", 9.81]
+        bodies = {web_api.handle_request(
+            "/api/potential", {"mass": "1", "height": "2", "gravity": g}, cache)[1]
+            for g in spellings}
+        self.assertEqual(len(bodies), 1)
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (4, 1, 1))
+    
+    def test_response_cache_eviction_and_ttl(self):
+        """Test LRU eviction and expiry of cached responses."""
+        cache = web_api.ResponseCache(max_entries=2)
+        for mass in ("1", "2", "3"):
+            web_api.handle_request("/api/kinetic", {"mass": mass, "velocity": "1"}, cache)
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(len(cache), 2)
+        
+        cache = web_api.ResponseCache(max_entries=2, ttl=-1)
+        web_api.handle_request("/api/kinetic", {"mass": "1", "velocity": "1"}, cache)
+        web_api.handle_request("/api/kinetic", {"mass": "1", "velocity": "1"}, cache)
+        self.assertEqual(cache.stats()["expirations"], 1)
+    
+    def test_errors_are_cached(self):
+        """Test rejected inputs are cached like successful ones."""
+        cache = web_api.ResponseCache()
+        for _ in range(2):
+            status, _ = web_api.handle_request(
+                "/api/kinetic", {"mass": "-1", "velocity": "1"}, cache)
+            self.assertEqual(status, 400)
+        self.assertEqual(cache.hits, 1)
+    
+    def test_bodies_endpoint(self):
+        """Test the body registry is served and usable as a gravity value."""
+        status, body = web_api.handle_request("/api/bodies", {})
+        names = [b["name"] for b in json.loads(body)["bodies"]]
+        self.assertEqual(status, 200)
+        self.assertIn("Neptune", names)
+        status, body = web_api.handle_request(
+            "/api/potential", {"mass": "1", "height": "1", "gravity": "Neptune"})
+        self.assertEqual(json.loads(body)["potential_energy"], 11.15)
+    
+    def test_formula_endpoints(self):
+        """Test formulas are listed and evaluated, with defaults and domains."""
+        status, body = web_api.handle_request("/api/formulas", {})
+        names = [f["name"] for f in json.loads(body)["formulas"]]
+        self.assertEqual(status, 200)
+        self.assertIn("relativistic_kinetic", names)
+        status, body = web_api.handle_request("/api/formula/potential",
+                                              {"mass": "2", "height": "1"})
+        self.assertEqual(status, 200)
+        self.assertAlmostEqual(json.loads(body)["result"], 2 * 9.81)
+        status, body = web_api.handle_request("/api/formula/gravitational_potential",
+                                              {"central_mass": "1", "mass": "1",
+                                               "distance": "0"})
+        self.assertEqual((status, json.loads(body)["error"]),
+                         (400, "Distance must be positive"))
+        status, _ = web_api.handle_request("/api/formula/nope", {})
+        self.assertEqual(status, 404)
+    
+    def test_replaced_formula_is_not_served_from_cache(self):
+        """Test re-registering a formula bypasses responses cached for the old one."""
+        cache = web_api.ResponseCache()
+        self.addCleanup(formulas._registry.pop, "cache_probe", None)
+        for factor in (2, 3):
+            formulas.register("cache_probe", f"{factor} * mass * velocity ** 2",
+                              {"mass": "kg", "velocity": "m/s"}, replace=True)
+            status, body = web_api.handle_request("/api/formula/cache_probe",
+                                                  {"mass": "1", "velocity": "1"}, cache)
+            self.assertEqual((status, json.loads(body)["result"]), (200, factor))
+        self.assertEqual(cache.hits, 0)
+
+    def test_unknown_endpoint(self):
+        """Test unknown API paths give 404."""
+        status, _ = web_api.handle_request("/api/nope", {})
+        self.assertEqual(status, 404)
+
+
+class TestServer(unittest.TestCase):
+    """Tests against a live threaded server."""
+    
+    @classmethod
+    def setUpClass(cls):
+        directory = os.path.dirname(os.path.abspath(__file__))
+        cls.httpd = create_server("127.0.0.1", 0, quiet=True, directory=directory)
+        cls.port = cls.httpd.server_address[1]
+        threading.Thread(target=cls.httpd.serve_forever, daemon=True).start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.httpd.shutdown()
+        cls.httpd.server_close()
+    
+    def test_keep_alive_get_and_post(self):
+        """Test several API requests reuse one HTTP/1.1 connection."""
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+        conn.request("GET", "/api/kinetic?mass=2&velocity=3")
+        response = conn.getresponse()
+        self.assertEqual(response.status, 200)
+        self.assertEqual(json.loads(response.read())["kinetic_energy"], 9.0)
+        sock = conn.sock
+        
+        conn.request("POST", "/api/potential",
+                     body=json.dumps({"mass": 1, "height": 10, "gravity": 1.62}),
+                     headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        self.assertAlmostEqual(json.loads(response.read())["potential_energy"], 16.2)
+        self.assertIs(conn.sock, sock)
+        conn.close()
+    
+    def test_cache_stats_endpoint(self):
+        """Test cache counters are exposed over HTTP."""
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+        for _ in range(2):
+            conn.request("GET", "/api/total?mass=1&velocity=1&height=1&gravity=Moon")
+            conn.getresponse().read()
+        conn.request("GET", "/api/cache-stats")
+        stats = json.loads(conn.getresponse().read())
+        self.assertGreaterEqual(stats["hits"], 1)
+        conn.close()
+    
+    def test_static_file(self):
+        """Test static pages are still served."""
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+        conn.request("GET", "/index.html")
+        response = conn.getresponse()
+        self.assertEqual(response.status, 200)
+        self.assertIn(b"<html", response.read())
+        conn.close()
+    
+    def test_metrics_not_served_by_default(self):
+        """Test /metrics only exists on instrumented servers."""
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+        conn.request("GET", "/metrics")
+        self.assertEqual(conn.getresponse().status, 404)
+        conn.close()
+
+
+class TestInstrumentedServer(unittest.TestCase):
+    """Tests for request metrics and the /metrics endpoint."""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.httpd = create_server("127.0.0.1", 0, quiet=True,
+                                   directory=self.tmp.name, instrument=True)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        metrics.reset()
+    
+    def tearDown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.tmp.cleanup()
+        metrics.disable()
+        metrics.reset()
+    
+    def test_metrics_endpoint(self):
+        """Test requests and calculator calls show up in Prometheus format."""
+        conn = http.client.HTTPConnection("127.0.0.1", self.httpd.server_address[1], timeout=5)
+        for query in ("mass=2&velocity=3&height=1", "mass=-1&velocity=3&height=1"):
+            conn.request("GET", f"/api/total?{query}")
+            conn.getresponse().read()
+        conn.request("GET", "/api/no-such-endpoint")
+        conn.getresponse().read()
+        conn.request("GET", "/metrics")
+        response = conn.getresponse()
+        self.assertTrue(response.getheader("Content-Type").startswith("text/plain"))
+        text = response.read().decode("utf-8")
+        conn.close()
+        self.assertIn('http_requests_total{method="GET",endpoint="/api/total",status="200"} 1',
+                      text)
+        self.assertIn('http_requests_total{method="GET",endpoint="api_unknown",status="404"} 1',
+                      text)
+        self.assertIn('energy_calls_total{function="kinetic_energy"} 2', text)
+        self.assertIn('energy_validation_failures_total{reason="negative_mass"} 1', text)
+        self.assertIn('http_request_duration_seconds_bucket{endpoint="/api/total",le="+Inf"} 2',
+                      text)
+
+
+class TestStaticAssetCache(unittest.TestCase):
+    """Tests for cached static files, ETags and gzip."""
+    
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = self._tmp.name
+        self.page = os.path.join(self.directory, "index.html")
+        with open(self.page, "w") as f:
+            f.write("<html>" + "energy " * 2000 + "</html>")
+        self.httpd = create_server("127.0.0.1", 0, quiet=True, directory=self.directory)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.conn = http.client.HTTPConnection(
+            "127.0.0.1", self.httpd.server_address[1], timeout=5)
+    
+    def tearDown(self):
+        self.conn.close()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self._tmp.cleanup()
+    
+    def get(self, path="/index.html", **headers):
+        self.conn.request("GET", path, headers=headers)
+        response = self.conn.getresponse()
+        return response, response.read()
+    
+    def test_gzip_and_etag(self):
+        """Test gzip bodies, strong ETags and cache headers."""
+        plain, body = self.get()
+        self.assertEqual(plain.status, 200)
+        self.assertIsNone(plain.getheader("Content-Encoding"))
+        self.assertEqual(plain.getheader("Cache-Control"), "no-cache")
+        self.assertFalse(plain.getheader("ETag").startswith("W/"))
+        
+        compressed, gz_body = self.get(**{"Accept-Encoding": "gzip, deflate"})
+        self.assertEqual(compressed.getheader("Content-Encoding"), "gzip")
+        self.assertEqual(gzip.decompress(gz_body), body)
+        self.assertLess(len(gz_body), len(body))
+        self.assertNotEqual(compressed.getheader("ETag"), plain.getheader("ETag"))
+        
+        for header in ("gzip;q=abc", "*, gzip;q=0", "gzip;q=0, *", "deflate"):
+            response, _ = self.get(**{"Accept-Encoding": header})
+            self.assertIsNone(response.getheader("Content-Encoding"), header)
+        
+        self.conn.request("HEAD", "/")
+        head = self.conn.getresponse()
+        self.assertEqual(head.read(), b"")
+        self.assertEqual(head.getheader("ETag"), plain.getheader("ETag"))
+    
+    def test_accept_encoding(self):
+        """Test q-values, malformed weights and the "*" wildcard."""
+        for header, expected in (("gzip", True), ("GZIP;q=0.5", True), ("*", True),
+                                 ("deflate, *;q=0.1", True), ("gzip;q=0", False),
+                                 ("gzip; q=abc", False), ("*, gzip;q=0", False),
+                                 ("gzip;q=0, *", False), ("*;q=0", False),
+                                 ("gzip;level=1;q=0", False), ("", False), (None, False)):
+            self.assertEqual(_accepts_gzip(header), expected, header)
+    
+    def test_conditional_get(self):
+        """Test If-None-Match and If-Modified-Since answer 304."""
+        first, _ = self.get()
+        etag = first.getheader("ETag")
+        response, body = self.get(**{"If-None-Match": f'"other", W/{etag}'})
+        self.assertEqual(response.status, 304)
+        self.assertEqual(body, b"")
+        response, _ = self.get(**{"If-Modified-Since": first.getheader("Last-Modified")})
+        self.assertEqual(response.status, 304)
+        response, _ = self.get(**{"If-None-Match": '"other"'})
+        self.assertEqual(response.status, 200)
+    
+    def test_invalidated_when_file_changes(self):
+        """Test an mtime change reloads the asset with a new ETag."""
+        first, _ = self.get()
+        with open(self.page, "w") as f:
+            f.write("<html>changed</html>")
+        stat = os.stat(self.page)
+        os.utime(self.page, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+        response, body = self.get(**{"If-None-Match": first.getheader("ETag")})
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, b"<html>changed</html>")
+    
+    def test_uncached_files_fall_back(self):
+        """Test other file types are still served from disk."""
+        with open(os.path.join(self.directory, "data.bin"), "wb") as f:
+            f.write(b"\x00\x01")
+        response, body = self.get("/data.bin")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, b"\x00\x01")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the opt-in instrumentation layer
+"""
+
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import batch_stream
+import columnar
+import metrics
+from energy_calculator import EnergyCalculator, main
+
+
+class InstrumentedTestCase(unittest.TestCase):
+    """Enables instrumentation around each test and clears it afterwards."""
+
+    def setUp(self):
+        metrics.reset()
+        metrics.enable()
+
+    def tearDown(self):
+        metrics.disable()
+        metrics.reset()
+
+
+class TestEnableDisable(unittest.TestCase):
+    """Tests for installing and removing the wrappers."""
+
+    def test_disable_restores_originals(self):
+        """Test the uninstrumented functions are back after disable()."""
+        original = EnergyCalculator.__dict__["kinetic_energy"]
+        chunk = batch_stream.compute_chunk
+        metrics.enable()
+        metrics.enable()
+        self.assertTrue(metrics.enabled())
+        self.assertIsNot(EnergyCalculator.__dict__["kinetic_energy"], original)
+        metrics.disable()
+        self.assertFalse(metrics.enabled())
+        self.assertIs(EnergyCalculator.__dict__["kinetic_energy"], original)
+        self.assertIs(batch_stream.compute_chunk, chunk)
+
+    def test_nothing_recorded_when_disabled(self):
+        """Test calls are not counted without enable()."""
+        metrics.reset()
+        EnergyCalculator.kinetic_energy(1, 2)
+        self.assertEqual(metrics.CALLS.get(("kinetic_energy",)), 0)
+
+
+class TestScalarInstrumentation(InstrumentedTestCase):
+    """Tests for counting scalar calls."""
+
+    def test_outermost_call_only(self):
+        """Test total_mechanical_energy counts once, not its inner calls."""
+        EnergyCalculator.total_mechanical_energy(2, 3, 1)
+        EnergyCalculator.kinetic_energy(2, 3)
+        self.assertEqual(metrics.CALLS.get(("total_mechanical_energy",)), 1)
+        self.assertEqual(metrics.CALLS.get(("kinetic_energy",)), 1)
+        self.assertEqual(metrics.CALL_DURATION.count(("kinetic_energy",)), 1)
+
+    def test_validation_failure_reason(self):
+        """Test scalar ValueErrors are counted as errors with their reason."""
+        with self.assertRaises(ValueError):
+            EnergyCalculator.total_mechanical_energy(1, 1, -5)
+        self.assertEqual(metrics.CALL_ERRORS.get(("total_mechanical_energy",)), 1)
+        self.assertEqual(metrics.VALIDATION_FAILURES.get(("negative_height",)), 1)
+        self.assertEqual(metrics.ROWS.get(("total_mechanical_energy",)), 0)
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestBatchInstrumentation(InstrumentedTestCase):
+    """Tests for counting batch calls and the batch engines."""
+
+    def test_rows_and_failures(self):
+        """Test batch rows and per-column failures are counted."""
+        EnergyCalculator.total_mechanical_energy_batch(
+            [1.0, -1.0, 2.0], [1.0, 1.0, -1.0], 1.0, on_invalid="nan")
+        self.assertEqual(metrics.ROWS.get(("total_mechanical_energy_batch",)), 3)
+        self.assertEqual(metrics.VALIDATION_FAILURES.get(("negative_mass",)), 1)
+        self.assertEqual(metrics.VALIDATION_FAILURES.get(("negative_velocity",)), 1)
+
+    def test_stream_engine(self):
+        """Test a CSV chunk counts its rows and its parse and body errors."""
+        stream = io.StringIO("mass,velocity,height,body\n"
+                             "1,2,3,Moon\n-1,2,3,Earth\nx,2,3,Pluto\n")
+        out = io.StringIO()
+        batch_stream.run_batch(stream, out, {"mass": "mass", "velocity": "velocity",
+                                             "height": "height", "body": "body"})
+        self.assertEqual(metrics.CALLS.get(("stream_chunk",)), 1)
+        self.assertEqual(metrics.ROWS.get(("stream_chunk",)), 3)
+        self.assertEqual(metrics.CALLS.get(("validate_batch",)), 0)
+        self.assertEqual(metrics.VALIDATION_FAILURES.get(("negative_mass",)), 1)
+        self.assertEqual(metrics.VALIDATION_FAILURES.get(("not_a_number",)), 1)
+        self.assertEqual(metrics.VALIDATION_FAILURES.get(("unknown_body",)), 1)
+
+    def test_parallel_engine(self):
+        """Test ParallelBatchEngine calls count their rows in the calling process."""
+        from parallel import ParallelBatchEngine
+
+        mass = np.ones(40)
+        with ParallelBatchEngine(workers=2, chunk_size=10, min_parallel_rows=20) as engine:
+            engine.total_mechanical_energy(mass, mass, mass)
+            engine.kinetic_energy(mass[:5], mass[:5])
+        self.assertEqual(metrics.ROWS.get(("parallel_total_mechanical_energy",)), 40)
+        self.assertEqual(metrics.ROWS.get(("parallel_kinetic_energy",)), 5)
+        self.assertEqual(metrics.CALLS.get(("parallel_chunks",)), 0)
+        self.assertEqual(metrics.CALLS.get(("kinetic_energy_batch",)), 0)
+
+
+class TestThreads(InstrumentedTestCase):
+    """Tests for recording from several threads."""
+
+    def test_threads_are_merged(self):
+        """Test calls on other threads, finished or not, add up in the totals."""
+        def work():
+            for _ in range(100):
+                EnergyCalculator.kinetic_energy(1, 2)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        work()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(metrics.CALLS.get(("kinetic_energy",)), 500)
+        self.assertEqual(metrics.CALL_DURATION.count(("kinetic_energy",)), 500)
+        self.assertIn("kinetic_energy", metrics.summary())
+        metrics.reset()
+        self.assertEqual(metrics.CALLS.get(("kinetic_energy",)), 0)
+        EnergyCalculator.kinetic_energy(1, 2)
+        self.assertEqual(metrics.CALLS.get(("kinetic_energy",)), 1)
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestCliStats(unittest.TestCase):
+    """Tests for the --stats command-line flag."""
+
+    def tearDown(self):
+        metrics.reset()
+
+    def test_cli_stats(self):
+        """Test --stats prints the summary on stderr."""
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "in.csv")
+            with open(source, "w", encoding="utf-8") as f:
+                f.write("mass,velocity,height\n1,2,3\n-1,2,3\n")
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                code = main(["--stats", "batch", "--in", source,
+                             "--out", os.path.join(tmp, "out.csv"),
+                             "--columns", "mass,velocity,height"])
+        self.assertEqual(code, 0)
+        self.assertIn("stream_chunk", stderr.getvalue())
+        self.assertIn("negative_mass=1", stderr.getvalue())
+        self.assertFalse(metrics.enabled())
+
+    def test_cli_stats_as_script(self):
+        """Test --stats records calls when the calculator runs as a script."""
+        here = os.path.dirname(os.path.abspath(__file__))
+        result = subprocess.run(
+            [sys.executable, os.path.join(here, "energy_calculator.py"),
+             "--stats", "kinetic", "10", "5"],
+            cwd=here, capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout, "125.0\n")
+        self.assertIn("kinetic_energy", result.stderr)
+        self.assertNotIn("no calculator calls recorded", result.stderr)
+
+    def test_cli_stats_with_workers(self):
+        """Test --stats counts the rows of a column set computed by worker processes."""
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ("mass", "velocity", "height"):
+                np.ones(50).tofile(os.path.join(tmp, f"in.{name}.f64"))
+            columnar.write_manifest(os.path.join(tmp, "in.manifest.json"), 50, {
+                name: {"file": f"in.{name}.f64", "dtype": "<f8"}
+                for name in ("mass", "velocity", "height")})
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                code = main(["--stats", "batch", "--in", os.path.join(tmp, "in.manifest.json"),
+                             "--out", os.path.join(tmp, "out.manifest.json"),
+                             "--columns", "mass,velocity,height",
+                             "--workers", "2", "--chunk-size", "20"])
+        self.assertEqual(code, 0)
+        line = [line for line in stderr.getvalue().splitlines()
+                if line.startswith("parallel_chunks")][0]
+        self.assertEqual(line.split()[1:3], ["1", "50"])
+
+
+class TestHistogram(unittest.TestCase):
+    """Tests for log-bucketed histograms and rendering."""
+
+    def test_bucket_boundaries(self):
+        """Test a power of two lands in the bucket it bounds."""
+        histogram = metrics.Histogram("t_seconds", "test", ("name",))
+        histogram.observe_ns(("a",), 1024)
+        histogram.observe_ns(("a",), 1025)
+        histogram.observe_ns(("a",), 1)
+        histogram.observe_ns(("a",), 10 ** 12)
+        samples = {values[-1]: value for suffix, _, values, value in histogram.samples()
+                   if suffix == "_bucket"}
+        self.assertEqual(samples[repr(64 / 1e9)], 1)
+        self.assertEqual(samples[repr(1024 / 1e9)], 2)
+        self.assertEqual(samples[repr(2048 / 1e9)], 3)
+        self.assertEqual(samples["+Inf"], 4)
+        self.assertEqual(histogram.quantile(("a",), 0.5), 1024 / 1e9)
+        self.assertEqual(histogram.quantile(("a",), 1.0), float("inf"))
+
+    def test_render_format(self):
+        """Test the Prometheus text output has HELP/TYPE lines and labels."""
+        metrics.reset()
+        metrics.observe_request("GET", "/api/total", 200, 5000)
+        text = metrics.render()
+        self.assertIn("# TYPE http_request_duration_seconds histogram", text)
+        self.assertIn('http_requests_total{method="GET",endpoint="/api/total",status="200"} 1',
+                      text)
+        self.assertIn('http_request_duration_seconds_count{endpoint="/api/total"} 1', text)
+        metrics.reset()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the multi-core batch engine
+"""
+
+import os
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if np is not None:
+    import columnar
+    from energy_calculator import BatchValidationError, EnergyCalculator
+    from parallel import ParallelBatchEngine
+
+
+@unittest.skipIf(np is None, "NumPy is required for batch calculations")
+class TestParallelBatchEngine(unittest.TestCase):
+    """Tests for chunked shared-memory execution."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = ParallelBatchEngine(workers=2, chunk_size=250,
+                                         min_parallel_rows=100)
+        rng = np.random.default_rng(0)
+        cls.mass, cls.velocity, cls.height = rng.random((3, 1000)) * 10
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.close()
+    
+    def test_matches_single_process(self):
+        """Test pooled results equal the in-process batch API in order."""
+        result = self.engine.total_mechanical_energy(
+            self.mass, self.velocity, self.height, 1.62)
+        expected = EnergyCalculator.total_mechanical_energy_batch(
+            self.mass, self.velocity, self.height, 1.62)
+        np.testing.assert_array_equal(result, expected)
+        self.assertEqual([t.start for t in self.engine.timings], [0, 250, 500, 750])
+    
+    def test_broadcast_column(self):
+        """Test a one-element column is broadcast across pooled chunks."""
+        result = self.engine.total_mechanical_energy(
+            self.mass, self.velocity, self.height, np.array([1.62]))
+        expected = EnergyCalculator.total_mechanical_energy_batch(
+            self.mass, self.velocity, self.height, 1.62)
+        np.testing.assert_array_equal(result, expected)
+        self.assertEqual(len(self.engine.timings), 4)
+        with self.assertRaises(BatchValidationError) as ctx:
+            self.engine.kinetic_energy(self.mass, [-1.0])
+        self.assertEqual(len(ctx.exception.report.invalid_rows()), 1000)
+    
+    def test_invalid_rows_reported_across_chunks(self):
+        """Test bad rows from different chunks end up in one report."""
+        mass = self.mass.copy()
+        mass[[3, 600]] = -1.0
+        with self.assertRaises(BatchValidationError) as ctx:
+            self.engine.kinetic_energy(mass, self.velocity)
+        self.assertEqual(ctx.exception.report.invalid_rows().tolist(), [3, 600])
+        ke = self.engine.kinetic_energy(mass, self.velocity, on_invalid="nan")
+        self.assertTrue(np.isnan(ke[600]))
+    
+    def test_small_input_runs_in_process(self):
+        """Test inputs below the threshold skip the pool."""
+        pe = self.engine.potential_energy([1.0, 2.0], 10.0)
+        np.testing.assert_allclose(pe, [98.1, 196.2])
+        self.assertEqual(len(self.engine.timings), 1)
+        self.assertEqual(self.engine.timings[0].worker, os.getpid())
+    
+    def test_columnar_run_with_workers(self):
+        """Test memory-mapped columns processed by worker processes."""
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ("mass", "velocity", "height"):
+                getattr(self, name).tofile(os.path.join(tmp, f"in.{name}.f64"))
+            manifest = os.path.join(tmp, "in.manifest.json")
+            columnar.write_manifest(manifest, 1000, {
+                name: {"file": f"in.{name}.f64", "dtype": "<f8"}
+                for name in ("mass", "velocity", "height")})
+            out = os.path.join(tmp, "out.manifest.json")
+            stats = columnar.run_columnar(
+                manifest, out, {"mass": "mass", "velocity": "velocity", "height": "height"},
+                chunk_size=300, workers=2)
+            self.assertEqual(len(stats["timings"]), 4)
+            result = columnar.ColumnSet.open(out)
+            np.testing.assert_allclose(
+                result["total_energy"],
+                EnergyCalculator.total_mechanical_energy_batch(
+                    self.mass, self.velocity, self.height))
+
+
+if __name__ == "__main__":
+    unittest.main()
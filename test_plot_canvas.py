@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Unit tests for decimated canvas plotting (no display needed)
+"""
+
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import plot_canvas
+except ImportError:
+    plot_canvas = None
+
+
+class RecordingCanvas:
+    """Minimal stand-in for tk.Canvas that records item coordinates."""
+    
+    def __init__(self, width=400, height=300):
+        self.width, self.height = width, height
+        self.items = {}
+        self.created = 0
+        self.idle = []
+    
+    def _create(self, *args, **kwargs):
+        self.created += 1
+        self.items[self.created] = {"coords": list(args), **kwargs}
+        return self.created
+    
+    create_line = create_text = create_rectangle = _create
+    
+    def coords(self, item, *args):
+        self.items[item]["coords"] = list(args[0]) if len(args) == 1 else list(args)
+    
+    def itemconfigure(self, item, **kwargs):
+        self.items[item].update(kwargs)
+    
+    def bind(self, *args):
+        pass
+    
+    def tag_raise(self, item):
+        pass
+    
+    def after_idle(self, func):
+        self.idle.append(func)
+    
+    def winfo_width(self):
+        return self.width
+    
+    def winfo_height(self):
+        return self.height
+    
+    def run_idle(self):
+        while self.idle:
+            self.idle.pop(0)()
+
+
+@unittest.skipIf(np is None or plot_canvas is None, "NumPy and tkinter are required")
+class TestMinMaxBuckets(unittest.TestCase):
+    """Tests for per-pixel min/max decimation."""
+    
+    def test_buckets_keep_extremes(self):
+        """Test every column reports the true min and max of its points."""
+        x = np.arange(1000, dtype=float)
+        y = np.sin(x)
+        y[537] = 50.0
+        ymin, ymax = plot_canvas.minmax_buckets(x, y, 0.0, 10.0, 100)
+        np.testing.assert_allclose(ymin, y.reshape(100, 10).min(axis=1))
+        np.testing.assert_allclose(ymax, y.reshape(100, 10).max(axis=1))
+        self.assertEqual(ymax[53], 50.0)
+    
+    def test_empty_columns_are_nan(self):
+        """Test columns outside or between the data hold NaN."""
+        x = np.array([0.0, 0.5, 3.2])
+        ymin, ymax = plot_canvas.minmax_buckets(x, np.array([1.0, 2.0, 3.0]), -1.0, 1.0, 6)
+        self.assertTrue(np.isnan(ymin[[0, 2, 3, 5]]).all())
+        self.assertEqual((ymin[1], ymax[1]), (1.0, 2.0))
+        self.assertEqual(ymax[4], 3.0)
+
+
+@unittest.skipIf(np is None or plot_canvas is None, "NumPy and tkinter are required")
+class TestCurvePlot(unittest.TestCase):
+    """Tests for item reuse and incremental panning."""
+    
+    def setUp(self):
+        self.canvas = RecordingCanvas()
+        self.plot = plot_canvas.CurvePlot(self.canvas)
+        self.x = np.linspace(0.0, 100.0, 200_000)
+        self.plot.set_data(self.x, {"KE": (self.x ** 2, "blue"), "PE": (100 - self.x, "green")})
+        self.canvas.run_idle()
+    
+    def line_points(self, name):
+        return len(self.canvas.items[self.plot.items[name][0]]["coords"]) // 2
+    
+    def test_decimated_to_two_points_per_column(self):
+        """Test a large series is drawn with at most two vertices per column."""
+        left, _, right, _ = self.plot._area()
+        self.assertEqual(self.line_points("KE"), 2 * (right - left))
+    
+    def test_items_reused_across_redraws(self):
+        """Test redraws and new data move existing items instead of creating more."""
+        created = self.canvas.created
+        self.plot._zoom(200, 0.5)
+        self.canvas.run_idle()
+        self.plot.set_data(self.x, {"KE": (self.x, "blue")})
+        self.canvas.run_idle()
+        self.assertEqual(self.canvas.created, created)
+        self.assertEqual(self.canvas.items[self.plot.items["PE"][0]]["state"], "hidden")
+    
+    def test_incremental_pan_matches_full_recompute(self):
+        """Test shifted cached buckets equal a from-scratch bucketing."""
+        self.plot._zoom(200, 0.25)
+        self.canvas.run_idle()
+        for dx in (-7, 30, -100):
+            self.plot._drag_x = 200
+            self.plot._pan(type("Event", (), {"x": 200 + dx})())
+            self.canvas.run_idle()
+        columns = self.plot._cache[2]
+        expected = plot_canvas.minmax_buckets(
+            self.x, self.x ** 2, self.plot.x0, self.plot.pixel_width, columns)
+        cached = self.plot._cache[3]["KE"]
+        np.testing.assert_array_equal(cached[0], expected[0])
+        np.testing.assert_array_equal(cached[1], expected[1])
+    
+    def test_zoomed_in_draws_raw_points(self):
+        """Test a view with fewer points than columns draws the points themselves."""
+        for _ in range(40):
+            self.plot._zoom(100, 0.8)
+        self.canvas.run_idle()
+        left, _, right, _ = self.plot._area()
+        self.assertLess(self.line_points("KE"), 2 * (right - left))
+        self.assertGreater(self.line_points("KE"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the numeric precision modes
+"""
+
+import io
+import json
+import unittest
+from decimal import Decimal
+from fractions import Fraction
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import batch_stream
+import precision
+import web_api
+from energy_calculator import BatchValidationError, EnergyCalculator
+
+
+class TestConvert(unittest.TestCase):
+    """Tests for converting inputs to each mode."""
+
+    def test_exact_inputs_as_written(self):
+        """Test floats and strings both mean the decimal value written."""
+        self.assertEqual(precision.convert(0.1, "fraction"), Fraction(1, 10))
+        self.assertEqual(precision.convert("0.1", "fraction"), Fraction(1, 10))
+        self.assertEqual(precision.convert(0.1, "decimal"), Decimal("0.1"))
+        self.assertEqual(precision.convert(Fraction(1, 4), "decimal"), Decimal("0.25"))
+
+    def test_float32_rounding(self):
+        """Test float32 values are rounded to single precision."""
+        self.assertEqual(precision.convert(0.1, "float32"), 0.10000000149011612)
+        self.assertEqual(precision.round_float32(1e39), float("inf"))
+
+    def test_rejected_values(self):
+        """Test unknown modes and non-finite exact inputs raise ValueError."""
+        with self.assertRaises(ValueError):
+            precision.check("float16")
+        for value in ("nan", "inf", "x", float("inf")):
+            with self.assertRaises(ValueError):
+                precision.convert(value, "decimal")
+            with self.assertRaises(ValueError):
+                precision.convert(value, "fraction")
+
+
+class TestScalar(unittest.TestCase):
+    """Tests for per-call precision in the scalar API."""
+
+    def test_exact_modes(self):
+        """Test the exact modes give the exact decimal answer."""
+        self.assertEqual(EnergyCalculator.total_mechanical_energy(
+            0.1, 0.3, 0.2, precision="fraction"), Fraction(2007, 10000))
+        self.assertEqual(EnergyCalculator.total_mechanical_energy(
+            0.1, 0.3, 0.2, precision="decimal"), Decimal("0.2007"))
+        self.assertNotEqual(EnergyCalculator.total_mechanical_energy(0.1, 0.3, 0.2), 0.2007)
+
+    def test_float64_matches_default(self):
+        """Test explicit float64 gives exactly the default results."""
+        for args in ((0.1, 0.3, 0.2), (3.7, 12.9, 104.2, 1.62)):
+            self.assertEqual(EnergyCalculator.total_mechanical_energy(*args, precision="float64"),
+                             EnergyCalculator.total_mechanical_energy(*args))
+
+    def test_validation_and_unknown_mode(self):
+        """Test negative inputs and unknown modes still raise ValueError."""
+        with self.assertRaisesRegex(ValueError, "Mass cannot be negative"):
+            EnergyCalculator.kinetic_energy("-0.5", 1, precision="fraction")
+        with self.assertRaisesRegex(ValueError, "Unknown precision mode"):
+            EnergyCalculator.potential_energy(1, 1, precision="float128")
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestBatch(unittest.TestCase):
+    """Tests for per-batch precision."""
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.mass = rng.uniform(0.1, 100.0, 50)
+        self.velocity = rng.uniform(0.0, 50.0, 50)
+        self.height = rng.uniform(0.0, 1000.0, 50)
+
+    def test_float32_matches_scalar(self):
+        """Test float32 batches agree bit for bit with scalar float32 calls."""
+        mass, velocity, height = (a.astype(np.float32).tolist()
+                                  for a in (self.mass, self.velocity, self.height))
+        ke = EnergyCalculator.kinetic_energy_batch(mass, velocity, precision="float32")
+        pe = EnergyCalculator.potential_energy_batch(mass, height, precision="float32")
+        self.assertEqual(ke.dtype, np.float32)
+        self.assertEqual(ke.tolist(), [EnergyCalculator.kinetic_energy(m, v, precision="float32")
+                                       for m, v in zip(mass, velocity)])
+        self.assertEqual(pe.tolist(), [EnergyCalculator.potential_energy(m, h, precision="float32")
+                                       for m, h in zip(mass, height)])
+
+    def test_exact_batches(self):
+        """Test exact batches match the exact scalar results and mark bad rows."""
+        for mode in ("fraction", "decimal"):
+            result = EnergyCalculator.kinetic_energy_batch(
+                [0.1, -1.0, 2.5], [0.3, 1.0, 2.0], on_invalid="nan", precision=mode)
+            self.assertEqual(result.dtype, object)
+            self.assertEqual(result[0], EnergyCalculator.kinetic_energy(0.1, 0.3, precision=mode))
+            self.assertNotEqual(result[1], result[1])
+        with self.assertRaises(BatchValidationError):
+            EnergyCalculator.potential_energy_batch([1.0], [-1.0], precision="decimal")
+
+    def test_float32_bulk_paths(self):
+        """Test column sets, the parallel engine and bulk requests in float32."""
+        import os
+        import tempfile
+
+        import async_server
+        import columnar
+        from parallel import ParallelBatchEngine
+
+        expected = EnergyCalculator.total_mechanical_energy_batch(
+            self.mass, self.velocity, self.height, precision="float32")
+        # Column sets and bulk responses add the kinetic and potential results
+        summed = (EnergyCalculator.kinetic_energy_batch(self.mass, self.velocity,
+                                                        precision="float32")
+                  + EnergyCalculator.potential_energy_batch(self.mass, self.height,
+                                                            precision="float32"))
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ("mass", "velocity", "height"):
+                getattr(self, name).tofile(os.path.join(tmp, f"in.{name}.f64"))
+            manifest = os.path.join(tmp, "in.manifest.json")
+            columnar.write_manifest(manifest, 50, {
+                name: {"file": f"in.{name}.f64", "dtype": "<f8"}
+                for name in ("mass", "velocity", "height")})
+            mapping = {"mass": "mass", "velocity": "velocity", "height": "height"}
+            for dtype in ("<f8", "<f4"):
+                out = os.path.join(tmp, f"out{dtype[-1]}.manifest.json")
+                columnar.run_columnar(manifest, out, mapping, chunk_size=20, dtype=dtype,
+                                      precision="float32")
+                self.assertEqual(columnar.ColumnSet.open(out)["total_energy"].tolist(),
+                                 summed.tolist())
+            with self.assertRaisesRegex(ValueError, "float64 or float32"):
+                columnar.run_columnar(manifest, os.path.join(tmp, "x.manifest.json"),
+                                      mapping, precision="decimal")
+
+        with ParallelBatchEngine(workers=2, chunk_size=20, min_parallel_rows=10) as engine:
+            result = engine.total_mechanical_energy(self.mass, self.velocity, self.height,
+                                                    precision="float32")
+        self.assertEqual(result.dtype, np.float32)
+        self.assertEqual(result.tolist(), expected.tolist())
+
+        _, outputs, _ = async_server.compute_bulk(
+            "total", {"mass": self.mass, "velocity": self.velocity,
+                      "height": self.height, "gravity": np.float64(9.81)}, "float32")
+        self.assertEqual(outputs[2].tolist(), summed.tolist())
+        request = async_server.HttpRequest("POST", "/api/bulk/total?precision=fraction",
+                                           "HTTP/1.1", {}, b"")
+        with self.assertRaisesRegex(web_api.ApiError, "per-row endpoints"):
+            async_server.bulk_precision(request)
+
+    def test_out_and_unknown_mode(self):
+        """Test out= works in float32 and unknown modes are rejected."""
+        out = np.empty(50, dtype=np.float32)
+        result = EnergyCalculator.total_mechanical_energy_batch(
+            self.mass, self.velocity, self.height, out=out, precision="float32")
+        self.assertIs(result, out)
+        with self.assertRaises(ValueError):
+            EnergyCalculator.kinetic_energy_batch([1.0], [1.0], precision="half")
+
+    def test_stream(self):
+        """Test the streaming engine parses text exactly in the exact modes."""
+        source = "mass,velocity,height\n0.1,0.3,0.2\nx,1,1\n"
+        mapping = {"mass": "mass", "velocity": "velocity", "height": "height"}
+        out = io.StringIO()
+        stats = batch_stream.run_batch(io.StringIO(source), out, mapping,
+                                       out_format="jsonl", precision="fraction")
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(stats, {"rows": 2, "invalid": 1})
+        self.assertEqual(rows[0]["total_energy"], "2007/10000")
+        self.assertIsNone(rows[1]["mass"])
+        self.assertEqual(rows[1]["error"], "Mass is not a number")
+
+        out = io.StringIO()
+        batch_stream.run_batch(io.StringIO(source), out, mapping, precision="float32")
+        self.assertEqual(out.getvalue().splitlines()[1].split(",")[:5],
+                         ["0.1", "0.3", "0.2", "9.81", "0.0045000003"])
+
+
+    def test_stream_unknown_body(self):
+        """Test an unknown body is reported per row in the exact modes."""
+        source = "mass,velocity,height,body\n1,0,1,Moon\n1,0,1,Pluto\n"
+        mapping = {"mass": "mass", "velocity": "velocity", "height": "height", "body": "body"}
+        for mode in ("fraction", "decimal"):
+            out = io.StringIO()
+            stats = batch_stream.run_batch(io.StringIO(source), out, mapping,
+                                           out_format="jsonl", precision=mode)
+            rows = [json.loads(line) for line in out.getvalue().splitlines()]
+            self.assertEqual(stats, {"rows": 2, "invalid": 1})
+            self.assertEqual(rows[0]["total_energy"], "81/50" if mode == "fraction" else "1.62")
+            self.assertIsNone(rows[1]["gravity"])
+            self.assertIsNone(rows[1]["total_energy"])
+            self.assertEqual(rows[1]["error"], "Unknown body 'Pluto'")
+
+
+class TestWeb(unittest.TestCase):
+    """Tests for the precision request parameter."""
+
+    def test_precision_parameter(self):
+        """Test exact results come back as strings and are cached per mode."""
+        cache = web_api.ResponseCache()
+        params = {"mass": "0.1", "velocity": "0.3", "height": "0.2"}
+        _, body = web_api.handle_request("/api/total", {**params, "precision": "decimal"}, cache)
+        data = json.loads(body)
+        self.assertEqual((data["total_energy"], data["precision"]), ("0.2007", "decimal"))
+        _, body = web_api.handle_request("/api/total", params, cache)
+        self.assertNotIn("precision", json.loads(body))
+        self.assertEqual(cache.stats()["entries"], 2)
+        status, _ = web_api.handle_request("/api/total", {**params, "precision": "x"})
+        self.assertEqual(status, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
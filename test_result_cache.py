@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the on-disk batch result cache
+"""
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import result_cache
+from result_cache import ResultCache
+
+if np is not None:
+    import batch_stream
+    from energy_calculator import main
+
+
+class TestResultCache(unittest.TestCase):
+    """Tests for the store itself."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory(prefix="energy-cache-")
+        self.cache = ResultCache(self.tmp.name, max_bytes=100)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_put_and_get(self):
+        """Test stored chunks come back with their row counts and are counted."""
+        self.assertIsNone(self.cache.get("a" * 64))
+        self.cache.put("a" * 64, b"1,2,3\n", rows=1, invalid=0)
+        entry = self.cache.get("a" * 64)
+        self.assertEqual((entry.data, entry.rows, entry.invalid), (b"1,2,3\n", 1, 0))
+        stats = self.cache.stats()
+        self.assertEqual((stats["entries"], stats["bytes"], stats["hits"], stats["misses"]),
+                         (1, 6, 1, 1))
+
+    def test_counts_written_on_close(self):
+        """Test lookups leave the index alone until the counts are flushed."""
+        self.cache.get("a" * 64)
+        self.cache.get("b" * 64)
+        other = ResultCache(self.tmp.name)
+        self.assertEqual(other.stats()["misses"], 0)
+        self.cache.close()
+        self.assertEqual(other.stats()["misses"], 2)
+        other.close()
+        self.cache = ResultCache(self.tmp.name)
+
+    def test_lru_eviction(self):
+        """Test the least recently used entries go first when over the limit."""
+        for name in "abc":
+            self.cache.put(name * 64, bytes(40), rows=1)
+            time.sleep(0.01)
+        self.assertIsNone(self.cache.get("a" * 64))
+        self.cache.get("b" * 64)
+        time.sleep(0.01)
+        self.cache.put("d" * 64, bytes(40), rows=1)
+        self.assertIsNotNone(self.cache.get("b" * 64))
+        self.assertIsNone(self.cache.get("c" * 64))
+        self.assertLessEqual(self.cache.stats()["bytes"], 100)
+        # Larger than the whole limit: not stored at all
+        self.cache.put("e" * 64, bytes(101), rows=1)
+        self.assertIsNone(self.cache.get("e" * 64))
+
+    def test_prune_and_limit_persist(self):
+        """Test prune by size and age, and that the limit is saved."""
+        self.cache.put("a" * 64, bytes(30), rows=1)
+        self.cache.put("b" * 64, bytes(30), rows=1)
+        self.assertEqual(self.cache.prune(max_bytes=40), {"entries": 1, "bytes": 30})
+        self.assertEqual(self.cache.prune(older_than=-1), {"entries": 1, "bytes": 30})
+        with ResultCache(self.tmp.name) as reopened:
+            self.assertEqual(reopened.max_bytes, 100)
+
+    def test_missing_object_file(self):
+        """Test an object deleted from disk is treated as a miss and forgotten."""
+        self.cache.put("a" * 64, b"x", rows=1)
+        os.remove(os.path.join(self.tmp.name, "objects", "aa", "a" * 64))
+        self.assertIsNone(self.cache.get("a" * 64))
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_keys(self):
+        """Test keys change with any input value or with the context."""
+        context = result_cache.context_key(formula="f", precision="float64")
+        key = result_cache.chunk_key(context, {"mass": ["1", "2"], "velocity": ["3", "4"]})
+        self.assertEqual(key, result_cache.chunk_key(
+            context, {"velocity": ["3", "4"], "mass": ["1", "2"]}))
+        self.assertNotEqual(key, result_cache.chunk_key(
+            context, {"mass": ["1", "2"], "velocity": ["3", "5"]}))
+        self.assertNotEqual(key, result_cache.chunk_key(
+            context, {"mass": [1, "2"], "velocity": ["3", "4"]}))
+        self.assertNotEqual(key, result_cache.chunk_key(
+            result_cache.context_key(formula="f", precision="float32"),
+            {"mass": ["1", "2"], "velocity": ["3", "4"]}))
+
+    def test_parse_size(self):
+        """Test byte counts with binary suffixes."""
+        self.assertEqual(result_cache.parse_size("1024"), 1024)
+        self.assertEqual(result_cache.parse_size("500M"), 500 << 20)
+        self.assertEqual(result_cache.parse_size("1.5GiB"), 3 << 29)
+        with self.assertRaises(ValueError):
+            result_cache.parse_size("lots")
+
+
+@unittest.skipIf(np is None, "NumPy is required for batch calculations")
+class TestCachedBatch(unittest.TestCase):
+    """Tests for batch runs through the cache."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory(prefix="energy-cache-")
+        self.cache = ResultCache(self.tmp.name)
+        rows = [f"{m},{m % 7},{m % 5}" for m in range(1, 101)]
+        rows[42] = "-1,1,1"
+        self.text = "mass,velocity,height\n" + "\n".join(rows) + "\n"
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def run_batch(self, text, **options):
+        out = io.StringIO()
+        stats = batch_stream.run_batch(io.StringIO(text), out,
+                                       {"mass": "mass", "velocity": "velocity",
+                                        "height": "height"},
+                                       chunk_size=10, cache=self.cache, **options)
+        return out.getvalue(), stats
+
+    def test_rerun_reuses_chunks(self):
+        """Test a rerun is read from the cache and matches an uncached run."""
+        plain = io.StringIO()
+        batch_stream.run_batch(io.StringIO(self.text), plain,
+                               {"mass": "mass", "velocity": "velocity", "height": "height"},
+                               chunk_size=10)
+        first, stats = self.run_batch(self.text)
+        self.assertEqual(first, plain.getvalue())
+        self.assertEqual(stats, {"rows": 100, "invalid": 1, "cached_rows": 0})
+        second, stats = self.run_batch(self.text)
+        self.assertEqual(second, first)
+        self.assertEqual(stats, {"rows": 100, "invalid": 1, "cached_rows": 100})
+
+    def test_only_changed_chunks_recomputed(self):
+        """Test editing, inserting or deleting a row recomputes only the chunks around it."""
+        self.run_batch(self.text)
+        edits = {"edit": self.text.replace("\n55,6,0\n", "\n55,6,1\n"),
+                 "insert": self.text.replace("\n55,6,0\n", "\n55,6,0\n7,7,7\n"),
+                 "delete": self.text.replace("\n55,6,0\n", "\n")}
+        for name, changed in edits.items():
+            self.assertNotEqual(changed, self.text)
+            _, stats = self.run_batch(changed)
+            # At most the row's chunk and, if the row ended it, the next one
+            self.assertGreaterEqual(stats["cached_rows"], stats["rows"] - 21, name)
+            self.assertLess(stats["cached_rows"], stats["rows"], name)
+
+    def test_content_defined_chunks(self):
+        """Test chunk boundaries follow the rows, not their offset in the input."""
+        rows = [str(i) for i in range(1000)]
+        chunks = list(batch_stream.content_defined_chunks(
+            ({"mass": rows[i:i + 64]} for i in range(0, 1000, 64)), 64))
+        self.assertEqual([value for chunk in chunks for value in chunk["mass"]], rows)
+        self.assertLessEqual(max(len(chunk["mass"]) for chunk in chunks), 64)
+        shifted = ["x"] + rows
+        again = batch_stream.content_defined_chunks(
+            ({"mass": shifted[i:i + 50]} for i in range(0, len(shifted), 50)), 64)
+        self.assertEqual([chunk["mass"] for chunk in again][1:], [c["mass"] for c in chunks][1:])
+
+    def test_context_in_key(self):
+        """Test precision, gravity and output format each get their own entries."""
+        first, _ = self.run_batch(self.text)
+        for options in ({"precision": "float32"}, {"gravity": 1.62}, {"out_format": "jsonl"}):
+            _, stats = self.run_batch(self.text, **options)
+            self.assertEqual(stats["cached_rows"], 0, options)
+        self.assertEqual(self.run_batch(self.text)[0], first)
+
+    def test_cli(self):
+        """Test batch --cache and the cache stats/prune subcommands."""
+        source = os.path.join(self.tmp.name, "input.csv")
+        with open(source, "w", encoding="utf-8") as f:
+            f.write(self.text)
+        argv = ["batch", "--in", source, "--out", os.path.join(self.tmp.name, "out.csv"),
+                "--columns", "mass,velocity,height", "--cache", "--cache-dir", self.tmp.name,
+                "--chunk-size", "10"]
+        for expected in ("(1 invalid, 0 from", "(1 invalid, 100 from"):
+            with contextlib.redirect_stderr(io.StringIO()) as err:
+                self.assertEqual(main(argv), 0)
+            self.assertIn(expected, err.getvalue())
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            self.assertEqual(main(["cache", "stats", "--cache-dir", self.tmp.name]), 0)
+        stats = json.loads(out.getvalue())
+        self.assertEqual(stats["rows"], 100)
+        self.assertEqual((stats["hits"], stats["misses"]), (stats["entries"], stats["entries"]))
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            self.assertEqual(main(["cache", "prune", "--cache-dir", self.tmp.name, "--all"]), 0)
+        self.assertTrue(out.getvalue().startswith(f"Removed {stats['entries']} entries"))
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
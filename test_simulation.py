@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the many-particle free-fall simulator
+"""
+
+import contextlib
+import io
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if np is not None:
+    import simulation
+    from energy_calculator import BatchValidationError, main
+
+
+@unittest.skipIf(np is None, "NumPy is required for the simulator")
+class TestSimulate(unittest.TestCase):
+    """Tests for stepping, sampling and drift reporting."""
+    
+    def setUp(self):
+        self.heights = np.linspace(0.0, 100.0, 1001)
+    
+    def test_verlet_matches_closed_form(self):
+        """Test velocity Verlet reproduces h0 + v0 t - g t²/2 exactly."""
+        result = simulation.simulate(2.0, self.heights, 5.0, gravity=1.62,
+                                     dt=0.01, steps=300, sample_every=50)
+        t = 3.0
+        np.testing.assert_allclose(result.height, self.heights + 5.0 * t - 0.81 * t * t,
+                                   atol=1e-9)
+        np.testing.assert_allclose(result.velocity, 5.0 - 1.62 * t)
+        self.assertLess(result.drift_report().max_drift, 1e-12)
+    
+    def test_euler_drift_signs(self):
+        """Test explicit Euler gains energy and semi-implicit Euler loses it."""
+        reports = simulation.compare_integrators(1.0, self.heights, steps=200)
+        self.assertGreater(reports["euler"].final_drift, 1e-6)
+        self.assertLess(reports["semi-implicit-euler"].final_drift, -1e-6)
+        self.assertAlmostEqual(reports["euler"].final_drift,
+                               -reports["semi-implicit-euler"].final_drift, places=9)
+    
+    def test_sampling_stride_and_blocks(self):
+        """Test sample steps include the final step and blocking changes nothing."""
+        a = simulation.simulate(1.0, self.heights, steps=25, sample_every=10,
+                                integrator="euler", block_size=64)
+        b = simulation.simulate(1.0, self.heights, steps=25, sample_every=10,
+                                integrator="euler", block_size=10_000)
+        self.assertEqual(a.sample_steps.tolist(), [0, 10, 20, 25])
+        np.testing.assert_allclose(a.times, [0.0, 0.01, 0.02, 0.025])
+        np.testing.assert_array_equal(a.height, b.height)
+        np.testing.assert_allclose(a.total, b.total, rtol=1e-14)
+        np.testing.assert_allclose(a.total, a.kinetic + a.potential)
+    
+    def test_in_place_and_per_particle_gravity(self):
+        """Test in-place state updates with a gravity value per particle."""
+        height = np.full(4, 10.0)
+        velocity = np.zeros(4)
+        gravity = np.array([9.81, 1.62, 3.71, 0.0])
+        result = simulation.simulate([1, 2, 3, 4], height, velocity, gravity,
+                                     dt=0.1, steps=10, in_place=True)
+        self.assertIs(result.height, height)
+        np.testing.assert_allclose(velocity, -gravity)
+        self.assertEqual(height[3], 10.0)
+        with self.assertRaises(ValueError):
+            simulation.simulate(1.0, [1.0, 2.0], in_place=True)
+    
+    def test_invalid_inputs(self):
+        """Test unknown integrators, bad steps and negative masses are rejected."""
+        with self.assertRaises(ValueError):
+            simulation.simulate(1.0, self.heights, integrator="rk4")
+        with self.assertRaises(ValueError):
+            simulation.simulate(1.0, self.heights, steps=0)
+        with self.assertRaises(BatchValidationError):
+            simulation.simulate(-1.0, self.heights)
+    
+    def test_negative_initial_height(self):
+        """Test particles may start below the height reference level."""
+        result = simulation.simulate(2.0, [-5.0, 5.0], gravity=1.62, steps=10)
+        self.assertEqual(result.height.shape, (2,))
+        self.assertLess(result.height[0], -5.0)
+    
+    def test_cli_simulate(self):
+        """Test the simulate subcommand prints one drift row per integrator."""
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            code = main(["simulate", "--particles", "100", "--steps", "20",
+                         "--gravity", "Moon"])
+        self.assertEqual(code, 0)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertTrue(lines[-1].startswith("velocity-verlet"))
+
+
+if __name__ == "__main__":
+    unittest.main()
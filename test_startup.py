@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Start-up cost tests: the scalar path must not import the heavy backends
+"""
+
+import os
+import subprocess
+import sys
+import time
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# Modules only the subcommands that need them may import
+HEAVY_MODULES = ("numpy", "tkinter", "http.server", "multiprocessing", "asyncio", "socket",
+                 "argparse", "typing", "decimal", "fractions", "bodies")
+# Cumulative -X importtime of energy_calculator itself (about 0.8 ms measured)
+IMPORT_BUDGET_US = 5_000
+# Wall-clock cost of one scalar calculation from a cold interpreter, on top
+# of starting a bare interpreter
+COLD_START_OVERHEAD = 0.010
+RUNS = 5
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ)
+    # Let the first run write bytecode so later runs measure a cached import
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return subprocess.run([sys.executable, *args], cwd=HERE, env=env,
+                          capture_output=True, text=True, check=True)
+
+
+def loaded_modules(code: str) -> list:
+    """The HEAVY_MODULES present in sys.modules after running code."""
+    result = run_python("-c", f"{code}\nimport sys\n"
+                              f"print('loaded:' + ','.join(m for m in {HEAVY_MODULES!r} "
+                              f"if m in sys.modules))")
+    line = result.stdout.splitlines()[-1]
+    return [name for name in line[len("loaded:"):].split(",") if name]
+
+
+def best_times(*commands: tuple) -> list:
+    """Best wall-clock time of each command, with the runs interleaved."""
+    best = [float("inf")] * len(commands)
+    for _ in range(RUNS):
+        # Alternating keeps a burst of machine load from landing on one command
+        for i, args in enumerate(commands):
+            start = time.perf_counter()
+            run_python(*args)
+            best[i] = min(best[i], time.perf_counter() - start)
+    return best
+
+
+class TestStartup(unittest.TestCase):
+    """Tests for lazy loading and the scalar import budget."""
+
+    def test_import_is_light(self):
+        """Test importing the calculator loads none of the heavy modules."""
+        self.assertEqual(loaded_modules("import energy_calculator"), [])
+
+    def test_scalar_subcommand_is_light(self):
+        """Test a scalar calculation through main() stays on the light path."""
+        code = ("import energy_calculator\n"
+                "assert energy_calculator.main(['total', '10', '5', '3', '--gravity', '1.62']) == 0")
+        self.assertEqual(loaded_modules(code), [])
+
+    def test_daemon_client_is_light(self):
+        """Test the daemon client needs neither socket nor NumPy."""
+        code = ("import contextlib, io, energy_calculator\n"
+                "with contextlib.redirect_stderr(io.StringIO()):\n"
+                "    energy_calculator.main(['client', '--socket', 'missing.sock', "
+                "'total', '1', '2', '3'])")
+        self.assertEqual(loaded_modules(code), [])
+
+    def test_subcommands_load_their_backends(self):
+        """Test the lazy imports still happen when a subcommand needs them."""
+        code = ("import energy_calculator\n"
+                "energy_calculator.main(['potential', '1', '1', '--gravity', 'Moon'])")
+        self.assertEqual(loaded_modules(code), ["argparse", "typing", "bodies"])
+
+    def test_import_time_budget(self):
+        """Test -X importtime of the calculator stays within IMPORT_BUDGET_US."""
+        run_python("-c", "import energy_calculator")
+        best = float("inf")
+        for _ in range(RUNS):
+            stderr = run_python("-X", "importtime", "-c", "import energy_calculator").stderr
+            line = [line for line in stderr.splitlines() if line.endswith("| energy_calculator")][-1]
+            best = min(best, int(line.split("|")[1]))
+        self.assertLess(best, IMPORT_BUDGET_US)
+
+    def test_cold_start(self):
+        """Test one scalar calculation adds under 10 ms to interpreter start-up."""
+        command = ("-m", "energy_calculator", "total", "10", "5", "3")
+        run_python(*command)
+        bare, calculation = best_times(("-c", "pass"), command)
+        self.assertLess(calculation - bare, COLD_START_OVERHEAD)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Unit tests for lazy parameter sweeps
+"""
+
+import contextlib
+import io
+import itertools
+import json
+import os
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from energy_calculator import EnergyCalculator
+
+if np is not None:
+    import columnar
+    import sweep
+    from energy_calculator import main
+
+
+@unittest.skipIf(np is None, "NumPy is required for parameter sweeps")
+class TestSweep(unittest.TestCase):
+    """Tests for chunking, reducers and writers."""
+    
+    AXES = ([1, 2, 3], [0, 1, 2, 3, 4], [0, 10], [9.81, 1.62])
+    
+    def expected(self):
+        return [EnergyCalculator.total_mechanical_energy(*p)
+                for p in itertools.product(*self.AXES)]
+    
+    def test_chunks_cover_grid_in_order(self):
+        """Test every chunk size yields the full grid in C order within bounds."""
+        for chunk_size in (1, 3, 7, 10, 20, 59, 1000):
+            grid = sweep.Sweep(*self.AXES, chunk_size=chunk_size)
+            totals, position = [], 0
+            for chunk in grid.chunks():
+                self.assertLessEqual(chunk.size, chunk_size)
+                self.assertEqual(chunk.start, position)
+                position = chunk.stop
+                totals.extend(chunk.flat("total_energy").tolist())
+            self.assertEqual(position, grid.size)
+            np.testing.assert_allclose(totals, self.expected())
+    
+    def test_stats_and_histogram(self):
+        """Test reducers see every point and locate the extremes."""
+        grid = sweep.Sweep(*self.AXES, chunk_size=7)
+        stats, histogram = grid.run(sweep.SweepStats(), sweep.Histogram([0, 100, 1000]))
+        result = stats.result()
+        expected = self.expected()
+        self.assertEqual(result["count"], 60)
+        self.assertAlmostEqual(result["sum"], sum(expected))
+        self.assertEqual(result["max"], max(expected))
+        self.assertEqual(result["argmax"],
+                         {"mass": 3.0, "velocity": 4.0, "height": 10.0, "gravity": 9.81})
+        self.assertEqual(int(histogram.counts.sum()), 60)
+        self.assertEqual(grid.point(58), result["argmax"])
+    
+    def test_parse_axis(self):
+        """Test linspace, logspace, lists and body names."""
+        np.testing.assert_allclose(sweep.parse_axis("mass", "linspace:0:1:5"),
+                                   [0, 0.25, 0.5, 0.75, 1])
+        np.testing.assert_allclose(sweep.parse_axis("mass", "logspace:0:2:3"), [1, 10, 100])
+        np.testing.assert_allclose(sweep.parse_axis("gravity", "Moon, 2"), [1.62, 2])
+        self.assertEqual(len(sweep.parse_axis("gravity", "bodies")), 9)
+        with self.assertRaises(ValueError):
+            sweep.parse_axis("mass", "Moon")
+        with self.assertRaises(ValueError):
+            sweep.Sweep([1, -1], 1, 1)
+    
+    def test_write_columns(self):
+        """Test chunks stream into memory-mapped output columns."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "grid.manifest.json")
+            rows = sweep.write_columns(sweep.Sweep(*self.AXES, chunk_size=7), path,
+                                       fields=["mass", "total_energy"], dtype="float32")
+            result = columnar.ColumnSet.open(path)
+            self.assertEqual(rows, 60)
+            self.assertEqual(result["mass"].tolist(), [1.0] * 20 + [2.0] * 20 + [3.0] * 20)
+            np.testing.assert_allclose(result["total_energy"], self.expected(), rtol=1e-6)
+    
+    def test_cli_sweep(self):
+        """Test the sweep subcommand writes CSV rows and prints statistics."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "grid.csv")
+            err = io.StringIO()
+            with contextlib.redirect_stderr(err):
+                code = main(["sweep", "--mass", "1,2", "--velocity", "linspace:0:2:3",
+                             "--height", "5", "--gravity", "Earth,Moon", "--out", path])
+            self.assertEqual(code, 0)
+            with open(path) as f:
+                lines = f.read().splitlines()
+        self.assertEqual(len(lines), 13)
+        self.assertEqual(lines[0].split(",")[:4], ["mass", "velocity", "height", "gravity"])
+        stats = json.loads(err.getvalue().split("\n", 1)[1])
+        self.assertEqual(stats["count"], 12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the unit registry and unit-aware batches
+"""
+
+import io
+import json
+import os
+import tempfile
+import unittest
+from fractions import Fraction
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import batch_stream
+import units
+import web_api
+from energy_calculator import EnergyCalculator
+
+MAPPING = {"mass": "mass", "velocity": "velocity", "height": "height"}
+
+
+class TestRegistry(unittest.TestCase):
+    """Tests for unit lookup and single-value conversions."""
+
+    def test_lookup(self):
+        """Test aliases and case-folding resolve to the canonical unit."""
+        self.assertEqual(units.get("Pounds").name, "lb")
+        self.assertEqual(units.get("KWH").name, "kWh")
+        self.assertEqual(units.get("km/h").factor, Fraction(5, 18))
+        self.assertIn("BTU", units.names("energy"))
+        # Case only folds where it cannot change the unit
+        self.assertEqual(units.get("mJ").factor, Fraction(1, 1000))
+        self.assertEqual(units.get("MJ").factor, 10 ** 6)
+        with self.assertRaisesRegex(ValueError, "Ambiguous unit.*mJ or MJ"):
+            units.get("mj")
+        with self.assertRaisesRegex(ValueError, "Unknown unit"):
+            units.get("T")
+        self.assertEqual(units.get("TONNES").name, "t")
+        with self.assertRaisesRegex(ValueError, "Unknown unit"):
+            units.get("furlong")
+        with self.assertRaisesRegex(ValueError, "velocity needs a velocity unit"):
+            units.for_role("velocity", "lb")
+
+    def test_convert(self):
+        """Test conversions agree with the hand-written factors they replace."""
+        self.assertEqual(units.convert(468750.0, "J", "kJ"), 468750.0 / 1000)
+        self.assertEqual(units.convert(25, "m/s", "km/h"), 90.0)
+        self.assertEqual(units.convert(1, "mi", "ft"), 5280.0)
+        self.assertEqual(units.convert(1, "kWh", "J"), 3.6e6)
+        self.assertAlmostEqual(units.convert(1, "eV", "J"), 1.602176634e-19, delta=1e-34)
+        with self.assertRaisesRegex(ValueError, "Cannot convert"):
+            units.convert(1, "kg", "m")
+
+    def test_affine(self):
+        """Test temperature units apply their offset as well as their factor."""
+        self.assertEqual(units.convert(100, "degC", "degF"), 212.0)
+        self.assertEqual(units.convert(0, "degC", "K"), 273.15)
+        self.assertAlmostEqual(units.to_si_value(32, units.get("degF")), 273.15, places=12)
+
+    def test_exact_values(self):
+        """Test the exact precision modes convert with the exact factors."""
+        self.assertEqual(units.to_si_value(1, units.get("lb"), "fraction"),
+                         Fraction("0.45359237"))
+        self.assertEqual(units.from_si_value(Fraction(1), units.get("kJ"), "fraction"),
+                         Fraction(1, 1000))
+
+
+class TestSpecs(unittest.TestCase):
+    """Tests for column names and unit specifications."""
+
+    def test_split_name(self):
+        """Test a unit in brackets is split from the column name."""
+        self.assertEqual(units.split_name("mass [lb]"), ("mass", "lb"))
+        self.assertEqual(units.split_name("mass"), ("mass", None))
+
+    def test_parse_spec(self):
+        """Test energy expands to all results and errors name the problem."""
+        spec = units.parse_spec("mass=lb, energy=kJ")
+        self.assertEqual(spec["mass"].name, "lb")
+        self.assertEqual({spec[role].name for role in units.ENERGY_ROLES}, {"kJ"})
+        for bad in ("mass", "mass=mph", "colour=kg"):
+            with self.assertRaises(ValueError):
+                units.parse_spec(bad)
+
+    def test_merge_conflict(self):
+        """Test a declared unit cannot be silently overridden."""
+        declared = {"mass": units.get("lb")}
+        self.assertEqual(units.merge(declared, {"mass": units.get("pound")}), declared)
+        with self.assertRaisesRegex(ValueError, "declared as lb"):
+            units.merge(declared, {"mass": units.get("kg")})
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestColumns(unittest.TestCase):
+    """Tests for whole-column conversions in the batch pipelines."""
+
+    def test_in_place(self):
+        """Test columns convert in place with out= and SI passes through."""
+        values = np.array([1.0, 2.0])
+        result = units.to_si(np, values, units.get("lb"), out=values)
+        self.assertIs(result, values)
+        np.testing.assert_array_equal(values, [0.45359237, 0.90718474])
+        self.assertIs(units.to_si(np, values, units.get("kg")), values)
+        energy = np.array([1500.0, 2.5])
+        units.from_si(np, energy, units.get("kJ"), out=energy)
+        np.testing.assert_array_equal(energy, [1.5, 0.0025])
+
+    def test_stream_header_units(self):
+        """Test header units are converted and results labelled with theirs."""
+        source = "mass[lb],velocity,height[ft]\n10,20,30\n"
+        out = io.StringIO()
+        batch_stream.run_batch(io.StringIO(source), out, MAPPING,
+                               units={"velocity": "mph", "total_energy": "kJ"})
+        header, row = (line.split(",") for line in out.getvalue().splitlines())
+        self.assertEqual(header[:7], ["mass", "velocity", "height", "gravity",
+                                      "kinetic_energy", "potential_energy",
+                                      "total_energy[kJ]"])
+        si = [units.convert(10, "lb", "kg"), units.convert(20, "mph", "m/s"),
+              units.convert(30, "ft", "m")]
+        expected = EnergyCalculator.total_mechanical_energy(*si) / 1000
+        self.assertAlmostEqual(float(row[6]), expected, places=12)
+
+    def test_stream_jsonl_and_conflict(self):
+        """Test JSONL keys declare units and conflicting units are refused."""
+        source = '{"mass[g]": 500, "velocity": 2, "height": 0}\n'
+        out = io.StringIO()
+        batch_stream.run_batch(io.StringIO(source), out, MAPPING, in_format="jsonl",
+                               out_format="jsonl")
+        self.assertEqual(json.loads(out.getvalue())["kinetic_energy"], 1.0)
+        with self.assertRaisesRegex(ValueError, "declared as g"):
+            batch_stream.run_batch(io.StringIO(source), io.StringIO(), MAPPING,
+                                   in_format="jsonl", units={"mass": "kg"})
+
+    def test_columnar(self):
+        """Test manifest units are applied and recorded on the output columns."""
+        import columnar
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, values in (("mass", [2000.0]), ("velocity", [36.0]),
+                                 ("height", [100.0])):
+                np.array(values).tofile(os.path.join(tmp, f"in.{name}.f64"))
+            manifest = os.path.join(tmp, "in.manifest.json")
+            columnar.write_manifest(manifest, 1, {
+                "mass": {"file": "in.mass.f64", "dtype": "<f8", "unit": "g"},
+                "velocity": {"file": "in.velocity.f64", "dtype": "<f8"},
+                "height": {"file": "in.height.f64", "dtype": "<f8", "unit": "cm"},
+            })
+            out = os.path.join(tmp, "out.manifest.json")
+            columnar.run_columnar(manifest, out, MAPPING,
+                                  units={"velocity": "km/h", "kinetic_energy": "kJ"})
+            result = columnar.ColumnSet.open(out)
+            self.assertEqual(result.units, {"kinetic_energy": "kJ"})
+            self.assertAlmostEqual(float(result["kinetic_energy"][0]), 0.1)
+            self.assertAlmostEqual(float(result["potential_energy"][0]), 19.62)
+
+
+class TestWeb(unittest.TestCase):
+    """Tests for the <role>_unit request parameters."""
+
+    def test_unit_parameters(self):
+        """Test inputs and results are converted and cached per unit."""
+        cache = web_api.ResponseCache()
+        params = {"mass": "1000", "velocity": "36", "height": "0"}
+        _, body = web_api.handle_request(
+            "/api/total", {**params, "mass_unit": "g", "velocity_unit": "km/h",
+                           "energy_unit": "kJ"}, cache)
+        data = json.loads(body)
+        self.assertAlmostEqual(data["total_energy"], 0.05)
+        self.assertEqual(data["unit"], "kJ")
+        self.assertEqual(data["units"]["mass"], "g")
+        self.assertEqual(data["inputs"]["mass"], 1000.0)
+        _, body = web_api.handle_request("/api/total", params, cache)
+        self.assertEqual(json.loads(body)["total_energy"], 648000.0)
+        self.assertEqual(cache.stats()["entries"], 2)
+
+    def test_bad_units_and_bodies(self):
+        """Test wrong units give 400 and gravity_unit is ignored for bodies."""
+        status, _ = web_api.handle_request(
+            "/api/kinetic", {"mass": "1", "velocity": "1", "velocity_unit": "kg"})
+        self.assertEqual(status, 400)
+        _, body = web_api.handle_request(
+            "/api/potential", {"mass": "1", "height": "1", "gravity": "Moon",
+                               "gravity_unit": "ft/s^2"})
+        self.assertEqual(json.loads(body)["potential_energy"], 1.62)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Unit registry for calculator inputs and results
+
+Every unit stores the exact SI value of one unit (a Fraction) and, for
+affine units such as degrees Celsius, the SI value of its zero. Float
+factors are precomputed once, so converting a column is one vectorized
+multiply (plus one add for affine units) on arrays; SI units are passed
+through without touching the data at all.
+
+Units are tied to a quantity, and each calculator role to the quantity it
+accepts:
+
+    mass            kg, g, mg, t, lb, oz
+    velocity        m/s, km/h, mph, ft/s, knot
+    height          m, cm, mm, km, in, ft, yd, mi
+    gravity         m/s^2, ft/s^2, gal, g0
+    *_energy        J, mJ, kJ, MJ, Wh, kWh, cal, kcal, BTU, eV, ft*lbf
+
+Columns can declare their unit in their name, e.g. a CSV header
+``mass[lb]``, or through a specification such as
+``mass=lb,velocity=mph,energy=kJ`` (see parse_spec).
+"""
+
+import re
+from fractions import Fraction
+from typing import Dict, Iterable, List, NamedTuple, Tuple, Union
+
+# Calculator role -> quantity; "energy" stands for all three results
+ROLE_QUANTITIES = {
+    "mass": "mass",
+    "velocity": "velocity",
+    "height": "length",
+    "gravity": "acceleration",
+    "kinetic_energy": "energy",
+    "potential_energy": "energy",
+    "total_energy": "energy",
+}
+ENERGY_ROLES = ("kinetic_energy", "potential_energy", "total_energy")
+SI_UNITS = {"mass": "kg", "velocity": "m/s", "length": "m",
+            "acceleration": "m/s^2", "energy": "J", "temperature": "K"}
+
+_NAME_WITH_UNIT = re.compile(r"^\s*(?P<name>.*?)\s*\[(?P<unit>[^\[\]]+)\]\s*$")
+
+
+class Unit(NamedTuple):
+    """A unit: SI value = value * factor + offset."""
+    name: str
+    quantity: str
+    factor: Fraction
+    offset: Fraction
+    # Float copies of factor and offset, precomputed for array conversions
+    scale: float
+    shift: float
+
+    @property
+    def is_si(self) -> bool:
+        """True when conversion is the identity."""
+        return self.factor == 1 and self.offset == 0
+
+
+_units: Dict[str, Unit] = {}
+# Name or alias as registered -> canonical name
+_lookup: Dict[str, str] = {}
+# Case-folded name or alias -> canonical names it could stand for
+_folded: Dict[str, List[str]] = {}
+
+
+def register(name: str, quantity: str, factor, offset=0,
+             aliases: Iterable[str] = ()) -> Unit:
+    """
+    Add a unit to the registry.
+
+    Args:
+        name: Canonical unit name, e.g. "km/h"
+        quantity: Quantity measured, e.g. "velocity"
+        factor: SI value of one unit; an exact string or Fraction keeps
+            the exact modes exact ("0.45359237", Fraction(1000, 3600))
+        offset: SI value of the unit's zero for affine units
+        aliases: Other accepted spellings
+
+    Returns:
+        The registered Unit
+    """
+    factor, offset = Fraction(factor), Fraction(offset)
+    if factor <= 0:
+        raise ValueError(f"Unit factor must be positive: {name!r}")
+    unit = Unit(name, quantity, factor, offset, float(factor), float(offset))
+    _units[name] = unit
+    for spelling in (name, *aliases):
+        _lookup[spelling] = name
+        folded = _folded.setdefault(spelling.casefold(), [])
+        if name not in folded:
+            folded.append(name)
+    return unit
+
+
+def get(name: Union[str, Unit]) -> Unit:
+    """
+    Look up a unit by name or alias.
+
+    Spellings are matched exactly first. Otherwise case is ignored when
+    that is unambiguous: a spelling that folds onto several units ("mj":
+    mJ or MJ) or a one-letter symbol ("T" is not t) must match exactly.
+
+    Raises:
+        ValueError: If the unit is unknown or ambiguous
+    """
+    if isinstance(name, Unit):
+        return name
+    if not isinstance(name, str):
+        raise ValueError(f"Unknown unit: {name!r}")
+    spelling = name.strip()
+    canonical = _lookup.get(spelling)
+    if canonical is None and len(spelling) > 1:
+        candidates = _folded.get(spelling.casefold(), [])
+        if len(candidates) > 1:
+            raise ValueError(f"Ambiguous unit: {name!r} (case matters: "
+                             f"{' or '.join(candidates)})")
+        canonical = candidates[0] if candidates else None
+    if canonical is None:
+        raise ValueError(f"Unknown unit: {name!r}")
+    return _units[canonical]
+
+
+def for_role(role: str, name: Union[str, Unit]) -> Unit:
+    """
+    Look up a unit and check it measures what a calculator role needs.
+
+    Raises:
+        ValueError: For unknown roles or units, or a unit of the wrong
+            quantity (e.g. lb for velocity)
+    """
+    if role not in ROLE_QUANTITIES:
+        raise ValueError(f"No unit can be given for {role!r}")
+    unit = get(name)
+    expected = ROLE_QUANTITIES[role]
+    if unit.quantity != expected:
+        raise ValueError(f"{unit.name} is a {unit.quantity} unit; "
+                         f"{role} needs a {expected} unit")
+    return unit
+
+
+def names(quantity: Union[str, None] = None) -> List[str]:
+    """Canonical unit names, optionally only those of one quantity."""
+    return [name for name, unit in _units.items()
+            if quantity is None or unit.quantity == quantity]
+
+
+def split_name(column: str) -> Tuple[str, Union[str, None]]:
+    """Split a column name with a declared unit: "mass[lb]" -> ("mass", "lb")."""
+    match = _NAME_WITH_UNIT.match(column)
+    if match is None:
+        return column, None
+    return match["name"], match["unit"].strip()
+
+
+def parse_spec(spec: str) -> Dict[str, Unit]:
+    """
+    Parse a unit specification such as "mass=lb,velocity=mph,energy=kJ".
+
+    "energy" sets the unit of all three results; a single result can be
+    set with its own name (e.g. "kinetic_energy=eV").
+
+    Returns:
+        Dict mapping role to Unit; SI units are kept so that merge() can
+        report a conflict with a unit declared in the input
+
+    Raises:
+        ValueError: If an entry is malformed, unknown or of the wrong
+            quantity
+    """
+    result = {}
+    for part in (p.strip() for p in spec.split(",") if p.strip()):
+        role, sep, name = part.partition("=")
+        role = role.strip()
+        if not sep:
+            raise ValueError(f"Invalid unit declaration: {part!r} (expected role=unit)")
+        for target in (ENERGY_ROLES if role == "energy" else (role,)):
+            result[target] = for_role(target, name)
+    return result
+
+
+def merge(declared: Dict[str, Unit], explicit: Dict[str, Unit]) -> Dict[str, Unit]:
+    """
+    Combine units declared in column names with units given explicitly.
+
+    Raises:
+        ValueError: If both give a role different units
+    """
+    merged = dict(declared)
+    for role, unit in explicit.items():
+        if role in merged and merged[role] != unit:
+            raise ValueError(f"{role} is declared as {merged[role].name} in the "
+                             f"input but given as {unit.name}")
+        merged[role] = unit
+    return {role: unit for role, unit in merged.items() if not unit.is_si}
+
+
+def _exact(value, mode: str):
+    import precision
+    return precision.convert(value, mode)
+
+
+def to_si_value(value, unit: Unit, mode: Union[str, None] = None):
+    """
+    Convert one value to SI.
+
+    Args:
+        value: Value in the unit
+        unit: Source unit
+        mode: Optional precision mode; the exact modes convert with the
+            exact factor
+    """
+    if unit.is_si:
+        return value
+    if mode in ("fraction", "decimal"):
+        import precision
+        with precision.context(mode):
+            return (_exact(value, mode) * _exact(unit.factor, mode)
+                    + _exact(unit.offset, mode))
+    return value * unit.scale + unit.shift
+
+
+def from_si_value(value, unit: Unit, mode: Union[str, None] = None):
+    """Convert one SI value to a unit (see to_si_value)."""
+    if unit.is_si:
+        return value
+    if mode in ("fraction", "decimal"):
+        import precision
+        with precision.context(mode):
+            return ((_exact(value, mode) - _exact(unit.offset, mode))
+                    / _exact(unit.factor, mode))
+    return (value - unit.shift) / unit.scale
+
+
+def convert(value: float, source: Union[str, Unit], target: Union[str, Unit]) -> float:
+    """
+    Convert a single value between two units of the same quantity.
+
+    Raises:
+        ValueError: If the units are unknown or measure different quantities
+    """
+    source, target = get(source), get(target)
+    if source.quantity != target.quantity:
+        raise ValueError(f"Cannot convert {source.name} ({source.quantity}) to "
+                         f"{target.name} ({target.quantity})")
+    if source == target:
+        return value
+    # Exact arithmetic on the float's value, rounded once at the end
+    exact = (Fraction(value) * source.factor + source.offset - target.offset) / target.factor
+    return float(exact)
+
+
+def _object_mode(values, mode: Union[str, None]) -> str:
+    """Precision mode of an object array: given, else from its elements."""
+    if mode in ("fraction", "decimal"):
+        return mode
+    from decimal import Decimal
+    first = values.flat[0] if values.size else None
+    return "decimal" if isinstance(first, Decimal) else "fraction"
+
+
+def to_si(np, values, unit: Unit, out=None, mode: Union[str, None] = None):
+    """
+    Convert a column to SI with one whole-array multiply (and add).
+
+    Args:
+        np: The NumPy module
+        values: NumPy array in the unit
+        unit: Source unit
+        out: Optional output array; pass values itself to convert in place
+        mode: Precision mode of object arrays ("fraction" or "decimal")
+
+    Returns:
+        The converted array (values itself for SI units)
+    """
+    if unit.is_si:
+        return values
+    if values.dtype == object:
+        import precision
+        mode = _object_mode(values, mode)
+        with precision.context(mode):
+            result = np.multiply(values, _exact(unit.factor, mode), out=out)
+            if unit.offset:
+                result += _exact(unit.offset, mode)
+        return result
+    result = np.multiply(values, unit.scale, out=out)
+    if unit.shift:
+        result += unit.shift
+    return result
+
+
+def from_si(np, values, unit: Unit, out=None, mode: Union[str, None] = None):
+    """
+    Convert an SI column to a unit with one whole-array divide (and subtract).
+
+    Dividing by the factor keeps results such as J -> kJ identical to
+    value / 1000. See to_si for the arguments.
+    """
+    if unit.is_si:
+        return values
+    if values.dtype == object:
+        import precision
+        mode = _object_mode(values, mode)
+        with precision.context(mode):
+            result = values
+            if unit.offset:
+                result = np.subtract(result, _exact(unit.offset, mode), out=out)
+                out = result
+            return np.divide(result, _exact(unit.factor, mode), out=out)
+    result = values
+    if unit.shift:
+        result = np.subtract(result, unit.shift, out=out)
+        out = result
+    return np.divide(result, unit.scale, out=out)
+
+
+# International yard and pound; IT calorie and BTU; CODATA 2018 electronvolt
+_FOOT = Fraction("0.3048")
+_POUND = Fraction("0.45359237")
+_STANDARD_GRAVITY = Fraction("9.80665")
+
+for _args in [
+    ("kg", "mass", 1, 0, ("kilogram", "kilograms")),
+    ("g", "mass", "0.001", 0, ("gram", "grams")),
+    ("mg", "mass", "0.000001", 0, ()),
+    ("t", "mass", 1000, 0, ("tonne", "tonnes")),
+    ("lb", "mass", _POUND, 0, ("lbs", "pound", "pounds")),
+    ("oz", "mass", _POUND / 16, 0, ("ounce", "ounces")),
+
+    ("m/s", "velocity", 1, 0, ("mps",)),
+    ("km/h", "velocity", Fraction(1000, 3600), 0, ("kmh", "kph")),
+    ("mph", "velocity", 5280 * _FOOT / 3600, 0, ("mi/h",)),
+    ("ft/s", "velocity", _FOOT, 0, ("fps",)),
+    ("knot", "velocity", Fraction(1852, 3600), 0, ("knots", "kn", "kt")),
+
+    ("m", "length", 1, 0, ("meter", "meters", "metre", "metres")),
+    ("cm", "length", "0.01", 0, ()),
+    ("mm", "length", "0.001", 0, ()),
+    ("km", "length", 1000, 0, ()),
+    ("in", "length", _FOOT / 12, 0, ("inch", "inches")),
+    ("ft", "length", _FOOT, 0, ("foot", "feet")),
+    ("yd", "length", 3 * _FOOT, 0, ("yard", "yards")),
+    ("mi", "length", 5280 * _FOOT, 0, ("mile", "miles")),
+
+    ("m/s^2", "acceleration", 1, 0, ("m/s2", "m/s**2")),
+    ("ft/s^2", "acceleration", _FOOT, 0, ("ft/s2", "ft/s**2")),
+    ("gal", "acceleration", "0.01", 0, ("galileo", "cm/s^2")),
+    ("g0", "acceleration", _STANDARD_GRAVITY, 0, ("gn",)),
+
+    ("J", "energy", 1, 0, ("joule", "joules")),
+    ("mJ", "energy", "0.001", 0, ("millijoule", "millijoules")),
+    ("kJ", "energy", 1000, 0, ()),
+    ("MJ", "energy", 10 ** 6, 0, ()),
+    ("Wh", "energy", 3600, 0, ()),
+    ("kWh", "energy", 3_600_000, 0, ()),
+    ("cal", "energy", "4.1868", 0, ("calorie", "calories")),
+    ("kcal", "energy", "4186.8", 0, ()),
+    ("BTU", "energy", "1055.05585262", 0, ("btu_it",)),
+    ("eV", "energy", "1.602176634e-19", 0, ("electronvolt",)),
+    ("ft*lbf", "energy", _FOOT * _POUND * _STANDARD_GRAVITY, 0, ("ft-lbf", "ft.lbf")),
+
+    # Affine units: not used by the calculator roles, available to callers
+    ("K", "temperature", 1, 0, ("kelvin",)),
+    ("degC", "temperature", 1, "273.15", ("°C", "celsius")),
+    ("degF", "temperature", Fraction(5, 9), Fraction("273.15") - Fraction(160, 9),
+     ("°F", "fahrenheit")),
+]:
+    register(_args[0], _args[1], _args[2], _args[3], _args[4])
+del _args
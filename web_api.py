@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+JSON compute API for the Energy Calculator web server
+
+Transport-independent request handling shared by the HTTP servers: maps
+an endpoint path plus query/JSON parameters onto EnergyCalculator and
+returns a status code with an encoded JSON body.
+
+Endpoints (GET with a query string, or POST with a JSON object):
+    /api/kinetic     mass, velocity
+    /api/potential   mass, height[, gravity]
+    /api/total       mass, velocity, height[, gravity]
+    /api/bodies      celestial body registry
+    /api/formulas    registered formulas (see formulas.py)
+    /api/formula/NAME evaluate a registered formula; one parameter per
+                     variable, variables with a default may be omitted
+    /api/cache-stats response cache counters
+
+Gravity may be a number or a body name from the registry (e.g. Moon).
+The energy endpoints also accept precision=float32|float64|fraction|decimal
+(see precision.py); exact results are returned as strings such as "9/2".
+Inputs and results may be given in other units (see units.py) with
+<role>_unit parameters, e.g. mass_unit=lb, velocity_unit=mph and
+energy_unit=kJ for all results; gravity_unit is ignored when gravity is
+a body name.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple, Union
+from urllib.parse import parse_qsl
+
+import bodies
+import formulas
+import precision as precision_modes
+import units as unit_registry
+from energy_calculator import EnergyCalculator
+
+API_PREFIX = "/api/"
+JSON_CONTENT_TYPE = "application/json"
+CACHE_STATS_ENDPOINT = "cache-stats"
+BODIES_ENDPOINT = "bodies"
+FORMULAS_ENDPOINT = "formulas"
+FORMULA_PREFIX = "formula/"
+PRECISION_PARAM = "precision"
+UNIT_SUFFIX = "_unit"
+DEFAULT_CACHE_SIZE = 4096
+DEFAULT_CACHE_TTL = 300.0
+
+# Endpoint name -> (required parameters, optional parameters with defaults)
+ENDPOINTS = {
+    "kinetic": (("mass", "velocity"), {}),
+    "potential": (("mass", "height"), {"gravity": EnergyCalculator.GRAVITY}),
+    "total": (("mass", "velocity", "height"), {"gravity": EnergyCalculator.GRAVITY}),
+}
+# Endpoint name -> result fields, the roles set by energy_unit
+ENDPOINT_RESULTS = {
+    "kinetic": ("kinetic_energy",),
+    "potential": ("potential_energy",),
+    "total": ("kinetic_energy", "potential_energy", "total_energy"),
+}
+
+
+class ApiError(Exception):
+    """An API failure carrying the HTTP status code to respond with."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def is_api_path(path: str) -> bool:
+    """True if the request path (without query) targets the compute API."""
+    return path.startswith(API_PREFIX)
+
+
+def parse_query(query: str) -> Dict[str, str]:
+    """Parse a URL query string into a dict, keeping the last value of a key."""
+    return dict(parse_qsl(query, keep_blank_values=True))
+
+
+def parse_json(body: bytes):
+    """
+    Decode a JSON request body of any type (an empty body is {}).
+
+    Raises:
+        ApiError: 400 if the body is not valid JSON
+    """
+    try:
+        return json.loads(body or b"{}")
+    except (UnicodeDecodeError, ValueError):
+        raise ApiError(400, "Request body is not valid JSON") from None
+
+
+def parse_json_body(body: bytes) -> dict:
+    """
+    Decode a JSON request body that must hold an object.
+
+    Raises:
+        ApiError: 400 if the body is not a JSON object
+    """
+    data = parse_json(body)
+    if not isinstance(data, dict):
+        raise ApiError(400, "Request body must be a JSON object")
+    return data
+
+
+def parse_number(name: str, value) -> float:
+    """
+    Convert a request parameter to a finite float.
+
+    Raises:
+        ApiError: 400 if the value is not a finite number
+    """
+    if isinstance(value, bool):
+        raise ApiError(400, f"Parameter {name!r} must be a number")
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"Parameter {name!r} must be a number") from None
+    if number != number or number in (float("inf"), float("-inf")):
+        raise ApiError(400, f"Parameter {name!r} must be finite")
+    return number
+
+
+def parse_gravity(value) -> float:
+    """Convert a gravity parameter, accepting body names like "Earth"."""
+    if bodies.is_body(value):
+        return bodies.get_body(value).gravity
+    return parse_number("gravity", value)
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache of encoded API responses with a TTL.
+
+    Keys are canonical (endpoint, parsed float inputs) tuples, so requests
+    that spell the same numbers differently share an entry.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE,
+                 ttl: float = DEFAULT_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Return the cached (status, body) for a key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, response = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return response
+
+    def put(self, key, response) -> None:
+        """Store a (status, body) response, evicting the oldest if full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Counters and occupancy of the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"entries": len(self._entries), "max_entries": self.max_entries,
+                    "ttl": self.ttl, "hits": self.hits, "misses": self.misses,
+                    "evictions": self.evictions, "expirations": self.expirations,
+                    "hit_ratio": self.hits / lookups if lookups else 0.0}
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def resolve_params(endpoint: str, params: dict) -> Dict[str, float]:
+    """
+    Validate and convert the parameters of an endpoint.
+
+    Args:
+        endpoint: Endpoint name ("kinetic", "potential" or "total")
+        params: Raw parameters from the query string or JSON body
+
+    Returns:
+        Dict of float parameters with defaults filled in
+
+    Raises:
+        ApiError: 404 for unknown endpoints, 400 for missing or non-numeric
+            parameters
+    """
+    if endpoint not in ENDPOINTS:
+        raise ApiError(404, f"Unknown endpoint: {API_PREFIX}{endpoint}")
+    required, optional = ENDPOINTS[endpoint]
+    values = {}
+    for name in required:
+        if name not in params or params[name] in ("", None):
+            raise ApiError(400, f"Missing parameter {name!r}")
+        values[name] = parse_number(name, params[name])
+    for name, default in optional.items():
+        raw = params.get(name)
+        if raw in ("", None):
+            values[name] = default
+        elif name == "gravity":
+            values[name] = parse_gravity(raw)
+        else:
+            values[name] = parse_number(name, raw)
+    return values
+
+
+def resolve_precision(params: dict) -> Union[str, None]:
+    """
+    Read the optional precision mode of a request (None for float64).
+
+    Raises:
+        ApiError: 400 for an unknown mode
+    """
+    mode = params.get(PRECISION_PARAM)
+    if mode in ("", None, precision_modes.FLOAT64):
+        return None
+    if mode not in precision_modes.MODES:
+        raise ApiError(400, f"Unknown precision mode: {mode!r}")
+    return mode
+
+
+def resolve_units(endpoint: str, params: dict) -> Dict[str, unit_registry.Unit]:
+    """
+    Read the optional <role>_unit parameters of an energy endpoint.
+
+    Returns:
+        Dict mapping role to Unit, without SI units; "energy_unit" sets
+        every result of the endpoint
+
+    Raises:
+        ApiError: 400 for unknown units or units of the wrong quantity
+    """
+    required, optional = ENDPOINTS[endpoint]
+    roles = {role: role for role in (*required, *optional)}
+    roles["energy"] = ENDPOINT_RESULTS[endpoint]
+    units = {}
+    for param, targets in roles.items():
+        name = params.get(param + UNIT_SUFFIX)
+        if name in ("", None):
+            continue
+        if param == "gravity" and bodies.is_body(params.get("gravity")):
+            continue
+        try:
+            for role in (targets,) if isinstance(targets, str) else targets:
+                units[role] = unit_registry.for_role(role, name)
+        except ValueError as e:
+            raise ApiError(400, f"Parameter {param + UNIT_SUFFIX!r}: {e}") from None
+    return {role: unit for role, unit in units.items() if not unit.is_si}
+
+
+def resolve_formula_params(kernel: formulas.Kernel, params: dict) -> Dict[str, float]:
+    """
+    Validate and convert the parameters of a formula, filling in defaults.
+
+    Raises:
+        ApiError: 400 for missing or non-numeric parameters
+    """
+    values = {}
+    for variable in kernel.variables:
+        raw = params.get(variable.name)
+        if raw in ("", None):
+            if variable.default is None:
+                raise ApiError(400, f"Missing parameter {variable.name!r}")
+            values[variable.name] = variable.default
+        else:
+            values[variable.name] = parse_number(variable.name, raw)
+    return values
+
+
+def compute(endpoint: str, values: Dict[str, float],
+            precision: Union[str, None] = None,
+            units: Union[Dict[str, unit_registry.Unit], None] = None) -> dict:
+    """
+    Run the calculation for an endpoint and build the response object.
+
+    Args:
+        endpoint: Endpoint name
+        values: Parameters from resolve_params
+        precision: Optional precision mode; float64 when None
+        units: Optional role -> Unit from resolve_units; inputs are
+            converted to SI and results back to their units
+
+    Raises:
+        ApiError: 400 if EnergyCalculator rejects the inputs
+    """
+    units = units or {}
+    si = {name: unit_registry.to_si_value(value, units[name], precision)
+          if name in units else value for name, value in values.items()}
+    try:
+        if endpoint == "kinetic":
+            result = {"kinetic_energy": EnergyCalculator.kinetic_energy(
+                si["mass"], si["velocity"], precision)}
+        elif endpoint == "potential":
+            result = {"potential_energy": EnergyCalculator.potential_energy(
+                si["mass"], si["height"], si["gravity"], precision)}
+        else:
+            ke = EnergyCalculator.kinetic_energy(si["mass"], si["velocity"], precision)
+            pe = EnergyCalculator.potential_energy(
+                si["mass"], si["height"], si["gravity"], precision)
+            total = ke + pe if precision is None else precision_modes.add(ke, pe, precision)
+            result = {"kinetic_energy": ke, "potential_energy": pe,
+                      "total_energy": total}
+    except ValueError as e:
+        raise ApiError(400, str(e)) from None
+    response = {"inputs": values}
+    for name, value in result.items():
+        if name in units:
+            value = unit_registry.from_si_value(value, units[name], precision)
+        response[name] = value if precision is None else precision_modes.to_json(value)
+    energy_unit = units.get(ENDPOINT_RESULTS[endpoint][0])
+    response["unit"] = energy_unit.name if energy_unit else "J"
+    if units:
+        response["units"] = {role: unit.name for role, unit in units.items()}
+    if precision is not None:
+        response["precision"] = precision
+    return response
+
+
+def compute_formula(kernel: formulas.Kernel, values: Dict[str, float]) -> dict:
+    """
+    Evaluate a formula with its scalar kernel and build the response object.
+
+    Raises:
+        ApiError: 400 if a value is outside the formula's domain
+    """
+    try:
+        result = kernel.scalar(**values)
+    except ValueError as e:
+        raise ApiError(400, str(e)) from None
+    return {"inputs": values, "formula": kernel.name, "result": result, "unit": kernel.unit}
+
+
+def encode(payload: dict) -> bytes:
+    """Serialize a response object as compact UTF-8 JSON."""
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def handle_request(path: str, params: dict,
+                   cache: Union[ResponseCache, None] = None) -> Tuple[int, bytes]:
+    """
+    Handle one API request end to end.
+
+    Args:
+        path: Request path without the query string, e.g. "/api/total"
+        params: Raw parameters from the query string or JSON body
+        cache: Optional ResponseCache consulted before computing
+
+    Returns:
+        (HTTP status code, JSON response body)
+    """
+    endpoint = path[len(API_PREFIX):].strip("/")
+    if endpoint == CACHE_STATS_ENDPOINT:
+        return 200, encode(cache.stats() if cache is not None else {"enabled": False})
+    if endpoint == BODIES_ENDPOINT:
+        return 200, encode({"bodies": bodies.as_dicts()})
+    if endpoint == FORMULAS_ENDPOINT:
+        return 200, encode({"formulas": formulas.as_dicts()})
+    try:
+        precision = resolve_precision(params)
+        if endpoint.startswith(FORMULA_PREFIX):
+            if precision is not None:
+                raise ApiError(400, "Formulas are evaluated in float64 only")
+            name = endpoint[len(FORMULA_PREFIX):]
+            try:
+                kernel = formulas.get(name)
+            except ValueError:
+                raise ApiError(404, f"Unknown formula: {name!r}") from None
+            values = resolve_formula_params(kernel, params)
+        else:
+            kernel = None
+            values = resolve_params(endpoint, params)
+            units = resolve_units(endpoint, params)
+    except ApiError as e:
+        return e.status, encode({"error": e.message})
+
+    key = None
+    if cache is not None:
+        if kernel is None:
+            identity = tuple((role, unit.name) for role, unit in units.items())
+        else:
+            # Kernels are compiled once per definition, so the kernel itself
+            # tells a formula re-registered with replace=True from the old one
+            identity = (kernel,)
+        key = (endpoint, precision, *values.values(), *identity)
+        response = cache.get(key)
+        if response is not None:
+            return response
+    try:
+        if kernel is None:
+            response = 200, encode(compute(endpoint, values, precision, units))
+        else:
+            response = 200, encode(compute_formula(kernel, values))
+    except ApiError as e:
+        response = e.status, encode({"error": e.message})
+    if key is not None:
+        cache.put(key, response)
+    return response